@@ -285,6 +285,13 @@ class OrderServiceAdapter:
 
 # -------------------------------- Composition ----------------------------------
 
+# MARKET_DATA_SOURCE → модуль, з якого MarketDataAdapter бере провайдера
+_MD_MODULES = {
+    "rest": "app.services.market_data",
+    "ws": "app.services.market_stream",
+}
+
+
 def compose_trader_app(cfg: Optional[Union[AppConfig, Dict[str, Any], Any]] = None):
     app_cfg = cfg if isinstance(cfg, AppConfig) else _coerce_to_appconfig(cfg)
     log = _ensure_logging(app_cfg)
@@ -299,8 +306,15 @@ def compose_trader_app(cfg: Optional[Union[AppConfig, Dict[str, Any], Any]] = No
     })
 
     # 2) Wire adapters
-    setattr(trader_app, "md", MarketDataAdapter(cfg=cfg or app_cfg, symbol=app_cfg.symbol, logger=logging.getLogger("MarketData")))
-    log.info("Wired MarketDataAdapter -> trader_app.md")
+    md_source = str(os.environ.get("MARKET_DATA_SOURCE", "rest")).strip().lower()
+    md_module = _MD_MODULES.get(md_source, _MD_MODULES["rest"])
+    md = MarketDataAdapter(module_name=md_module, cfg=cfg or app_cfg, symbol=app_cfg.symbol, logger=logging.getLogger("MarketData"))
+    # REST: кеш до закриття бару + single-flight (WS-провайдер і так тримає бари в пам'яті)
+    if md_source != "ws" and str(os.environ.get("MD_CACHE", "1")).strip() != "0":
+        CachedMarketData = getattr(_import_module("app.services.market_cache"), "CachedMarketData")
+        md = CachedMarketData(md, logger=logging.getLogger("MarketCache"))
+    setattr(trader_app, "md", md)
+    log.info("Wired %s(%s) -> trader_app.md", type(md).__name__, md_module)
 
     setattr(trader_app, "exe", OrderServiceAdapter(cfg=cfg or app_cfg, symbol=app_cfg.symbol, logger=logging.getLogger("OrderService")))
     log.info("Wired OrderServiceAdapter -> trader_app.exe")
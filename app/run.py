@@ -40,8 +40,10 @@ class TraderApp:
         self.risk = None # expects can_open(decision) -> (ok, reason)
         self.exe = None  # expects place(symbol, side, otype, wallet_usdt, **kwargs)
         self.tel = None  # optional snapshot/decision/health
+        self.exit = None  # optional ExitManager (bootstrap): track(...) після входу, intrabar(symbol, price)
 
-    def run_once(self) -> None:
+    def run_once(self, closed_only: bool = False) -> None:
+        """closed_only: рішення лише по закритих барах (незакритий останній бар відкидається)."""
         df = None
         if getattr(self, "md", None) and hasattr(self.md, "get_klines"):
             try:
@@ -49,6 +51,8 @@ class TraderApp:
             except Exception as e:
                 self.log.exception("md.get_klines failed: %s", e)
                 df = None
+        if closed_only and df is not None:
+            df = _closed_bars(df, time.time())
 
         if getattr(self, "tel", None) and hasattr(self.tel, "snapshot") and df is not None:
             try:
@@ -113,6 +117,8 @@ class TraderApp:
                 res = self.exe.place(self.symbol, side, otype, wallet_usdt, **kwargs)
                 if isinstance(res, dict):
                     self.log.info("execution: submitted=%s reason=%s", res.get("submitted"), res.get("reason"))
+                    if res.get("submitted") and hasattr(getattr(self, "exit", None), "track"):
+                        self.exit.track(self.symbol, side, decision.get("sl"), decision.get("tp"))
                 else:
                     self.log.info("execution: done (non-dict response)")
             except Exception as e:
@@ -132,6 +138,52 @@ class TraderApp:
         if oneshot:
             self.run_once()
             return
+        if os.environ.get("BAR_CLOCK", "1") == "0":
+            self._poll_loop()
+            return
+        from app.services.bar_clock import BarClock
+        try:
+            # без exit між закриттями робити нічого — спимо прямо до close_time
+            clock = BarClock.from_env([(self.symbol, self.interval)],
+                                      **({} if self.exit is not None else {"intrabar_sec": None}))
+        except ValueError as e:
+            self.log.warning("bar clock unavailable (%s) — polling every LOOP_SLEEP_SEC", e)
+            self._poll_loop()
+            return
+        self._bar_loop(clock)
+
+    def _bar_loop(self, clock: Any) -> None:
+        """Рішення раз на закритий бар; між закриттями — лише on_intrabar()."""
+        i = 0
+        try:
+            self._decide_closed()  # останній закритий бар на старті ще не оброблений
+            while True:
+                if clock.wait():
+                    i += 1
+                    nxt = time.gmtime(clock.next_close(self.symbol, self.interval))
+                    self.log.info("Bar close #%d; next close %s UTC", i, time.strftime("%H:%M:%S", nxt))
+                    self._decide_closed()
+                else:
+                    self.on_intrabar()
+        except KeyboardInterrupt:
+            self.log.info("TraderApp shutdown requested.")
+
+    def _decide_closed(self) -> None:
+        """
+        run_once по закритих барах. Кеш klines (CachedMarketData) скидається перед рішенням: його
+        close_grace не пов'язаний з BAR_CLOSE_GRACE_SEC, і кадр, скачаний до закриття, інакше
+        віддався б з незакритим баром, чий close_time уже минув.
+        """
+        invalidate = getattr(self.md, "invalidate", None)
+        if callable(invalidate):
+            try:
+                invalidate(self.symbol)
+            except Exception as e:
+                self.log.warning("md.invalidate failed: %s", e)
+        self.run_once(closed_only=True)
+
+    def _poll_loop(self) -> None:
+        """Старий режим (BAR_CLOCK=0): повний цикл кожні LOOP_SLEEP_SEC."""
         i = 0
         try:
             while True:
@@ -143,6 +195,42 @@ class TraderApp:
         except KeyboardInterrupt:
             self.log.info("TraderApp shutdown requested.")
 
+    def on_intrabar(self) -> None:
+        """Легкий хук між закриттями барів: ціна + exit.intrabar(symbol, price), без стратегії і klines."""
+        exit_mgr = getattr(self, "exit", None)
+        if exit_mgr is None or not hasattr(exit_mgr, "intrabar"):
+            return
+        price = None
+        if getattr(self, "md", None) and hasattr(self.md, "get_latest_price"):
+            try:
+                price = float(self.md.get_latest_price(self.symbol))
+            except Exception as e:
+                self.log.warning("md.get_latest_price failed: %s", e)
+                return
+        try:
+            exit_mgr.intrabar(self.symbol, price)
+        except Exception as e:
+            self.log.exception("exit.intrabar failed: %s", e)
+
+def _closed_bars(df: Any, now: float) -> Any:
+    """
+    Відкидає рядки з close_time після now (бар, що відкрився щойно після закриття).
+    close_time — datetime (HttpMarketData/MarketStream) або epoch ms; кадр без close_time — як є.
+    """
+    import pandas as pd
+
+    if not hasattr(df, "columns") or "close_time" not in df.columns or len(df) == 0:
+        return df
+    ct = df["close_time"]
+    if pd.api.types.is_datetime64_any_dtype(ct.dtype):
+        cut = pd.Timestamp(now, unit="s", tz="UTC")
+        closed = ct <= (cut if getattr(ct.dtype, "tz", None) is not None else cut.tz_localize(None))
+    else:
+        closed = pd.to_numeric(ct, errors="coerce") <= now * 1000.0
+    if bool(closed.all()):
+        return df
+    return df[closed.to_numpy()].reset_index(drop=True)
+
 def _try_get_main() -> Optional[Callable[..., None]]:
     candidates = [
         ("app.entrypoint", "main"),
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Інкрементальна агрегація старших таймфреймів (3m/5m/15m/1h/4h) з одного базового стріму (1m).
+
+Призначення:
+  - Кожен апдейт базового бару (закритого чи in-progress) оновлює поточний бар кожного старшого
+    таймфрейму за O(1): закрита частина кошика накопичується один раз, in-progress бар
+    накладається поверх неї, а не перераховується з усіх хвилин.
+  - Закриття старшого бару (закрилась остання хвилина кошика) повертається з update(),
+    щоб провайдер міг розіслати його слухачам.
+  - Історія старших барів — кільцевий буфер на (symbol, interval); холодний старт/ресинк
+    засіваються з REST один раз (seed), далі — лише з базового стріму.
+
+Кошики вирівняні по epoch UTC (як у Binance для інтервалів ≤ 1d); 1w/1M не підтримуються.
+
+Публічний API:
+  class BarAggregator:
+      def __init__(self, base_interval: str = "1m", targets=None, *, capacity: int = 1000)
+      def supports(self, interval: str) -> bool
+      def update(self, symbol: str, row: list, closed: bool) -> list[tuple[str, list]]
+      def seed(self, symbol: str, interval: str, htf_rows, base_rows=()) -> None
+      def is_synced(self, symbol: str, interval: str) -> bool
+      def invalidate(self, symbol: str | None = None) -> None
+      def frame(self, symbol: str, interval: str, limit: int) -> pd.DataFrame   # схема STORE_COLUMNS
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.services.kline_store import STORE_COLUMNS
+from app.services.market_data import interval_to_ms
+
+DEFAULT_TARGETS = ("3m", "5m", "15m", "1h", "4h")
+_MAX_STEP_MS = 86_400_000  # вирівнювання по epoch коректне до 1d включно
+
+# Індекси у рядку STORE_COLUMNS
+_OT, _O, _H, _L, _C, _V, _CT, _QV, _N, _TBV, _TQV = range(len(STORE_COLUMNS))
+
+
+def _fold(acc: Optional[List[Any]], row: List[Any]) -> List[Any]:
+    """Додає базовий бар до агрегату кошика (новий список; acc не змінюється)."""
+    if acc is None:
+        return list(row)
+    return [
+        acc[_OT], acc[_O], max(acc[_H], row[_H]), min(acc[_L], row[_L]), row[_C], acc[_V] + row[_V],
+        row[_CT], acc[_QV] + row[_QV], acc[_N] + row[_N], acc[_TBV] + row[_TBV], acc[_TQV] + row[_TQV],
+    ]
+
+
+class _Bucket:
+    """
+    Стан одного (symbol, interval): закриті старші бари + поточний кошик.
+    acc — агрегат закритих базових барів кошика; live — in-progress базовий бар.
+    """
+    __slots__ = ("step", "rows", "start", "acc", "acc_last", "live", "complete", "synced")
+
+    def __init__(self, step: int, capacity: int) -> None:
+        self.step = step
+        self.rows: Deque[List[Any]] = deque(maxlen=capacity)
+        self.start = -1          # open_time поточного кошика
+        self.acc: Optional[List[Any]] = None
+        self.acc_last = -1       # open_time останнього врахованого закритого базового бару
+        self.live: Optional[List[Any]] = None
+        self.complete = False    # кошик бачив усі базові бари з початку (інакше закриття не розсилається)
+        self.synced = False
+
+    def _publish(self) -> None:
+        cur = _fold(self.acc, self.live) if self.live is not None else self.acc
+        if cur is None:
+            return
+        cur = list(cur)
+        cur[_OT] = self.start
+        cur[_CT] = self.start + self.step - 1
+        if self.rows and self.rows[-1][_OT] == self.start:
+            self.rows[-1] = cur
+        else:
+            self.rows.append(cur)
+
+    def _open(self, start: int, complete: bool = True) -> None:
+        self.start, self.acc, self.acc_last, self.live = start, None, -1, None
+        self.complete = complete
+
+    def add(self, row: List[Any], closed: bool, base_step: int) -> Optional[List[Any]]:
+        """Враховує базовий бар; повертає закритий старший бар, якщо ця хвилина його завершила."""
+        ot = int(row[_OT])
+        start = ot - ot % self.step
+        if start < self.start:
+            return None
+        if start != self.start:
+            self._open(start, complete=ot == start)
+        if self.live is not None and self.live[_OT] < ot:
+            # пропущений x=true для попередньої хвилини: вважаємо її закритою
+            self.acc, self.acc_last = _fold(self.acc, self.live), int(self.live[_OT])
+            self.live = None
+        fresh = ot > self.acc_last
+        if closed:
+            if fresh:
+                self.acc, self.acc_last = _fold(self.acc, row), ot
+            if self.live is not None and self.live[_OT] == ot:
+                self.live = None
+        elif fresh:
+            self.live = row
+        self._publish()
+        if closed and fresh and self.complete and ot + base_step == self.start + self.step:
+            return self.rows[-1]
+        return None
+
+
+class BarAggregator:
+    """
+    Параметри:
+      base_interval: інтервал базового стріму.
+      targets: старші інтервали; беруться лише кратні базовому та ≤ 1d.
+      capacity: скільки старших барів тримати на (symbol, interval).
+    """
+    def __init__(self, base_interval: str = "1m", targets: Optional[Iterable[str]] = None, *, capacity: int = 1000) -> None:
+        self.base_interval = base_interval
+        self.base_step = interval_to_ms(base_interval)
+        self.capacity = max(1, int(capacity))
+        self.steps: Dict[str, int] = {}
+        for itv in (targets if targets is not None else DEFAULT_TARGETS):
+            step = interval_to_ms(itv)
+            if self.base_step < step <= _MAX_STEP_MS and step % self.base_step == 0:
+                self.steps[itv] = step
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+
+    @property
+    def targets(self) -> List[str]:
+        return list(self.steps)
+
+    def supports(self, interval: str) -> bool:
+        return interval in self.steps
+
+    def _bucket(self, symbol: str, interval: str) -> _Bucket:
+        key = (symbol, interval)
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = _Bucket(self.steps[interval], self.capacity)
+        return b
+
+    def update(self, symbol: str, row: List[Any], closed: bool) -> List[Tuple[str, List[Any]]]:
+        """
+        Апдейт базового бару (рядок у порядку STORE_COLUMNS).
+        Повертає [(interval, row)] закритих старших барів (лише кошиків, побачених з першого базового бару).
+        """
+        done: List[Tuple[str, List[Any]]] = []
+        for itv in self.steps:
+            out = self._bucket(symbol, itv).add(row, closed, self.base_step)
+            if out is not None:
+                done.append((itv, out))
+        return done
+
+    def seed(self, symbol: str, interval: str, htf_rows: Iterable[List[Any]], base_rows: Iterable[List[Any]] = ()) -> None:
+        """
+        Засіває історію старших барів (з REST) і перебудовує з базових барів усі кошики,
+        які вони покривають з початку (останній базовий рядок вважається in-progress).
+        Якщо базові бари не покривають жодного кошика повністю, поточний старший бар з REST
+        лишається як є до відкриття наступного кошика.
+        """
+        b = self._bucket(symbol, interval)
+        hist = {int(r[_OT]): list(r) for r in htf_rows}
+        for r in b.rows:
+            hist.setdefault(int(r[_OT]), r)
+        base = [list(r) for r in base_rows]
+        b.rows.clear()
+        b._open(-1, complete=False)
+        b.synced = True
+        if base:
+            first = int(base[0][_OT])
+            first += (-first) % b.step           # перший кошик, побачений з початку
+            if first <= int(base[-1][_OT]):
+                b.rows.extend(hist[k] for k in sorted(hist) if k < first)
+                for i, r in enumerate(base):
+                    if int(r[_OT]) >= first:
+                        b.add(r, i < len(base) - 1, self.base_step)
+                return
+        b.rows.extend(hist[k] for k in sorted(hist))
+        if b.rows:
+            b.start = int(b.rows[-1][_OT])
+            b.acc = list(b.rows[-1])
+            b.acc_last = b.start + b.step   # хвилини цього кошика вже не додаються (інакше подвійний обсяг)
+
+    def is_synced(self, symbol: str, interval: str) -> bool:
+        b = self._buckets.get((symbol, interval))
+        return b is not None and b.synced
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Позначає старші серії для повторного засіву (розрив або реконект базового стріму)."""
+        for (sym, _), b in self._buckets.items():
+            if symbol is None or sym == symbol:
+                b.synced = False
+
+    def frame(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        b = self._buckets.get((symbol, interval))
+        rows = list(b.rows)[-max(1, int(limit)):] if b is not None else []
+        return pd.DataFrame(rows, columns=STORE_COLUMNS)
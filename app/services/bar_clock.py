@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Годинник барів: рішення раз на закритий бар замість опитування кожні LOOP_SLEEP_SEC.
+
+Призначення:
+  - Для кожної пари (symbol, interval) рахує наступний close_time (межа інтервалу в UTC,
+    як у Binance) і спить рівно до нього + close_grace, поки біржа віддасть закритий бар.
+  - wait() повертає пари, чий бар закрився з часу попереднього рішення; кожен закритий бар
+    видається рівно один раз (після довгого сну пропущені бари зливаються в одне рішення).
+  - Між закриттями — легкий intrabar-тік кожні intrabar_sec (вихід з позиції, трейлінг);
+    wait() тоді повертає порожній список. intrabar_sec=None — спимо прямо до закриття.
+
+Публічний API:
+  class BarClock:
+      def __init__(self, streams, *, close_grace: float = 1.0, intrabar_sec: float | None = None,
+                   clock=time.time, sleep=time.sleep)
+      def next_close(self, symbol: str, interval: str) -> float      # epoch-секунди
+      def due(self, now: float | None = None) -> list[tuple[str, str]]
+      def wait(self) -> list[tuple[str, str]]
+      @classmethod from_env(cls, streams) -> BarClock              # BAR_CLOSE_GRACE_SEC, LOOP_SLEEP_SEC
+"""
+
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.market_cache import next_bar_close
+
+Stream = Tuple[str, str]
+
+
+class BarClock:
+    """
+    Параметри:
+      streams: пари (symbol, interval); невідомий інтервал → ValueError одразу.
+      close_grace: запас після close_time, сек.
+      intrabar_sec: період intrabar-тіку, сек (None або <= 0 — без тіків).
+      clock / sleep: джерело часу та сон (підміняються в тестах).
+    """
+    def __init__(
+        self,
+        streams: Iterable[Stream],
+        *,
+        close_grace: float = 1.0,
+        intrabar_sec: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.close_grace = max(0.0, float(close_grace))
+        self.intrabar_sec = float(intrabar_sec) if intrabar_sec and intrabar_sec > 0 else None
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        # close_time бару, на якому чекаємо наступне рішення
+        self._pending: Dict[Stream, float] = {
+            (s, itv): next_bar_close(itv, now) for s, itv in dict.fromkeys(streams)
+        }
+        self._next_tick = now + self.intrabar_sec if self.intrabar_sec else None
+
+    @classmethod
+    def from_env(cls, streams: Iterable[Stream], **kwargs) -> "BarClock":
+        kwargs.setdefault("close_grace", float(os.environ.get("BAR_CLOSE_GRACE_SEC", "1")))
+        kwargs.setdefault("intrabar_sec", float(os.environ.get("LOOP_SLEEP_SEC", "5")))
+        return cls(streams, **kwargs)
+
+    def next_close(self, symbol: str, interval: str) -> float:
+        return self._pending[(symbol, interval)]
+
+    def due(self, now: Optional[float] = None) -> List[Stream]:
+        """Пари з закритим (з урахуванням close_grace) баром; для них чекаємо вже наступного."""
+        now = self.clock() if now is None else now
+        out: List[Stream] = []
+        for (sym, itv), close_at in self._pending.items():
+            if close_at + self.close_grace <= now:
+                out.append((sym, itv))
+                self._pending[(sym, itv)] = next_bar_close(itv, now)
+        return out
+
+    def wait(self) -> List[Stream]:
+        """Спить до найближчої події: закриття бару (+grace) або intrabar-тіку."""
+        while True:
+            now = self.clock()
+            ready = self.due(now)
+            if ready:
+                return ready
+            if self._next_tick is not None and self._next_tick <= now:
+                self._next_tick += self.intrabar_sec
+                if self._next_tick <= now:  # тік запізнився (довге рішення) — не наздоганяємо пачкою
+                    self._next_tick = now + self.intrabar_sec
+                return []
+            wake = min(self._pending.values()) + self.close_grace
+            if self._next_tick is not None:
+                wake = min(wake, self._next_tick)
+            self.sleep(max(0.0, wake - now))
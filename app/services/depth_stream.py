@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Локальні L2-книги ордерів по підписаних символах: REST-знімок + diff-стрім `<symbol>@depth@100ms`.
+
+Призначення:
+  - Один combined-стрім на процес (фоновий потік з asyncio, як MarketStream).
+  - Синхронізація за sequence id (OrderBook.apply_event): події буферизуються до знімка,
+    старі відкидаються, розрив pu != u → книга перезавантажується зі знімка.
+  - Знімок (вага 20) качається окремим потоком поза локом, один у польоті на символ;
+    невдача (помилка REST або знімок старіший за буфер) → повтор з експоненційною паузою,
+    буфер подій при цьому зберігається.
+  - Запити до книги (vwap, depth_within) — з пам'яті, без мережі: для paper-філів і сайзингу.
+
+Публічний API:
+  class OrderBookStream:
+      def __init__(self, symbols=None, *, ws_base=None, rest_base=None, snapshot_limit=1000,
+                   fetch=None, autostart=True, logger=None)
+      def start(self) -> None
+      def stop(self) -> None
+      def handle_message(self, raw) -> None
+      def book(self, symbol: str) -> OrderBook     # book.synced=False, поки знімок не застосовано
+      def wait_resync(self, symbol: str, timeout: float = 5.0) -> bool   # дочекатися знімка в польоті; -> synced
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Set
+
+from app.services.market_stream import FUTURES_WS_BASE, _split_env_list
+from core.exchange import cassette as _cassette
+from core.exchange.orderbook import FUTURES_BASE, OrderBook, OrderBookSyncError, fetch_snapshot
+
+
+class OrderBookStream:
+    """
+    Параметри:
+      symbols: перелік символів; None → ENV SYMBOLS або ENV SYMBOL.
+      ws_base: базовий wss-URL; None → ENV BINANCE_WS_BASE або fstream.binance.com.
+      rest_base: REST-база для знімків; None → ENV BINANCE_FAPI_BASE або fapi.binance.com.
+      snapshot_limit: глибина знімка /fapi/v1/depth.
+      fetch: callable(symbol) -> {'lastUpdateId', 'bids', 'asks'}; None → fetch_snapshot().
+      autostart: запускати фоновий потік при першому book().
+      resync_backoff: пауза перед повтором невдалого знімка, сек (подвоюється до 30 с).
+    """
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        *,
+        ws_base: Optional[str] = None,
+        rest_base: Optional[str] = None,
+        snapshot_limit: int = 1000,
+        fetch: Optional[Callable[[str], Mapping[str, Any]]] = None,
+        autostart: bool = True,
+        resync_backoff: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.log = logger or logging.getLogger("DepthStream")
+        syms = list(symbols or _split_env_list(os.environ.get("SYMBOLS")) or [os.environ.get("SYMBOL", "BTCUSDT")])
+        self.symbols: List[str] = [s.upper().strip() for s in syms]
+        self.ws_base = (ws_base or os.environ.get("BINANCE_WS_BASE") or FUTURES_WS_BASE).rstrip("/")
+        rest = (rest_base or os.environ.get("BINANCE_FAPI_BASE") or FUTURES_BASE).rstrip("/")
+        limit = int(snapshot_limit)
+        self._fetch = fetch or (lambda sym: fetch_snapshot(sym, rest, limit))
+        self.autostart = bool(autostart)
+        self._books: Dict[str, OrderBook] = {s: OrderBook(s) for s in self.symbols}
+        self._pending: Dict[str, Deque[Mapping[str, Any]]] = {s: deque(maxlen=1000) for s in self.symbols}
+        self._lock = threading.RLock()
+        self._resynced = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.resync_backoff = max(0.0, float(resync_backoff))
+        self._inflight: Set[str] = set()
+        self._retry_at: Dict[str, float] = {}
+        self._retry_delay: Dict[str, float] = {}
+        self.resyncs = 0
+
+    # ---- Життєвий цикл ----
+
+    @property
+    def stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@depth@100ms" for s in self.symbols)
+        return f"{self.ws_base}/stream?streams={streams}"
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DepthStream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        if _cassette.replay_into(self.stream_url, self.handle_message, self._stop):
+            return  # офлайн-сесія: ті самі повідомлення з касети замість мережі
+        try:
+            asyncio.run(self._consume())
+        except Exception as e:
+            self.log.error("Depth stream thread stopped: %s", e, exc_info=True)
+
+    async def _consume(self) -> None:
+        try:
+            from websockets.asyncio.client import connect  # websockets>=14
+        except ImportError:  # pragma: no cover - старий layout
+            from websockets import connect  # type: ignore
+        handle = _cassette.record_ws(self.stream_url, self.handle_message)
+        delay = 0.5
+        while not self._stop.is_set():
+            try:
+                async with connect(self.stream_url, ping_interval=20, ping_timeout=20, max_size=2 ** 22) as ws:
+                    self.log.info("Depth stream connected: %d symbols", len(self.symbols))
+                    delay = 0.5
+                    while not self._stop.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        handle(raw)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.log.warning("Depth stream error: %s, reconnect in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                # після розриву diff-послідовність втрачена — кожну книгу треба перезавантажити
+                with self._lock:
+                    for book in self._books.values():
+                        book.synced = False
+
+    # ---- Обробка подій ----
+
+    def handle_message(self, raw: Any) -> None:
+        """Приймає повідомлення combined-стріму depthUpdate (str/bytes/dict) і оновлює книгу."""
+        msg = json.loads(raw) if isinstance(raw, (str, bytes, bytearray)) else raw
+        data = msg.get("data", msg) if isinstance(msg, dict) else None
+        if not isinstance(data, dict) or data.get("e") != "depthUpdate":
+            return
+        sym = str(data.get("s", "")).upper()
+        with self._lock:
+            book = self._books.get(sym)
+            if book is None:
+                return
+            if book.synced:
+                try:
+                    book.apply_event(data)
+                    return
+                except OrderBookSyncError as e:
+                    self.log.warning("Order book out of sync: %s", e)
+            self._pending[sym].append(data)
+            if sym in self._inflight or time.monotonic() < self._retry_at.get(sym, 0.0):
+                return  # знімок уже качається або ще триває пауза після невдачі
+            self._inflight.add(sym)
+        # REST-знімок не тримає ні лок, ні потік стріму
+        threading.Thread(target=self._resync, args=(sym,), name=f"DepthResync-{sym}", daemon=True).start()
+
+    def _resync(self, sym: str) -> None:
+        """Знімок з REST (поза локом) і програвання буферизованих подій поверх нього."""
+        try:
+            snap = self._fetch(sym)
+        except Exception as e:
+            self.log.warning("Depth snapshot %s failed: %s", sym, e)
+            snap = None
+        with self._lock:
+            try:
+                if snap is not None and self._apply_snapshot(sym, snap):
+                    self._retry_delay.pop(sym, None)
+                    self._retry_at.pop(sym, None)
+                else:
+                    delay = self._retry_delay.get(sym, self.resync_backoff)
+                    self._retry_at[sym] = time.monotonic() + delay
+                    self._retry_delay[sym] = min(max(delay, 0.1) * 2, 30.0)
+            finally:
+                self._inflight.discard(sym)
+                self._resynced.notify_all()
+
+    def _apply_snapshot(self, sym: str, snap: Mapping[str, Any]) -> bool:
+        book = self._books[sym]
+        book.apply_snapshot(int(snap["lastUpdateId"]), snap.get("bids", ()), snap.get("asks", ()))
+        self.resyncs += 1
+        pending = self._pending[sym]
+        try:
+            while pending:
+                book.apply_event(pending[0])
+                pending.popleft()
+        except OrderBookSyncError as e:
+            # знімок старіший за буфер (або розрив у буфері) — події лишаються, повтор після паузи
+            self.log.warning("Depth resync %s incomplete: %s", sym, e)
+            book.synced = False
+            return False
+        self.log.info("Order book %s synced at u=%d", sym, book.last_update_id)
+        return True
+
+    # ---- Доступ ----
+
+    def book(self, symbol: str) -> OrderBook:
+        sym = (symbol or "").upper().strip()
+        if self.autostart:
+            self.start()
+        return self._books[sym]
+
+    def wait_resync(self, symbol: str, timeout: float = 5.0) -> bool:
+        """Чекає, поки знімок у польоті для символу завершиться; повертає book.synced."""
+        sym = (symbol or "").upper().strip()
+        with self._resynced:
+            self._resynced.wait_for(lambda: sym not in self._inflight, timeout)
+            return self._books[sym].synced
@@ -1,7 +1,9 @@
 # utils/exit_adapter.py  (v3)
 from __future__ import annotations
-import os, json, ssl, time, hmac, hashlib
-from urllib import request, parse
+import os, json, time, hmac, hashlib
+from urllib import parse
+
+from core.exchange.transport import TRANSPORT
 
 BINANCE_FAPI_BASE = os.environ.get("BINANCE_FAPI_BASE", "https://fapi.binance.com")
 _API_KEY = os.environ.get("API_KEY","")
@@ -17,15 +19,13 @@ def _sign(params: dict) -> bytes:
 
 def _post(path: str, params: dict) -> dict:
     url = BINANCE_FAPI_BASE.rstrip("/") + path
-    ctx = ssl.create_default_context()
     data = _sign(params)
     headers = {"X-MBX-APIKEY": _API_KEY, "User-Agent": "exit-adapter/3.0"}
-    req = request.Request(url, data=data, headers=headers, method="POST")
     try:
-        with request.urlopen(req, context=ctx, timeout=15) as r:
-            raw = r.read().decode("utf-8")
-            try: return json.loads(raw)
-            except Exception: return {"raw": raw}
+        r = TRANSPORT.request("POST", url, data=data, headers=headers, timeout=15, retries=0)
+        raw = r.text
+        try: return json.loads(raw)
+        except Exception: return {"raw": raw}
     except Exception as e:
         body = None
         try:
@@ -11,6 +11,8 @@ ExitManager: reconcile SL/TP для відкритої позиції.
       * скасувати старі та поставити нові;
       * (опційно) використати cancelReplace (поки шлях "cancel+create" — простіше і надійніше).
   - Врахувати анти-дергання: гістерезис (не “розширювати” стоп) + пороги delta_abs/delta_pct + cooldown.
+  - Intrabar-хук TraderApp: track() запам'ятовує цілі відкритої позиції, intrabar() між закриттями
+    барів тримає їх на біржі через reconcile(); ціна за SL/TP — позиція вийшла, ціль знімається.
 
 Залежності (локальні):
   - app.services.notifications: get_open_orders, cancel_order_via_rest, place_order_via_rest
@@ -79,6 +81,13 @@ def _pick_current_exits(open_orders: List[Dict[str, Any]], exit_side: str) -> Tu
     return sl, tp
 
 
+def _crossed(side_entry: str, price: float, sl: Optional[float], tp: Optional[float]) -> bool:
+    """Чи дійшла ціна до SL або TP (тоді вихідний ордер уже спрацював)."""
+    if (side_entry or "").strip().upper() == "SELL":
+        return (sl is not None and price >= sl) or (tp is not None and price <= tp)
+    return (sl is not None and price <= sl) or (tp is not None and price >= tp)
+
+
 def _need_update(kind: str, side_entry: str, old_price: Optional[float], new_price: Optional[float],
                  *, delta_abs: float, delta_pct: float, hysteresis: bool) -> bool:
     """
@@ -133,6 +142,7 @@ class ExitManager:
         self.delta_pct = float(delta_pct)
         self.hysteresis = bool(hysteresis)
         self._last_update_ts: Dict[str, float] = {}
+        self._tracked: Dict[str, Tuple[str, Optional[float], Optional[float]]] = {}
 
     def _cooldown_ok(self, symbol: str, now_ts: float) -> bool:
         last = self._last_update_ts.get(symbol)
@@ -140,6 +150,28 @@ class ExitManager:
             return True
         return (now_ts - last) >= self.cooldown_sec
 
+    def track(self, symbol: str, side_entry: str, sl_target: Optional[float], tp_target: Optional[float]) -> None:
+        """Запам'ятовує цілі SL/TP відкритої позиції для intrabar(); без цілей — знімає трекінг."""
+        if sl_target is None and tp_target is None:
+            self._tracked.pop(symbol, None)
+            return
+        self._tracked[symbol] = (side_entry, sl_target, tp_target)
+
+    def intrabar(self, symbol: str, price: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Хук між закриттями барів: reconcile() запам'ятованих цілей (частоту стримує cooldown).
+        Без трекінгу — нічого (жодних REST-запитів). Повертає результат reconcile() або None.
+        """
+        tracked = self._tracked.get(symbol)
+        if tracked is None:
+            return None
+        side_entry, sl, tp = tracked
+        if price is not None and _crossed(side_entry, float(price), sl, tp):
+            self._tracked.pop(symbol, None)
+            log.info("%s: price %s reached SL/TP — exit tracking stopped", symbol, price)
+            return None
+        return self.reconcile(symbol=symbol, side_entry=side_entry, sl_target=sl, tp_target=tp)
+
     def reconcile(self, *, symbol: str, side_entry: str,
                   sl_target: Optional[float], tp_target: Optional[float]) -> Dict[str, Any]:
         """
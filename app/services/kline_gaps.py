@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Пошук і точковий ремонт розривів у збережених klines.
+
+Призначення:
+  - find_gaps(): векторизований пошук розривів за diff int64-колонки open_time
+    (сусідні бари мають відрізнятися рівно на інтервал).
+  - KlineGapRepair.scan(): звіт по серії — очікувана/наявна кількість барів, розриви,
+    continuity index (частка наявних барів від очікуваних).
+  - KlineGapRepair.repair(): докачує з REST лише відсутні діапазони (вікнами по ≤ limit барів,
+    обмежений пул потоків, ліміт ваги — через спільний governor), пише у KlineStore і пересканує.
+    Бари, яких немає і на біржі (техобслуговування), лишаються у звіті як `unrepaired`.
+
+Навіщо: RMA/ATR та інші рекурсивні індикатори тихо «пливуть», коли бари пропущені,
+а перекачування цілих вікон витрачає вагу.
+
+Публічний API:
+  def find_gaps(open_time: np.ndarray, step_ms: int) -> list[tuple[int, int]]
+  @dataclass class GapReport
+  class KlineGapRepair:
+      def __init__(self, store: KlineStore, rest=None, *, workers: int = 4, per_call: int = 1000, logger=None)
+      def scan(self, symbol, interval, *, start_time=None, end_time=None) -> GapReport
+      def scan_all(self) -> list[GapReport]
+      def repair(self, symbol, interval, *, start_time=None, end_time=None) -> GapReport
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.services import market_data as _md
+from app.services.kline_store import KlineStore
+
+
+def find_gaps(open_time: np.ndarray, step_ms: int) -> List[Tuple[int, int]]:
+    """
+    Відсутні діапазони [first_missing_open, last_missing_open] у відсортованому масиві open_time.
+    Один векторний прохід: np.diff + flatnonzero.
+    """
+    t = np.asarray(open_time, dtype=np.int64)
+    if t.size < 2:
+        return []
+    step = int(step_ms)
+    d = np.diff(t)
+    idx = np.flatnonzero(d > step)
+    return [(int(t[i]) + step, int(t[i + 1]) - step) for i in idx]
+
+
+@dataclass
+class GapReport:
+    symbol: str
+    interval: str
+    bars: int = 0
+    expected: int = 0
+    missing: int = 0
+    gaps: List[Tuple[int, int]] = field(default_factory=list)
+    repaired: int = 0
+    unrepaired: int = 0
+
+    @property
+    def continuity(self) -> float:
+        """Частка наявних барів від очікуваних між першим і останнім (1.0 — без розривів)."""
+        return round(self.bars / self.expected, 6) if self.expected else 1.0
+
+    def as_dict(self) -> dict:
+        return {
+            "symbol": self.symbol, "interval": self.interval, "bars": self.bars, "expected": self.expected,
+            "missing": self.missing, "gaps": len(self.gaps), "continuity": self.continuity,
+            "repaired": self.repaired, "unrepaired": self.unrepaired,
+        }
+
+
+class KlineGapRepair:
+    """
+    Параметри:
+      store: KlineStore з серіями.
+      rest: клієнт з get_klines_raw(symbol, interval, limit, start_time=, end_time=); None → HttpMarketData.
+      workers: одночасних REST-запитів при ремонті.
+      per_call: барів на один запит.
+    """
+    def __init__(self, store: KlineStore, rest: Any = None, *, workers: int = 4, per_call: int = 1000,
+                 logger: Optional[logging.Logger] = None) -> None:
+        self.store = store
+        self.log = logger or logging.getLogger("KlineGaps")
+        self.rest = rest if rest is not None else _md.HttpMarketData(logger=self.log)
+        self.workers = max(1, int(workers))
+        self.per_call = max(1, min(int(per_call), _md._MAX_LIMIT))
+
+    def scan(self, symbol: str, interval: str, *, start_time: Optional[int] = None, end_time: Optional[int] = None) -> GapReport:
+        sym = symbol.upper()
+        step = _md.interval_to_ms(interval)
+        t = self.store.open_times(sym, interval, start_time=start_time, end_time=end_time)
+        rep = GapReport(sym, interval, bars=int(t.size))
+        if t.size == 0:
+            return rep
+        rep.expected = int((t[-1] - t[0]) // step) + 1
+        rep.gaps = find_gaps(t, step)
+        rep.missing = sum((hi - lo) // step + 1 for lo, hi in rep.gaps)
+        return rep
+
+    def scan_all(self) -> List[GapReport]:
+        return [self.scan(s, i) for s, i in self.store.series()]
+
+    def repair(self, symbol: str, interval: str, *, start_time: Optional[int] = None, end_time: Optional[int] = None) -> GapReport:
+        """Докачує лише відсутні діапазони; повертає звіт після ремонту."""
+        before = self.scan(symbol, interval, start_time=start_time, end_time=end_time)
+        if not before.gaps:
+            return before
+        sym, step = before.symbol, _md.interval_to_ms(interval)
+        windows: List[Tuple[int, int]] = []
+        for lo, hi in before.gaps:
+            n = (hi - lo) // step + 1
+            windows.extend(_md._backfill_windows(interval, self.per_call, n, lo, hi))
+
+        def fetch(w: Tuple[int, int]):
+            # Порожнє вікно (біржа не має барів) чи збій запиту не зупиняють решту ремонту.
+            try:
+                return self.rest.get_klines_raw(sym, interval, limit=self.per_call, start_time=w[0], end_time=w[1])
+            except Exception as e:
+                self.log.warning("Gap window %s %s [%d, %d] not fetched: %s", sym, interval, w[0], w[1], e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(windows)), thread_name_prefix="kline-repair") as pool:
+            for w, frame in zip(windows, pool.map(fetch, windows)):
+                if frame is not None and len(frame):
+                    self.store.write(sym, interval, frame)
+
+        after = self.scan(symbol, interval, start_time=start_time, end_time=end_time)
+        after.repaired = before.missing - after.missing
+        after.unrepaired = after.missing
+        self.log.info("Gap repair %s %s: %d windows, repaired=%d, still missing=%d, continuity=%.6f",
+                      sym, interval, len(windows), after.repaired, after.unrepaired, after.continuity)
+        return after
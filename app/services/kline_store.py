@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+KlineStore — локальне сховище свічок (Parquet, pyarrow).
+
+Призначення:
+  - Зберігати klines на диску з ключем (symbol, interval) і розбиттям по днях (UTC).
+  - Давати швидкий доступ до "хвоста" серії з пам'яті, щоб HttpMarketData
+    докачував з REST лише нові бари.
+  - Upsert за open_time: повторний запис того ж бару (in-progress → closed) перезаписує рядок.
+  - Диск чіпається лише для змінених рядків: незмінні бари (той самий хвіст з REST) партицію
+    не переписують; persist=False тримає рядок (незакритий бар) лише в пам'яті.
+
+Розкладка на диску:
+  <root>/<SYMBOL>/<interval>/<YYYY-MM-DD>.parquet
+
+Схема (STORE_COLUMNS / STORE_DTYPES): сирі числові поля Binance, час — int64 epoch ms, угоди — int32.
+Перетворення у стабільний DataFrame робить market_data (_stable_frame).
+
+Публічний API:
+  class KlineStore:
+      def __init__(self, root: str | Path | None = None, *, memory_bars: int = 5000, logger=None)
+      def write(self, symbol: str, interval: str, frame: pd.DataFrame, *, persist: bool = True) -> int
+      def read(self, symbol: str, interval: str, *, start_time: int | None = None, end_time: int | None = None) -> pd.DataFrame
+      def tail(self, symbol: str, interval: str, n: int) -> pd.DataFrame
+      def last_open_time(self, symbol: str, interval: str) -> int | None
+      def open_times(self, symbol: str, interval: str, *, start_time=None, end_time=None) -> np.ndarray
+      def series(self) -> list[tuple[str, str]]
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = "logs/cache/klines"
+
+STORE_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "number_of_trades",
+    "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume",
+]
+# Час — int64 epoch ms, кількість угод — int32, решта — float64.
+STORE_DTYPES = {c: np.float64 for c in STORE_COLUMNS}
+STORE_DTYPES.update(open_time=np.int64, close_time=np.int64, number_of_trades=np.int32)
+
+
+def _day_of(ms: int) -> str:
+    return datetime.fromtimestamp(int(ms) / 1000.0, tz=timezone.utc).date().isoformat()
+
+
+def empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=STORE_DTYPES[c]) for c in STORE_COLUMNS})
+
+
+def _coerce(frame: pd.DataFrame) -> pd.DataFrame:
+    """Приводить кадр до STORE_COLUMNS з фіксованими dtypes."""
+    missing = [c for c in STORE_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"kline frame misses columns: {missing}")
+    out = frame[STORE_COLUMNS].copy()
+    for c in STORE_COLUMNS:
+        if STORE_DTYPES[c] is np.float64:
+            out[c] = pd.to_numeric(out[c], errors="coerce").astype(np.float64)
+        else:
+            out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).astype(STORE_DTYPES[c])
+    return out
+
+
+def _merge(old: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+    """Об'єднує два кадри: дедуп за open_time (перемагає новий рядок), сортування."""
+    if old is None or old.empty:
+        merged = new
+    else:
+        merged = pd.concat([old, new], ignore_index=True)
+    merged = merged.drop_duplicates(subset="open_time", keep="last")
+    return merged.sort_values("open_time", kind="stable").reset_index(drop=True)
+
+
+class KlineStore:
+    """
+    Parquet-сховище klines з кешем хвоста в пам'яті.
+
+    Параметри:
+      root: коренева тека (за замовчуванням KLINE_STORE_DIR або logs/cache/klines).
+      memory_bars: скільки останніх барів на ключ тримати в пам'яті.
+      logger: існуючий логер або None (тоді 'KlineStore').
+    """
+    def __init__(self, root: str | Path | None = None, *, memory_bars: int = 5000, logger: Optional[logging.Logger] = None) -> None:
+        self.root = Path(root or os.environ.get("KLINE_STORE_DIR") or DEFAULT_ROOT)
+        self.memory_bars = max(1, int(memory_bars))
+        self.log = logger or logging.getLogger("KlineStore")
+        self._tails: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._unsaved: Dict[Tuple[str, str], set] = {}  # open_time рядків кешу, яких немає на диску
+        self._lock = threading.RLock()
+
+    # ---- Шляхи ----
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    def path_for(self, symbol: str, interval: str, day: str) -> Path:
+        return self._dir(symbol, interval) / f"{day}.parquet"
+
+    def days(self, symbol: str, interval: str) -> List[str]:
+        """Відсортований перелік днів (YYYY-MM-DD), для яких є партиції."""
+        d = self._dir(symbol, interval)
+        if not d.exists():
+            return []
+        return sorted(p.stem for p in d.glob("*.parquet"))
+
+    # ---- Читання/запис партицій ----
+
+    def _read_day(self, symbol: str, interval: str, day: str) -> Optional[pd.DataFrame]:
+        p = self.path_for(symbol, interval, day)
+        if not p.exists():
+            return None
+        try:
+            return pd.read_parquet(p, engine="pyarrow")
+        except Exception as e:
+            self.log.warning("Cannot read %s: %s", p, e)
+            return None
+
+    def _write_day(self, symbol: str, interval: str, day: str, frame: pd.DataFrame) -> None:
+        p = self.path_for(symbol, interval, day)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(".parquet.tmp")
+        frame.to_parquet(tmp, engine="pyarrow", index=False)
+        os.replace(tmp, p)
+
+    # ---- Публічні методи ----
+
+    def write(self, symbol: str, interval: str, frame: pd.DataFrame, *, persist: bool = True) -> int:
+        """
+        Upsert рядків у денні партиції та кеш хвоста.
+        Рядки, що збігаються з уже записаними, партиції не переписують; persist=False — лише кеш.
+        Повертає кількість записаних рядків.
+        """
+        if frame is None or frame.empty:
+            return 0
+        sym = symbol.upper()
+        new = _coerce(frame)
+        new = _merge(None, new)
+        key = (sym, interval)
+        opens = [int(t) for t in new["open_time"].to_numpy()]
+        with self._lock:
+            tail = self._tails.get(key)
+            if tail is None:
+                tail = self._load_tail(sym, interval)
+            unsaved = self._unsaved.setdefault(key, set())
+            if persist:
+                dirty = new[self._changed(tail, new, unsaved)]
+                day_keys = pd.to_datetime(dirty["open_time"], unit="ms", utc=True).dt.strftime("%Y-%m-%d")
+                for day, part in dirty.groupby(day_keys.to_numpy(), sort=True):
+                    merged = _merge(self._read_day(sym, interval, day), part)
+                    self._write_day(sym, interval, day, merged)
+                unsaved.difference_update(opens)
+            else:
+                unsaved.update(opens)
+            tail = self._tails[key] = _merge(tail, new).tail(self.memory_bars).reset_index(drop=True)
+            if unsaved:
+                unsaved.intersection_update(int(t) for t in tail["open_time"].to_numpy())
+        return int(len(new))
+
+    @staticmethod
+    def _changed(tail: pd.DataFrame, new: pd.DataFrame, unsaved: set) -> np.ndarray:
+        """Маска рядків new, яких на диску немає в такому вигляді (звірка з кешем хвоста)."""
+        if tail.empty:
+            return np.ones(len(new), dtype=bool)
+        cols = STORE_COLUMNS[1:]
+        old = tail.set_index("open_time").reindex(new["open_time"].to_numpy())[cols]
+        same = (old.to_numpy() == new[cols].to_numpy()).all(axis=1)
+        if unsaved:
+            same &= ~new["open_time"].isin(unsaved).to_numpy()
+        return ~same
+
+    def read(self, symbol: str, interval: str, *, start_time: int | None = None, end_time: int | None = None) -> pd.DataFrame:
+        """Читає діапазон [start_time, end_time] (ms, включно) з диску."""
+        sym = symbol.upper()
+        days = self.days(sym, interval)
+        if start_time is not None:
+            lo = _day_of(start_time)
+            days = [d for d in days if d >= lo]
+        if end_time is not None:
+            hi = _day_of(end_time)
+            days = [d for d in days if d <= hi]
+        parts = [f for f in (self._read_day(sym, interval, d) for d in days) if f is not None and not f.empty]
+        if not parts:
+            return empty_frame()
+        out = pd.concat(parts, ignore_index=True)
+        if start_time is not None:
+            out = out[out["open_time"] >= int(start_time)]
+        if end_time is not None:
+            out = out[out["open_time"] <= int(end_time)]
+        return out.reset_index(drop=True)
+
+    def open_times(self, symbol: str, interval: str, *, start_time: int | None = None, end_time: int | None = None) -> np.ndarray:
+        """Відсортований int64-масив open_time діапазону; з диску читається лише ця колонка."""
+        sym = symbol.upper()
+        days = self.days(sym, interval)
+        if start_time is not None:
+            days = [d for d in days if d >= _day_of(start_time)]
+        if end_time is not None:
+            days = [d for d in days if d <= _day_of(end_time)]
+        parts = []
+        for d in days:
+            try:
+                parts.append(pd.read_parquet(self.path_for(sym, interval, d), engine="pyarrow", columns=["open_time"])["open_time"].to_numpy(np.int64))
+            except Exception as e:
+                self.log.warning("Cannot read %s: %s", self.path_for(sym, interval, d), e)
+        out = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        if start_time is not None:
+            out = out[out >= int(start_time)]
+        if end_time is not None:
+            out = out[out <= int(end_time)]
+        return out
+
+    def series(self) -> List[Tuple[str, str]]:
+        """Усі (symbol, interval), для яких є партиції."""
+        if not self.root.exists():
+            return []
+        return sorted((s.name, i.name) for s in self.root.iterdir() if s.is_dir()
+                      for i in s.iterdir() if i.is_dir() and any(i.glob("*.parquet")))
+
+    def _load_tail(self, sym: str, interval: str) -> pd.DataFrame:
+        """Піднімає з диску останні memory_bars барів (з найновіших партицій)."""
+        parts: List[pd.DataFrame] = []
+        have = 0
+        for day in reversed(self.days(sym, interval)):
+            f = self._read_day(sym, interval, day)
+            if f is None or f.empty:
+                continue
+            parts.append(f)
+            have += len(f)
+            if have >= self.memory_bars:
+                break
+        if not parts:
+            return empty_frame()
+        return _merge(None, pd.concat(parts[::-1], ignore_index=True)).tail(self.memory_bars).reset_index(drop=True)
+
+    def tail(self, symbol: str, interval: str, n: int) -> pd.DataFrame:
+        """Останні n барів (з кешу в пам'яті; при першому зверненні — з диску)."""
+        sym = symbol.upper()
+        key = (sym, interval)
+        with self._lock:
+            t = self._tails.get(key)
+            if t is None:
+                t = self._load_tail(sym, interval)
+                self._tails[key] = t
+            return t.tail(max(0, int(n))).reset_index(drop=True)
+
+    def last_open_time(self, symbol: str, interval: str) -> int | None:
+        t = self.tail(symbol, interval, 1)
+        if t.empty:
+            return None
+        return int(t["open_time"].iloc[-1])
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Кеш відповідей market data, вирівняний по закриттю бару.
+
+Призначення:
+  - Обгортка над будь-яким клієнтом з get_klines()/get_latest_price() (HttpMarketData, MarketDataAdapter).
+  - Klines живуть до очікуваного закриття поточного бару (з інтервалу) + невеликий запас:
+    при LOOP_SLEEP_SEC=5 на 1m ті самі бари качаються раз на хвилину, а не 12 разів.
+  - Однакові конкурентні запити зливаються в один виклик (single-flight).
+  - Лічильники hit/miss/coalesced для телеметрії: stats().
+
+Увага: незакритий (останній) бар заморожується до закриття бару;
+max_ttl обмежує це, якщо стратегії потрібен свіжіший in-progress бар.
+Історичні запити (start_time/end_time/max_bars) не кешуються: кожен діапазон — унікальний ключ,
+і такі записи лише накопичувались би в пам'яті.
+
+Публічний API:
+  class CachedMarketData:
+      def __init__(self, inner, *, max_ttl: float | None = None, price_ttl: float = 1.0, close_grace: float = 1.0, logger=None)
+      def get_klines(self, symbol, interval="1m", limit=500, **kwargs) -> pd.DataFrame
+      def get_latest_price(self, symbol, **kwargs) -> float
+      def invalidate(self, symbol: str | None = None) -> None
+      def stats(self) -> dict
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from app.services.market_data import interval_to_ms
+
+
+class _Flight:
+    """Один запит у польоті: решта викликачів чекають на його результат."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def next_bar_close(interval: str, now: Optional[float] = None) -> float:
+    """Epoch-секунди закриття поточного бару інтервалу (== відкриття наступного)."""
+    step = interval_to_ms(interval)
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return ((now_ms // step) + 1) * step / 1000.0
+
+
+class CachedMarketData:
+    """
+    Параметри:
+      inner: клієнт market data (get_klines/get_latest_price).
+      max_ttl: верхня межа життя klines-запису, сек (ENV MD_CACHE_MAX_TTL_SEC; None — до закриття бару).
+      price_ttl: життя ціни, сек.
+      close_grace: запас після закриття бару, поки біржа віддасть закритий бар, сек.
+    """
+    def __init__(
+        self,
+        inner: Any,
+        *,
+        max_ttl: Optional[float] = None,
+        price_ttl: float = 1.0,
+        close_grace: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.inner = inner
+        env_ttl = os.environ.get("MD_CACHE_MAX_TTL_SEC")
+        self.max_ttl = float(max_ttl) if max_ttl is not None else (float(env_ttl) if env_ttl else None)
+        self.price_ttl = float(price_ttl)
+        self.close_grace = float(close_grace)
+        self.log = logger or logging.getLogger("MarketCache")
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    # ---- ядро ----
+
+    def _cached(self, key: Hashable, expires_at: Callable[[], float], fetch: Callable[[], Any]) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        assert flight is not None
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            value = fetch()
+            flight.value = value
+            with self._lock:
+                self._entries[key] = (expires_at(), value)
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _klines_expiry(self, interval: str) -> float:
+        exp = next_bar_close(interval) + self.close_grace
+        if self.max_ttl is not None:
+            exp = min(exp, time.time() + self.max_ttl)
+        return exp
+
+    # ---- контракт MarketData ----
+
+    def get_klines(self, symbol: str | None = None, interval: str = "1m", limit: int = 500, **kwargs: Any) -> pd.DataFrame:
+        if any(kwargs.get(k) is not None for k in ("start_time", "end_time", "max_bars")):
+            return self.inner.get_klines(symbol, interval=interval, limit=limit, **kwargs)
+        sym = (symbol or getattr(self.inner, "symbol", None) or "").upper().strip()
+        key = ("klines", sym, interval, int(limit), tuple(sorted(kwargs.items())))
+        df = self._cached(
+            key,
+            lambda: self._klines_expiry(interval),
+            lambda: self.inner.get_klines(symbol, interval=interval, limit=limit, **kwargs),
+        )
+        # Глибока копія: у pandas 2.x copy-on-write вимкнено, і пласка копія ділила б дані з кешем.
+        return df.copy() if isinstance(df, pd.DataFrame) else df
+
+    def get_latest_price(self, symbol: str | None = None, **kwargs: Any) -> float:
+        sym = (symbol or getattr(self.inner, "symbol", None) or "").upper().strip()
+        key = ("price", sym, tuple(sorted(kwargs.items())))
+        return self._cached(key, lambda: time.time() + self.price_ttl,
+                            lambda: self.inner.get_latest_price(symbol, **kwargs))
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Скидає записи (усі або одного символу)."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            sym = symbol.upper().strip()
+            for key in [k for k in self._entries if k[1] == sym]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def __getattr__(self, name: str) -> Any:
+        # решта методів клієнта (symbol, get_klines_raw, ...) — напряму
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
@@ -2,37 +2,44 @@
 from __future__ import annotations
 
 """
-MarketData (HTTP, без сторонніх залежностей).
+MarketData (HTTP, без сторонніх залежностей; з'єднання — core.exchange.transport).
 
 Призначення:
   - Надати історичні свічки (klines) і поточну ціну з Binance REST.
   - Працює як для SPOT, так і для FUTURES (шлях обирається за base_url).
   - Стабільна схема колонок DataFrame та коректні типи.
   - Ретраї з backoff, обробка 429/5xx, таймаути.
+  - Опційний локальний KlineStore: get_klines докачує лише бари після останнього збереженого.
 
 НЕ робить:
   - Жодних хотпатчів класів.
   - Жодних динамічних імпортів “core.*”.
-  - WebSocket-стрімів (тільки REST).
+  - WebSocket-стрімів (див. app.services.market_stream; тут тільки REST).
 
 Публічний API:
+  def interval_to_ms(interval: str) -> int
+
   class HttpMarketData:
-      def __init__(self, base_url: str = "https://fapi.binance.com", *, timeout: int = 15, max_retries: int = 5, logger=None)
+      def __init__(self, base_url: str = "https://fapi.binance.com", *, timeout: int = 15, max_retries: int = 5, logger=None, store: KlineStore | None = None)
       def get_klines(self, symbol: str, interval: str, limit: int = 1000, *, start_time: int | None = None, end_time: int | None = None, max_bars: int | None = None) -> pd.DataFrame
-      def get_latest_price(self, symbol: str) -> float
+      def get_klines_raw(...) -> pd.DataFrame   # те саме, але числова схема сховища (час у ms)
+      def get_latest_price(self, symbol: str, *, max_age: float | None = None) -> float   # зі знімка всіх тікерів
 """
 
-import json
 import logging
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any, Tuple
-from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import urlopen, Request
 
+import numpy as np
 import pandas as pd
 
+from app.services.kline_store import KlineStore, STORE_COLUMNS, STORE_DTYPES, _coerce as _coerce_store_frame
+from core.exchange.prices import PriceSnapshot, snapshot_for
+from core.exchange.transport import TRANSPORT
+
 # ---- Константи та валідація інтервалів ----
 
 SPOT_BASE = "https://api.binance.com"
@@ -45,10 +52,57 @@ _VALID_INTERVALS = {
     "1d", "3d", "1w", "1M"
 }
 
+# Тривалість інтервалу в мс (1M — наближено, 30 днів)
+_INTERVAL_MS = {
+    "1s": 1_000, "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000, "1M": 2_592_000_000,
+}
+
 # Максимальний ліміт за 1 запит у Binance
 _MAX_LIMIT = 1500  # SPOT/FUTURES дозволяють 1000/1500 для різних ендпойнтів, беремо 1500 з перестраховкою
 
 
+def interval_to_ms(interval: str) -> int:
+    """Тривалість Binance-інтервалу в мілісекундах ('1m' -> 60000)."""
+    try:
+        return _INTERVAL_MS[(interval or "").strip()]
+    except KeyError:
+        raise ValueError(f"invalid interval: {interval!r}") from None
+
+
+def _backfill_windows(itv: str, per_call: int, max_bars: int, start_time: Optional[int], end_time: Optional[int]) -> List[Tuple[int, int]]:
+    """
+    Ділить діапазон на вікна [start, end] по per_call барів.
+    З start_time — max_bars барів від нього (не далі end_time); без — max_bars барів до end_time
+    (або до "зараз"). Вікна поза max_bars не запитуються.
+    """
+    step = interval_to_ms(itv)
+    if start_time is not None:
+        lo = int(start_time)
+        hi = lo + max_bars * step - 1
+        if end_time is not None:
+            hi = min(int(end_time), hi)
+    else:
+        hi = int(end_time) if end_time is not None else int(time.time() * 1000)
+        lo = hi - max_bars * step + 1
+    span = per_call * step
+    return [(w, min(w + span - 1, hi)) for w in range(lo, hi + 1, span)]
+
+
+def _merge_pages(pages: List[List[List[Any]]], max_bars: int, *, from_start: bool) -> pd.DataFrame:
+    """Зливає сторінки klines з дедупом за open_time; лишає перші (from_start) або останні max_bars."""
+    by_open: Dict[int, List[Any]] = {}
+    for page in pages:
+        for row in page:
+            by_open[int(row[0])] = row
+    if not by_open:
+        raise RuntimeError("no klines returned")
+    rows = [by_open[k] for k in sorted(by_open)]
+    rows = rows[:max_bars] if from_start else rows[-max_bars:]
+    return _raw_frame(rows)
+
+
 @dataclass(frozen=True)
 class _Endpoints:
     klines_path: str
@@ -66,69 +120,76 @@ def _endpoints_for_base(base_url: str) -> _Endpoints:
     return _Endpoints(klines_path="/api/v3/klines", price_path="/api/v3/ticker/price")
 
 
-# ---- HTTP утиліти з ретраями ----
+# ---- HTTP (спільний пул з'єднань) ----
 
 def _http_get_json(url: str, params: Dict[str, Any], *, timeout: int, max_retries: int, log: logging.Logger) -> Tuple[Any, Dict[str, str]]:
     """
-    Виконує GET із ретраями (експоненційний backoff).
+    GET через спільний keep-alive транспорт (ретраї, backoff, ліміт ваги — там же).
     Повертає (parsed_json, headers_dict).
     """
-    headers = {"User-Agent": "almost-bot/1.0"}
-    query = urlencode({k: v for k, v in params.items() if v is not None})
-    full_url = f"{url}?{query}" if query else url
-
-    delay = 0.5
-    for attempt in range(max_retries + 1):
-        try:
-            req = Request(full_url, headers=headers)
-            with urlopen(req, timeout=timeout) as resp:
-                raw = resp.read().decode("utf-8")
-                hdrs = {k.lower(): v for k, v in resp.headers.items()}
-                return json.loads(raw), hdrs
-        except HTTPError as e:
-            # Обробка 429/5xx з паузами
-            status = e.code
-            retry_after = 0.0
-            try:
-                if e.headers:
-                    ra = e.headers.get("Retry-After")
-                    if ra:
-                        retry_after = float(ra)
-            except Exception:
-                retry_after = 0.0
-
-            if status in (429, 418, 500, 502, 503, 504) and attempt < max_retries:
-                sleep_for = max(retry_after, delay)
-                log.warning("HTTP %s on %s, retry in %.2fs (attempt %d/%d)", status, full_url, sleep_for, attempt + 1, max_retries)
-                time.sleep(sleep_for)
-                delay = min(delay * 2, 8.0)
-                continue
-
-            # Безпечна спроба прочитати тіло для діагностики
-            try:
-                raw = e.read().decode("utf-8", errors="ignore")
-            except Exception:
-                raw = ""
-            log.error("HTTP error %s on %s: %s", status, full_url, raw.strip()[:300])
-            raise
-        except URLError as e:
-            if attempt < max_retries:
-                log.warning("Network error on %s: %s, retry in %.2fs (attempt %d/%d)", full_url, e, delay, attempt + 1, max_retries)
-                time.sleep(delay)
-                delay = min(delay * 2, 8.0)
-                continue
-            log.error("Network error on %s: %s (no more retries)", full_url, e)
-            raise
-        except Exception as e:
-            log.error("Unexpected error on %s: %s", full_url, e, exc_info=True)
-            raise
-
-    # Теоретично недосяжно: цикл вийде раніше або кине виключення
-    raise RuntimeError("GET failed with retries exhausted")
+    return TRANSPORT.get_json(url, params, timeout=timeout, retries=max_retries, logger=log)
 
 
 # ---- Перетворення у стабільний DataFrame ----
 
+_RAW_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "number_of_trades",
+    "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore",
+]
+
+_N_STORE = len(STORE_COLUMNS)  # перші 11 полів payload; 'ignore' відкидається
+
+_OUT_COLUMNS = ["time", "open", "high", "low", "close", "volume",
+                "open_time", "close_time", "quote_asset_volume", "number_of_trades",
+                "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume"]
+
+
+def _raw_frame(raw: List[List[Any]]) -> pd.DataFrame:
+    """
+    Сирий масив масивів Binance → числовий кадр у схемі сховища (STORE_COLUMNS / STORE_DTYPES):
+    час лишається int64 epoch ms, ціни/обсяги — float64, кількість угод — int32.
+
+    Швидкий шлях: один прохід у 2D-масив float64 (column-major, тож кожна колонка — суцільний
+    шматок пам'яті), далі типізовані колонки і один DataFrame без копій.
+    Час у ms (~1.7e12) точно представимий у float64 (< 2**53).
+    Пейлоад з нечисловими значеннями йде повільним шляхом з pd.to_numeric(errors='coerce').
+    """
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("empty klines payload")
+    try:
+        block = np.array(raw, dtype=object)
+        if block.ndim != 2 or block.shape[1] < _N_STORE:
+            return _raw_frame_slow(raw)
+        block = block[:, :_N_STORE].astype(np.float64, order="F")
+    except (TypeError, ValueError):
+        return _raw_frame_slow(raw)
+    cols = {
+        c: (block[:, i] if STORE_DTYPES[c] is np.float64 else block[:, i].astype(STORE_DTYPES[c]))
+        for i, c in enumerate(STORE_COLUMNS)
+    }
+    return pd.DataFrame(cols, copy=False)
+
+
+def _raw_frame_slow(raw: List[List[Any]]) -> pd.DataFrame:
+    return _coerce_store_frame(pd.DataFrame(raw, columns=_RAW_COLUMNS))
+
+
+def _stable_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Числовий кадр (STORE_COLUMNS, час у ms) → стабільна схема get_klines():
+      ['time','open','high','low','close','volume','open_time','close_time',
+       'quote_asset_volume','number_of_trades','taker_buy_base_asset_volume','taker_buy_quote_asset_volume']
+    - 'time' == 'open_time' (UTC)
+    """
+    # Один DataFrame з готових колонок: без df.copy() і df.insert() (кожен з них копіює кадр).
+    open_dt = pd.to_datetime(df["open_time"].to_numpy(), unit="ms", utc=True)
+    close_dt = pd.to_datetime(df["close_time"].to_numpy(), unit="ms", utc=True)
+    cols = {c: df[c].to_numpy() for c in _OUT_COLUMNS[1:]}
+    cols.update(time=open_dt, open_time=open_dt, close_time=close_dt)
+    return pd.DataFrame({c: cols[c] for c in _OUT_COLUMNS})
+
+
 def _as_dataframe_klines(raw: List[List[Any]]) -> pd.DataFrame:
     """
     Приймає сирий масив масивів Binance і повертає DataFrame з **стабільною** схемою колонок:
@@ -137,32 +198,7 @@ def _as_dataframe_klines(raw: List[List[Any]]) -> pd.DataFrame:
     - 'time' == 'open_time' (UTC)
     - числові поля приведені до float/int
     """
-    cols_full = [
-        "open_time","open","high","low","close","volume",
-        "close_time","quote_asset_volume","number_of_trades",
-        "taker_buy_base_asset_volume","taker_buy_quote_asset_volume","ignore"
-    ]
-    if not isinstance(raw, list) or not raw:
-        raise ValueError("empty klines payload")
-
-    df = pd.DataFrame(raw, columns=cols_full)
-    # Приводимо до числових типів
-    to_num = ["open", "high", "low", "close", "volume", "quote_asset_volume",
-              "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume",
-              "open_time", "close_time", "number_of_trades"]
-    for c in to_num:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    # Епоха мс → datetime UTC; зберігаємо і open_time/close_time, і додаємо 'time'
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms", utc=True)
-    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms", utc=True)
-    df.insert(0, "time", df["open_time"])
-
-    # Повертаємо тільки стабільні, корисні колонки (без 'ignore')
-    want = ["time", "open", "high", "low", "close", "volume",
-            "open_time", "close_time", "quote_asset_volume", "number_of_trades",
-            "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume"]
-    return df[want]
+    return _stable_frame(_raw_frame(raw))
 
 
 # ---- Основний клас ----
@@ -176,13 +212,21 @@ class HttpMarketData:
       timeout:  таймаут одного запиту (сек).
       max_retries: скільки разів повторювати при 429/5xx/мережевих помилках.
       logger: існуючий логер або None (тоді створиться 'MarketData').
+      store: локальне сховище klines; None → береться з ENV KLINE_STORE_DIR (якщо задано), інакше вимкнено.
+      backfill_workers: паралельні запити для max_bars-бекфілу (ENV MD_BACKFILL_WORKERS, дефолт 4).
     """
-    def __init__(self, base_url: str = FUTURES_BASE, *, timeout: int = 15, max_retries: int = 5, logger: Optional[logging.Logger] = None) -> None:
+    def __init__(self, base_url: str = FUTURES_BASE, *, timeout: int = 15, max_retries: int = 5, logger: Optional[logging.Logger] = None, store: Optional[KlineStore] = None, backfill_workers: Optional[int] = None) -> None:
         self.base_url: str = base_url.rstrip("/")
         self.timeout: int = int(timeout)
         self.max_retries: int = int(max_retries)
         self.log = logger or logging.getLogger("MarketData")
         self._endpoints = _endpoints_for_base(self.base_url)
+        if store is None and os.environ.get("KLINE_STORE_DIR"):
+            store = KlineStore(os.environ["KLINE_STORE_DIR"], logger=self.log)
+        self.store: Optional[KlineStore] = store
+        self._short_history: set = set()  # (symbol, interval), для яких біржа віддала неповну сторінку
+        self.backfill_workers: int = max(1, int(backfill_workers or os.environ.get("MD_BACKFILL_WORKERS", "4")))
+        self.prices: PriceSnapshot = snapshot_for(self.base_url)
 
     # ---- Публічні методи ----
 
@@ -202,10 +246,31 @@ class HttpMarketData:
         - interval (str): один з Binance інтервалів (наприклад, '1m', '1h', '1d').
         - limit (int): до _MAX_LIMIT за один запит (1500). Binance часто дає ≤1000.
         - start_time/end_time (ms epoch): опційний фільтр у Binance API.
-        - max_bars: якщо потрібно більше за ліміт — завантажуємо порціями до max_bars.
+        - max_bars: якщо потрібно більше за ліміт — діапазон ділиться на вікна, які качаються паралельно.
+
+        Якщо підключено store і не задано start_time/end_time/max_bars — з REST докачується
+        лише хвіст після останнього збереженого бару, решта віддається зі сховища.
 
         Повертає: pandas.DataFrame (див. _as_dataframe_klines()).
         """
+        return _stable_frame(self.get_klines_raw(
+            symbol, interval, limit, start_time=start_time, end_time=end_time, max_bars=max_bars,
+        ))
+
+    def get_klines_raw(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 1000,
+        *,
+        start_time: int | None = None,
+        end_time: int | None = None,
+        max_bars: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Те саме, що get_klines(), але повертає числовий кадр у схемі сховища
+        (STORE_COLUMNS, час — int64 epoch ms). Для стрімінгу/сховища/бекфілу.
+        """
         sym = (symbol or "").upper().strip()
         if not sym:
             raise ValueError("symbol must be non-empty")
@@ -232,62 +297,84 @@ class HttpMarketData:
                 raise RuntimeError(f"unexpected klines payload type: {type(data)}")
             return data
 
+        if self.store is not None and start_time is None and end_time is None and not max_bars:
+            return self._get_klines_synced(sym, itv, per_call, fetch_once)
+
         # Якщо потрібно <= per_call — один запит
         if not max_bars or max_bars <= per_call:
             raw = fetch_once(per_call, start_time, end_time)
-            return _as_dataframe_klines(raw)
-
-        # Інакше — пагінація порціями
-        all_rows: List[List[Any]] = []
-        fetched = 0
-        next_start = start_time
-        # Якщо start_time не заданий — беремо останні max_bars (кроками назад через end_time)
-        # Але, щоб не ускладнювати: коли немає start_time, просто робимо послідовні запити назад за endTime.
-        local_end = end_time
-
-        while fetched < max_bars:
-            want = min(per_call, max_bars - fetched)
-            raw = fetch_once(want, next_start, local_end)
-            if not raw:
-                break
-            all_rows.extend(raw)
-            fetched += len(raw)
-
-            # На Binance kline: raw[i][6] = closeTime (ms). Зсуваємо вікно.
-            last_close = raw[-1][6]
-            # Щоб уникнути перетину, наступний startTime = last_close + 1
-            next_start = int(last_close) + 1
-
-            # Якщо масив повернувся меншим від запитаного — більше даних немає
-            if len(raw) < want:
-                break
+            return _raw_frame(raw)
 
-        if not all_rows:
-            raise RuntimeError("no klines returned")
+        # Інакше — паралельний бекфіл вікнами
+        return self._backfill(itv, per_call, int(max_bars), start_time, end_time, fetch_once)
 
-        return _as_dataframe_klines(all_rows[:max_bars])
+    def _backfill(self, itv: str, per_call: int, max_bars: int, start_time: Optional[int], end_time: Optional[int], fetch_once) -> pd.DataFrame:
+        """
+        Ділить діапазон на вікна по per_call барів наперед і качає їх паралельно
+        (обмежений пул, кожен запит проходить через спільний governor ваги), потім зливає з дедупом за open_time.
+        - з start_time: перші max_bars барів від start_time;
+        - без start_time: останні max_bars барів до end_time (або до "зараз").
+        """
+        windows = _backfill_windows(itv, per_call, max_bars, start_time, end_time)
+        workers = max(1, min(self.backfill_workers, len(windows)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="klines-backfill") as pool:
+            pages = list(pool.map(lambda w: fetch_once(per_call, w[0], w[1]), windows))
+        return _merge_pages(pages, max_bars, from_start=start_time is not None)
 
-    def get_latest_price(self, symbol: str) -> float:
+    def _get_klines_synced(self, sym: str, itv: str, per_call: int, fetch_once) -> pd.DataFrame:
         """
-        Повертає останню ціну інструмента (float).
+        Інкрементальна синхронізація хвоста зі store.
+        Останній збережений бар перезапитується (він міг бути ще не закритим),
+        ліміт запиту — рівно стільки барів, скільки могло з'явитися (менша вага запиту).
+        Якщо розрив довший за одну сторінку або у store менше per_call барів (а біржа має більше) —
+        береться свіжа сторінка, як при холодному старті.
+        На диск ідуть лише закриті бари, що змінилися; незакритий бар живе в кеші хвоста store.
+        """
+        store = self.store
+        assert store is not None
+        step = interval_to_ms(itv)
+        now_ms = int(time.time() * 1000)
+        last_open = store.last_open_time(sym, itv)
+        short = last_open is not None and (sym, itv) not in self._short_history \
+            and len(store.tail(sym, itv, per_call)) < per_call
+        need = int(max(0, now_ms - last_open) // step) + 2 if last_open is not None else 0
+        if last_open is None or short or need > per_call:
+            raw = fetch_once(per_call, None, None)
+            if len(raw) < per_call:
+                self._short_history.add((sym, itv))  # уся історія біржі вже в store
+            self._store_write(sym, itv, raw, now_ms)
+            return store.tail(sym, itv, per_call)
+
+        cursor = last_open
+        while True:
+            raw = fetch_once(need, cursor, None)
+            if raw:
+                self._store_write(sym, itv, raw, now_ms)
+            if len(raw) < need:
+                break
+            # Сторінка повна — можливо, є ще бари (розсинхрон годинника); докачуємо далі.
+            cursor = int(raw[-1][0]) + 1
+            need = per_call
+        return store.tail(sym, itv, per_call)
+
+    def _store_write(self, sym: str, itv: str, raw: List[List[Any]], now_ms: int) -> None:
+        """Закриті бари — у store (на диск лише змінені), незакритий — лише в кеш хвоста."""
+        store = self.store
+        assert store is not None
+        frame = _raw_frame(raw)
+        open_bar = frame["close_time"].astype("int64").to_numpy() >= now_ms
+        if (~open_bar).any():
+            store.write(sym, itv, frame[~open_bar])
+        if open_bar.any():
+            store.write(sym, itv, frame[open_bar], persist=False)
+
+    def get_latest_price(self, symbol: str, *, max_age: float | None = None) -> float:
+        """
+        Повертає останню ціну інструмента (float) зі спільного знімка всіх тікерів
+        (core.exchange.prices): один запит на весь ринок, далі O(1) до межі застарілості.
+        max_age: допустимий вік знімка, сек (None → PRICE_SNAPSHOT_MAX_AGE_SEC; 0 → живий запит).
         """
         sym = (symbol or "").upper().strip()
         if not sym:
             raise ValueError("symbol must be non-empty")
-
-        url = f"{self.base_url}{self._endpoints.price_path}"
-        data, _hdrs = _http_get_json(url, {"symbol": sym}, timeout=self.timeout, max_retries=self.max_retries, log=self.log)
-
-        # Binance повертає {"symbol":"BTCUSDT","price":"12345.67"}
-        if isinstance(data, dict) and "price" in data:
-            try:
-                return float(data["price"])
-            except Exception as e:
-                raise RuntimeError(f"cannot parse price: {data!r}") from e
-
-        # Якщо раптом масив — шукаємо наш символ
-        if isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict) and item.get("symbol") == sym and "price" in item:
-                    return float(item["price"])
-        raise RuntimeError(f"unexpected price payload: {data!r}")
+        return self.prices.get(sym, max_age=max_age)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Асинхронний MarketData (aiohttp) для паралельного опитування багатьох символів.
+
+Призначення:
+  - Той самий контракт, що й у HttpMarketData (get_klines/get_latest_price), але корутинами.
+  - get_klines_many(symbols, interval): усі символи одночасно в одній aiohttp-сесії,
+    тож оновлення 50 символів займає ~один round-trip, а не 50 послідовних.
+  - Паралелізм обмежено семафором і спільним бюджетом ваги (core.exchange.rate_limit.GOVERNOR).
+
+НЕ робить:
+  - Локального сховища klines (KlineStore) — це робота HttpMarketData.
+  - WebSocket-стрімів (див. app.services.market_stream).
+
+Публічний API:
+  class AsyncHttpMarketData:
+      def __init__(self, base_url: str = FUTURES_BASE, *, timeout: float = 15, max_retries: int = 5,
+                   concurrency: int | None = None, logger=None, session: aiohttp.ClientSession | None = None)
+      async def get_klines(self, symbol, interval, limit=1000, *, start_time=None, end_time=None, max_bars=None) -> pd.DataFrame
+      async def get_klines_raw(...) -> pd.DataFrame
+      async def get_klines_many(self, symbols, interval, limit=1000, *, return_exceptions=False) -> dict[str, pd.DataFrame]
+      async def get_latest_price(self, symbol: str) -> float
+      async def close(self) -> None   # або `async with AsyncHttpMarketData() as md: ...`
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+import pandas as pd
+
+from app.services import market_data as _md
+from core.exchange.rate_limit import GOVERNOR, endpoint_weight
+
+
+def _retry_after(headers: Any) -> float:
+    try:
+        return float(headers.get("Retry-After") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AsyncHttpMarketData:
+    """
+    Параметри:
+      base_url: SPOT або FUTURES (шляхи обираються як у HttpMarketData).
+      timeout: загальний таймаут запиту, сек.
+      max_retries: повтори для 429/5xx/мережевих помилок.
+      concurrency: одночасних запитів у польоті (ENV MD_ASYNC_CONCURRENCY, дефолт 16).
+      session: зовнішня aiohttp-сесія (тоді close() її не закриває).
+    """
+    def __init__(
+        self,
+        base_url: str = _md.FUTURES_BASE,
+        *,
+        timeout: float = 15,
+        max_retries: int = 5,
+        concurrency: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> None:
+        self.base_url: str = base_url.rstrip("/")
+        self.timeout = float(timeout)
+        self.max_retries = int(max_retries)
+        self.concurrency = max(1, int(concurrency or os.environ.get("MD_ASYNC_CONCURRENCY", "16")))
+        self.log = logger or logging.getLogger("AsyncMarketData")
+        self._endpoints = _md._endpoints_for_base(self.base_url)
+        self._session = session
+        self._own_session = session is None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    # ---- Сесія ----
+
+    async def __aenter__(self) -> "AsyncHttpMarketData":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300),
+                headers={"User-Agent": "almost-bot/1.0"},
+            )
+            self._own_session = True
+        return self._session
+
+    async def close(self) -> None:
+        if self._own_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ---- HTTP ----
+
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Any:
+        """GET із ретраями; кожна спроба чекає на семафор і бюджет ваги governor'а."""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        url = f"{self.base_url}{path}"
+        query = {k: str(v) for k, v in params.items() if v is not None}
+        weight = endpoint_weight(path, query)
+        session = self._get_session()
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            while True:
+                wait = GOVERNOR.reserve(weight)
+                if wait <= 0.0:
+                    break
+                await asyncio.sleep(wait)
+            try:
+                async with self._sem:
+                    async with session.get(url, params=query) as resp:
+                        GOVERNOR.update(resp.headers)
+                        body = await resp.text()
+                        status = resp.status
+                        retry_after = _retry_after(resp.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries:
+                    self.log.warning("Network error on %s: %s, retry in %.2fs (attempt %d/%d)", url, e, delay, attempt + 1, self.max_retries)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 8.0)
+                    continue
+                self.log.error("Network error on %s: %s (no more retries)", url, e)
+                raise
+            if 200 <= status < 300:
+                return json.loads(body)
+            if status in (429, 418):
+                retry_after = max(retry_after, GOVERNOR.penalize(status, retry_after or None))
+            if status in (429, 418, 500, 502, 503, 504) and attempt < self.max_retries:
+                sleep_for = max(retry_after, delay) if status not in (429, 418) else 0.0  # governor вже тримає паузу
+                self.log.warning("HTTP %s on %s, retry (attempt %d/%d)", status, url, attempt + 1, self.max_retries)
+                await asyncio.sleep(sleep_for)
+                delay = min(delay * 2, 8.0)
+                continue
+            self.log.error("HTTP error %s on %s: %s", status, url, body.strip()[:300])
+            raise RuntimeError(f"HTTP {status} on {url}: {body.strip()[:300]}")
+        raise RuntimeError("GET failed with retries exhausted")  # pragma: no cover
+
+    # ---- Публічні методи ----
+
+    async def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 1000,
+        *,
+        start_time: int | None = None,
+        end_time: int | None = None,
+        max_bars: int | None = None,
+    ) -> pd.DataFrame:
+        """Як HttpMarketData.get_klines(): стабільна схема колонок з tz-aware 'time'."""
+        return _md._stable_frame(await self.get_klines_raw(
+            symbol, interval, limit, start_time=start_time, end_time=end_time, max_bars=max_bars,
+        ))
+
+    async def get_klines_raw(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 1000,
+        *,
+        start_time: int | None = None,
+        end_time: int | None = None,
+        max_bars: int | None = None,
+    ) -> pd.DataFrame:
+        """Числовий кадр у схемі сховища (STORE_COLUMNS). max_bars > limit — вікна качаються одночасно."""
+        sym = (symbol or "").upper().strip()
+        if not sym:
+            raise ValueError("symbol must be non-empty")
+        itv = (interval or "").strip()
+        if itv not in _md._VALID_INTERVALS:
+            raise ValueError(f"invalid interval: {interval!r}")
+        per_call = max(1, min(int(limit), _md._MAX_LIMIT))
+
+        async def fetch_once(_limit: int, _start: Optional[int], _end: Optional[int]) -> List[List[Any]]:
+            data = await self._get_json(self._endpoints.klines_path, {
+                "symbol": sym, "interval": itv, "limit": int(_limit), "startTime": _start, "endTime": _end,
+            })
+            if not isinstance(data, list):
+                raise RuntimeError(f"unexpected klines payload type: {type(data)}")
+            return data
+
+        if not max_bars or max_bars <= per_call:
+            return _md._raw_frame(await fetch_once(per_call, start_time, end_time))
+
+        windows = _md._backfill_windows(itv, per_call, int(max_bars), start_time, end_time)
+        pages = await asyncio.gather(*(fetch_once(per_call, lo, hi) for lo, hi in windows))
+        return _md._merge_pages(list(pages), int(max_bars), from_start=start_time is not None)
+
+    async def get_klines_many(
+        self,
+        symbols: Iterable[str],
+        interval: str,
+        limit: int = 1000,
+        *,
+        return_exceptions: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Свічки для багатьох символів одночасно: {SYMBOL: DataFrame}.
+        return_exceptions=True — помилка одного символу стає значенням у словнику, решта не страждає.
+        """
+        syms = [s.upper().strip() for s in symbols if (s or "").strip()]
+        results = await asyncio.gather(
+            *(self.get_klines(s, interval, limit) for s in syms), return_exceptions=return_exceptions,
+        )
+        return dict(zip(syms, results))
+
+    async def get_latest_price(self, symbol: str) -> float:
+        """Остання ціна інструмента (float)."""
+        sym = (symbol or "").upper().strip()
+        if not sym:
+            raise ValueError("symbol must be non-empty")
+        data = await self._get_json(self._endpoints.price_path, {"symbol": sym})
+        if isinstance(data, dict) and "price" in data:
+            try:
+                return float(data["price"])
+            except Exception as e:
+                raise RuntimeError(f"cannot parse price: {data!r}") from e
+
+        # Якщо раптом масив — шукаємо наш символ
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict) and item.get("symbol") == sym and "price" in item:
+                    return float(item["price"])
+        raise RuntimeError(f"unexpected price payload: {data!r}")
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+MarketData через WebSocket kline-стріми Binance.
+
+Призначення:
+  - Підписка на `<symbol>@kline_<interval>` для всіх налаштованих символів/інтервалів
+    (один combined-стрім на процес, фоновий потік з asyncio).
+  - Кільцевий буфер фіксованого розміру на (symbol, interval): закриті бари + поточний (in-progress).
+  - Той самий контракт get_klines()/get_latest_price(), що й у HttpMarketData,
+    тож MarketDataAdapter підключає провайдер без змін у TraderApp.
+  - REST використовується лише для бекфілу: холодний старт, розрив у послідовності барів, реконект.
+  - Старші таймфрейми (STREAM_HTF_INTERVALS, за замовчуванням 3m/5m/15m/1h/4h + cfg.HTF_INTERVAL)
+    агрегуються з найдрібнішого підписаного інтервалу (BarAggregator): get_klines(symbol, "15m")
+    без окремої підписки і без REST у сталому режимі.
+
+НЕ робить:
+  - Торгових/приватних стрімів (user data).
+
+Публічний API:
+  class StreamMarketDataProvider:
+      def __init__(self, symbols=None, intervals=None, *, capacity: int = 1000, ws_base: str | None = None,
+                   htf_intervals=None, rest=None, autostart: bool = True, cfg=None, symbol: str | None = None, logger=None)
+      def start(self) -> None
+      def stop(self) -> None
+      def get_klines(self, symbol: str, interval: str, limit: int = 1000, **kwargs) -> pd.DataFrame
+      def get_latest_price(self, symbol: str) -> float
+      def add_listener(self, fn: Callable[[str, str, list], None]) -> None   # виклик на закритті бару (і старшого теж)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.services import market_data as _md
+from app.services.bar_aggregator import DEFAULT_TARGETS, BarAggregator
+from app.services.kline_store import STORE_COLUMNS
+from core.exchange import cassette as _cassette
+
+FUTURES_WS_BASE = "wss://fstream.binance.com"
+SPOT_WS_BASE = "wss://stream.binance.com:9443"
+
+
+def _split_env_list(value: Optional[str]) -> List[str]:
+    return [x.strip() for x in (value or "").split(",") if x.strip()]
+
+
+def _row_from_event(k: Dict[str, Any]) -> List[Any]:
+    """Поле 'k' kline-події → рядок у порядку STORE_COLUMNS."""
+    return [
+        int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]),
+        int(k["T"]), float(k.get("q", 0.0)), int(k.get("n", 0)),
+        float(k.get("V", 0.0)), float(k.get("Q", 0.0)),
+    ]
+
+
+class _BarRing:
+    """
+    Кільцевий буфер барів одного (symbol, interval).
+    Останній елемент може бути незакритим; повторний апдейт того ж open_time його замінює.
+    `synced=False` означає, що буфер треба добити з REST (старт, розрив, реконект).
+    `updated` — час останнього повідомлення стріму для цієї пари (бекфіл з REST його не рухає).
+    """
+    def __init__(self, capacity: int, step_ms: int) -> None:
+        self.rows: Deque[List[Any]] = deque(maxlen=max(1, int(capacity)))
+        self.step_ms = int(step_ms)
+        self.synced = False
+        self.updated = 0.0
+
+    def upsert(self, row: List[Any]) -> bool:
+        """Додає/оновлює бар. Повертає False для застарілого бару; розрив знімає `synced`."""
+        if not self.rows:
+            self.rows.append(row)
+            return True
+        last_open = self.rows[-1][0]
+        if row[0] == last_open:
+            self.rows[-1] = row
+            return True
+        if row[0] < last_open:
+            return False
+        if row[0] - last_open > self.step_ms:
+            self.synced = False
+        self.rows.append(row)
+        return True
+
+    def merge(self, rows: Iterable[List[Any]]) -> None:
+        """Зливає пачку барів (бекфіл) з поточним вмістом; рядки зі стріму мають пріоритет."""
+        by_open: Dict[int, List[Any]] = {int(r[0]): list(r) for r in rows}
+        for r in self.rows:
+            by_open[int(r[0])] = r
+        self.rows = deque((by_open[k] for k in sorted(by_open)), maxlen=self.rows.maxlen)
+
+    def frame(self, limit: int) -> pd.DataFrame:
+        rows = list(self.rows)[-max(1, int(limit)):]
+        return pd.DataFrame(rows, columns=STORE_COLUMNS)
+
+
+class StreamMarketDataProvider:
+    """
+    WebSocket-провайдер klines з кільцевими буферами.
+
+    Параметри:
+      symbols: перелік символів; None → ENV SYMBOLS (через кому) або symbol/ENV SYMBOL.
+      intervals: перелік інтервалів; None → ENV STREAM_INTERVALS або ENV INTERVAL ('1m').
+      capacity: розмір кільцевого буфера на (symbol, interval).
+      ws_base: базовий wss-URL; None → ENV BINANCE_WS_BASE або fstream.binance.com.
+      htf_intervals: старші інтервали, що агрегуються з найдрібнішого підписаного;
+        None → ENV STREAM_HTF_INTERVALS або 3m,5m,15m,1h,4h (+ cfg.HTF_INTERVAL).
+      rest: REST-клієнт для бекфілу (має get_klines_raw); None → HttpMarketData.
+      autostart: запускати фоновий потік при першому зверненні.
+    """
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        intervals: Optional[Iterable[str]] = None,
+        *,
+        capacity: int = 1000,
+        ws_base: Optional[str] = None,
+        htf_intervals: Optional[Iterable[str]] = None,
+        rest: Any = None,
+        autostart: bool = True,
+        cfg: Any = None,
+        symbol: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.log = logger or logging.getLogger("MarketStream")
+        syms = list(symbols or _split_env_list(os.environ.get("SYMBOLS")) or [symbol or os.environ.get("SYMBOL", "BTCUSDT")])
+        itvs = list(intervals or _split_env_list(os.environ.get("STREAM_INTERVALS")) or [os.environ.get("INTERVAL", "1m")])
+        self.symbols: List[str] = [s.upper().strip() for s in syms]
+        self.intervals: List[str] = [i.strip() for i in itvs]
+        self.capacity = max(1, int(capacity))
+        self.ws_base = (ws_base or os.environ.get("BINANCE_WS_BASE") or FUTURES_WS_BASE).rstrip("/")
+        self.rest = rest if rest is not None else _md.HttpMarketData(os.environ.get("BINANCE_FAPI_BASE", _md.FUTURES_BASE), logger=self.log)
+        self.autostart = bool(autostart)
+
+        self._rings: Dict[Tuple[str, str], _BarRing] = {
+            (s, i): _BarRing(self.capacity, _md.interval_to_ms(i)) for s in self.symbols for i in self.intervals
+        }
+        htf = list(htf_intervals if htf_intervals is not None
+                   else (_split_env_list(os.environ.get("STREAM_HTF_INTERVALS")) or DEFAULT_TARGETS))
+        cfg_htf = getattr(cfg, "HTF_INTERVAL", None)
+        if htf_intervals is None and cfg_htf and cfg_htf not in htf:
+            htf.append(str(cfg_htf))
+        self.base_interval = min(self.intervals, key=_md.interval_to_ms)
+        self._agg = BarAggregator(self.base_interval, [i for i in htf if i not in self.intervals], capacity=self.capacity)
+        self._listeners: List[Callable[[str, str, List[Any]], None]] = []
+        self._lock = threading.RLock()
+        self._resets = 0  # лічильник розривів: бекфіл, що зловив розрив посеред запиту, не вважається синхронним
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_message_ts: float = 0.0
+
+    # ---- Життєвий цикл ----
+
+    @property
+    def stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@kline_{i}" for s, i in self._rings)
+        return f"{self.ws_base}/stream?streams={streams}"
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MarketStream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        if _cassette.replay_into(self.stream_url, self.handle_message, self._stop):
+            return  # офлайн-сесія: ті самі повідомлення з касети замість мережі
+        try:
+            asyncio.run(self._consume())
+        except Exception as e:
+            self.log.error("Market stream thread stopped: %s", e, exc_info=True)
+
+    async def _consume(self) -> None:
+        try:
+            from websockets.asyncio.client import connect  # websockets>=14
+        except ImportError:  # pragma: no cover - старий layout
+            from websockets import connect  # type: ignore
+        handle = _cassette.record_ws(self.stream_url, self.handle_message)
+        delay = 0.5
+        while not self._stop.is_set():
+            try:
+                async with connect(self.stream_url, ping_interval=20, ping_timeout=20, max_size=2 ** 22) as ws:
+                    self.log.info("Market stream connected: %d streams", len(self._rings))
+                    delay = 0.5
+                    while not self._stop.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        handle(raw)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.log.warning("Market stream error: %s, reconnect in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                # Після розриву буфери могли пропустити бари — наступний get_klines добере з REST.
+                with self._lock:
+                    self._resets += 1
+                    for ring in self._rings.values():
+                        ring.synced = False
+                    self._agg.invalidate()
+
+    # ---- Обробка подій ----
+
+    def add_listener(self, fn: Callable[[str, str, List[Any]], None]) -> None:
+        """fn(symbol, interval, row) викликається на кожному закритому барі (row у порядку STORE_COLUMNS)."""
+        self._listeners.append(fn)
+
+    def handle_message(self, raw: Any) -> None:
+        """Приймає повідомлення combined-стріму (str/bytes/dict) і оновлює буфер."""
+        msg = json.loads(raw) if isinstance(raw, (str, bytes, bytearray)) else raw
+        data = msg.get("data", msg) if isinstance(msg, dict) else None
+        if not isinstance(data, dict) or data.get("e") != "kline":
+            return
+        k = data.get("k") or {}
+        key = (str(k.get("s") or data.get("s") or "").upper(), str(k.get("i", "")))
+        row = _row_from_event(k)
+        closed = bool(k.get("x"))
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                return
+            ring.upsert(row)
+            self.last_message_ts = ring.updated = time.time()
+            htf_closed: List[Tuple[str, List[Any]]] = []
+            if key[1] == self.base_interval:
+                htf_closed = self._agg.update(key[0], row, closed)
+                if not ring.synced:
+                    self._agg.invalidate(key[0])
+        done = ([(key[1], row)] if closed else []) + htf_closed
+        for itv, bar in done:
+            for fn in list(self._listeners):
+                try:
+                    fn(key[0], itv, bar)
+                except Exception as e:
+                    self.log.warning("Bar listener failed: %s", e)
+
+    def _backfill(self, key: Tuple[str, str], ring: _BarRing) -> None:
+        """REST-запит — поза self._lock (стрім не чекає мережу); під локом лише злиття в буфер."""
+        with self._lock:
+            resets = self._resets
+        frame = self.rest.get_klines_raw(key[0], key[1], limit=self.capacity)
+        with self._lock:
+            ring.merge(frame[STORE_COLUMNS].itertuples(index=False, name=None))
+            ring.synced = resets == self._resets
+        self.log.info("Backfilled %s %s from REST: %d bars", key[0], key[1], len(frame))
+
+    def _seed_htf(self, sym: str, itv: str) -> None:
+        """
+        Історія старшого інтервалу з REST (раз на старт/ресинк), поточний кошик — з базового буфера.
+        REST-запити — поза self._lock, як у _backfill; під локом лише засів агрегатора.
+        """
+        with self._lock:
+            resets = self._resets
+        base = self._rings[(sym, self.base_interval)]
+        if not base.synced:
+            self._backfill((sym, self.base_interval), base)
+        frame = self.rest.get_klines_raw(sym, itv, limit=self.capacity)
+        with self._lock:
+            self._agg.seed(sym, itv, frame[STORE_COLUMNS].itertuples(index=False, name=None), base.rows)
+            if resets != self._resets:
+                self._agg.invalidate(sym)  # розрив посеред засіву: наступний get_klines засіє знову
+        self.log.info("Seeded %s %s from REST: %d bars, aggregating from %s", sym, itv, len(frame), self.base_interval)
+
+    # ---- Публічний контракт MarketData ----
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 1000, **kwargs: Any) -> pd.DataFrame:
+        """
+        Останні `limit` барів з буфера (останній може бути незакритим), схема як у HttpMarketData.get_klines().
+        Старші інтервали з агрегатора — з базового стріму.
+        Запити з start_time/end_time/max_bars або по непідписаних парах ідуть у REST.
+        """
+        sym = (symbol or "").upper().strip()
+        itv = (interval or "").strip()
+        ring = self._rings.get((sym, itv))
+        aggregated = ring is None and sym in self.symbols and self._agg.supports(itv)
+        if (ring is None and not aggregated) or any(kwargs.get(k) for k in ("start_time", "end_time", "max_bars")):
+            return self.rest.get_klines(sym, itv, limit=limit, **kwargs)
+        if self.autostart:
+            self.start()
+        if aggregated:
+            with self._lock:
+                stale = not self._agg.is_synced(sym, itv) or not self._rings[(sym, self.base_interval)].synced
+            if stale:
+                self._seed_htf(sym, itv)
+            with self._lock:
+                frame = self._agg.frame(sym, itv, limit)
+            return _md._stable_frame(frame)
+        if not ring.synced:
+            self._backfill((sym, itv), ring)
+        with self._lock:
+            frame = ring.frame(limit)
+        return _md._stable_frame(frame)
+
+    def get_latest_price(self, symbol: str) -> float:
+        """Close поточного бару з буфера (найдрібніший інтервал), якщо стрім пари живий (< 5 с); інакше — REST."""
+        sym = (symbol or "").upper().strip()
+        with self._lock:
+            for itv in sorted(self.intervals, key=_md.interval_to_ms):
+                ring = self._rings.get((sym, itv))
+                if ring is not None and ring.rows and time.time() - ring.updated < 5.0:
+                    return float(ring.rows[-1][4])
+        return self.rest.get_latest_price(sym)
@@ -17,13 +17,14 @@ app.services.notifications
 
 import os
 import json
-import ssl
 import time
 import hmac
 import hashlib
-from urllib import request, parse
+from urllib import parse
 from typing import Dict, Any, Optional
 
+from core.exchange.transport import TRANSPORT
+
 BINANCE_FAPI_BASE = os.environ.get("BINANCE_FAPI_BASE", "https://fapi.binance.com")
 _API_KEY = os.environ.get("API_KEY", "")
 _API_SECRET = os.environ.get("API_SECRET", "")
@@ -54,7 +55,6 @@ def _sign_params(params: Dict[str, Any]) -> bytes:
 
 def _do(method: str, path: str, params: Dict[str, Any], *, signed: bool=True) -> Dict[str, Any]:
     url = BINANCE_FAPI_BASE.rstrip("/") + path
-    ctx = ssl.create_default_context()
     headers = _headers()
     data = None
     if method in ("POST", "DELETE"):
@@ -67,14 +67,14 @@ def _do(method: str, path: str, params: Dict[str, Any], *, signed: bool=True) ->
         else:
             qs = parse.urlencode(params)
             url += ("?" + qs)
-    req = request.Request(url, data=data, headers=headers, method=method)
     try:
-        with request.urlopen(req, context=ctx, timeout=15) as r:
-            raw = r.read().decode("utf-8")
-            try:
-                return json.loads(raw)
-            except Exception:
-                return {"raw": raw}
+        # Підписаний timestamp старіє — без повторів; ліміти/пул/429 обробляє транспорт.
+        r = TRANSPORT.request(method, url, data=data, headers=headers, timeout=15, retries=0)
+        raw = r.text
+        try:
+            return json.loads(raw)
+        except Exception:
+            return {"raw": raw}
     except Exception as e:
         err = {"error": str(e)}
         try:
@@ -7,6 +7,8 @@ from typing import Any, Dict, Callable, Optional
 
 import pandas as pd
 
+from core.bars import BarSeries
+
 # 1) Джерело дефолтних параметрів (підтримує обидві сигнатури: get_best_params() та get_best_params(name))
 try:
     from core.config.best_params import get_best_params  # type: ignore
@@ -125,11 +127,12 @@ class SignalService:
     - Підтягує дефолтні параметри (best_params) і зливає з params.
     - Викликає стратегію core.logic.<name>.decide або core.logic.<name>_signal.
     - Повертає decision у стабільному форматі (_normalize_decision).
+    - df: pandas.DataFrame або core.bars.BarSeries (стратегії бачать ті ж колонки 'close'/'high'/...).
     """
     def __init__(self, logger: Optional[logging.Logger] = None) -> None:
         self.log = logger or logging.getLogger("SignalService")
 
-    def decide(self, df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    def decide(self, df: pd.DataFrame | BarSeries, params: Dict[str, Any]) -> Dict[str, Any]:
         # Строгий контракт: лише dict
         if not isinstance(params, dict):
             raise TypeError("SignalService.decide expects params: dict")
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Бари з потоку угод (aggTrade): time-бари з секундною роздільністю, volume- і dollar-бари.
+
+Призначення:
+  - TradeBarBuilder: одна угода → O(1) апдейт поточного бару; бар живе у BarSeries
+    (той самий контейнер, що читають стратегії/гейти/paper), закриті бари повертаються з add().
+  - TradeBarStream: підписка на `<symbol>@aggTrade` (combined-стрім, фоновий потік з asyncio,
+    як MarketStream) або replay() записаного файлу угод; закриті бари пачками пишуться у KlineStore.
+  - Годинник — час угод зі стріму (спільний для всіх символів): щойно він минає close_time
+    time-бару тихого символу, бар закривається без його нової угоди (і в касетному replay);
+    коли мовчить увесь стрім — за настінним часом після секунди тиші.
+
+Специфікація бару (spec):
+  "1s", "5s", "15s", "30s", "1m", ...  — time-бари (вирівняні по epoch; секунди без угод бару не дають)
+  "v100"       — volume-бар: закривається, коли обсяг (base) досягає 100
+  "d1000000"   — dollar-бар: закривається, коли обіг (quote) досягає 1 000 000
+Угода, що перетинає поріг, лишається у своєму барі цілком (без розщеплення).
+У сховищі spec виступає як interval: <root>/<SYMBOL>/<spec>/<day>.parquet.
+
+Рядок бару — у порядку STORE_COLUMNS; taker buy = угоди з m=false (покупець — тейкер).
+
+Публічний API:
+  def parse_bar_spec(spec: str) -> tuple[str, float]        # ("time", step_ms) | ("volume", qty) | ("dollar", quote)
+  class TradeBarBuilder:
+      def __init__(self, spec: str, *, capacity: int = 1000)
+      def add(self, ts_ms: int, price: float, qty: float, buyer_maker: bool = False) -> list | None
+      def close_due(self, now_ms: int) -> list | None      # закрити time-бар без нової угоди
+  class TradeBarStream:
+      def __init__(self, symbols=None, specs=None, *, capacity=1000, ws_base=None, store=None, flush_bars=100, logger=None)
+      def start(self) / stop(self) / flush(self)
+      def handle_message(self, raw) -> None
+      def replay(self, path, symbol: str) -> int
+      def bars(self, symbol: str, spec: str) -> BarSeries
+      def add_listener(self, fn: Callable[[str, str, list], None]) -> None   # виклик на закритті бару
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.services.kline_store import STORE_COLUMNS, KlineStore
+from app.services.market_stream import FUTURES_WS_BASE, _split_env_list
+from core.bars import BarSeries
+from core.exchange import cassette as _cassette
+
+_SPEC_RE = re.compile(r"^(?:(?P<n>\d+)(?P<unit>[smh])|(?P<kind>[vd])(?P<thr>\d+(?:\.\d+)?(?:e\d+)?))$")
+_UNIT_MS = {"s": 1_000, "m": 60_000, "h": 3_600_000}
+
+# Колонки архівів aggTrades з data.binance.vision
+_AGG_CSV_COLUMNS = ["agg_trade_id", "price", "quantity", "first_trade_id", "last_trade_id", "transact_time", "is_buyer_maker"]
+
+
+def parse_bar_spec(spec: str) -> Tuple[str, float]:
+    m = _SPEC_RE.match((spec or "").strip())
+    if not m:
+        raise ValueError(f"bad bar spec: {spec!r} (expected e.g. '5s', '1m', 'v100', 'd1000000')")
+    if m.group("unit"):
+        step = int(m.group("n")) * _UNIT_MS[m.group("unit")]
+        if step <= 0:
+            raise ValueError(f"bad bar spec: {spec!r}")
+        return "time", float(step)
+    thr = float(m.group("thr"))
+    if thr <= 0:
+        raise ValueError(f"bad bar spec: {spec!r}")
+    return ("volume" if m.group("kind") == "v" else "dollar"), thr
+
+
+class TradeBarBuilder:
+    """
+    Будує бари одного spec з угод одного символу.
+
+    Поточний бар — список у порядку STORE_COLUMNS, оновлюється на місці;
+    у BarSeries він upsert-иться тим самим open_time, тож останній бар серії може бути незакритим.
+    """
+    def __init__(self, spec: str, *, capacity: int = 1000) -> None:
+        self.spec = spec
+        self.kind, self.threshold = parse_bar_spec(spec)
+        self.step = int(self.threshold) if self.kind == "time" else 0
+        self.bars = BarSeries(capacity)
+        self.current: Optional[List[Any]] = None
+        self._fill = 0.0          # накопичений обсяг/обіг для volume/dollar-барів
+        self._last_open = -1
+
+    def _open(self, open_time: int, price: float) -> None:
+        # open_time строго зростає (BarSeries); кілька volume-барів в одну мс зсуваються на 1 мс.
+        # time-бари не зсуваються: add() відкидає угоди вже закритих інтервалів
+        open_time = int(open_time) if self.step else max(int(open_time), self._last_open + 1)
+        self._last_open = open_time
+        close_time = open_time + self.step - 1 if self.step else open_time
+        self.current = [open_time, price, price, price, price, 0.0, close_time, 0.0, 0, 0.0, 0.0]
+        self._fill = 0.0
+
+    def add(self, ts_ms: int, price: float, qty: float, buyer_maker: bool = False) -> Optional[List[Any]]:
+        """Враховує угоду; повертає щойно закритий бар або None."""
+        ts, price, qty = int(ts_ms), float(price), float(qty)
+        closed: Optional[List[Any]] = None
+        if self.step:
+            start = ts - ts % self.step
+            if self.current is not None and start > self.current[0]:
+                closed = self.current
+                self.current = None
+            if start < (self.current[0] if self.current is not None else self._last_open + 1):
+                return closed  # запізніла угода з уже закритого бару (зокрема закритого close_due())
+            if self.current is None:
+                self._open(start, price)
+        elif self.current is None:
+            self._open(ts, price)
+        bar = self.current
+        assert bar is not None
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        bar[4] = price
+        quote = price * qty
+        bar[5] += qty
+        bar[7] += quote
+        bar[8] += 1
+        if not buyer_maker:
+            bar[9] += qty
+            bar[10] += quote
+        if not self.step:
+            bar[6] = max(bar[6], ts)
+        self.bars.upsert(bar[0], bar[1], bar[2], bar[3], bar[4], bar[5])
+        if not self.step:
+            self._fill += qty if self.kind == "volume" else quote
+            if self._fill >= self.threshold:
+                closed, self.current = bar, None
+        return closed
+
+    def close_due(self, now_ms: int) -> Optional[List[Any]]:
+        """Закриває поточний time-бар, якщо його час минув (для тихого ринку без нових угод)."""
+        if self.step and self.current is not None and int(now_ms) > self.current[6]:
+            closed, self.current = self.current, None
+            return closed
+        return None
+
+
+class TradeBarStream:
+    """
+    aggTrade-стрім → бари для кількох символів і spec.
+
+    Параметри:
+      symbols: перелік символів; None → ENV SYMBOLS або ENV SYMBOL.
+      specs: перелік spec; None → ENV TRADE_BAR_SPECS або '5s'.
+      capacity: розмір BarSeries на (symbol, spec).
+      ws_base: базовий wss-URL; None → ENV BINANCE_WS_BASE або fstream.binance.com.
+      store: KlineStore для закритих барів (None — лише в пам'яті).
+      flush_bars: скільки закритих барів накопичувати перед записом у store.
+    """
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        specs: Optional[Iterable[str]] = None,
+        *,
+        capacity: int = 1000,
+        ws_base: Optional[str] = None,
+        store: Optional[KlineStore] = None,
+        flush_bars: int = 100,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.log = logger or logging.getLogger("TradeBars")
+        syms = list(symbols or _split_env_list(os.environ.get("SYMBOLS")) or [os.environ.get("SYMBOL", "BTCUSDT")])
+        self.symbols: List[str] = [s.upper().strip() for s in syms]
+        self.specs: List[str] = list(specs or _split_env_list(os.environ.get("TRADE_BAR_SPECS")) or ["5s"])
+        self.ws_base = (ws_base or os.environ.get("BINANCE_WS_BASE") or FUTURES_WS_BASE).rstrip("/")
+        self.store = store
+        self.flush_bars = max(1, int(flush_bars))
+        self._builders: Dict[Tuple[str, str], TradeBarBuilder] = {
+            (s, sp): TradeBarBuilder(sp, capacity=capacity) for s in self.symbols for sp in self.specs
+        }
+        self._pending: Dict[Tuple[str, str], List[List[Any]]] = {}
+        self._clock_ms = 0                      # найбільший час угоди (годинник біржі)
+        self._next_due: Optional[int] = None    # найближчий close_time серед відкритих time-барів
+        self._listeners: List[Callable[[str, str, List[Any]], None]] = []
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---- Життєвий цикл ----
+
+    @property
+    def stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@aggTrade" for s in self.symbols)
+        return f"{self.ws_base}/stream?streams={streams}"
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TradeBars", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        if _cassette.replay_into(self.stream_url, self.handle_message, self._stop):
+            return  # офлайн-сесія: ті самі повідомлення з касети замість мережі
+        try:
+            asyncio.run(self._consume())
+        except Exception as e:
+            self.log.error("Trade bar stream thread stopped: %s", e, exc_info=True)
+
+    async def _consume(self) -> None:
+        try:
+            from websockets.asyncio.client import connect  # websockets>=14
+        except ImportError:  # pragma: no cover - старий layout
+            from websockets import connect  # type: ignore
+        handle = _cassette.record_ws(self.stream_url, self.handle_message)
+        delay = 0.5
+        while not self._stop.is_set():
+            try:
+                async with connect(self.stream_url, ping_interval=20, ping_timeout=20, max_size=2 ** 22) as ws:
+                    self.log.info("Trade bar stream connected: %d symbols", len(self.symbols))
+                    delay = 0.5
+                    while not self._stop.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            self._close_due()
+                            continue
+                        handle(raw)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.log.warning("Trade bar stream error: %s, reconnect in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    # ---- Обробка угод ----
+
+    def add_listener(self, fn: Callable[[str, str, List[Any]], None]) -> None:
+        """fn(symbol, spec, row) викликається на кожному закритому барі (row у порядку STORE_COLUMNS)."""
+        self._listeners.append(fn)
+
+    def add_trade(self, symbol: str, ts_ms: int, price: float, qty: float, buyer_maker: bool = False) -> None:
+        sym = symbol.upper()
+        if sym not in self.symbols:
+            return
+        done: List[Tuple[str, List[Any]]] = []
+        with self._lock:
+            for spec in self.specs:
+                b = self._builders[(sym, spec)]
+                row = b.add(ts_ms, price, qty, buyer_maker)
+                if row is not None:
+                    done.append((spec, row))
+                if b.step and b.current is not None and (self._next_due is None or b.current[6] < self._next_due):
+                    self._next_due = b.current[6]
+            self._clock_ms = max(self._clock_ms, int(ts_ms))
+            sweep = self._next_due is not None and self._clock_ms > self._next_due
+        self._emit(sym, done)
+        if sweep:  # годинник минув close_time чийогось бару: закриваємо бари символів без угод
+            self._close_due(self._clock_ms)
+
+    def handle_message(self, raw: Any) -> None:
+        """Приймає повідомлення combined-стріму aggTrade (str/bytes/dict)."""
+        msg = json.loads(raw) if isinstance(raw, (str, bytes, bytearray)) else raw
+        data = msg.get("data", msg) if isinstance(msg, dict) else None
+        if not isinstance(data, dict) or data.get("e") != "aggTrade":
+            return
+        self.add_trade(str(data.get("s", "")), int(data["T"]), float(data["p"]), float(data["q"]), bool(data.get("m")))
+
+    def _close_due(self, now_ms: Optional[int] = None) -> None:
+        now = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        with self._lock:
+            done = [(key, row) for key, b in self._builders.items() for row in [b.close_due(now)] if row is not None]
+            self._next_due = min((b.current[6] for b in self._builders.values() if b.step and b.current is not None),
+                                 default=None)
+        for (sym, spec), row in done:
+            self._emit(sym, [(spec, row)])
+
+    def _emit(self, sym: str, done: List[Tuple[str, List[Any]]]) -> None:
+        for spec, row in done:
+            if self.store is not None:
+                with self._lock:
+                    pending = self._pending.setdefault((sym, spec), [])
+                    pending.append(row)
+                    if len(pending) >= self.flush_bars:
+                        self._flush_key((sym, spec))
+            for fn in list(self._listeners):
+                try:
+                    fn(sym, spec, row)
+                except Exception as e:
+                    self.log.warning("Trade bar listener failed: %s", e)
+
+    def _flush_key(self, key: Tuple[str, str]) -> None:
+        rows = self._pending.pop(key, None)
+        if rows and self.store is not None:
+            self.store.write(key[0], key[1], pd.DataFrame(rows, columns=STORE_COLUMNS))
+
+    def flush(self) -> None:
+        """Пише у store всі накопичені закриті бари."""
+        with self._lock:
+            for key in list(self._pending):
+                self._flush_key(key)
+
+    # ---- Replay записаних угод ----
+
+    def replay(self, path: str | Path, symbol: str, *, chunk_rows: int = 200_000) -> int:
+        """
+        Проганяє файл угод через ті самі білдери: архів aggTrades (CSV, з заголовком чи без)
+        або JSONL з сирими повідомленнями стріму. Повертає кількість угод.
+        """
+        p = Path(path)
+        n = 0
+        if p.suffix in (".jsonl", ".json"):
+            with open(p, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        self.handle_message(line)
+                        n += 1
+        else:
+            with open(p, "r", encoding="utf-8") as fh:
+                header = 0 if not fh.readline()[:1].isdigit() else None
+            reader = pd.read_csv(p, header=header, names=_AGG_CSV_COLUMNS, usecols=range(len(_AGG_CSV_COLUMNS)),
+                                 chunksize=max(1, int(chunk_rows)))
+            for chunk in reader:
+                ts = chunk["transact_time"].to_numpy("int64")
+                ts = ts // 1000 if ts.size and ts[0] > 10 ** 14 else ts  # мікросекунди → ms
+                maker = chunk["is_buyer_maker"].astype(str).str.lower().eq("true").to_numpy()
+                for t, px, q, m in zip(ts.tolist(), chunk["price"].tolist(), chunk["quantity"].tolist(), maker.tolist()):
+                    self.add_trade(symbol, t, px, q, m)
+                n += len(chunk)
+        self.flush()
+        return n
+
+    # ---- Доступ до барів ----
+
+    def bars(self, symbol: str, spec: str) -> BarSeries:
+        """BarSeries для (symbol, spec); останній бар може бути незакритим."""
+        return self._builders[(symbol.upper(), spec)].bars
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Record/replay cassettes for HTTP and WebSocket traffic (deterministic offline sessions).
+
+While a cassette is active, the shared transport (core.exchange.transport) records every
+final HTTP outcome (2xx response or HTTP error) — which covers market_data._http_get_json,
+notifications._do, the futures client, prices and depth snapshots — and the stream clients
+(MarketStream, TradeBars, DepthStream) record every raw WebSocket message.
+In replay mode the same calls are answered from the file, with no network.
+
+File: JSON lines (gzip when the path ends with .gz), one interaction per line:
+  {"k": "http", "t": <s since start>, "m": "GET", "u": <url>, "d": <form body>, "s": 200,
+   "h": {...}, "b": <body text> | "b64": <base64 body>, "ms": <elapsed ms>}
+  {"k": "ws", "t": <s since start>, "u": <stream url>, "b": <raw message>}
+Secrets never reach the file: signature/timestamp/recvWindow are dropped from URLs and
+bodies, and request headers (API key) are not recorded.
+
+Replay matching: HTTP by (method, url, body) without the volatile signed params, FIFO per
+key; once a key's recordings are used up the last one is repeated (strict=True raises
+CassetteMiss instead). Unknown keys raise CassetteMiss.
+Pace: "fast" (no waits), "real" (original HTTP latency and gaps between WS messages) or a
+speed multiplier (2.0 = twice as fast as recorded).
+
+Public API:
+  class Cassette: record_http(), record_ws(), http_response(), ws_messages(), close()
+  class CassetteMiss(LookupError)
+  use_cassette(path, mode="replay", pace="fast", strict=False)  # context manager
+  install(cassette) / uninstall() / active() -> Cassette | None
+  replay_into(stream_url, handler, stop) -> bool   # stream clients: replay instead of connecting
+  record_ws(stream_url, handler) -> handler        # stream clients: record raw messages, then handle
+  ENV: CASSETTE_PATH, CASSETTE_MODE=record|replay, CASSETTE_PACE=fast|real|<speed>
+"""
+
+import atexit
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+log = logging.getLogger("Cassette")
+
+# Signed-request params: change on every call and must not be stored.
+_VOLATILE = frozenset({"signature", "timestamp", "recvWindow"})
+
+
+class CassetteMiss(LookupError):
+    """Replay has no recording for the request."""
+
+
+def _strip_query(query: str) -> str:
+    pairs = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in _VOLATILE]
+    return urlencode(sorted(pairs))
+
+
+def _clean_url(url: str) -> str:
+    p = urlsplit(url)
+    q = _strip_query(p.query)
+    return f"{p.scheme}://{p.netloc}{p.path}" + (f"?{q}" if q else "")
+
+
+def _clean_body(data: Optional[bytes]) -> str:
+    if not data:
+        return ""
+    text = data.decode("utf-8", errors="replace")
+    return _strip_query(text) if "=" in text else text
+
+
+def _parse_pace(pace: Any) -> float:
+    """Speed multiplier; 0 means as fast as possible."""
+    if pace in (None, "", "fast"):
+        return 0.0
+    if pace == "real":
+        return 1.0
+    return max(0.0, float(pace))
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """
+    Parameters:
+      path: cassette file (.jsonl or .jsonl.gz).
+      mode: "record" (truncates the file) or "replay".
+      pace: "fast", "real" or a speed multiplier (replay only).
+      strict: replay raises CassetteMiss when a key's recordings are used up.
+    """
+
+    def __init__(self, path: str | Path, mode: str = "replay", *, pace: Any = "fast", strict: bool = False) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"cassette mode must be 'record' or 'replay', got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = _parse_pace(pace)
+        self.strict = bool(strict)
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._fh: Optional[IO[str]] = None
+        self._http: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._ws: List[Dict[str, Any]] = []
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = _open(self.path, "w")
+        else:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # ---- record ----
+
+    def _write(self, item: Dict[str, Any]) -> None:
+        item["t"] = round(time.monotonic() - self._t0, 6)
+        line = json.dumps(item, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            if self._fh is not None:
+                self._fh.write(line + "\n")
+
+    def record_http(self, method: str, url: str, data: Optional[bytes], status: int,
+                    headers: Dict[str, str], body: bytes, elapsed_ms: float = 0.0) -> None:
+        item: Dict[str, Any] = {"k": "http", "m": method.upper(), "u": _clean_url(url), "d": _clean_body(data),
+                                "s": int(status), "h": dict(headers), "ms": round(float(elapsed_ms), 3)}
+        try:
+            item["b"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            item["b64"] = base64.b64encode(body).decode("ascii")
+        self._write(item)
+
+    def record_ws(self, stream_url: str, raw: Any) -> None:
+        if isinstance(raw, (bytes, bytearray)):
+            raw = bytes(raw).decode("utf-8", errors="replace")
+        self._write({"k": "ws", "u": stream_url, "b": raw if isinstance(raw, str) else json.dumps(raw)})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    # ---- replay ----
+
+    def _load(self) -> None:
+        with _open(self.path, "r") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.get("k") == "http":
+                    self._http[(item["m"], item["u"], item.get("d", ""))].append(item)
+                elif item.get("k") == "ws":
+                    self._ws.append(item)
+        log.info("Cassette %s: %d http keys, %d ws messages", self.path, len(self._http), len(self._ws))
+
+    def http_response(self, method: str, url: str, data: Optional[bytes] = None) -> Tuple[int, Dict[str, str], bytes, float]:
+        """Recorded (status, headers, body, elapsed_ms) for the request; sleeps the recorded latency at real pace."""
+        key = (method.upper(), _clean_url(url), _clean_body(data))
+        with self._lock:
+            queue = self._http.get(key)
+            if queue:
+                item = queue.popleft()
+                self._last[key] = item
+            elif key in self._last and not self.strict:
+                item = self._last[key]
+            else:
+                raise CassetteMiss(f"no recording for {key[0]} {key[1]}" + (f" [{key[2]}]" if key[2] else ""))
+        if self.speed > 0 and item.get("ms"):
+            time.sleep(float(item["ms"]) / 1000.0 / self.speed)
+        body = base64.b64decode(item["b64"]) if "b64" in item else str(item.get("b", "")).encode("utf-8")
+        return int(item["s"]), dict(item.get("h") or {}), body, float(item.get("ms") or 0.0)
+
+    def ws_messages(self, stream_url: Optional[str] = None, stop: Optional[threading.Event] = None) -> Iterator[str]:
+        """Recorded raw messages of one stream URL (all when None), paced like the recording."""
+        prev: Optional[float] = None
+        for item in self._ws:
+            if stream_url is not None and item.get("u") != stream_url:
+                continue
+            if stop is not None and stop.is_set():
+                return
+            t = float(item.get("t") or 0.0)
+            if self.speed > 0 and prev is not None and t > prev:
+                time.sleep((t - prev) / self.speed)
+            prev = t
+            yield item["b"]
+
+
+# ---- process-wide cassette ----
+
+_ACTIVE: Optional[Cassette] = None
+
+
+def active() -> Optional[Cassette]:
+    return _ACTIVE
+
+
+def install(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """Makes `cassette` the process-wide one; returns the previous one."""
+    global _ACTIVE
+    prev, _ACTIVE = _ACTIVE, cassette
+    return prev
+
+
+def uninstall() -> None:
+    cas = install(None)
+    if cas is not None:
+        cas.close()
+
+
+def replay_into(stream_url: str, handler: Callable[[Any], None], stop: threading.Event) -> bool:
+    """
+    Feeds the active replay cassette's messages for `stream_url` to `handler`, then blocks until
+    `stop` is set (so a restarted client does not replay the file twice). Returns False, doing
+    nothing, when no cassette is replaying — the caller connects to the network as usual.
+    """
+    cas = active()
+    if cas is None or not cas.replaying:
+        return False
+    for raw in cas.ws_messages(stream_url, stop):
+        handler(raw)
+    stop.wait()
+    return True
+
+
+def record_ws(stream_url: str, handler: Callable[[Any], None]) -> Callable[[Any], None]:
+    """Wraps `handler` so every raw message is written to the active recording cassette first."""
+    def _handle(raw: Any) -> None:
+        cas = active()
+        if cas is not None and cas.recording:
+            cas.record_ws(stream_url, raw)
+        handler(raw)
+    return _handle
+
+
+@contextmanager
+def use_cassette(path: str | Path, mode: str = "replay", *, pace: Any = "fast", strict: bool = False) -> Iterator[Cassette]:
+    cas = Cassette(path, mode, pace=pace, strict=strict)
+    prev = install(cas)
+    try:
+        yield cas
+    finally:
+        install(prev)
+        cas.close()
+
+
+def _from_env() -> None:
+    path = os.environ.get("CASSETTE_PATH")
+    if path:
+        install(Cassette(path, os.environ.get("CASSETTE_MODE", "replay").strip().lower(),
+                         pace=os.environ.get("CASSETTE_PACE", "fast").strip().lower()))
+        atexit.register(uninstall)
+
+
+_from_env()
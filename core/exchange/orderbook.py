@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Local L2 order book mirror (Binance USDT-M futures depth).
+
+Each side keeps a sorted price list (bisect) plus a {price: qty} dict, so a diff level
+is one dict write plus an O(log n) search (an insertion/removal is a memmove of at most
+a few thousand floats), and walking the book from the touch is a plain list scan.
+
+Sync follows the futures procedure:
+  1. buffer `<symbol>@depth@100ms` events, fetch `/fapi/v1/depth` (lastUpdateId);
+  2. drop events with u < lastUpdateId;
+  3. the first applied event must have U <= lastUpdateId <= u;
+  4. every next event must have pu == previous u, otherwise the book is out of sync
+     and has to be re-snapshotted.
+
+Query helpers:
+  vwap(side, qty)           -> (avg price, filled qty) of a market order walking the book
+  depth_within(side, bps)   -> (qty, quote notional) resting within `bps` of the touch
+
+Public API:
+  class OrderBook:
+      apply_snapshot(last_update_id, bids, asks), apply_event(event) -> bool
+      best_bid(), best_ask(), mid(), spread_bps(), vwap(), depth_within(), levels(side, n)
+  class OrderBookSyncError(RuntimeError)
+  fetch_snapshot(symbol, base_url=FUTURES_BASE, limit=1000) -> dict
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from core.exchange.transport import TRANSPORT
+
+FUTURES_BASE = "https://fapi.binance.com"
+
+
+class OrderBookSyncError(RuntimeError):
+    """The diff stream no longer continues the local book (pu != previous u)."""
+
+
+class _Side:
+    """
+    One side of the book. Prices are stored as sort keys (asks: price, bids: -price),
+    so index 0 is always the touch.
+    """
+
+    __slots__ = ("sign", "keys", "qty")
+
+    def __init__(self, sign: float) -> None:
+        self.sign = sign
+        self.keys: List[float] = []
+        self.qty: Dict[float, float] = {}
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.qty.clear()
+
+    def set(self, price: float, qty: float) -> None:
+        key = self.sign * price
+        if qty > 0.0:
+            if key not in self.qty:
+                insort(self.keys, key)
+            self.qty[key] = qty
+        elif key in self.qty:
+            del self.qty[key]
+            i = bisect_left(self.keys, key)
+            del self.keys[i]
+
+    def best(self) -> Optional[float]:
+        return self.sign * self.keys[0] if self.keys else None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class OrderBook:
+    """
+    Parameters:
+      symbol: instrument, for messages only.
+      max_levels: levels kept per side after a snapshot/update (deep tails are trimmed).
+    """
+
+    def __init__(self, symbol: str = "", *, max_levels: int = 5000) -> None:
+        self.symbol = symbol.upper()
+        self.max_levels = max(1, int(max_levels))
+        self.bids = _Side(-1.0)
+        self.asks = _Side(1.0)
+        self.last_update_id = 0
+        self.synced = False
+        self.event_time = 0
+        self._first = True
+        self._lock = threading.RLock()
+
+    # ---- sync ----
+
+    def apply_snapshot(self, last_update_id: int, bids: Iterable[Sequence[Any]], asks: Iterable[Sequence[Any]]) -> None:
+        """Loads a REST snapshot; diff events must continue from `last_update_id`."""
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            for px, q in bids:
+                self.bids.set(float(px), float(q))
+            for px, q in asks:
+                self.asks.set(float(px), float(q))
+            self.last_update_id = int(last_update_id)
+            self.synced = True
+            self._first = True
+
+    def apply_event(self, event: Mapping[str, Any]) -> bool:
+        """
+        Applies one depthUpdate event (keys U, u, pu, b, a, E).
+        Returns False for an event older than the book; raises OrderBookSyncError on a sequence break.
+        """
+        U, u = int(event["U"]), int(event["u"])
+        with self._lock:
+            if not self.synced:
+                raise OrderBookSyncError(f"{self.symbol}: no snapshot")
+            if u < self.last_update_id:
+                return False
+            if self._first:
+                if U > self.last_update_id:
+                    self.synced = False
+                    raise OrderBookSyncError(f"{self.symbol}: first event U={U} > lastUpdateId={self.last_update_id}")
+            elif int(event.get("pu", self.last_update_id)) != self.last_update_id:
+                self.synced = False
+                raise OrderBookSyncError(f"{self.symbol}: pu={event.get('pu')} != last u={self.last_update_id}")
+            for px, q in event.get("b", ()):
+                self.bids.set(float(px), float(q))
+            for px, q in event.get("a", ()):
+                self.asks.set(float(px), float(q))
+            self._trim()
+            self.last_update_id = u
+            self.event_time = int(event.get("E", 0) or 0)
+            self._first = False
+            return True
+
+    def _trim(self) -> None:
+        for side in (self.bids, self.asks):
+            extra = len(side.keys) - self.max_levels
+            if extra > 0:
+                for key in side.keys[-extra:]:
+                    del side.qty[key]
+                del side.keys[-extra:]
+
+    # ---- queries ----
+
+    def _side(self, side: str) -> _Side:
+        """Book side a market order of `side` consumes: BUY/LONG → asks, SELL/SHORT → bids."""
+        s = str(side).upper()
+        if s in ("BUY", "LONG"):
+            return self.asks
+        if s in ("SELL", "SHORT"):
+            return self.bids
+        raise ValueError(f"bad side: {side!r}")
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        return (a + b) / 2.0 if a is not None and b is not None else None
+
+    def spread_bps(self) -> Optional[float]:
+        b, a = self.bids.best(), self.asks.best()
+        return (a - b) / ((a + b) / 2.0) * 10_000.0 if a is not None and b is not None else None
+
+    def levels(self, side: str, n: int = 10) -> List[Tuple[float, float]]:
+        """Top `n` (price, qty) levels a market order of `side` would hit."""
+        s = self._side(side)
+        with self._lock:
+            return [(s.sign * k, s.qty[k]) for k in s.keys[:max(0, int(n))]]
+
+    def vwap(self, side: str, qty: float) -> Tuple[Optional[float], float]:
+        """
+        Average fill price of a market order for `qty` walking the book, and the qty actually
+        available. (None, 0.0) on an empty side; filled < qty means the book is too thin.
+        """
+        s = self._side(side)
+        want = float(qty)
+        filled = notional = 0.0
+        with self._lock:
+            for key in s.keys:
+                take = min(s.qty[key], want - filled)
+                filled += take
+                notional += take * s.sign * key
+                if filled >= want:
+                    break
+        return (notional / filled if filled > 0 else None), filled
+
+    def depth_within(self, side: str, bps: float) -> Tuple[float, float]:
+        """(qty, quote notional) resting within `bps` of the touch on the side `side` would consume."""
+        s = self._side(side)
+        qty = notional = 0.0
+        with self._lock:
+            if not s.keys:
+                return 0.0, 0.0
+            # keys grow away from the touch on both sides
+            limit = s.keys[0] + abs(s.keys[0]) * float(bps) / 10_000.0
+            for key in s.keys:
+                if key > limit:
+                    break
+                q = s.qty[key]
+                qty += q
+                notional += q * s.sign * key
+        return qty, notional
+
+    def __repr__(self) -> str:
+        return (f"OrderBook({self.symbol}, bid={self.best_bid()}, ask={self.best_ask()}, "
+                f"levels={len(self.bids)}/{len(self.asks)}, u={self.last_update_id})")
+
+
+def fetch_snapshot(symbol: str, base_url: str = FUTURES_BASE, limit: int = 1000) -> Dict[str, Any]:
+    """REST depth snapshot: {'lastUpdateId', 'bids', 'asks'} (weight from the shared governor)."""
+    data, _ = TRANSPORT.get_json(f"{base_url.rstrip('/')}/fapi/v1/depth", {"symbol": symbol.upper(), "limit": int(limit)}, timeout=10)
+    if not isinstance(data, dict) or "lastUpdateId" not in data:
+        raise RuntimeError(f"unexpected depth payload: {str(data)[:200]}")
+    return data
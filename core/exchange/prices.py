@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Whole-market price snapshot.
+
+One all-symbols `/ticker/price` request (futures weight 2) refreshes an in-memory
+{SYMBOL: price} dict; every lookup after that is an O(1) dict read until the snapshot
+is older than the staleness bound. Sizing N orders in one tick costs one request, not N.
+
+- max_age: explicit staleness bound (ENV PRICE_SNAPSHOT_MAX_AGE_SEC, default 2s);
+  get(symbol, max_age=0) forces a live refresh.
+- Concurrent callers that find the snapshot stale share one refresh.
+- start(interval) keeps it warm from a daemon thread (optional).
+- Symbols missing from the snapshot fall back to a single-symbol request.
+
+Public API:
+  class PriceSnapshot: get(), refresh(), age(), prices(), start(), stop()
+  snapshot_for(base_url) -> PriceSnapshot   # one shared snapshot per REST base
+  latest_price(symbol, base_url=FUTURES_BASE, max_age=None) -> float
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core.exchange.transport import TRANSPORT
+
+FUTURES_BASE = "https://fapi.binance.com"
+
+log = logging.getLogger("PriceSnapshot")
+
+
+def _price_path(base_url: str) -> str:
+    return "/fapi/v1/ticker/price" if "fapi" in (base_url or "").lower() else "/api/v3/ticker/price"
+
+
+class PriceSnapshot:
+    """
+    Parameters:
+      base_url: REST base; futures/spot path is picked like in HttpMarketData.
+      max_age: default staleness bound, seconds.
+      fetch: callable(url, params) -> (json, headers); defaults to the shared transport.
+    """
+
+    def __init__(self, base_url: str = FUTURES_BASE, *, max_age: Optional[float] = None,
+                 fetch: Optional[Callable[..., Any]] = None, logger: Optional[logging.Logger] = None) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.url = self.base_url + _price_path(self.base_url)
+        self.max_age = float(max_age if max_age is not None else os.environ.get("PRICE_SNAPSHOT_MAX_AGE_SEC", "2"))
+        self._fetch = fetch or (lambda url, params: TRANSPORT.get_json(url, params, timeout=10))
+        self.log = logger or log
+        self._prices: Dict[str, float] = {}
+        self._stamp = 0.0           # monotonic time of the last successful refresh
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.single_fetches = 0
+
+    def age(self) -> float:
+        """Seconds since the last successful refresh (inf if never)."""
+        return time.monotonic() - self._stamp if self._stamp else float("inf")
+
+    def prices(self) -> Dict[str, float]:
+        return dict(self._prices)
+
+    def refresh(self) -> None:
+        """Fetches the all-symbols ticker and swaps the dict in one assignment."""
+        data, _ = self._fetch(self.url, {})
+        if not isinstance(data, list):
+            raise RuntimeError(f"unexpected ticker payload: {type(data)}")
+        fresh: Dict[str, float] = {}
+        for item in data:
+            try:
+                fresh[str(item["symbol"])] = float(item["price"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        self._prices = fresh
+        self._stamp = time.monotonic()
+        self.refreshes += 1
+
+    def _ensure_fresh(self, max_age: float) -> None:
+        if self.age() <= max_age:
+            return
+        with self._refresh_lock:
+            # another caller may have refreshed while we waited for the lock
+            if self.age() <= max_age:
+                return
+            self.refresh()
+
+    def get(self, symbol: str, max_age: Optional[float] = None) -> float:
+        """Price for `symbol` no older than `max_age` seconds (default: self.max_age)."""
+        sym = (symbol or "").upper().strip()
+        if not sym:
+            raise ValueError("symbol must be non-empty")
+        self._ensure_fresh(self.max_age if max_age is None else float(max_age))
+        px = self._prices.get(sym)
+        if px is not None:
+            return px
+        # Not in the snapshot (new listing / spot-only symbol): one live request.
+        self.single_fetches += 1
+        data, _ = self._fetch(self.url, {"symbol": sym})
+        if isinstance(data, dict) and "price" in data:
+            return float(data["price"])
+        raise RuntimeError(f"unexpected price payload: {data!r}")
+
+    # ---- background refresh ----
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """Refreshes every `interval` seconds (default: max_age / 2) from a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        period = max(0.2, float(interval if interval is not None else self.max_age / 2.0))
+        self._stop.clear()
+
+        def _loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    with self._refresh_lock:
+                        self.refresh()
+                except Exception as e:
+                    self.log.warning("Price snapshot refresh failed: %s", e)
+                self._stop.wait(period)
+
+        self._thread = threading.Thread(target=_loop, name="PriceSnapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+
+_SNAPSHOTS: Dict[str, PriceSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def snapshot_for(base_url: str = FUTURES_BASE) -> PriceSnapshot:
+    """Process-wide snapshot per REST base URL."""
+    key = base_url.rstrip("/")
+    with _SNAPSHOTS_LOCK:
+        snap = _SNAPSHOTS.get(key)
+        if snap is None:
+            snap = _SNAPSHOTS[key] = PriceSnapshot(key)
+        return snap
+
+
+def latest_price(symbol: str, base_url: str = FUTURES_BASE, max_age: Optional[float] = None) -> float:
+    return snapshot_for(base_url).get(symbol, max_age=max_age)
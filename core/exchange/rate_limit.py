@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Process-wide Binance request-weight governor.
+
+- Token buckets for IP request weight (per minute) and order count (per 10s / per minute).
+- Each REST caller reserves the endpoint weight *before* sending (`acquire`), then syncs
+  the bucket from the response headers (`update`): x-mbx-used-weight-1m, x-mbx-order-count-10s/1m.
+- 429/418 responses block every caller until Retry-After has passed (`penalize`).
+
+Callers wait briefly instead of tripping a ban; a single 418 stops every symbol at once.
+
+Public API:
+  endpoint_weight(path, params=None) -> int
+  throttle(path, params=None, method="GET")  # acquire on the shared governor
+  class WeightGovernor: acquire(), reserve(), update(), penalize(), snapshot()
+  GOVERNOR  # shared instance (configured from ENV)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+log = logging.getLogger("RateLimit")
+
+# Endpoint weights (Binance USDT-M futures / spot docs). Callables get the request params.
+_WEIGHTS: Dict[str, Any] = {
+    "/fapi/v1/klines": lambda p: _by_limit(p, ((100, 1), (500, 2), (1001, 5)), 10),
+    "/fapi/v1/depth": lambda p: _by_limit(p, ((51, 2), (101, 5), (501, 10)), 20),
+    "/fapi/v1/ticker/price": lambda p: 1 if p.get("symbol") else 2,
+    "/fapi/v1/ticker/24hr": lambda p: 1 if p.get("symbol") else 40,
+    "/fapi/v1/premiumIndex": lambda p: 1 if p.get("symbol") else 10,
+    "/fapi/v1/openOrders": lambda p: 1 if p.get("symbol") else 40,
+    "/fapi/v1/exchangeInfo": 1,
+    "/fapi/v1/allOrders": 5,
+    "/fapi/v1/userTrades": 5,
+    "/fapi/v1/income": 30,
+    "/fapi/v2/positionRisk": 5,
+    "/fapi/v2/balance": 5,
+    "/fapi/v2/account": 5,
+    "/api/v3/klines": 2,
+    "/api/v3/exchangeInfo": 20,
+    "/api/v3/ticker/price": lambda p: 2 if p.get("symbol") else 4,
+}
+
+# Endpoints that count against the order-rate limits (when sent as POST).
+_ORDER_PATHS = {"/fapi/v1/order", "/fapi/v1/batchOrders", "/api/v3/order"}
+
+
+def _by_limit(params: Mapping[str, Any], table, top: int) -> int:
+    try:
+        limit = int(params.get("limit") or 500)
+    except (TypeError, ValueError):
+        limit = 500
+    for bound, w in table:
+        if limit < bound:
+            return w
+    return top
+
+
+def endpoint_weight(path: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """Request weight for a REST path ('/fapi/v1/klines'); unknown endpoints cost 1."""
+    w = _WEIGHTS.get(path.split("?", 1)[0], 1)
+    return int(w(params or {})) if callable(w) else int(w)
+
+
+def is_order_request(path: str, method: str = "GET") -> bool:
+    return method.upper() == "POST" and path.split("?", 1)[0] in _ORDER_PATHS
+
+
+class _Bucket:
+    """Token bucket: `capacity` tokens, refilled continuously over `window` seconds."""
+
+    def __init__(self, capacity: float, window: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / float(window)
+        self.window = float(window)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, cost: float, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+    def sync_used(self, used: float, now: float) -> None:
+        # Server counts every client on this IP; never believe we have more than it allows.
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - float(used))
+
+
+class WeightGovernor:
+    """
+    Shared limiter for all REST callers.
+
+    Parameters:
+      weight_limit: IP weight per minute (futures: 2400).
+      order_limit_10s / order_limit_1m: order-rate limits (futures: 300 / 1200).
+      safety: share of each limit we allow ourselves to use.
+      max_wait: longest single wait in acquire(); beyond that acquire() raises.
+    """
+
+    def __init__(self, weight_limit: int = 2400, *, order_limit_10s: int = 300, order_limit_1m: int = 1200,
+                 safety: float = 0.8, max_wait: float = 90.0) -> None:
+        self.safety = float(safety)
+        self.max_wait = float(max_wait)
+        self._weight = _Bucket(weight_limit * self.safety, 60.0)
+        self._orders_10s = _Bucket(order_limit_10s * self.safety, 10.0)
+        self._orders_1m = _Bucket(order_limit_1m * self.safety, 60.0)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_sec = 0.0
+
+    @classmethod
+    def from_env(cls) -> "WeightGovernor":
+        env = os.environ
+        return cls(
+            int(env.get("BINANCE_WEIGHT_LIMIT_1M", "2400")),
+            order_limit_10s=int(env.get("BINANCE_ORDER_LIMIT_10S", "300")),
+            order_limit_1m=int(env.get("BINANCE_ORDER_LIMIT_1M", "1200")),
+            safety=float(env.get("BINANCE_LIMIT_SAFETY", "0.8")),
+        )
+
+    def reserve(self, weight: int, *, orders: int = 0) -> float:
+        """
+        Non-blocking: takes the tokens and returns 0.0, or returns how long to wait
+        before trying again (nothing is taken). Used directly by asyncio callers.
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self._blocked_until - now)
+            wait = max(wait, self._weight.wait_for(weight, now))
+            if orders:
+                wait = max(wait, self._orders_10s.wait_for(orders, now), self._orders_1m.wait_for(orders, now))
+            if wait > 0.0:
+                return wait
+            self._weight.take(weight)
+            if orders:
+                self._orders_10s.take(orders)
+                self._orders_1m.take(orders)
+            return 0.0
+
+    def acquire(self, weight: int, *, orders: int = 0, logger: Optional[logging.Logger] = None) -> None:
+        """Blocks until the request fits the budget."""
+        started = time.monotonic()
+        while True:
+            wait = self.reserve(weight, orders=orders)
+            if wait <= 0.0:
+                break
+            if time.monotonic() - started + wait > self.max_wait:
+                raise RuntimeError(f"request budget unavailable for {wait:.1f}s (weight={weight}, orders={orders})")
+            (logger or log).debug("Rate limit: wait %.3fs for weight=%d orders=%d", wait, weight, orders)
+            time.sleep(wait)
+        spent = time.monotonic() - started
+        if spent > 0.0005:
+            with self._lock:
+                self.waits += 1
+                self.waited_sec += spent
+
+    def update(self, headers: Optional[Mapping[str, Any]]) -> None:
+        """Syncs buckets from response headers (case-insensitive)."""
+        if not headers:
+            return
+        h = {str(k).lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+        with self._lock:
+            for key, bucket in (
+                ("x-mbx-used-weight-1m", self._weight),
+                ("x-mbx-order-count-10s", self._orders_10s),
+                ("x-mbx-order-count-1m", self._orders_1m),
+            ):
+                v = h.get(key)
+                if v is None:
+                    continue
+                try:
+                    bucket.sync_used(float(v), now)
+                except (TypeError, ValueError):
+                    continue
+
+    def penalize(self, status: int, retry_after: Optional[float] = None) -> float:
+        """429/418: blocks every caller for Retry-After (or a conservative default). Returns the pause."""
+        pause = float(retry_after) if retry_after else (120.0 if int(status) == 418 else 10.0)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            self._weight.tokens = min(self._weight.tokens, 0.0)
+        log.warning("HTTP %s from Binance: all REST callers paused for %.1fs", status, pause)
+        return pause
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._weight._refill(now)
+            return {
+                "weight_tokens": round(self._weight.tokens, 2),
+                "weight_capacity": self._weight.capacity,
+                "blocked_for_sec": round(max(0.0, self._blocked_until - now), 3),
+                "waits": self.waits,
+                "waited_sec": round(self.waited_sec, 3),
+            }
+
+
+GOVERNOR = WeightGovernor.from_env()
+
+
+def throttle(path: str, params: Optional[Mapping[str, Any]] = None, method: str = "GET",
+             *, logger: Optional[logging.Logger] = None) -> None:
+    """Shortcut for callers: reserve the endpoint weight (and order slot) on the shared governor."""
+    GOVERNOR.acquire(endpoint_weight(path, params), orders=1 if is_order_request(path, method) else 0, logger=logger)
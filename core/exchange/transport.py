@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+Shared pooled HTTP transport for every Binance REST caller (stdlib only).
+
+- Keep-alive connections in per-host pools (http.client), one TLS context per process:
+  the TCP+TLS handshake is paid once per pooled connection, not once per request.
+- Configurable timeouts and retries (exponential backoff; 429/418 go through the rate-limit governor).
+- Every request reserves its weight on core.exchange.rate_limit.GOVERNOR and syncs it from headers.
+- Per-endpoint timing (count, errors, avg/max ms) for telemetry: TRANSPORT.stats().
+- An active cassette (core.exchange.cassette) records final outcomes or answers from a recording.
+
+Non-idempotent requests (POST) are retried only when the exchange rejected them (429/418)
+or when a reused keep-alive connection failed while the request was being written. A failure
+while reading the response (the request may already have reached the exchange) resends only
+idempotent methods; retries=0 disables the resend entirely.
+
+Public API:
+  class HttpTransport: request(), get_json(), stats(), close()
+  class HttpResponse: status, headers, body, json(), text
+  class HttpError(RuntimeError): status, headers, body
+  TRANSPORT  # shared instance (configured from ENV)
+"""
+
+import http.client
+import json
+import logging
+import os
+import queue
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from core.exchange import cassette as _cassette
+from core.exchange.rate_limit import GOVERNOR, endpoint_weight, is_order_request
+
+log = logging.getLogger("HttpTransport")
+
+_RETRY_STATUS = (429, 418, 500, 502, 503, 504)
+_IDEMPOTENT = ("GET", "HEAD", "DELETE", "PUT", "OPTIONS")
+# Server closed an idle keep-alive connection. Raised by conn.request() the request never went
+# out; raised by getresponse() (RemoteDisconnected/ConnectionResetError) it may have been processed.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError, http.client.CannotSendRequest)
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    elapsed_ms: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+class HttpError(RuntimeError):
+    """Non-2xx response after retries. Keeps status/headers/body for diagnostics."""
+
+    def __init__(self, status: int, url: str, headers: Mapping[str, str], body: bytes) -> None:
+        self.status = int(status)
+        self.url = url
+        self.headers = dict(headers)
+        self.body = body
+        super().__init__(f"HTTP {status} on {url}: {body[:300].decode('utf-8', errors='replace').strip()}")
+
+    # urllib.error.HTTPError compatibility for callers that used e.code / e.read()
+    @property
+    def code(self) -> int:
+        return self.status
+
+    def read(self) -> bytes:
+        return self.body
+
+
+@dataclass
+class _EndpointStats:
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {"count": self.count, "errors": self.errors, "avg_ms": round(avg, 3), "max_ms": round(self.max_ms, 3)}
+
+
+@dataclass
+class _HostPool:
+    scheme: str
+    host: str
+    port: Optional[int]
+    idle: "queue.LifoQueue[http.client.HTTPConnection]" = field(default_factory=queue.LifoQueue)
+
+
+class HttpTransport:
+    """
+    Parameters:
+      timeout: per-request socket timeout, seconds (ENV HTTP_TIMEOUT_SEC).
+      max_retries: retries for retryable failures (ENV HTTP_MAX_RETRIES).
+      pool_size: idle connections kept per host (ENV HTTP_POOL_SIZE).
+      backoff: first retry delay, doubled per attempt (capped at 8s).
+      governor: rate-limit governor; None disables throttling.
+    """
+
+    def __init__(self, *, timeout: float = 15.0, max_retries: int = 3, pool_size: int = 8, backoff: float = 0.5,
+                 user_agent: str = "almost-bot/1.0", governor: Any = GOVERNOR) -> None:
+        self.timeout = float(timeout)
+        self.max_retries = int(max_retries)
+        self.pool_size = max(1, int(pool_size))
+        self.backoff = float(backoff)
+        self.user_agent = user_agent
+        self.governor = governor
+        self._ssl = ssl.create_default_context()
+        self._pools: Dict[Tuple[str, str, Optional[int]], _HostPool] = {}
+        self._stats: Dict[str, _EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HttpTransport":
+        env = os.environ
+        return cls(
+            timeout=float(env.get("HTTP_TIMEOUT_SEC", "15")),
+            max_retries=int(env.get("HTTP_MAX_RETRIES", "3")),
+            pool_size=int(env.get("HTTP_POOL_SIZE", "8")),
+        )
+
+    # ---- connection pool ----
+
+    def _pool(self, scheme: str, host: str, port: Optional[int]) -> _HostPool:
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _HostPool(scheme, host, port)
+            return pool
+
+    def _checkout(self, pool: _HostPool, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = pool.idle.get_nowait()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        except queue.Empty:
+            pass
+        if pool.scheme == "https":
+            return http.client.HTTPSConnection(pool.host, pool.port, timeout=timeout, context=self._ssl), False
+        return http.client.HTTPConnection(pool.host, pool.port, timeout=timeout), False
+
+    def _checkin(self, pool: _HostPool, conn: http.client.HTTPConnection) -> None:
+        if pool.idle.qsize() >= self.pool_size:
+            conn.close()
+            return
+        pool.idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            while True:
+                try:
+                    pool.idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    # ---- stats ----
+
+    def _record(self, key: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = _EndpointStats()
+            st.count += 1
+            st.total_ms += elapsed_ms
+            st.max_ms = max(st.max_ms, elapsed_ms)
+            if not ok:
+                st.errors += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """{'GET /fapi/v1/klines': {'count','errors','avg_ms','max_ms'}, ...}"""
+        with self._lock:
+            return {k: v.as_dict() for k, v in self._stats.items()}
+
+    # ---- requests ----
+
+    def _send_once(self, pool: _HostPool, method: str, target: str, body: Optional[bytes],
+                   headers: Dict[str, str], timeout: float, resend: bool = True) -> HttpResponse:
+        conn, reused = self._checkout(pool, timeout)
+        started = time.perf_counter()
+        sent = False
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            sent = True
+            resp = conn.getresponse()
+            data = resp.read()
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused or not resend or (sent and method not in _IDEMPOTENT):
+                raise
+            # Stale keep-alive connection: resend once on a fresh one (POST only if it never went out).
+            conn, _ = self._checkout(_HostPool(pool.scheme, pool.host, pool.port), timeout)
+            started = time.perf_counter()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+        elapsed = (time.perf_counter() - started) * 1000.0
+        hdrs = {k.lower(): v for k, v in resp.getheaders()}
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(pool, conn)
+        return HttpResponse(resp.status, hdrs, data, elapsed)
+
+    def request(self, method: str, url: str, *, params: Optional[Mapping[str, Any]] = None,
+                data: Optional[bytes | Mapping[str, Any]] = None, headers: Optional[Mapping[str, str]] = None,
+                timeout: Optional[float] = None, retries: Optional[int] = None, throttle: bool = True,
+                logger: Optional[logging.Logger] = None) -> HttpResponse:
+        """
+        Sends a request and returns the 2xx response; raises HttpError for other statuses
+        (after retries) and OSError-family errors for network failures.
+        `params` go to the query string (None values dropped); `data` is the form body.
+        """
+        lg = logger or log
+        method = method.upper()
+        parts = urlsplit(url)
+        query = parts.query
+        if params:
+            extra = urlencode({k: v for k, v in params.items() if v is not None}, doseq=True)
+            query = f"{query}&{extra}" if query and extra else (query or extra)
+        target = (parts.path or "/") + (f"?{query}" if query else "")
+        full_url = f"{parts.scheme}://{parts.netloc}{target}"
+        if isinstance(data, Mapping):
+            data = urlencode(dict(data), doseq=True).encode("utf-8")
+        hdrs = {"User-Agent": self.user_agent, "Connection": "keep-alive"}
+        if data is not None:
+            hdrs["Content-Type"] = "application/x-www-form-urlencoded"
+        hdrs.update(headers or {})
+        pool = self._pool(parts.scheme or "https", parts.hostname or "", parts.port)
+        stat_key = f"{method} {parts.path}"
+        timeout = self.timeout if timeout is None else float(timeout)
+        max_retries = self.max_retries if retries is None else int(retries)
+        idempotent = method in _IDEMPOTENT
+        weight_params = dict(parse_qsl(parts.query))
+        weight_params.update(params or {})
+
+        cas = _cassette.active()
+        if cas is not None and cas.replaying:
+            status, rh, body, ms = cas.http_response(method, full_url, data)
+            self._record(stat_key, ms, 200 <= status < 300)
+            if 200 <= status < 300:
+                return HttpResponse(status, rh, body, ms)
+            raise HttpError(status, full_url, rh, body)
+
+        delay = self.backoff
+        for attempt in range(max_retries + 1):
+            if throttle and self.governor is not None:
+                self.governor.acquire(endpoint_weight(parts.path, weight_params),
+                                      orders=1 if is_order_request(parts.path, method) else 0, logger=lg)
+            try:
+                resp = self._send_once(pool, method, target, data, hdrs, timeout, resend=max_retries > 0)
+            except (OSError, http.client.HTTPException) as e:
+                self._record(stat_key, 0.0, False)
+                if idempotent and attempt < max_retries:
+                    lg.warning("Network error on %s: %s, retry in %.2fs (attempt %d/%d)", full_url, e, delay, attempt + 1, max_retries)
+                    time.sleep(delay)
+                    delay = min(delay * 2, 8.0)
+                    continue
+                lg.error("Network error on %s: %s (no more retries)", full_url, e)
+                raise
+
+            ok = 200 <= resp.status < 300
+            self._record(stat_key, resp.elapsed_ms, ok)
+            if self.governor is not None:
+                self.governor.update(resp.headers)
+            if ok:
+                if cas is not None:
+                    cas.record_http(method, full_url, data, resp.status, resp.headers, resp.body, resp.elapsed_ms)
+                return resp
+
+            retry_after = 0.0
+            try:
+                retry_after = float(resp.headers.get("retry-after") or 0.0)
+            except ValueError:
+                retry_after = 0.0
+            if resp.status in (429, 418) and self.governor is not None:
+                retry_after = max(retry_after, self.governor.penalize(resp.status, retry_after or None))
+            retryable = resp.status in (429, 418) or (idempotent and resp.status in _RETRY_STATUS)
+            if retryable and attempt < max_retries:
+                sleep_for = max(retry_after, delay)
+                lg.warning("HTTP %s on %s, retry in %.2fs (attempt %d/%d)", resp.status, full_url, sleep_for, attempt + 1, max_retries)
+                if not (throttle and self.governor is not None and resp.status in (429, 418)):
+                    time.sleep(sleep_for)
+                delay = min(delay * 2, 8.0)
+                continue
+            lg.error("HTTP error %s on %s: %s", resp.status, full_url, resp.text.strip()[:300])
+            if cas is not None:
+                cas.record_http(method, full_url, data, resp.status, resp.headers, resp.body, resp.elapsed_ms)
+            raise HttpError(resp.status, full_url, resp.headers, resp.body)
+
+        raise RuntimeError("request failed with retries exhausted")  # pragma: no cover
+
+    def get_json(self, url: str, params: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Tuple[Any, Dict[str, str]]:
+        """GET + JSON decode. Returns (parsed_json, lower-cased headers)."""
+        resp = self.request("GET", url, params=params, **kwargs)
+        return resp.json(), resp.headers
+
+
+TRANSPORT = HttpTransport.from_env()
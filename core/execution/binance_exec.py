@@ -260,17 +260,35 @@ def _retry_on_exceptions(retries: int = 3, initial_delay: float = 0.5, backoff:
     return deco
 
 # === Client factory ===
+_CLIENTS: dict[tuple, Any] = {}
+
+
 def ensure_client(testnet: bool = False):
     """
     Lazily create python-binance Client using env vars.
     Uses (BINANCE_API_KEY, BINANCE_API_SECRET) or fallbacks.
+    The client is cached per (key, testnet, base): its requests.Session keeps the
+    TLS connection alive instead of re-handshaking (and re-pinging) on every call.
+    BINANCE_FAPI_BASE (e.g. the local emulator, tools/emulator) replaces the futures
+    REST base; the spot ping on construction is skipped then.
     """
-    from binance.client import Client
     api_key = os.getenv("BINANCE_API_KEY") or os.getenv("BINANCE_FAPI_KEY") or os.getenv("API_KEY")
     api_secret = os.getenv("BINANCE_API_SECRET") or os.getenv("BINANCE_FAPI_SECRET") or os.getenv("API_SECRET")
     if not api_key or not api_secret:
         raise RuntimeError("Missing API keys for live trading")
-    return Client(api_key, api_secret, testnet=testnet)
+    fapi_base = (os.getenv("BINANCE_FAPI_BASE") or "").strip().rstrip("/")
+    key = (api_key, api_secret, bool(testnet), fapi_base)
+    client = _CLIENTS.get(key)
+    if client is None:
+        from binance.client import Client
+        if fapi_base:
+            client = Client(api_key, api_secret, testnet=testnet, ping=False)
+            # python-binance builds futures URLs as FUTURES_URL + "/v1/<path>"
+            client.FUTURES_URL = client.FUTURES_TESTNET_URL = fapi_base + "/fapi"
+        else:
+            client = Client(api_key, api_secret, testnet=testnet)
+        _CLIENTS[key] = client
+    return client
 
 # === Exchange info (filters) ===
 @_retry_on_exceptions(retries=4, initial_delay=0.3, backoff=2.0, retry_on=(Exception,))
@@ -1,9 +1,13 @@
 from __future__ import annotations
 import time, hmac, hashlib, os
 from typing import Dict, Any, Optional
-import requests
+from urllib.parse import urlencode
 
-BINANCE_FAPI_BASE = "https://testnet.binancefuture.com" if str(os.getenv("BINANCE_TESTNET","0")).strip() in {"1","true","TRUE","True"} else "https://fapi.binance.com"
+from core.exchange.transport import TRANSPORT
+
+_DEFAULT_BASE = "https://testnet.binancefuture.com" if str(os.getenv("BINANCE_TESTNET","0")).strip() in {"1","true","TRUE","True"} else "https://fapi.binance.com"
+# BINANCE_FAPI_BASE перекриває вибір (напр. локальний емулятор: http://127.0.0.1:8765)
+BINANCE_FAPI_BASE = os.getenv("BINANCE_FAPI_BASE", _DEFAULT_BASE).rstrip("/")
 
 API_KEY  = os.getenv("BINANCE_FAPI_KEY", "")
 API_SECRET = os.getenv("BINANCE_FAPI_SECRET", "")
@@ -14,7 +18,8 @@ def _ts() -> int:
 def _sign(params: Dict[str, Any]) -> str:
     if not API_SECRET:
         raise RuntimeError("BINANCE_FAPI_SECRET is not set")
-    q = "&".join([f"{k}={params[k]}" for k in sorted(params)])
+    # Binance підписує рядок саме в тому порядку, в якому його шле транспорт (urlencode у порядку вставки)
+    q = urlencode(params, doseq=True)
     return hmac.new(API_SECRET.encode(), q.encode(), hashlib.sha256).hexdigest()
 
 def _headers() -> Dict[str, str]:
@@ -27,22 +32,20 @@ def _get(path: str, params: Dict[str, Any], private: bool=False) -> Any:
     if private:
         params["timestamp"] = _ts()
         params["signature"] = _sign(params)
-    r = requests.get(url, params=params, headers=_headers() if private else None, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    # Підписаний timestamp старіє (бекофф, пауза governor на 429/418) — приватні GET без повторів
+    return TRANSPORT.request("GET", url, params=params, headers=_headers() if private else None, timeout=10,
+                             retries=0 if private else None).json()
 
 def _post(path: str, params: Dict[str, Any]) -> Any:
     url = BINANCE_FAPI_BASE + path
     params["timestamp"] = _ts()
     params["signature"] = _sign(params)
-    r = requests.post(url, data=params, headers=_headers(), timeout=10)
-    r.raise_for_status()
-    return r.json()
+    return TRANSPORT.request("POST", url, data=params, headers=_headers(), timeout=10, retries=0).json()
 
 # ----- Public helpers -----
 def ping() -> bool:
     try:
-        requests.get(BINANCE_FAPI_BASE + "/fapi/v1/ping", timeout=5)
+        TRANSPORT.request("GET", BINANCE_FAPI_BASE + "/fapi/v1/ping", timeout=5, retries=0)
         return True
     except Exception:
         return False
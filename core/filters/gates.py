@@ -6,6 +6,15 @@ from pathlib import Path
 import pandas as pd
 from datetime import datetime, timezone, date
 
+from core.bars import BarSeries  # duck-types the DataFrame columns used below
+from core.indicators import ta
+from core.indicators.cache import CACHE
+from core.indicators.stream import IndicatorEngine
+
+# live mode: rolling ATR quantiles kept per stream, each tick folds only the new bars
+_ENGINE = IndicatorEngine()
+_SNAPSHOT_STREAM = "gates:snapshot"
+
 def _today_dir() -> Path:
     return Path("logs/snapshots") / date.today().isoformat()
 
@@ -57,9 +66,34 @@ def session_gate(now_utc: datetime, cfg: GateConfig) -> tuple[bool, str]:
     ok = (lo <= hr < hi)
     return ok, f"session({hr} in {lo}-{hi})"
 
-def atr_percentile_gate(df: pd.DataFrame, cfg: GateConfig) -> tuple[bool, str]:
+def _snapshot_stream() -> str | None:
+    """Engine key for the snapshot window; None when INDICATOR_STREAM is off (full recompute)."""
+    flag = os.getenv("INDICATOR_STREAM", "1").strip().lower()
+    return None if flag in ("0", "false", "no", "off") else _SNAPSHOT_STREAM
+
+def _atr_quantiles_stream(df, cfg: GateConfig, stream) -> tuple[float, float, float] | None:
+    """(last atr, low, high quantile) from streaming window states; None → pandas path."""
+    val = float(df["atr"].iloc[-1])
+    if val != val:  # last bar without atr: the gate reads the last valid one, rare — recompute
+        return None
+    w = max(1, cfg.atr_window)
+    try:
+        return (val,
+                _ENGINE.value(stream, "rolling_quantile", df, w, cfg.atr_pctl_min/100.0, fields=("atr",)),
+                _ENGINE.value(stream, "rolling_quantile", df, w, cfg.atr_pctl_max/100.0, fields=("atr",)))
+    except (KeyError, ValueError, TypeError):
+        return None
+
+def atr_percentile_gate(df: pd.DataFrame | BarSeries, cfg: GateConfig, stream=None) -> tuple[bool, str]:
     if df is None or "atr" not in df.columns or len(df) < 10:
         return True, "atr:skip"
+    last = _atr_quantiles_stream(df, cfg, stream) if stream is not None else None
+    if last is not None:
+        val, p_low, p_high = last
+        if p_low != p_low:
+            return True, "atr:skip"
+        ok = (p_low <= val <= p_high)
+        return ok, f"atr:{val:.4f} in [{p_low:.4f},{p_high:.4f}]"
     window = min(cfg.atr_window, len(df))
     series = df["atr"].tail(window).dropna()
     if series.empty:
@@ -70,11 +104,11 @@ def atr_percentile_gate(df: pd.DataFrame, cfg: GateConfig) -> tuple[bool, str]:
     ok = (p_low <= val <= p_high)
     return ok, f"atr:{val:.4f} in [{p_low:.4f},{p_high:.4f}]"
 
-def htf_trend_gate(df: pd.DataFrame, side: str, cfg: GateConfig) -> tuple[bool, str]:
+def htf_trend_gate(df: pd.DataFrame | BarSeries, side: str, cfg: GateConfig) -> tuple[bool, str]:
     if df is None or "close" not in df.columns or len(df) < cfg.htf_ema_window:
         return True, "htf:skip"
     w = cfg.htf_ema_window
-    ema = df["close"].ewm(span=w, adjust=False).mean()
+    ema = CACHE.call(ta.ema, df["close"], w)
     last = float(df["close"].iloc[-1])
     last_ema = float(ema.iloc[-1])
     if side.upper() == "LONG":
@@ -90,7 +124,7 @@ def evaluate_gates(side: str, now_utc: datetime | None = None, cfg: GateConfig |
         return False, ["weekday:block"]
     ok_sess, msg_sess = session_gate(now_utc, cfg)
     df = _load_snapshot_df()
-    ok_atr, msg_atr = atr_percentile_gate(df, cfg)
+    ok_atr, msg_atr = atr_percentile_gate(df, cfg, stream=_snapshot_stream())
     ok_tr, msg_tr = htf_trend_gate(df, side, cfg)
     oks = [ok_sess, ok_atr, ok_tr]
     msgs = [msg_sess, msg_atr, msg_tr]
@@ -8,7 +8,7 @@ from core.filters.gates import (
     atr_percentile_gate,
     htf_trend_gate,
 )
-from core.filters import gates as _G  # for _load_snapshot_df()
+from core.filters import gates as _G  # for _load_snapshot_df() / _snapshot_stream()
 
 
 # --- extra primitive for weekday check (kept here to avoid export from gates) ---
@@ -58,7 +58,7 @@ def evaluate_preset(side: str,
         elif gate == "session":
             ok, msg = session_gate(now_utc, cfg)
         elif gate == "atr":
-            ok, msg = atr_percentile_gate(df, cfg)
+            ok, msg = atr_percentile_gate(df, cfg, stream=_G._snapshot_stream())
         elif gate == "trend":
             ok, msg = htf_trend_gate(df, side, cfg)
         else:
@@ -0,0 +1,258 @@
+# core/indicators/cache.py
+"""
+Memoization of indicator results keyed by (function, params, length, last label, data digest).
+
+One decision computes the same EMA/ATR several times (strategy, HTF gate, telemetry) and
+parameter sweeps recompute identical `ema(close, 20)` for every combination. CACHE.call()
+returns the stored result when the inputs are byte-identical (blake2b over the input
+values) and end on the same index label; the result is rebuilt on the caller's index.
+
+Tail growth: when the inputs are a longer version of a cached call (same head, and the
+first n values hash to the cached digest), only the new rows are computed. The function
+is re-run on the last `lookback + new` inputs and its tail is appended. Lookbacks are the
+declared warm-up of the kernel a wrapper runs (core.indicators.kernels) or registered per
+function. For finite windows they are exact. For EWM-based indicators they truncate
+weights below 1e-17, which is floating-point tolerance. Functions without a lookback are
+recomputed in full.
+
+Eviction: LRU, bounded by entry count and by the bytes of the stored result arrays.
+
+Public API:
+  class IndicatorCache:
+      def __init__(self, max_entries=512, max_bytes=64 << 20, enabled=True)
+      @classmethod from_env() -> IndicatorCache   # INDICATOR_CACHE, INDICATOR_CACHE_ENTRIES, INDICATOR_CACHE_MB
+      def call(self, fn, *args, **kwargs)          # fn(*args, **kwargs), memoized
+      def stats(self) -> dict                      # hits, extends, misses, evictions, hit_rate, entries, bytes
+      def clear(self) -> None
+  register(fn, lookback) -> None               # lookback(params: dict) -> int bars of history needed
+  CACHE  # shared instance (configured from ENV)
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import kernels, ta
+
+_HEAD = 64  # values hashed into the growth-lookup key
+
+
+def _warmup(name: str, *params: Any) -> int:
+    return kernels.get(name).warmup(*params)
+
+
+# bars of history each multi-line function needs before the first recomputed row;
+# single-series wrappers tagged with a kernel (kernels.wraps) use the kernel's warm-up
+_LOOKBACK: Dict[Callable[..., Any], Callable[[Dict[str, Any]], int]] = {
+    ta.macd: lambda p: _warmup("ema", max(p["fast"], p["slow"])) + _warmup("ema", p["signal"]),
+    ta.stoch_kd: lambda p: int(p["k"]) + int(p["d"]),
+    ta.bbands: lambda p: int(p["period"]),
+    ta.roc: lambda p: int(p["period"]) + 1,
+    ta.dmi: lambda p: _warmup("atr", p["period"]),
+    ta.adx: lambda p: _warmup("atr", p["period"]) + _warmup("rma", p["period"]),
+}
+
+
+def register(fn: Callable[..., Any], lookback: Callable[[Dict[str, Any]], int]) -> None:
+    """Enable tail extension for fn (shared by every IndicatorCache)."""
+    _LOOKBACK[fn] = lookback
+
+
+def _lookback(fn: Callable[..., Any], params: Dict[str, Any]) -> Optional[int]:
+    lb = _LOOKBACK.get(fn)
+    if lb is not None:
+        return int(lb(params))
+    name = getattr(fn, "kernel", None)
+    if name is None:
+        return None
+    k = kernels.get(name)
+    return int(k.warmup(*(params[p] for p in k.params if p in params)))
+
+
+def _values(x: Any) -> np.ndarray:
+    return x.to_numpy() if isinstance(x, pd.Series) else np.asarray(x)
+
+
+def _digest(arrays: List[np.ndarray], n: Optional[int] = None) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        part = a if n is None else a[:n]
+        h.update(np.ascontiguousarray(part).view(np.uint8) if part.dtype != object else repr(part.tolist()).encode())
+    return h.digest()
+
+
+def _pack(result: Any) -> Tuple[str, Any, Dict[str, np.ndarray]]:
+    """(kind, meta, arrays) with read-only copies of the result columns."""
+    if isinstance(result, pd.Series):
+        kind, meta, cols = "series", result.name, {"": result.to_numpy(copy=True)}
+    elif isinstance(result, pd.DataFrame):
+        kind, meta, cols = "frame", list(result.columns), {str(c): result[c].to_numpy(copy=True) for c in result.columns}
+    elif dataclasses.is_dataclass(result) and all(isinstance(getattr(result, f.name), pd.Series)
+                                                   for f in dataclasses.fields(result)):
+        kind, meta = "dataclass", type(result)
+        cols = {f.name: getattr(result, f.name).to_numpy(copy=True) for f in dataclasses.fields(result)}
+    else:
+        raise TypeError(f"uncacheable result type {type(result).__name__}")
+    for a in cols.values():
+        a.flags.writeable = False
+    return kind, meta, cols
+
+
+def _unpack(kind: str, meta: Any, cols: Dict[str, np.ndarray], index: pd.Index) -> Any:
+    if kind == "series":
+        return pd.Series(cols[""], index=index, name=meta)
+    if kind == "frame":
+        return pd.DataFrame({c: cols[str(c)] for c in meta}, index=index)
+    return meta(**{name: pd.Series(a, index=index) for name, a in cols.items()})
+
+
+class _Entry:
+    __slots__ = ("n", "digest", "head", "kind", "meta", "cols", "nbytes")
+
+    def __init__(self, n: int, digest: bytes, head: tuple, kind: str, meta: Any, cols: Dict[str, np.ndarray]) -> None:
+        self.n = n
+        self.head = head
+        self.digest = digest
+        self.kind = kind
+        self.meta = meta
+        self.cols = cols
+        self.nbytes = sum(int(a.nbytes) for a in cols.values())
+
+
+class IndicatorCache:
+    """
+    Parameters:
+      max_entries: LRU bound on cached results.
+      max_bytes: LRU bound on the total bytes of cached result arrays.
+      enabled: False → call() is a plain pass-through (counters still count misses).
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 << 20, enabled: bool = True) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._heads: Dict[tuple, tuple] = {}
+        self._sigs: Dict[Callable[..., Any], inspect.Signature] = {}
+        self.bytes = 0
+        self.hits = self.extends = self.misses = self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "IndicatorCache":
+        env = os.environ
+        return cls(
+            max_entries=int(env.get("INDICATOR_CACHE_ENTRIES", "512")),
+            max_bytes=int(float(env.get("INDICATOR_CACHE_MB", "64")) * (1 << 20)),
+            enabled=env.get("INDICATOR_CACHE", "1").strip().lower() not in ("0", "false", "no", "off"),
+        )
+
+    # ---- call ----
+
+    def _bind(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> inspect.BoundArguments:
+        sig = self._sigs.get(fn)
+        if sig is None:
+            sig = self._sigs[fn] = inspect.signature(fn)
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self.enabled:
+            self.misses += 1
+            return fn(*args, **kwargs)
+        bound = self._bind(fn, args, kwargs)
+        inputs = [k for k, v in bound.arguments.items() if isinstance(v, (pd.Series, np.ndarray))]
+        if not inputs:
+            self.misses += 1
+            return fn(*args, **kwargs)
+        params = {k: v for k, v in bound.arguments.items() if k not in inputs}
+        first = bound.arguments[inputs[0]]
+        index = first.index if isinstance(first, pd.Series) else pd.RangeIndex(len(first))
+        arrays = [_values(bound.arguments[k]) for k in inputs]
+        m = len(arrays[0])
+        try:
+            pkey = tuple(sorted(params.items()))
+            hash(pkey)
+        except TypeError:  # unhashable params: not cacheable
+            self.misses += 1
+            return fn(*args, **kwargs)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        digest = _digest(arrays)
+        key = (name, pkey, m, index[-1] if m else None, digest)
+        head = (name, pkey, _digest(arrays, _HEAD))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _unpack(entry.kind, entry.meta, entry.cols, index)
+            prev_key = self._heads.get(head)
+            prev = self._entries.get(prev_key) if prev_key is not None else None
+
+        lookback = _lookback(fn, params) if prev is not None else None
+        if (prev is not None and lookback is not None and _HEAD <= prev.n < m
+                and _digest(arrays, prev.n) == prev.digest):
+            start = max(0, prev.n - lookback)
+            sliced = dict(bound.arguments)
+            for k in inputs:
+                v = bound.arguments[k]
+                sliced[k] = v.iloc[start:] if isinstance(v, pd.Series) else v[start:]
+            kind, meta, tail = _pack(fn(**sliced))
+            cols = {c: np.concatenate([prev.cols[c], a[prev.n - start:]]) for c, a in tail.items()}
+            for a in cols.values():
+                a.flags.writeable = False
+            self.extends += 1
+            with self._lock:
+                self._drop(prev_key)
+        else:
+            kind, meta, cols = _pack(fn(*args, **kwargs))
+            self.misses += 1
+
+        with self._lock:
+            self._store(key, _Entry(m, digest, head, kind, meta, cols))
+        return _unpack(kind, meta, cols, index)
+
+    # ---- storage ----
+
+    def _store(self, key: tuple, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._heads[entry.head] = key
+        self.bytes += entry.nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            old = next(iter(self._entries))
+            self._drop(old)
+            self.evictions += 1
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.nbytes
+            if self._heads.get(entry.head) == key:
+                del self._heads[entry.head]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._heads.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.extends + self.misses
+        return {"hits": self.hits, "extends": self.extends, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": (self.hits + self.extends) / total if total else 0.0,
+                "entries": len(self._entries), "bytes": self.bytes}
+
+
+CACHE = IndicatorCache.from_env()
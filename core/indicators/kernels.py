@@ -0,0 +1,285 @@
+# core/indicators/kernels.py
+"""
+Canonical single-series indicator kernels: one implementation per indicator, array in → array out.
+
+Every other layer sits on this registry instead of carrying its own math:
+  - core.indicators.ta / core.indicators (package) / core.logic.ema_rsi_atr: thin pandas
+    wrappers (Series in → kernel → Series out, index re-attached);
+  - core.indicators.cache: tail-extension lookback = the kernel's declared warm-up;
+  - core.indicators.stream: streaming counterpart with the same name (STATES[name]); its
+    engine warms a new state over the last `warmup` bars only;
+  - core.indicators.panel: (bars × params) sweep counterpart (`many`).
+
+Kernels take 1-D float arrays and positional params and return a 1-D array of the same
+length. They do not validate or copy: as_array() converts once at the wrapper boundary
+(no copy for a float array without ±inf). run() computes in float64 or float32 (bulk
+research); the ewm/rolling recursions use pandas' engines, so float32 inputs come back
+rounded from float64 accumulation.
+
+Registered kernels (params → warm-up):
+  sma(x, period, min_periods=1)   rolling mean over non-NaN values     period
+  ema(x, period, adjust=False)    ewm(span=period)                     ewm weight < 1e-17
+  rma(x, period)                  Wilder RMA: ewm(alpha=1/period)      ewm weight < 1e-17
+  wma(x, period)                  linear weights 1..p (np.convolve)    period
+  tr(high, low, close)            true range, NaN terms skipped        1
+  atr(high, low, close, period)   Wilder ATR: rma(tr)                  1 + rma
+  rsi(close, period)              Wilder RSI, 50 where undefined        1 + rma
+  rsi_sma(close, period)          rolling-mean RSI (zero losses → 1e-9), NaN until `period` moves   period + 1
+  atr_sma(high, low, close, period)  rolling-mean ATR, prev close falls back to close, min_periods=1  period + 1
+  rolling_max / rolling_min(x, period)   rolling(min_periods=1).max()/min(), NaN skipped   period
+  rolling_quantile(x, period, q=0.5)     rolling(min_periods=1).quantile(q), linear        period
+  stoch_k(high, low, close, k)    %K of ta.stoch_kd (flat range → NaN)   k
+  stoch_d(high, low, close, k, d) %D: sma(%K, d)                         k + d - 1
+
+Public API:
+  class Kernel: name, fn, inputs, params, warmup(*params) -> int, stream (state class | None), many (sweep fn | None)
+  KERNELS: Dict[str, Kernel]
+  register(kernel) -> Kernel
+  get(name) -> Kernel                                  # KeyError for unknown names
+  as_array(x, dtype=np.float64) -> np.ndarray          # 1-D, numeric coercion, ±inf → NaN
+  run(name, *columns_then_params, dtype=np.float64) -> np.ndarray
+  wraps(name)                                          # decorator tagging a pandas wrapper with its kernel
+  ewm_lookback(alpha) -> int
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_NP_FLOAT = np.float64
+
+
+# ---------- conversion ----------
+
+def as_array(x: Any, dtype: Any = _NP_FLOAT) -> np.ndarray:
+    """1-D array of `dtype`; non-numeric → NaN, ±inf → NaN. No copy when x is already clean."""
+    if isinstance(x, pd.Series) and not pd.api.types.is_numeric_dtype(x.dtype):
+        x = pd.to_numeric(x, errors="coerce")
+    try:
+        a = np.asarray(x, dtype=dtype)
+    except (TypeError, ValueError):
+        a = pd.to_numeric(pd.Series(np.asarray(x, dtype=object).reshape(-1)), errors="coerce").to_numpy(dtype=dtype)
+    if a.ndim != 1:
+        a = a.reshape(-1)
+    if np.isinf(a).any():
+        a = np.where(np.isinf(a), np.nan, a)
+    return a
+
+
+def ewm_lookback(alpha: float) -> int:
+    """Bars after which an ewm(alpha) weight drops below 1e-17."""
+    if not 0.0 < alpha < 1.0:
+        return 1
+    return int(math.ceil(math.log(1e-17) / math.log1p(-alpha)))
+
+
+def _ema_alpha(period: Any) -> float:
+    return 2.0 / (max(1, int(period)) + 1.0)
+
+
+def _rma_alpha(period: Any) -> float:
+    return 1.0 / max(1, int(period))
+
+
+# ---------- kernels ----------
+
+def _owned(s: pd.Series) -> np.ndarray:
+    # under copy-on-write to_numpy() is a read-only view; wrappers must hand out writable Series
+    return s.to_numpy(copy=True)
+
+
+def _ewm(x: np.ndarray, alpha: float, adjust: bool = False) -> np.ndarray:
+    return _owned(pd.Series(x, copy=False).ewm(alpha=alpha, adjust=adjust).mean())
+
+
+def _rolling_mean(x: np.ndarray, period: Any, min_periods: Any) -> np.ndarray:
+    p = max(1, int(period))
+    return _owned(pd.Series(x, copy=False).rolling(window=p, min_periods=min_periods).mean())
+
+
+def _diff(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    if len(x):
+        out[0] = np.nan
+        np.subtract(x[1:], x[:-1], out=out[1:])
+    return out
+
+
+def _shift1(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    if len(x):
+        out[0] = np.nan
+        out[1:] = x[:-1]
+    return out
+
+
+def sma(x: np.ndarray, period: int, min_periods: int = 1) -> np.ndarray:
+    return _rolling_mean(x, period, min_periods)
+
+
+def ema(x: np.ndarray, period: int, adjust: bool = False) -> np.ndarray:
+    return _ewm(x, _ema_alpha(period), adjust)
+
+
+def rma(x: np.ndarray, period: int) -> np.ndarray:
+    return _ewm(x, _rma_alpha(period))
+
+
+def wma(x: np.ndarray, period: int) -> np.ndarray:
+    """Warm-up matches rolling(min_periods=1): a window of k < p bars uses the k heaviest
+    weights (p-k+1..p); any NaN inside a window yields NaN."""
+    p = max(1, int(period))
+    n = len(x)
+    kernel = np.arange(p, 0, -1, dtype=x.dtype if x.dtype.kind == "f" else _NP_FLOAT)  # kernel[k] weighs x[i-k]
+    num = np.convolve(x, kernel)[:n]
+    den = np.cumsum(kernel)[np.minimum(np.arange(n), p - 1)]
+    return num / den
+
+
+def tr(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    pc = _shift1(close)
+    return np.fmax(np.fmax(high - low, np.abs(high - pc)), np.abs(low - pc))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    return rma(tr(high, low, close), period)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    delta = _diff(close)
+    zero = np.where(np.isnan(delta), np.nan, 0.0)  # clip() keeps NaN moves
+    up = rma(np.where(delta > 0.0, delta, zero), period)
+    down = rma(np.where(delta < 0.0, -delta, zero), period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = 100.0 - 100.0 / (1.0 + up / np.where(down == 0.0, np.nan, down))
+    return np.where(np.isnan(r), 50.0, r)  # neutral seed where history is insufficient
+
+
+def rsi_sma(close: np.ndarray, period: int = 14) -> np.ndarray:
+    p = max(1, int(period))
+    delta = _diff(close)
+    up = _rolling_mean(np.where(delta > 0.0, delta, 0.0), p, p)  # Series.where: NaN moves count as 0
+    down = _rolling_mean(np.where(delta < 0.0, -delta, 0.0), p, p)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 - 100.0 / (1.0 + up / np.where(down == 0.0, 1e-9, down))
+
+
+def atr_sma(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    pc = _shift1(close)
+    pc = np.where(np.isnan(pc), close, pc)  # shift(1).fillna(close)
+    t = np.fmax(np.fmax(np.abs(high - low), np.abs(high - pc)), np.abs(low - pc))
+    return _rolling_mean(t, period, 1)
+
+
+def _rolling(x: np.ndarray, period: Any) -> Any:
+    return pd.Series(x, copy=False).rolling(window=max(1, int(period)), min_periods=1)
+
+
+def rolling_max(x: np.ndarray, period: int) -> np.ndarray:
+    return _owned(_rolling(x, period).max())
+
+
+def rolling_min(x: np.ndarray, period: int) -> np.ndarray:
+    return _owned(_rolling(x, period).min())
+
+
+def rolling_quantile(x: np.ndarray, period: int, q: float = 0.5) -> np.ndarray:
+    return _owned(_rolling(x, period).quantile(float(q)))
+
+
+def stoch_k(high: np.ndarray, low: np.ndarray, close: np.ndarray, k: int = 14) -> np.ndarray:
+    hh = rolling_max(high, k)
+    ll = rolling_min(low, k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * (close - ll) / np.where(hh - ll == 0.0, np.nan, hh - ll)
+
+
+def stoch_d(high: np.ndarray, low: np.ndarray, close: np.ndarray, k: int = 14, d: int = 3) -> np.ndarray:
+    return sma(stoch_k(high, low, close, k), d)
+
+
+# ---------- registry ----------
+
+@dataclass(frozen=True)
+class Kernel:
+    name: str
+    fn: Callable[..., np.ndarray]
+    inputs: Tuple[str, ...]                 # column names, in call order
+    params: Tuple[str, ...]                 # positional params after the columns
+    warmup: Callable[..., int]              # warmup(*params) -> bars of history one value depends on
+    many: Optional[Callable[..., Any]] = None  # (series..., periods) -> (bars × periods) sweep
+
+    @property
+    def stream(self) -> Optional[type]:
+        """Streaming (O(1) per bar) counterpart from core.indicators.stream, if any."""
+        from core.indicators.stream import STATES
+        return STATES.get(self.name)
+
+
+KERNELS: Dict[str, Kernel] = {}
+
+
+def register(kernel: Kernel) -> Kernel:
+    KERNELS[kernel.name] = kernel
+    return kernel
+
+
+def get(name: str) -> Kernel:
+    try:
+        return KERNELS[name]
+    except KeyError:
+        raise KeyError(f"unknown indicator kernel {name!r}") from None
+
+
+def run(name: str, *args: Any, dtype: Any = _NP_FLOAT) -> np.ndarray:
+    """get(name).fn over as_array(columns, dtype); the result is cast to dtype."""
+    k = get(name)
+    n = len(k.inputs)
+    cols = [as_array(a, dtype) for a in args[:n]]
+    return np.asarray(k.fn(*cols, *args[n:]), dtype=dtype)
+
+
+def wraps(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Tags a pandas wrapper with the kernel it runs (read by the cache for tail extension)."""
+    get(name)
+
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        fn.kernel = name
+        return fn
+    return deco
+
+
+def _register_all() -> None:
+    from core.indicators import panel
+
+    ema_lb = lambda period=14, *_: ewm_lookback(_ema_alpha(period))
+    rma_lb = lambda period=14, *_: ewm_lookback(_rma_alpha(period))
+    window = lambda period=14, *_: max(1, int(period))
+    for k in (
+        Kernel("sma", sma, ("close",), ("period", "min_periods"), window, panel.sma_many),
+        Kernel("ema", ema, ("close",), ("period", "adjust"), ema_lb, panel.ema_many),
+        Kernel("rma", rma, ("close",), ("period",), rma_lb, panel.rma_many),
+        Kernel("wma", wma, ("close",), ("period",), window),
+        Kernel("tr", tr, ("high", "low", "close"), (), lambda *_: 1),
+        Kernel("atr", atr, ("high", "low", "close"), ("period",), lambda period=14: 1 + rma_lb(period),
+               panel.atr_many),
+        Kernel("rsi", rsi, ("close",), ("period",), lambda period=14: 1 + rma_lb(period), panel.rsi_many),
+        Kernel("rsi_sma", rsi_sma, ("close",), ("period",), lambda period=14: window(period) + 1,
+               panel.rsi_sma_many),
+        Kernel("atr_sma", atr_sma, ("high", "low", "close"), ("period",), lambda period=14: window(period) + 1,
+               panel.atr_sma_many),
+        Kernel("rolling_max", rolling_max, ("close",), ("period",), window),
+        Kernel("rolling_min", rolling_min, ("close",), ("period",), window),
+        Kernel("rolling_quantile", rolling_quantile, ("close",), ("period", "q"), window),
+        Kernel("stoch_k", stoch_k, ("high", "low", "close"), ("k",), window),
+        Kernel("stoch_d", stoch_d, ("high", "low", "close"), ("k", "d"),
+               lambda k=14, d=3: window(k) + window(d) - 1),
+    ):
+        register(k)
+
+
+_register_all()
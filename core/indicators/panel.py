@@ -0,0 +1,346 @@
+# core/indicators/panel.py
+"""
+Panel indicators: one vectorized pass over a (bars × symbols) float64 matrix.
+
+Same math as the single-series functions in core.indicators.ta, column by column,
+including pandas' NaN rules: a symbol with a shorter history is NaN until its first
+bar, ewm-based indicators (ema/rma/rsi/atr/macd) carry the last value over gaps and
+decay its weight by (1 - alpha) per missing bar (ewm(adjust=False, ignore_na=False)),
+and rolling windows (sma/bbands/stoch_kd, min_periods=1) skip NaNs inside a window.
+
+Recursive indicators step over bars with numpy ops across all symbols, so the Python
+overhead is per bar, not per bar per symbol. Window sums come from cumulative sums,
+bbands' deviations from one shifted pass per window offset (two-pass, so flat windows
+stay ~0), rolling max/min from strided window views.
+
+Inputs are ndarray or DataFrame (rows = bars, columns = symbols); DataFrame inputs
+return DataFrames with the same index/columns. Multi-line indicators return a dict
+keyed like the columns of the single-series result ("macd"/"signal"/"hist", …).
+
+Public API:
+  to_panel(frames, column="close", time_col="open_time") -> pd.DataFrame  # {symbol: klines df} → bars × symbols
+  sma(x, period); ema(x, period); rma(x, period)
+  rsi(close, period=14); tr(high, low, close); atr(high, low, close, period=14)
+  macd(close, fast=12, slow=26, signal=9) -> {"macd", "signal", "hist"}
+  stoch_kd(high, low, close, k=14, d=3) -> {"%K", "%D"}
+  bbands(close, period=20, num_std=2.0) -> {"mid", "upper", "lower", "width"}
+
+Parameter sweeps take one series and a list of periods and return (bars × params)
+(a DataFrame with the params as columns for Series input). Shared intermediates —
+diff, the gain/loss split, true range, cumulative sums — are computed once, every
+distinct period is one column of the same vectorized pass, duplicates share it:
+  ema_many(close, spans); rma_many(x, periods); sma_many(x, periods)
+  rsi_many(close, periods); atr_many(high, low, close, periods)
+  rsi_sma_many(close, periods); atr_sma_many(high, low, close, periods)  # ema_rsi_atr's rolling-mean RSI/ATR
+"""
+from __future__ import annotations
+
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+__all__ = ["to_panel", "sma", "ema", "rma", "rsi", "tr", "atr", "macd", "stoch_kd", "bbands",
+           "ema_many", "rma_many", "sma_many", "rsi_many", "atr_many", "rsi_sma_many", "atr_sma_many"]
+
+Panel = Union[np.ndarray, pd.DataFrame]
+
+_NP_FLOAT = np.float64
+
+
+# ---------- helpers ----------
+
+def to_panel(frames: Mapping[str, pd.DataFrame], column: str = "close", time_col: str = "open_time") -> pd.DataFrame:
+    """Align per-symbol klines on time: rows = union of bar times, missing bars → NaN."""
+    cols = {}
+    for sym, df in frames.items():
+        if df is None or len(df) == 0 or column not in df:
+            continue
+        idx = df[time_col] if time_col in df else df.index
+        cols[sym] = pd.Series(pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=_NP_FLOAT),
+                              index=pd.Index(idx)).groupby(level=0).last()
+    return pd.DataFrame(cols).sort_index().astype(_NP_FLOAT)
+
+
+def _matrix(x: Panel) -> np.ndarray:
+    """Float64 2-D copy with ±inf → NaN (normalize_numeric for panels)."""
+    a = np.array(x, dtype=_NP_FLOAT)
+    if a.ndim == 1:
+        a = a[:, None]
+    a[np.isinf(a)] = np.nan
+    return a
+
+
+def _like(template: Panel, a: np.ndarray) -> Panel:
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(a, index=template.index, columns=template.columns)
+    return a
+
+
+def _ewm(a: np.ndarray, alpha) -> np.ndarray:
+    """pandas ewm(alpha, adjust=False).mean() on every column (alpha: scalar or one per column).
+
+    pandas decays the carried weight by (1 - alpha) per bar since the last observation,
+    so each observed bar is w = (d·w + alpha·x) / (d + alpha) with d = (1 - alpha)**gap:
+    an affine step w = A·w + B whose coefficients are built for the whole matrix at once.
+    Only the two-op recurrence runs per bar.
+    """
+    out = np.empty(a.shape, dtype=_NP_FLOAT)
+    if len(a) == 0:
+        return out
+    decay = 1.0 - np.asarray(alpha, dtype=_NP_FLOAT)
+    obs = ~np.isnan(a)
+    started = np.logical_or.accumulate(obs, axis=0)
+    first = np.argmax(obs, axis=0)
+    cols = np.flatnonzero(started[-1])
+    if (obs | ~started).all():
+        # no gaps after a symbol's first bar (shorter histories only): d = 1 - alpha throughout;
+        # w stays 0 before the first bar, so A·w vanishes there
+        A = None
+        B = np.where(obs, alpha * a, 0.0)
+    else:
+        rows = np.arange(len(a))[:, None]
+        seen = np.maximum.accumulate(np.where(obs, rows, -1), axis=0)  # last observed bar ≤ i
+        prev = np.vstack([np.full((1, a.shape[1]), -1), seen[:-1]])  # last observed bar < i
+        blend = obs & (prev >= 0)
+        gap = rows - prev
+        d = np.array(np.broadcast_to(decay, a.shape))
+        long_gap = blend & (gap > 1)
+        d[long_gap] **= gap[long_gap]
+        # pandas quirk: with com == 1 (alpha 0.5) the new weight is 1 - d, not alpha
+        new = np.where(np.broadcast_to(decay == 0.5, a.shape), 1.0 - d, alpha)
+        with np.errstate(invalid="ignore"):
+            A = np.where(blend, d / (d + new), 1.0)  # gap: 1·w + 0
+            B = np.where(blend, new * a / (d + new), 0.0)
+    B[first[cols], cols] = a[first[cols], cols]  # first bar: w = x
+    w = np.zeros(a.shape[1], dtype=_NP_FLOAT)
+    for i in range(len(a)):
+        if A is None:
+            w *= decay
+        else:
+            w *= A[i]
+        w += B[i]
+        out[i] = w
+    out[~started] = np.nan  # before a symbol's first bar
+    return out
+
+
+def _windows(a: np.ndarray, period: int) -> np.ndarray:
+    """(bars, symbols, period) view of trailing windows, NaN-padded before the first bar."""
+    p = max(1, int(period))
+    pad = np.full((p - 1, a.shape[1]), np.nan, dtype=_NP_FLOAT)
+    return sliding_window_view(np.vstack([pad, a]), p, axis=0)
+
+
+def _shift1(a: np.ndarray) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    out[1:] = a[:-1]
+    return out
+
+
+def _nan_if_zero(a: np.ndarray) -> np.ndarray:
+    return np.where(a == 0.0, np.nan, a)
+
+
+# ---------- moving averages ----------
+
+def _rolling_sum(a: np.ndarray, period: int):
+    """Trailing-window sum and count of the non-NaN values (min_periods=1 windows)."""
+    p = max(1, int(period))
+    obs = ~np.isnan(a)
+    total = np.cumsum(np.where(obs, a, 0.0), axis=0)
+    count = np.cumsum(obs, axis=0, dtype=_NP_FLOAT)
+    total[p:] -= total[:-p].copy()
+    count[p:] -= count[:-p].copy()
+    return total, count
+
+
+def _sma(a: np.ndarray, period: int) -> np.ndarray:
+    total, count = _rolling_sum(a, period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+def sma(x: Panel, period: int) -> Panel:
+    return _like(x, _sma(_matrix(x), period))
+
+
+def ema(x: Panel, period: int) -> Panel:
+    p = max(1, int(period))
+    return _like(x, _ewm(_matrix(x), 2.0 / (p + 1.0)))
+
+
+def rma(x: Panel, period: int) -> Panel:
+    """Wilder's RMA (aka SMMA)."""
+    return _like(x, _ewm(_matrix(x), 1.0 / max(1, int(period))))
+
+
+# ---------- momentum / volatility ----------
+
+def _rsi(c: np.ndarray, period: int) -> np.ndarray:
+    delta = c - _shift1(c)
+    alpha = 1.0 / max(1, int(period))
+    up = _ewm(np.where(delta > 0.0, delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha)
+    down = _ewm(np.where(delta < 0.0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = 100.0 - 100.0 / (1.0 + up / _nan_if_zero(down))
+    return np.where(np.isnan(r), 50.0, r)  # neutral seed where history is insufficient
+
+
+def rsi(close: Panel, period: int = 14) -> Panel:
+    """Wilder RSI."""
+    return _like(close, _rsi(_matrix(close), period))
+
+
+def _tr(h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    pc = _shift1(c)
+    return np.fmax(np.fmax(h - l, np.abs(h - pc)), np.abs(l - pc))  # max(axis=1, skipna)
+
+
+def tr(high: Panel, low: Panel, close: Panel) -> Panel:
+    """True Range."""
+    return _like(close, _tr(_matrix(high), _matrix(low), _matrix(close)))
+
+
+def atr(high: Panel, low: Panel, close: Panel, period: int = 14) -> Panel:
+    """Average True Range (Wilder)."""
+    a = _tr(_matrix(high), _matrix(low), _matrix(close))
+    return _like(close, _ewm(a, 1.0 / max(1, int(period))))
+
+
+def macd(close: Panel, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, Panel]:
+    c = _matrix(close)
+    line = _ewm(c, 2.0 / (max(1, int(fast)) + 1.0)) - _ewm(c, 2.0 / (max(1, int(slow)) + 1.0))
+    sig = _ewm(line, 2.0 / (max(1, int(signal)) + 1.0))
+    return {"macd": _like(close, line), "signal": _like(close, sig), "hist": _like(close, line - sig)}
+
+
+def stoch_kd(high: Panel, low: Panel, close: Panel, k: int = 14, d: int = 3) -> Dict[str, Panel]:
+    h, l, c = _matrix(high), _matrix(low), _matrix(close)
+    hh = np.fmax.reduce(_windows(h, k), axis=-1)  # rolling max/min skipping NaN
+    ll = np.fmin.reduce(_windows(l, k), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        k_line = 100.0 * (c - ll) / _nan_if_zero(hh - ll)
+    return {"%K": _like(close, k_line), "%D": _like(close, _sma(k_line, d))}
+
+
+def bbands(close: Panel, period: int = 20, num_std: float = 2.0) -> Dict[str, Panel]:
+    c = _matrix(close)
+    total, count = _rolling_sum(c, period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mid = total / count
+        # second pass: squared deviations from the window mean, one shifted slice per offset
+        obs = (~np.isnan(c)).astype(_NP_FLOAT)
+        c0 = np.where(obs > 0, c, 0.0)
+        sq = np.zeros_like(c)
+        dev = np.empty_like(c)
+        for j in range(min(max(1, int(period)), len(c))):
+            m = len(c) - j
+            np.subtract(c0[:m], mid[j:], out=dev[:m])
+            np.multiply(dev[:m], dev[:m], out=dev[:m])
+            np.multiply(dev[:m], obs[:m], out=dev[:m])
+            sq[j:] += dev[:m]
+        std = np.sqrt(sq / count)  # ddof=0
+        upper = mid + num_std * std
+        lower = mid - num_std * std
+        width = (upper - lower) / _nan_if_zero(mid)
+    return {"mid": _like(close, mid), "upper": _like(close, upper),
+            "lower": _like(close, lower), "width": _like(close, width)}
+
+
+# ---------- parameter sweeps (one series × many params) ----------
+
+def _vector(x: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    v = np.array(x, dtype=_NP_FLOAT).reshape(-1)
+    v[np.isinf(v)] = np.nan
+    return v
+
+
+def _wide(template: Union[pd.Series, np.ndarray], a: np.ndarray, params: Sequence[int]) -> Panel:
+    if isinstance(template, pd.Series):
+        return pd.DataFrame(a, index=template.index, columns=list(params))
+    return a
+
+
+def _sweep(kernel, template, params: Sequence[int], *series: np.ndarray) -> Panel:
+    """kernel(*series, unique periods) once per distinct period; duplicate params share a column."""
+    p = np.array([max(1, int(x)) for x in params], dtype=np.int64)
+    uniq, inv = np.unique(p, return_inverse=True)
+    return _wide(template, kernel(*series, uniq)[:, inv], params)
+
+
+def _ewm_many(v: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    return _ewm(np.broadcast_to(v[:, None], (len(v), len(alphas))), alphas)
+
+
+def _rolling_mean_many(v: np.ndarray, periods: np.ndarray, min_periods: Optional[int] = None) -> np.ndarray:
+    """rolling(p, min_periods).mean() for every p from one cumulative sum (NaNs skipped)."""
+    obs = ~np.isnan(v)
+    total = np.concatenate([[0.0], np.cumsum(np.where(obs, v, 0.0))])
+    count = np.concatenate([[0], np.cumsum(obs)])
+    end = np.arange(1, len(v) + 1)[:, None]
+    start = np.maximum(end - periods[None, :], 0)
+    n = count[end] - count[start]
+    need = periods[None, :] if min_periods is None else min_periods
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n >= np.maximum(need, 1), (total[end] - total[start]) / n, np.nan)
+
+
+def ema_many(close: Union[pd.Series, np.ndarray], spans: Sequence[int]) -> Panel:
+    """ta.ema(close, s) for every s in spans → (bars × spans)."""
+    return _sweep(lambda v, p: _ewm_many(v, 2.0 / (p + 1.0)), close, spans, _vector(close))
+
+
+def rma_many(x: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    return _sweep(lambda v, p: _ewm_many(v, 1.0 / p), x, periods, _vector(x))
+
+
+def sma_many(x: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    return _sweep(lambda v, p: _rolling_mean_many(v, p, min_periods=1), x, periods, _vector(x))
+
+
+def _gain_loss(c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    delta = np.diff(c, prepend=np.nan)
+    zero = np.where(np.isnan(delta), np.nan, 0.0)  # clip() keeps NaN
+    return np.where(delta > 0.0, delta, zero), np.where(delta < 0.0, -delta, zero)
+
+
+def rsi_many(close: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    """ta.rsi (Wilder) for every period; diff and the gain/loss split are computed once."""
+    def kernel(up: np.ndarray, down: np.ndarray, p: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = 100.0 - 100.0 / (1.0 + _ewm_many(up, 1.0 / p) / _nan_if_zero(_ewm_many(down, 1.0 / p)))
+        return np.where(np.isnan(r), 50.0, r)
+    return _sweep(kernel, close, periods, *_gain_loss(_vector(close)))
+
+
+def atr_many(high: Union[pd.Series, np.ndarray], low: Union[pd.Series, np.ndarray],
+             close: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    """ta.atr (Wilder) for every period; true range is computed once."""
+    t = _tr(_vector(high)[:, None], _vector(low)[:, None], _vector(close)[:, None])[:, 0]
+    return _sweep(lambda v, p: _ewm_many(v, 1.0 / p), close, periods, t)
+
+
+def rsi_sma_many(close: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    """Rolling-mean RSI of core.logic.ema_rsi_atr for every period."""
+    c = _vector(close)
+    delta = np.diff(c, prepend=np.nan)
+    up = np.where(delta > 0.0, delta, 0.0)  # Series.where: NaN → 0.0
+    down = np.where(delta < 0.0, -delta, 0.0)
+
+    def kernel(up: np.ndarray, down: np.ndarray, p: np.ndarray) -> np.ndarray:
+        d = _rolling_mean_many(down, p)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return 100.0 - 100.0 / (1.0 + _rolling_mean_many(up, p) / np.where(d == 0.0, 1e-9, d))
+    return _sweep(kernel, close, periods, up, down)
+
+
+def atr_sma_many(high: Union[pd.Series, np.ndarray], low: Union[pd.Series, np.ndarray],
+                 close: Union[pd.Series, np.ndarray], periods: Sequence[int]) -> Panel:
+    """Rolling-mean ATR of core.logic.ema_rsi_atr (min_periods=1, first bar against itself)."""
+    h, l, c = _vector(high), _vector(low), _vector(close)
+    pc = np.concatenate([c[:1], c[:-1]])
+    pc = np.where(np.isnan(pc), c, pc)  # shift(1).fillna(close)
+    t = np.fmax(np.fmax(np.abs(h - l), np.abs(h - pc)), np.abs(l - pc))
+    return _sweep(lambda v, p: _rolling_mean_many(v, p, min_periods=1), close, periods, t)
@@ -0,0 +1,548 @@
+# core/indicators/stream.py
+"""
+Streaming (O(1) per bar) indicator states and a per-(stream, indicator, params) engine.
+
+Each state folds one bar at a time and reproduces the batch functions in
+core/indicators/ta.py to floating-point tolerance, NaN handling included:
+
+  EmaState / RmaState   pandas ewm(adjust=False, ignore_na=False).mean()   ta.ema / ta.rma
+  SmaState              rolling(period, min_periods).mean()                 ta.sma
+  TrState / AtrState    true range / Wilder ATR                             ta.tr / ta.atr
+  RsiState              Wilder RSI (neutral 50 where undefined)             ta.rsi
+  RsiSmaState / AtrSmaState   rolling-mean RSI / ATR variants used by core.logic.ema_rsi_atr
+  RollingMaxState / RollingMinState   rolling(min_periods=1).max()/min()        kernels rolling_max/min
+  RollingQuantileState  rolling(min_periods=1).quantile(q) + percentile_rank     kernels.rolling_quantile
+  StochKState / StochDState   %K / %D                                            ta.stoch_kd
+
+The rolling-window states cost O(1) (max/min: monotonic deque of candidates) or O(log n)
+(quantile: bisect into a sorted copy of the window, the list shift is a memmove) per bar,
+so per-tick cost does not grow with the window the way a rolling recompute does.
+
+update(...) commits a closed bar; peek(...) returns the value the state would have with
+one more bar, without committing (used for the in-progress last bar of a window).
+
+IndicatorEngine keeps one state per key and, given the current bar window (DataFrame or
+BarSeries), folds only the bars that closed since the previous call: the first call warms
+the state over the last `warmup` bars declared by the kernel of the same name
+(core.indicators.kernels), later calls locate the last committed open_time with a
+binary search. A window that no longer continues the state (gap past the window start,
+rewind, or a changed close on the last committed bar) re-warms from the window; older
+committed bars are not re-checked — call reset() after rewriting history.
+
+Public API:
+  class EmaState, RmaState, SmaState, TrState, AtrState, RsiState, RsiSmaState, AtrSmaState
+  class RollingMaxState, RollingMinState, RollingQuantileState, StochKState, StochDState
+  STATES: Dict[str, type]       # name -> state class, used by IndicatorEngine
+  class IndicatorEngine:
+      value(stream, name, bars, *params, fields=None) -> float   # fields: columns fed instead of cls.fields
+      reset(stream=None) -> None
+  fold(name, columns, *params) -> np.ndarray     # whole-column run of one state
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.bars import BarSeries
+from core.indicators import kernels
+
+_NAN = float("nan")
+
+
+def _isnan(x: float) -> bool:
+    return x != x
+
+
+# ---------- moving averages ----------
+
+class EmaState:
+    """pandas ewm(span=period, adjust=False).mean(); `alpha` overrides the span."""
+
+    fields = ("close",)
+    __slots__ = ("alpha", "value", "_old_wt")
+
+    def __init__(self, period: int = 14, *, alpha: Optional[float] = None) -> None:
+        self.alpha = float(alpha) if alpha is not None else 2.0 / (max(1, int(period)) + 1.0)
+        self.value = _NAN
+        self._old_wt = 1.0
+
+    def _step(self, x: float) -> Tuple[float, float]:
+        v, w = self.value, self._old_wt
+        if _isnan(v):
+            return (x, w) if not _isnan(x) else (v, w)
+        w *= 1.0 - self.alpha
+        if _isnan(x):
+            return v, w
+        if v != x:  # pandas skips the update on equal values (constant-series guard)
+            a = 1.0 - w if self.alpha == 0.5 else self.alpha  # pandas: com == 1 weighs the new value 1 - w
+            v = (w * v + a * x) / (w + a)
+        return v, 1.0
+
+    def update(self, x: float) -> float:
+        self.value, self._old_wt = self._step(x)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        return self._step(x)[0]
+
+
+class RmaState(EmaState):
+    """Wilder's RMA: ewm(alpha=1/period, adjust=False)."""
+
+    __slots__ = ()
+
+    def __init__(self, period: int = 14) -> None:
+        super().__init__(alpha=1.0 / max(1, int(period)))
+
+
+class SmaState:
+    """rolling(window=period, min_periods=min_periods).mean() over non-NaN values."""
+
+    fields = ("close",)
+    __slots__ = ("period", "min_periods", "_win", "_sum", "_n", "_since_exact")
+
+    def __init__(self, period: int = 14, min_periods: int = 1) -> None:
+        self.period = max(1, int(period))
+        self.min_periods = max(1, int(min_periods))
+        self._win: Deque[float] = deque()
+        self._sum = 0.0
+        self._n = 0
+        self._since_exact = 0
+
+    def _mean(self, s: float, n: int) -> float:
+        return s / n if n >= self.min_periods and n > 0 else _NAN
+
+    def _with(self, x: float) -> Tuple[float, int]:
+        s, n = self._sum, self._n
+        if len(self._win) == self.period:
+            old = self._win[0]
+            if not _isnan(old):
+                s, n = s - old, n - 1
+        if not _isnan(x):
+            s, n = s + x, n + 1
+        return s, n
+
+    def update(self, x: float) -> float:
+        self._sum, self._n = self._with(x)
+        if len(self._win) == self.period:
+            self._win.popleft()
+        self._win.append(x)
+        self._since_exact += 1
+        if self._since_exact >= self.period:
+            # running sum drifts; an exact re-sum once per window keeps it amortized O(1)
+            self._sum = math.fsum(v for v in self._win if not _isnan(v))
+            self._since_exact = 0
+        return self._mean(self._sum, self._n)
+
+    def peek(self, x: float) -> float:
+        return self._mean(*self._with(x))
+
+
+# ---------- volatility ----------
+
+class TrState:
+    """ta.tr: max(h - l, |h - prev_close|, |l - prev_close|), NaN terms skipped."""
+
+    fields = ("high", "low", "close")
+    __slots__ = ("prev_close",)
+
+    def __init__(self) -> None:
+        self.prev_close = _NAN
+
+    def _tr(self, h: float, l: float) -> float:
+        pc = self.prev_close
+        terms = (h - l, abs(h - pc), abs(l - pc))
+        vals = [t for t in terms if not _isnan(t)]
+        return max(vals) if vals else _NAN
+
+    def update(self, h: float, l: float, c: float) -> float:
+        out = self._tr(h, l)
+        self.prev_close = c
+        return out
+
+    def peek(self, h: float, l: float, c: float) -> float:
+        return self._tr(h, l)
+
+
+class AtrState:
+    """ta.atr: Wilder RMA of the true range."""
+
+    fields = ("high", "low", "close")
+    __slots__ = ("_tr", "_rma")
+
+    def __init__(self, period: int = 14) -> None:
+        self._tr = TrState()
+        self._rma = RmaState(period)
+
+    def update(self, h: float, l: float, c: float) -> float:
+        return self._rma.update(self._tr.update(h, l, c))
+
+    def peek(self, h: float, l: float, c: float) -> float:
+        return self._rma.peek(self._tr.peek(h, l, c))
+
+
+class AtrSmaState:
+    """Rolling-mean ATR of core.logic.ema_rsi_atr: prev_close falls back to close, min_periods=1."""
+
+    fields = ("high", "low", "close")
+    __slots__ = ("prev_close", "_sma")
+
+    def __init__(self, period: int = 14) -> None:
+        self.prev_close = _NAN
+        self._sma = SmaState(period, min_periods=1)
+
+    def _tr(self, h: float, l: float, c: float) -> float:
+        pc = c if _isnan(self.prev_close) else self.prev_close
+        vals = [t for t in (abs(h - l), abs(h - pc), abs(l - pc)) if not _isnan(t)]
+        return max(vals) if vals else _NAN
+
+    def update(self, h: float, l: float, c: float) -> float:
+        out = self._sma.update(self._tr(h, l, c))
+        self.prev_close = c
+        return out
+
+    def peek(self, h: float, l: float, c: float) -> float:
+        return self._sma.peek(self._tr(h, l, c))
+
+
+# ---------- momentum ----------
+
+class RsiState:
+    """ta.rsi: Wilder RSI; 50 where the ratio is undefined (warm-up, no losses)."""
+
+    fields = ("close",)
+    __slots__ = ("prev_close", "_up", "_down")
+
+    def __init__(self, period: int = 14) -> None:
+        self.prev_close = _NAN
+        self._up = RmaState(period)
+        self._down = RmaState(period)
+
+    def _moves(self, c: float) -> Tuple[float, float]:
+        d = c - self.prev_close
+        if _isnan(d):
+            return _NAN, _NAN
+        return max(d, 0.0), -min(d, 0.0)
+
+    @staticmethod
+    def _rsi(up: float, down: float) -> float:
+        if _isnan(up) or _isnan(down) or down == 0.0:
+            return 50.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+    def update(self, c: float) -> float:
+        u, d = self._moves(c)
+        self.prev_close = c
+        return self._rsi(self._up.update(u), self._down.update(d))
+
+    def peek(self, c: float) -> float:
+        u, d = self._moves(c)
+        return self._rsi(self._up.peek(u), self._down.peek(d))
+
+
+class RsiSmaState:
+    """Rolling-mean RSI of core.logic.ema_rsi_atr (NaN until `period` moves; zero losses -> 1e-9)."""
+
+    fields = ("close",)
+    __slots__ = ("prev_close", "_up", "_down")
+
+    def __init__(self, period: int = 14) -> None:
+        p = max(1, int(period))
+        self.prev_close = _NAN
+        self._up = SmaState(p, min_periods=p)
+        self._down = SmaState(p, min_periods=p)
+
+    def _moves(self, c: float) -> Tuple[float, float]:
+        d = c - self.prev_close
+        # delta.where(delta > 0, 0.0): NaN moves count as 0
+        return (d if d > 0 else 0.0), (-d if d < 0 else 0.0)
+
+    @staticmethod
+    def _rsi(up: float, down: float) -> float:
+        if _isnan(up) or _isnan(down):
+            return _NAN
+        return 100.0 - 100.0 / (1.0 + up / (down if down != 0.0 else 1e-9))
+
+    def update(self, c: float) -> float:
+        u, d = self._moves(c)
+        self.prev_close = c
+        return self._rsi(self._up.update(u), self._down.update(d))
+
+    def peek(self, c: float) -> float:
+        u, d = self._moves(c)
+        return self._rsi(self._up.peek(u), self._down.peek(d))
+
+
+# ---------- rolling windows ----------
+
+class RollingMaxState:
+    """rolling(window=period, min_periods=1).max(): monotonic deque of (bar, value), NaN skipped."""
+
+    fields = ("close",)
+    __slots__ = ("period", "_q", "_t")
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = max(1, int(period))
+        self._q: Deque[Tuple[int, float]] = deque()  # values strictly decreasing from the head
+        self._t = 0
+
+    def update(self, x: float) -> float:
+        q = self._q
+        while q and q[0][0] <= self._t - self.period:
+            q.popleft()
+        if not _isnan(x):
+            while q and q[-1][1] <= x:
+                q.pop()
+            q.append((self._t, x))
+        self._t += 1
+        return q[0][1] if q else _NAN
+
+    def peek(self, x: float) -> float:
+        # one bar enters per step, so at most the head leaves the window
+        lo = self._t - self.period
+        head = next((v for i, v in islice(self._q, 2) if i > lo), _NAN)
+        if _isnan(head):
+            return x
+        return head if _isnan(x) or head >= x else x
+
+
+class RollingMinState(RollingMaxState):
+    """rolling(window=period, min_periods=1).min(): the max state over negated values."""
+
+    __slots__ = ()
+
+    def update(self, x: float) -> float:
+        return -super().update(-x)
+
+    def peek(self, x: float) -> float:
+        return -super().peek(-x)
+
+
+class RollingQuantileState:
+    """rolling(window=period, min_periods=1).quantile(q) (linear), NaN skipped; window kept sorted."""
+
+    fields = ("close",)
+    __slots__ = ("period", "q", "_win", "_sorted")
+
+    def __init__(self, period: int = 14, q: float = 0.5) -> None:
+        self.period = max(1, int(period))
+        self.q = float(q)
+        self._win: Deque[float] = deque()
+        self._sorted: list = []
+
+    def _quantile(self) -> float:
+        s = self._sorted
+        if not s:
+            return _NAN
+        pos = self.q * (len(s) - 1)
+        i = int(pos)
+        if i == pos:
+            return s[i]
+        return s[i] + (s[i + 1] - s[i]) * (pos - i)
+
+    def _oldest(self) -> float:
+        return self._win[0] if len(self._win) == self.period else _NAN
+
+    def update(self, x: float) -> float:
+        s = self._sorted
+        if len(self._win) == self.period:
+            old = self._win.popleft()
+            if not _isnan(old):
+                del s[bisect_left(s, old)]
+        self._win.append(x)
+        if not _isnan(x):
+            insort(s, x)
+        return self._quantile()
+
+    def peek(self, x: float) -> float:
+        s, old = self._sorted, self._oldest()
+        if not _isnan(old):
+            del s[bisect_left(s, old)]
+        if not _isnan(x):
+            insort(s, x)
+        try:
+            return self._quantile()
+        finally:
+            if not _isnan(x):
+                del s[bisect_left(s, x)]
+            if not _isnan(old):
+                insort(s, old)
+
+    def percentile_rank(self, x: float) -> float:
+        """Share (0..100) of the committed window's values <= x; NaN for an empty window."""
+        s = self._sorted
+        if not s or _isnan(x):
+            return _NAN
+        return 100.0 * bisect_right(s, x) / len(s)
+
+
+class StochKState:
+    """ta.stoch_kd %K: 100 * (c - lowest low) / (highest high - lowest low), flat range -> NaN."""
+
+    fields = ("high", "low", "close")
+    __slots__ = ("_hh", "_ll")
+
+    def __init__(self, k: int = 14) -> None:
+        self._hh = RollingMaxState(k)
+        self._ll = RollingMinState(k)
+
+    @staticmethod
+    def _k(hh: float, ll: float, c: float) -> float:
+        rng = hh - ll
+        if _isnan(rng) or rng == 0.0:
+            return _NAN
+        return 100.0 * (c - ll) / rng
+
+    def update(self, h: float, l: float, c: float) -> float:
+        return self._k(self._hh.update(h), self._ll.update(l), c)
+
+    def peek(self, h: float, l: float, c: float) -> float:
+        return self._k(self._hh.peek(h), self._ll.peek(l), c)
+
+
+class StochDState:
+    """ta.stoch_kd %D: sma(%K, d)."""
+
+    fields = ("high", "low", "close")
+    __slots__ = ("_k", "_sma")
+
+    def __init__(self, k: int = 14, d: int = 3) -> None:
+        self._k = StochKState(k)
+        self._sma = SmaState(d, min_periods=1)
+
+    def update(self, h: float, l: float, c: float) -> float:
+        return self._sma.update(self._k.update(h, l, c))
+
+    def peek(self, h: float, l: float, c: float) -> float:
+        return self._sma.peek(self._k.peek(h, l, c))
+
+
+STATES: Dict[str, type] = {
+    "ema": EmaState,
+    "rma": RmaState,
+    "sma": SmaState,
+    "tr": TrState,
+    "atr": AtrState,
+    "atr_sma": AtrSmaState,
+    "rsi": RsiState,
+    "rsi_sma": RsiSmaState,
+    "rolling_max": RollingMaxState,
+    "rolling_min": RollingMinState,
+    "rolling_quantile": RollingQuantileState,
+    "stoch_k": StochKState,
+    "stoch_d": StochDState,
+}
+
+
+# ---------- engine ----------
+
+def _open_times(bars: Any) -> Optional[np.ndarray]:
+    """int64 epoch-ms open times of a BarSeries / kline DataFrame; None when the window has no time axis."""
+    if isinstance(bars, BarSeries):
+        return bars.open_time
+    for name in ("open_time", "time"):
+        if name in getattr(bars, "columns", ()):
+            col = bars[name]
+            if pd.api.types.is_datetime64_any_dtype(col.dtype):
+                return col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+            return col.to_numpy(dtype=np.int64)
+    return None
+
+
+def _column(bars: Any, field: str) -> np.ndarray:
+    if isinstance(bars, BarSeries):
+        return bars.values(field)
+    name = field if field in bars.columns else field.capitalize()
+    return bars[name].to_numpy(dtype=np.float64)
+
+
+class _Entry:
+    __slots__ = ("state", "last_time", "last_close")
+
+    def __init__(self, state: Any) -> None:
+        self.state = state
+        self.last_time: Optional[int] = None
+        self.last_close = _NAN
+
+
+class IndicatorEngine:
+    """
+    Streaming indicator values per (stream, indicator, params).
+
+    `stream` is any hashable identifying one bar sequence (e.g. "BTCUSDT:1m"). value() treats
+    the last bar of the window as possibly in progress: it is peeked, not committed, and is
+    folded for good on the first call that sees a newer bar.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[Any, str, Tuple[Any, ...], Tuple[str, ...]], _Entry] = {}
+        self.warmups = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset(self, stream: Any = None) -> None:
+        if stream is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == stream]:
+                del self._entries[key]
+
+    def value(self, stream: Any, name: str, bars: Any, *params: Any,
+              fields: Optional[Sequence[str]] = None) -> float:
+        """`fields` feeds other columns than cls.fields (e.g. a rolling quantile of "atr")."""
+        cls = STATES[name]
+        n = len(bars)
+        if n == 0:
+            return _NAN
+        fields = tuple(fields or cls.fields)
+        cols = [_column(bars, f) for f in fields]
+        times = _open_times(bars)
+        # a fresh state only needs the kernel's declared warm-up, not the whole window
+        first = max(0, n - 1 - kernels.get(name).warmup(*params))
+        if times is None:  # no time axis: nothing to resume from, fold the window statelessly
+            state = cls(*params)
+            for i in range(first, n - 1):
+                state.update(*(float(c[i]) for c in cols))
+            return float(state.peek(*(float(c[n - 1]) for c in cols)))
+
+        key = (stream, name, tuple(params), fields)
+        entry = self._entries.get(key)
+        start = self._resume_at(entry, times, cols[-1]) if entry is not None else -1
+        if start < 0:
+            entry = self._entries[key] = _Entry(cls(*params))
+            self.warmups += 1
+            start = first
+        state = entry.state
+        for i in range(start, n - 1):
+            state.update(*(float(c[i]) for c in cols))
+        if start < n - 1:
+            entry.last_time = int(times[n - 2])
+            entry.last_close = float(cols[-1][n - 2])
+        return float(state.peek(*(float(c[n - 1]) for c in cols)))
+
+    @staticmethod
+    def _resume_at(entry: _Entry, times: np.ndarray, last_col: np.ndarray) -> int:
+        """Index of the first bar not yet folded into `entry`, or -1 when the window does not continue it."""
+        if entry.last_time is None:
+            return -1
+        i = int(np.searchsorted(times, entry.last_time, side="right"))
+        if i == 0 or i >= len(times) or int(times[i - 1]) != entry.last_time:
+            return -1
+        prev = float(last_col[i - 1])
+        if prev != entry.last_close and not (_isnan(prev) and _isnan(entry.last_close)):
+            return -1  # committed bar was rewritten (e.g. REST repair) — re-warm
+        return i
+
+
+def fold(name: str, columns: Sequence[Sequence[float]], *params: Any) -> np.ndarray:
+    """Runs a state over whole columns (reference/testing helper): one output per bar."""
+    state = STATES[name](*params)
+    n = len(columns[0])
+    return np.array([state.update(*(float(c[i]) for c in columns)) for i in range(n)], dtype=np.float64)
@@ -0,0 +1,207 @@
+# core/indicators/ta.py
+# Release-grade, dependency-light (numpy+pandas) technical indicators.
+# Safe for production: numeric coercion, NaN-tolerant, and typed.
+# Single-series math (sma/ema/rma/wma/tr/atr/rsi, stoch %K) runs through the kernel registry in
+# core/indicators/kernels.py; these are the pandas wrappers (Series in, Series out).
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple, Optional, Sequence, Dict
+import numpy as np
+import pandas as pd
+
+from core.indicators import kernels
+
+__all__ = [
+    "sma", "ema", "wma", "rma",
+    "rsi", "atr", "tr", "macd",
+    "stoch_kd", "bbands", "adx", "dmi",
+    "vwap", "roc", "obv", "supertrend",
+    "normalize_numeric",
+]
+
+_NP_FLOAT = np.float64
+
+# ---------- helpers ----------
+
+def normalize_numeric(s: pd.Series) -> pd.Series:
+    """Coerce to float Series, keep index, preserve NaNs; fill inf with NaN (no copy when already clean)."""
+    if isinstance(s, pd.Series) and s.dtype == _NP_FLOAT and not np.isinf(s.to_numpy()).any():
+        return s
+    return pd.Series(kernels.as_array(s), index=s.index, name=s.name, copy=False)
+
+def _wrap(out: np.ndarray, like: pd.Series, keep_name: bool = True) -> pd.Series:
+    return pd.Series(out, index=like.index, name=like.name if keep_name else None, copy=False)
+
+# ---------- moving averages (kernels: core.indicators.kernels) ----------
+
+@kernels.wraps("sma")
+def sma(s: pd.Series, period: int) -> pd.Series:
+    return _wrap(kernels.run("sma", s, period), s)
+
+@kernels.wraps("ema")
+def ema(s: pd.Series, period: int, adjust: bool = False) -> pd.Series:
+    return _wrap(kernels.run("ema", s, period, adjust), s)
+
+@kernels.wraps("wma")
+def wma(s: pd.Series, period: int) -> pd.Series:
+    """Linear weighted moving average (weights 1..p, newest heaviest), one np.convolve pass."""
+    return _wrap(kernels.run("wma", s, period), s, keep_name=False)
+
+@kernels.wraps("rma")
+def rma(s: pd.Series, period: int) -> pd.Series:
+    """Wilder's RMA (aka SMMA): ewm(alpha=1/p, adjust=False)."""
+    return _wrap(kernels.run("rma", s, period), s)
+
+# ---------- momentum / volatility ----------
+
+@kernels.wraps("rsi")
+def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """Wilder RSI (neutral 50 where history is insufficient)."""
+    return _wrap(kernels.run("rsi", close, period), close)
+
+@kernels.wraps("tr")
+def tr(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    """True Range (vectorized)."""
+    return _wrap(kernels.run("tr", high, low, close), close, keep_name=False)
+
+@kernels.wraps("atr")
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+    """Average True Range (Wilder)."""
+    return _wrap(kernels.run("atr", high, low, close, period), close, keep_name=False)
+
+def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+    c = normalize_numeric(close)
+    macd_line = ema(c, fast) - ema(c, slow)
+    signal_line = ema(macd_line, signal)
+    hist = macd_line - signal_line
+    return pd.DataFrame({"macd": macd_line, "signal": signal_line, "hist": hist}, index=c.index)
+
+def stoch_kd(high: pd.Series, low: pd.Series, close: pd.Series, k: int = 14, d: int = 3) -> pd.DataFrame:
+    k_line = kernels.run("stoch_k", high, low, close, k)
+    d_line = kernels.sma(k_line, d)
+    return pd.DataFrame({"%K": k_line, "%D": d_line}, index=close.index)
+
+def bbands(close: pd.Series, period: int = 20, num_std: float = 2.0) -> pd.DataFrame:
+    c = normalize_numeric(close)
+    m = sma(c, period)
+    std = c.rolling(window=max(1,period), min_periods=1).std(ddof=0)
+    upper = m + num_std * std
+    lower = m - num_std * std
+    width = (upper - lower) / m.replace(0.0, np.nan)
+    return pd.DataFrame({"mid": m, "upper": upper, "lower": lower, "width": width}, index=c.index)
+
+def dmi(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.DataFrame:
+    """Directional Movement Index (DI+, DI-)."""
+    h = normalize_numeric(high)
+    l = normalize_numeric(low)
+    c = normalize_numeric(close)
+    up_move = h.diff()
+    down_move = -l.diff()
+    plus_dm = ((up_move > down_move) & (up_move > 0)).astype(_NP_FLOAT) * up_move.clip(lower=0.0)
+    minus_dm = ((down_move > up_move) & (down_move > 0)).astype(_NP_FLOAT) * down_move.clip(lower=0.0)
+    tr_series = tr(h, l, c)
+    atr_series = rma(tr_series, period)
+    plus_di = 100.0 * rma(plus_dm, period) / atr_series.replace(0.0, np.nan)
+    minus_di = 100.0 * rma(minus_dm, period) / atr_series.replace(0.0, np.nan)
+    return pd.DataFrame({"+DI": plus_di, "-DI": minus_di}, index=c.index)
+
+def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+    dm = dmi(high, low, close, period)
+    plus_di, minus_di = dm["+DI"], dm["-DI"]
+    dx = 100.0 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0.0, np.nan)
+    return rma(dx, period)
+
+def vwap(high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.Series) -> pd.Series:
+    h = normalize_numeric(high); l = normalize_numeric(low); c = normalize_numeric(close)
+    v = normalize_numeric(volume).fillna(0.0)
+    tp = (h + l + c) / 3.0
+    cum_pv = (tp * v).cumsum()
+    cum_v = v.cumsum().replace(0.0, np.nan)
+    return cum_pv / cum_v
+
+def roc(series: pd.Series, period: int = 1) -> pd.Series:
+    s = normalize_numeric(series)
+    p = max(1, int(period))
+    return 100.0 * (s / s.shift(p) - 1.0)
+
+def obv(close: pd.Series, volume: pd.Series) -> pd.Series:
+    c = normalize_numeric(close)
+    v = normalize_numeric(volume).fillna(0.0)
+    sign = np.sign(c.diff().fillna(0.0))
+    return (v * sign).cumsum()
+
+# ---------- supertrend (popular ATR-based trailing) ----------
+
+def _map_compose_table() -> np.ndarray:
+    """_COMPOSE[f, g] = f∘g for maps {0..3} -> {0..3} packed 2 bits per input (f(x) = f >> 2x & 3)."""
+    f = np.arange(256, dtype=np.intp)[:, None]
+    g = np.arange(256, dtype=np.intp)[None, :]
+    out = np.zeros((256, 256), dtype=np.intp)
+    for x in range(4):
+        out |= ((f >> (2 * ((g >> (2 * x)) & 3))) & 3) << (2 * x)
+    return out.astype(np.uint8)
+
+_COMPOSE = _map_compose_table()
+
+@dataclass
+class SupertrendResult:
+    supertrend: pd.Series
+    direction: pd.Series  # +1 uptrend, -1 downtrend
+
+def supertrend(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 10, multiplier: float = 3.0) -> SupertrendResult:
+    """
+    ATR supertrend: line and direction (+1/-1), loop-free.
+
+    Per bar the line depends only on the (previous, current) direction pair, so the
+    recursion is a 4-state machine: for every bar the band candidates of all 4 states and
+    the transition map are built with array ops, and the maps are composed with a
+    log2(n)-step prefix scan. Same output as the bar-by-bar loop: a band persists
+    (min of upper / max of lower with the previous raw band) only while the previous
+    direction points at it, direction flips when close crosses the previous line, and a
+    NaN close keeps the direction.
+    """
+    h = normalize_numeric(high)
+    l = normalize_numeric(low)
+    c = normalize_numeric(close)
+
+    atr_val = atr(h, l, c, period).to_numpy()
+    hl2 = ((h + l) / 2.0).to_numpy()
+    upper = hl2 + multiplier * atr_val
+    lower = hl2 - multiplier * atr_val
+    n = len(c)
+    if n == 0:
+        empty = pd.Series(index=c.index, dtype=_NP_FLOAT)
+        return SupertrendResult(supertrend=empty, direction=empty.copy())
+
+    # state = 2*(prev_dir > 0) + (dir > 0); line candidate of bar j in each state
+    cand = np.empty((n, 4), dtype=_NP_FLOAT)
+    cand[:, 0] = upper
+    cand[:, 3] = lower
+    cand[0, 1], cand[0, 2] = lower[0], upper[0]
+    # python max(lb, prev)/min(ub, prev): prev only wins a strict comparison (NaN never does)
+    cand[1:, 1] = np.where(lower[:-1] > lower[1:], lower[:-1], lower[1:])
+    cand[1:, 2] = np.where(upper[:-1] < upper[1:], upper[:-1], upper[1:])
+
+    # transition of bar i (i >= 1): direction from close[i] vs the previous line
+    dir_pos = np.array([False, True, False, True])
+    prev = cand[:-1]
+    px = c.to_numpy()[1:, None]
+    with np.errstate(invalid="ignore"):
+        up = np.isnan(prev) | (px > prev) | (~(px < prev) & dir_pos)
+    nxt = (2 * dir_pos + up).astype(np.intp)
+    maps = (nxt[:, 0] | nxt[:, 1] << 2 | nxt[:, 2] << 4 | nxt[:, 3] << 6).astype(np.uint8)
+
+    # prefix scan: maps[i] becomes T_i ∘ ... ∘ T_1 (one table lookup per bar per pass)
+    k = 1
+    while k < len(maps):
+        maps[k:] = _COMPOSE[maps[k:], maps[:-k]]
+        k *= 2
+
+    state = np.empty(n, dtype=np.intp)
+    state[0] = 3  # first bar: no previous line → up
+    state[1:] = (maps >> 6) & 3  # applied to the state after bar 0
+    st = cand[np.arange(n), state]
+    dirn = np.where(state & 1, 1.0, -1.0)
+    return SupertrendResult(supertrend=pd.Series(st, index=c.index, dtype=_NP_FLOAT),
+                            direction=pd.Series(dirn, index=c.index, dtype=_NP_FLOAT))
@@ -1,25 +1,37 @@
 
 from __future__ import annotations
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 
-def _ema(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False).mean()
+from core.indicators import kernels, ta
+from core.indicators.cache import CACHE
+from core.indicators.stream import IndicatorEngine
 
+# Стрімінгові стани індикаторів на (symbol:interval, індикатор, період): кожен тік доганяє лише нові бари
+_ENGINE = IndicatorEngine()
+
+@kernels.wraps("rsi_sma")
 def _rsi(close: pd.Series, period: int=14) -> pd.Series:
-    delta = close.diff()
-    up = (delta.where(delta > 0, 0.0)).rolling(period).mean()
-    down = (-delta.where(delta < 0, 0.0)).rolling(period).mean()
-    rs = up / (down.replace(0, 1e-9))
-    return 100.0 - (100.0 / (1.0 + rs))
-
-def _atr(df: pd.DataFrame, period: int=14) -> pd.Series:
-    high = df['high'] if 'high' in df else df['High']
-    low = df['low'] if 'low' in df else df['Low']
-    close = df['close'] if 'close' in df else df['Close']
-    prev_close = close.shift(1)
-    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
-    return tr.rolling(period).mean()
+    """RSI стратегії: ковзні середні приростів/втрат (ядро rsi_sma, не Wilder)."""
+    return pd.Series(kernels.run("rsi_sma", close, period), index=close.index, name=close.name, copy=False)
+
+def _stream_key(params: Dict[str, Any]) -> Optional[str]:
+    """Ключ потоку барів для _ENGINE; None → рахуємо по всьому вікну (pandas)."""
+    sym = params.get('symbol') or params.get('SYMBOL')
+    flag = str(params.get('indicator_stream', os.getenv('INDICATOR_STREAM', '1'))).strip().lower()
+    if not sym or flag in ('0', 'false', 'no', 'off'):
+        return None
+    return f"{sym}:{params.get('interval') or params.get('INTERVAL') or ''}"
+
+def _stream_values(df: pd.DataFrame, key: str, ema_fast: int, ema_slow: int,
+                   rsi_p: int, atr_p: int) -> Optional[Tuple[float, float, float, float]]:
+    """Останні EMA/RSI/ATR з _ENGINE (O(нових барів)); None, якщо вікно без часу/OHLC."""
+    try:
+        return (_ENGINE.value(key, 'ema', df, ema_fast), _ENGINE.value(key, 'ema', df, ema_slow),
+                _ENGINE.value(key, 'rsi_sma', df, rsi_p), _ENGINE.value(key, 'atr_sma', df, atr_p))
+    except KeyError:
+        return None
 
 def generate_signal(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     """EMA/RSI/ATR стратегія з розрахунком SL/TP.
@@ -39,14 +51,18 @@ def generate_signal(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     sl_k = float(params.get('sl_atr', 1.5))
     tp_k = float(params.get('tp_atr', 2.0))
 
-    e_fast = _ema(close, ema_fast)
-    e_slow = _ema(close, ema_slow)
-    rsi = _rsi(close, rsi_p)
-    atr = _atr(df, atr_p)
+    key = _stream_key(params)
+    last = _stream_values(df, key, ema_fast, ema_slow, rsi_p, atr_p) if key else None
+    if last is None:
+        # повні серії через CACHE: ідентичне вікно → попадання, вікно, що лише виросло → догін хвоста
+        high, low, close = _ensure_ohlc(df)
+        last = (float(CACHE.call(ta.ema, close, ema_fast).iloc[-1]), float(CACHE.call(ta.ema, close, ema_slow).iloc[-1]),
+                float(CACHE.call(_rsi, close, rsi_p).iloc[-1]), float(CACHE.call(_atr_hlc, high, low, close, atr_p).iloc[-1]))
+    e_fast, e_slow, rsi, atr = last
 
-    if e_fast.iloc[-1] > e_slow.iloc[-1] and rsi.iloc[-1] > rsi_hi:
+    if e_fast > e_slow and rsi > rsi_hi:
         side = "LONG"
-    elif e_fast.iloc[-1] < e_slow.iloc[-1] and rsi.iloc[-1] < rsi_lo:
+    elif e_fast < e_slow and rsi < rsi_lo:
         side = "SHORT"
     else:
         side = "HOLD"
@@ -58,10 +74,10 @@ def generate_signal(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
         "action": side,
         "price": price,
         "qty": qty,
-        "ema_fast": float(e_fast.iloc[-1]),
-        "ema_slow": float(e_slow.iloc[-1]),
-        "rsi": float(rsi.iloc[-1]),
-        "atr": float(atr.iloc[-1]) if not atr.empty else None,
+        "ema_fast": e_fast,
+        "ema_slow": e_slow,
+        "rsi": rsi,
+        "atr": atr,
     }
 
     last_atr = decision["atr"]
@@ -127,13 +143,11 @@ def _atr(df, period):
     Robust ATR: supports various OHLC column namings; if only 'close' exists,
     ATR reduces to a moving mean of |delta close| (valid fallback for smoke tests).
     """
-    high, low, close = _ensure_ohlc(df)
-    prev_close = close.shift(1).fillna(close)
-    tr_components = [
-        (high - low).abs(),
-        (high - prev_close).abs(),
-        (low  - prev_close).abs(),
-    ]
-    tr = pd.concat(tr_components, axis=1).max(axis=1)
-    return tr.rolling(int(period), min_periods=1).mean()
+    return _atr_hlc(*_ensure_ohlc(df), period)
+
+@kernels.wraps("atr_sma")
+def _atr_hlc(high, low, close, period):
+    """ATR стратегії: ковзне середнє TR (ядро atr_sma; prev_close першого бару = close)."""
+    return pd.Series(kernels.run("atr_sma", high, low, close, int(period)), index=close.index, copy=False)
+
 # === OHLC NORMALIZER END ===
@@ -34,6 +34,7 @@ import pandas as pd
 from core.risk_guard import RiskManager, _read_last_equity
 from core.positions.portfolio import PortfolioState, Position
 from core.filters.gates import evaluate_gates
+from core.bars import BarSeries
 
 # --------- Helpers ---------
 
@@ -121,13 +122,16 @@ class PaperConfig:
 class PaperTrader:
     """Lifecycle & PnL in paper mode with risk gating and strategy gates."""
     def __init__(self, symbol: str, cfg: PaperConfig, *, risk_usd: Optional[float]=None,
-                 fee_bps: Optional[float]=None, slip_bps: Optional[float]=None, logger: Any=None) -> None:
+                 fee_bps: Optional[float]=None, slip_bps: Optional[float]=None, logger: Any=None,
+                 book: Any=None) -> None:
         self.symbol = symbol
         self.cfg = cfg
         self.risk_usd = float(risk_usd if risk_usd is not None else cfg.risk_usd)
         self.fee_bps = float(fee_bps if fee_bps is not None else cfg.fee_bps)
         self.slip_bps = float(slip_bps if slip_bps is not None else cfg.slip_bps)
         self.log = logger
+        # Optional local L2 book (core.exchange.orderbook.OrderBook): market fills at the book VWAP
+        self.book = book
         self.equity = float(_read_last_equity(symbol) or cfg.equity_start_usd)
         self.risk = RiskManager(symbol=self.symbol)
         self.portfolio = PortfolioState(symbol=self.symbol)
@@ -138,6 +142,15 @@ class PaperTrader:
         mult = 1.0 + (slip_bps / 10000.0) * (sgn if is_entry else -sgn)
         return float(price) * mult
 
+    def _book_fill(self, side: str, is_entry: bool, qty: float) -> Optional[float]:
+        """VWAP of a market fill for `qty` from the synced local book; None without a book, out of sync or too thin."""
+        book = self.book
+        if book is None or not getattr(book, "synced", False) or qty <= 0:
+            return None
+        long_ = str(side).upper() == "LONG"
+        vwap, filled = book.vwap("BUY" if long_ == is_entry else "SELL", qty)
+        return float(vwap) if vwap is not None and filled >= qty else None
+
     def _order_path(self) -> str:
         return self.cfg.orders_path_template.format(date=_today_str())
 
@@ -203,7 +216,9 @@ class PaperTrader:
         self.portfolio.set_position(None)
         return pnl
 
-    def on_bar(self, bar: Dict[str, Any], decision: Dict[str, Any]) -> None:
+    def on_bar(self, bar: Dict[str, Any] | BarSeries, decision: Dict[str, Any]) -> None:
+        if isinstance(bar, BarSeries):
+            bar = bar.last()
         ts = bar.get("open_time")
         if isinstance(ts, datetime):
             tss = ts.astimezone(timezone.utc).isoformat()
@@ -242,7 +257,7 @@ class PaperTrader:
             return
 
         if pos and pos.side.upper() != side_decision:
-            self._close(tss, pos, price, "Flip")
+            self._close(tss, pos, self._book_fill(pos.side, False, pos.qty) or price, "Flip")
 
         # ---- Strategy gates (session/ATR/HTF) ----
         gates_ok, gate_msgs = evaluate_gates(side_decision)
@@ -277,6 +292,7 @@ class PaperTrader:
             return
 
         # ---- Open new position ----
-        entry_px = self._apply_slip(price, side_decision, True, self.slip_bps)
+        entry_px = (self._book_fill(side_decision, True, self.risk_usd / max(1e-8, price))
+                    or self._apply_slip(price, side_decision, True, self.slip_bps))
         qty = max(1e-8, self.risk_usd / max(1e-8, entry_px))
         self._open(tss, side_decision, entry_px, qty, sl, tp, reason)
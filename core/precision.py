@@ -5,10 +5,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
-try:
-    import requests  # type: ignore
-except Exception:
-    requests = None  # type: ignore
+from core.exchange.transport import TRANSPORT
 
 _CACHE = {}
 _CACHE_PATH = Path("logs/cache/exchangeInfo.json")
@@ -36,13 +33,9 @@ def _save_cache():
         pass
 
 def _fetch_exchange_info(symbol: str) -> Optional[Dict[str, Any]]:
-    if requests is None:
-        return None
     url = "https://fapi.binance.com/fapi/v1/exchangeInfo"
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        data, _ = TRANSPORT.get_json(url, timeout=10)
     except Exception:
         return None
     syms = {s["symbol"]: s for s in data.get("symbols", []) if "symbol" in s}
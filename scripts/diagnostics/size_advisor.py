@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 # scripts/diagnostics/size_advisor.py
 from __future__ import annotations
-import os, json, math, ssl, urllib.request
+import os, sys, json, math, ssl, urllib.request
+from pathlib import Path
+
+# Ensure project root on sys.path (../../ from this file)
+_PROJ_ROOT = Path(__file__).resolve().parents[2]
+if str(_PROJ_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJ_ROOT))
+from core.exchange.prices import snapshot_for
 BASE = os.environ.get("BINANCE_FAPI_BASE", "https://fapi.binance.com")
 SYMBOL = os.environ.get("SYMBOL", "BTCUSDT")
 TARGET_USDT = float(os.environ.get("DESIRED_POS_USDT", "120.0"))
@@ -11,7 +18,7 @@ def _get(url: str):
     with urllib.request.urlopen(req, timeout=10, context=CTX) as r:
         return json.loads(r.read().decode("utf-8"))
 def price(symbol: str) -> float:
-    return float(_get(f"{BASE}/fapi/v1/ticker/price?symbol={symbol}")["price"])
+    return snapshot_for(BASE).get(symbol)
 def filters(symbol: str):
     info = _get(f"{BASE}/fapi/v1/exchangeInfo?symbol={symbol}")
     for s in info.get("symbols", []):
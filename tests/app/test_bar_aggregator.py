@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.bar_aggregator import BarAggregator
+from app.services.kline_store import STORE_COLUMNS
+from app.services.market_stream import StreamMarketDataProvider
+
+_STEP = 60_000
+_T0 = 1_727_740_800_000  # кратне 4h
+
+
+def _row(i, rng=None):
+    ot = _T0 + i * _STEP
+    c = 100.0 + (rng.normal() if rng is not None else i % 7)
+    return [ot, c - 0.5, c + 1.0, c - 1.0, c, 2.0, ot + _STEP - 1, 200.0, 3, 1.0, 100.0]
+
+
+def _resample(rows, minutes):
+    df = pd.DataFrame(rows, columns=STORE_COLUMNS)
+    key = df["open_time"] - df["open_time"] % (minutes * _STEP)
+    g = df.groupby(key)
+    return pd.DataFrame({"open": g["open"].first(), "high": g["high"].max(), "low": g["low"].min(),
+                         "close": g["close"].last(), "volume": g["volume"].sum(), "number_of_trades": g["number_of_trades"].sum()})
+
+
+def test_incremental_matches_resample_with_in_progress_updates():
+    rng = np.random.default_rng(7)
+    agg = BarAggregator("1m", ["5m", "15m", "1h"], capacity=100)
+    rows, closed = [], []
+    for i in range(130):
+        r = _row(i, rng)
+        # кілька in-progress апдейтів, потім закриття
+        agg.update("BTCUSDT", [*r[:4], r[4] - 0.3, *r[5:]], False)
+        agg.update("BTCUSDT", r, False)
+        closed += agg.update("BTCUSDT", r, True)
+        rows.append(r)
+    agg.update("BTCUSDT", r, True)  # дубль закриття нічого не міняє
+
+    for itv, m in (("5m", 5), ("15m", 15), ("1h", 60)):
+        got = agg.frame("BTCUSDT", itv, 100).set_index("open_time")
+        exp = _resample(rows, m)
+        pd.testing.assert_frame_equal(got[exp.columns].astype(float), exp.astype(float), check_names=False)
+    assert [c[0] for c in closed].count("15m") == 8 and [c[0] for c in closed].count("1h") == 2
+    assert agg.frame("BTCUSDT", "1h", 5)["close_time"].iloc[-1] == _T0 + 2 * 3_600_000 + 3_600_000 - 1
+
+
+def test_targets_filtered_and_missing_close_event():
+    agg = BarAggregator("5m", ["3m", "15m", "1w"])
+    assert agg.targets == ["15m"]
+    agg = BarAggregator("1m", ["3m"])
+    agg.update("X", _row(0), False)   # x=true для 0-ї хвилини втрачено
+    agg.update("X", _row(1), True)
+    agg.update("X", _row(2), False)
+    bar = agg.frame("X", "3m", 1).iloc[-1]
+    assert bar["volume"] == 6.0 and bar["number_of_trades"] == 9
+
+
+def _event(i, closed):
+    r = _row(i)
+    k = {"t": r[0], "T": r[6], "s": "BTCUSDT", "i": "1m", "o": str(r[1]), "h": str(r[2]), "l": str(r[3]),
+         "c": str(r[4]), "v": "2", "n": 3, "x": closed, "q": "200", "V": "1", "Q": "100"}
+    return json.dumps({"data": {"e": "kline", "s": "BTCUSDT", "k": k}})
+
+
+class _Rest:
+    def __init__(self, n):
+        self.calls = []
+        self.n = n
+
+    def get_klines_raw(self, symbol, interval, limit=1000, **_):
+        self.calls.append(interval)
+        if interval == "1m":
+            rows = [_row(i) for i in range(self.n)]
+        else:  # 15m-історія до _T0
+            rows = [[_T0 - j * 900_000, 1, 2, 0.5, 1.5, 30, _T0 - j * 900_000 + 899_999, 0, 45, 0, 0] for j in range(3, 0, -1)]
+        return pd.DataFrame(rows[-limit:], columns=STORE_COLUMNS)
+
+
+def test_stream_serves_htf_from_base_without_rest():
+    rest = _Rest(20)
+    p = StreamMarketDataProvider(["BTCUSDT"], ["1m"], capacity=200, htf_intervals=["15m"], rest=rest, autostart=False)
+    seen = []
+    p.add_listener(lambda s, i, row: seen.append((i, row[0])))
+
+    df = p.get_klines("BTCUSDT", "15m", limit=10)
+    assert rest.calls == ["1m", "15m"]
+    assert len(df) == 5 and df["close"].iloc[-1] == _row(19)[4]  # 3 з REST + 2 з 1m-буфера
+
+    for i in range(19, 31):
+        p.handle_message(_event(i, False))
+        p.handle_message(_event(i, True))
+    assert ("15m", _T0 + 15 * _STEP) in seen
+    df = p.get_klines("BTCUSDT", "15m", limit=10)
+    assert rest.calls == ["1m", "15m"]
+    assert len(df) == 6 and df["open"].iloc[-2] == _row(15)[1] and df["high"].iloc[-2] == max(_row(i)[2] for i in range(15, 30))
+
+
+def test_htf_seed_fetches_outside_lock_and_reset_reseeds():
+    import threading
+
+    p = None
+
+    class _ProbeRest(_Rest):
+        free = []
+
+        def get_klines_raw(self, symbol, interval, limit=1000, **_):
+            def probe():
+                self.free.append(p._lock.acquire(blocking=False))
+                if self.free[-1]:
+                    p._lock.release()
+
+            t = threading.Thread(target=probe)
+            t.start()
+            t.join()
+            if interval == "15m" and self.calls.count("15m") == 0:
+                with p._lock:  # розрив стріму посеред засіву
+                    p._resets += 1
+            return super().get_klines_raw(symbol, interval, limit)
+
+    rest = _ProbeRest(20)
+    p = StreamMarketDataProvider(["BTCUSDT"], ["1m"], capacity=200, htf_intervals=["15m"], rest=rest, autostart=False)
+    assert len(p.get_klines("BTCUSDT", "15m", limit=10)) == 5
+    assert rest.free == [True, True]  # стрім бере лок під час кожного REST-запиту
+    p.get_klines("BTCUSDT", "15m", limit=10)
+    p.get_klines("BTCUSDT", "15m", limit=10)
+    assert rest.calls == ["1m", "15m", "15m"]
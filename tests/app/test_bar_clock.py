@@ -0,0 +1,195 @@
+import pytest
+
+from app.services.bar_clock import BarClock
+
+_T0 = 1_700_000_100.0  # ділиться на 300 → межа і 1m, і 5m бару
+
+
+class _Clock:
+    """Віртуальний час: sleep() лише посуває стрілку."""
+
+    def __init__(self, t):
+        self.t = t
+        self.sleeps = []
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, sec):
+        self.sleeps.append(sec)
+        self.t += sec
+
+
+def test_wait_sleeps_until_close_plus_grace_once_per_bar():
+    c = _Clock(_T0 + 10)
+    clock = BarClock([("BTCUSDT", "1m"), ("BTCUSDT", "1m")], close_grace=1.0, clock=c, sleep=c.sleep)
+    assert clock.next_close("BTCUSDT", "1m") == _T0 + 60
+    assert clock.wait() == [("BTCUSDT", "1m")]
+    assert c.t == _T0 + 61 and c.sleeps == [51.0]  # один сон, рівно до close + grace
+    assert clock.next_close("BTCUSDT", "1m") == _T0 + 120
+    assert clock.due() == []  # той самий бар вдруге не видається
+
+    c.t += 600  # довгий сон/рішення: пропущені бари → одне рішення, далі знову по межі
+    assert clock.wait() == [("BTCUSDT", "1m")] and c.sleeps == [51.0]
+    assert clock.next_close("BTCUSDT", "1m") == _T0 + 720
+
+
+def test_streams_with_different_intervals_and_intrabar_ticks():
+    c = _Clock(_T0 + 1)
+    clock = BarClock([("BTCUSDT", "1m"), ("ETHUSDT", "5m")], close_grace=0.5, intrabar_sec=20,
+                     clock=c, sleep=c.sleep)
+    events = []
+    while c.t < _T0 + 301:
+        due = clock.wait()
+        events.append((round(c.t - _T0, 1), due))
+    closes = [due for _, due in events if due]
+    assert closes == [[("BTCUSDT", "1m")]] * 4 + [[("BTCUSDT", "1m"), ("ETHUSDT", "5m")]]
+    ticks = [d for d, due in events if not due]
+    assert ticks[:3] == [21.0, 41.0, 61.0] and len(ticks) == 15  # кожні 20 с, незалежно від закриттів
+    assert [d for d, due in events if due] == [60.5, 120.5, 180.5, 240.5, 300.5]
+
+
+def test_unknown_interval_raises_and_from_env(monkeypatch):
+    with pytest.raises(ValueError):
+        BarClock([("BTCUSDT", "7m")])
+    monkeypatch.setenv("BAR_CLOSE_GRACE_SEC", "2.5")
+    monkeypatch.setenv("LOOP_SLEEP_SEC", "0")
+    clock = BarClock.from_env([("BTCUSDT", "1m")])
+    assert clock.close_grace == 2.5 and clock.intrabar_sec is None
+
+
+def test_traderapp_decides_once_per_bar_and_runs_intrabar_hook(monkeypatch):
+    from app.run import TraderApp
+
+    c = _Clock(_T0 + 30)
+    app = TraderApp(symbol="BTCUSDT", interval="1m")
+    calls = {"decide": 0, "intrabar": []}
+
+    class MD:
+        def get_latest_price(self, symbol):
+            return 101.5
+
+    class EXITS:
+        def intrabar(self, symbol, price):
+            calls["intrabar"].append((symbol, price))
+            if len(calls["intrabar"]) == 10:
+                raise KeyboardInterrupt
+
+    def run_once(closed_only=False):
+        assert closed_only
+        calls["decide"] += 1
+
+    app.md, app.exit = MD(), EXITS()
+    monkeypatch.setattr(app, "run_once", run_once)
+    app._bar_loop(BarClock([("BTCUSDT", "1m")], close_grace=1.0, intrabar_sec=10, clock=c, sleep=c.sleep))
+    # старт (1) + закриття на _T0+61 і _T0+121; 10-й тік (на _T0+130) зупиняє цикл
+    assert calls["decide"] == 3
+    assert calls["intrabar"][0] == ("BTCUSDT", 101.5)
+
+
+def test_run_once_closed_only_drops_in_progress_bar(monkeypatch):
+    import pandas as pd
+
+    from app.run import TraderApp, _closed_bars
+
+    t = pd.date_range("2024-01-01", periods=4, freq="1min", tz="UTC")
+    df = pd.DataFrame({"open_time": t, "close_time": t + pd.Timedelta(milliseconds=59_999),
+                       "close": [1.0, 2.0, 3.0, 4.0]})
+    now = (t[3] + pd.Timedelta(seconds=1)).timestamp()  # close + grace: бар t[3] щойно відкрився
+    assert list(_closed_bars(df, now)["close"]) == [1.0, 2.0, 3.0]
+    ms = df.assign(close_time=[int(x.timestamp() * 1000) for x in df["close_time"]])  # epoch ms
+    assert len(_closed_bars(ms, now)) == 3 and _closed_bars(df, now + 60) is df
+
+    seen = []
+
+    class MD:
+        def get_klines(self, symbol, interval, limit=1000):
+            return df
+
+    class SIG:
+        def decide(self, frame, params):
+            seen.append(frame["close"].iloc[-1])
+            return {"side": "HOLD"}
+
+    app = TraderApp(symbol="BTCUSDT", interval="1m")
+    app.md, app.sig = MD(), SIG()
+    monkeypatch.setattr("app.run.time.time", lambda: now)
+    app.run_once(closed_only=True)
+    app.run_once()
+    assert seen == [3.0, 4.0]
+
+
+def test_bar_loop_refetches_frame_cached_before_close(monkeypatch):
+    import pandas as pd
+
+    from app.run import TraderApp
+    from app.services.market_cache import CachedMarketData
+
+    c = _Clock(_T0 + 30)
+    monkeypatch.setattr("time.time", c)
+    seen = []
+
+    class MD:
+        calls = 0
+
+        def get_klines(self, symbol, interval="1m", limit=1000):
+            self.calls += 1
+            now_ms = int(c() * 1000)
+            t = pd.to_datetime([now_ms - now_ms % 60_000 - 60_000, now_ms - now_ms % 60_000], unit="ms", utc=True)
+            return pd.DataFrame({"open_time": t, "close_time": t + pd.Timedelta(milliseconds=59_999),
+                                 "close": [float(self.calls)] * 2})  # close = номер запиту
+
+    class SIG:
+        def decide(self, frame, params):
+            seen.append((frame["open_time"].iloc[-1].timestamp(), frame["close"].iloc[-1]))
+            if len(seen) == 2:
+                raise KeyboardInterrupt
+            return {"side": "HOLD"}
+
+    app = TraderApp(symbol="BTCUSDT", interval="1m")
+    app.md, app.sig = CachedMarketData(MD(), close_grace=1.0), SIG()
+    # grace годинника (0.2 с) менший за grace кешу (1 с): без скидання кешу рішення на _T0+60.2
+    # отримало б кадр з _T0+30 з незакритим баром _T0 як «закритим»
+    app._bar_loop(BarClock([("BTCUSDT", "1m")], close_grace=0.2, clock=c, sleep=c.sleep))
+    assert seen == [(_T0 - 60, 1.0), (_T0, 2.0)]
+
+
+def test_intrabar_hook_keeps_exits_of_submitted_entry(monkeypatch):
+    import app.services.exit_manager as em
+    from app.run import TraderApp
+
+    calls = []
+    monkeypatch.setattr(em.net, "get_open_orders", lambda symbol: calls.append("open_orders") or [])
+    monkeypatch.setattr(em.net, "place_order_via_rest", lambda **spec: calls.append(spec["type"]) or {})
+    monkeypatch.setattr(em, "preview_exits", lambda symbol, side, sl, tp: {"orders": [
+        {"symbol": symbol, "type": "STOP_MARKET", "stopPrice": sl},
+        {"symbol": symbol, "type": "TAKE_PROFIT_MARKET", "stopPrice": tp}]})
+    price = {"px": 100.0}
+
+    class MD:
+        def get_klines(self, symbol, interval, limit=1000):
+            return object()
+
+        def get_latest_price(self, symbol):
+            return price["px"]
+
+    class SIG:
+        def decide(self, frame, params):
+            return {"side": "BUY", "sl": 90.0, "tp": 120.0}
+
+    class EXE:
+        def place(self, symbol, side, otype, wallet_usdt, **kw):
+            return {"submitted": True, "reason": "sent"}
+
+    app = TraderApp(symbol="BTCUSDT", interval="1m")
+    app.on_intrabar()  # без ExitManager — нічого
+    app.md, app.sig, app.exe, app.exit = MD(), SIG(), EXE(), em.ExitManager(cooldown_sec=0.0)
+    app.on_intrabar()
+    assert calls == []  # позиції ще немає — жодних REST-запитів
+    app.run_once()
+    app.on_intrabar()
+    assert calls == ["open_orders", "STOP_MARKET", "TAKE_PROFIT_MARKET"]
+    price["px"] = 89.0  # SL спрацював — трекінг знято
+    app.on_intrabar()
+    app.on_intrabar()
+    assert calls == ["open_orders", "STOP_MARKET", "TAKE_PROFIT_MARKET"]
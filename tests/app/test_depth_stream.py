@@ -0,0 +1,70 @@
+import json
+
+from app.services.depth_stream import OrderBookStream
+
+
+def _ev(U, u, pu, bids=(), asks=()):
+    return json.dumps({"stream": "btcusdt@depth@100ms", "data": {
+        "e": "depthUpdate", "E": 1, "s": "BTCUSDT", "U": U, "u": u, "pu": pu, "b": list(bids), "a": list(asks)}})
+
+
+def test_stream_snapshot_buffer_and_resync():
+    snaps = [{"lastUpdateId": 100, "bids": [["99", "1"]], "asks": [["101", "1"]]},
+             {"lastUpdateId": 200, "bids": [["98", "1"]], "asks": [["102", "1"]]}]
+    calls = []
+
+    def fetch(sym):
+        calls.append(sym)
+        return snaps[len(calls) - 1]
+
+    s = OrderBookStream(["BTCUSDT"], fetch=fetch, autostart=False)
+    s.handle_message(_ev(95, 105, 94, bids=[["99.5", "2"]]))   # перша подія → знімок + програвання буфера
+    assert s.wait_resync("BTCUSDT")
+    book = s.book("BTCUSDT")
+    assert calls == ["BTCUSDT"] and book.synced and book.best_bid() == 99.5
+
+    s.handle_message(_ev(106, 110, 105, asks=[["100.5", "1"]]))
+    assert book.best_ask() == 100.5 and len(calls) == 1
+
+    s.handle_message(_ev(150, 199, 140))                          # розрив pu → новий знімок
+    s.wait_resync("BTCUSDT")
+    assert len(calls) == 2 and s.resyncs == 2 and book.best_bid() == 98.0
+    s.handle_message(_ev(199, 205, 199, bids=[["98.5", "1"]]))
+    assert book.synced and book.best_bid() == 98.5
+    assert "btcusdt@depth@100ms" in s.stream_url
+
+
+def test_failed_resync_backs_off_and_keeps_buffer():
+    import threading
+    import time
+
+    calls, gate = [], threading.Event()
+
+    def fetch(sym):
+        calls.append(sym)
+        gate.wait(5)
+        if len(calls) == 1:
+            raise OSError("HTTP 503")
+        if len(calls) == 2:  # знімок старіший за буфер
+            return {"lastUpdateId": 50, "bids": [], "asks": []}
+        return {"lastUpdateId": 100, "bids": [["99", "1"]], "asks": [["101", "1"]]}
+
+    s = OrderBookStream(["BTCUSDT"], fetch=fetch, autostart=False, resync_backoff=0.2)
+    s.handle_message(_ev(95, 105, 94, bids=[["99.5", "2"]]))
+    for u in range(106, 110):  # поки знімок у польоті — лише буфер, без нових запитів
+        s.handle_message(_ev(u, u, u - 1))
+    gate.set()
+    assert not s.wait_resync("BTCUSDT") and calls == ["BTCUSDT"]
+    s.handle_message(_ev(110, 110, 109))  # пауза після невдачі ще триває
+    assert s.wait_resync("BTCUSDT") is False and len(calls) == 1
+
+    time.sleep(0.25)
+    s.handle_message(_ev(111, 111, 110))
+    assert not s.wait_resync("BTCUSDT") and len(calls) == 2  # знімок 50 < U=95: буфер не чіпаємо
+    assert len(s._pending["BTCUSDT"]) == 7
+
+    time.sleep(0.45)  # пауза подвоїлась
+    s.handle_message(_ev(112, 112, 111))
+    assert s.wait_resync("BTCUSDT") and len(calls) == 3
+    book = s.book("BTCUSDT")
+    assert book.best_bid() == 99.5 and book.last_update_id == 112
@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+
+from app.services import market_data as md
+from app.services.kline_gaps import KlineGapRepair, find_gaps
+from app.services.kline_store import KlineStore
+
+_STEP = 60_000
+_T0 = 1_727_740_800_000
+
+
+def _rows(idx):
+    return [[_T0 + i * _STEP, "1", "2", "0.5", str(1 + i), "3", _T0 + (i + 1) * _STEP - 1, "4", 5, "1", "1", "0"]
+            for i in idx]
+
+
+class _Rest:
+    def __init__(self, holes=()):
+        self.calls = []
+        self.holes = set(holes)  # бари, яких немає і на біржі
+        self.lock = threading.Lock()
+
+    def get_klines_raw(self, symbol, interval, limit=1000, start_time=None, end_time=None, **_):
+        with self.lock:
+            self.calls.append((start_time, end_time))
+        lo, hi = (start_time - _T0) // _STEP, (end_time - _T0) // _STEP
+        return md._raw_frame(_rows([i for i in range(lo, hi + 1) if i not in self.holes][:limit]))
+
+
+def test_find_gaps_vectorized():
+    t = _T0 + np.array([0, 1, 2, 5, 6, 9]) * _STEP
+    assert find_gaps(t, _STEP) == [(_T0 + 3 * _STEP, _T0 + 4 * _STEP), (_T0 + 7 * _STEP, _T0 + 8 * _STEP)]
+    assert find_gaps(t[:3], _STEP) == []
+
+
+def test_scan_and_repair_only_missing_ranges(tmp_path):
+    store = KlineStore(tmp_path)
+    present = [i for i in range(3000) if not (100 <= i < 2600) and i != 2900]
+    store.write("BTCUSDT", "1m", md._raw_frame(_rows(present)))
+
+    rest = _Rest(holes={2900})
+    svc = KlineGapRepair(store, rest, workers=3, per_call=1000)
+    rep = svc.scan("BTCUSDT", "1m")
+    assert rep.expected == 3000 and rep.missing == 2501 and len(rep.gaps) == 2
+    assert rep.continuity == round(499 / 3000, 6)
+
+    after = svc.repair("BTCUSDT", "1m")
+    # 2500 барів → 3 вікна по ≤1000, плюс 1 вікно на одиночний бар
+    assert len(rest.calls) == 4
+    assert min(c[0] for c in rest.calls) == _T0 + 100 * _STEP
+    assert after.repaired == 2500 and after.unrepaired == 1 and after.gaps == [(_T0 + 2900 * _STEP,) * 2]
+    assert [r.as_dict()["continuity"] for r in svc.scan_all()] == [after.continuity]
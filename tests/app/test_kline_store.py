@@ -0,0 +1,105 @@
+import time
+
+import pandas as pd
+
+from app.services import market_data as md
+from app.services.kline_store import KlineStore, STORE_COLUMNS
+
+_STEP = 60_000
+
+
+def _rows(start_ms: int, n: int, price: float = 100.0):
+    out = []
+    for i in range(n):
+        ot = start_ms + i * _STEP
+        p = price + i
+        out.append([ot, str(p), str(p + 1), str(p - 1), str(p + 0.5), "1.0",
+                    ot + _STEP - 1, "10", 3, "0.5", "5", "0"])
+    return out
+
+
+def test_store_upsert_and_tail(tmp_path):
+    store = KlineStore(tmp_path)
+    day_edge = 1_727_740_800_000  # 2024-10-01T00:00:00Z
+    store.write("btcusdt", "1m", md._raw_frame(_rows(day_edge - 3 * _STEP, 6)))
+    assert store.days("BTCUSDT", "1m") == ["2024-09-30", "2024-10-01"]
+
+    # повторний запис останнього бару перезаписує його, а не дублює
+    upd = _rows(day_edge + 2 * _STEP, 1, price=500.0)
+    store.write("BTCUSDT", "1m", md._raw_frame(upd))
+    fresh = KlineStore(tmp_path)
+    tail = fresh.tail("BTCUSDT", "1m", 10)
+    assert len(tail) == 6
+    assert list(tail.columns) == STORE_COLUMNS
+    assert tail["close"].iloc[-1] == 500.5
+    assert tail["open_time"].is_monotonic_increasing
+    assert fresh.last_open_time("BTCUSDT", "1m") == day_edge + 2 * _STEP
+
+    rng = fresh.read("BTCUSDT", "1m", start_time=day_edge - _STEP, end_time=day_edge)
+    assert list(rng["open_time"]) == [day_edge - _STEP, day_edge]
+
+
+def test_get_klines_syncs_only_tail(tmp_path, monkeypatch):
+    now_ms = int(time.time() * 1000)
+    now_ms -= now_ms % _STEP
+    history = _rows(now_ms - 9 * _STEP, 10)
+    calls = []
+
+    def fake_get_json(url, params, **_kw):
+        calls.append(dict(params))
+        start = params.get("startTime")
+        rows = [r for r in history if start is None or r[0] >= start]
+        return rows[-params["limit"]:] if start is None else rows[:params["limit"]], {}
+
+    monkeypatch.setattr(md, "_http_get_json", fake_get_json)
+    h = md.HttpMarketData(store=KlineStore(tmp_path))
+
+    df = h.get_klines("BTCUSDT", "1m", limit=8)
+    assert len(df) == 8
+    assert calls[-1]["limit"] == 8 and calls[-1].get("startTime") is None
+
+    df2 = h.get_klines("BTCUSDT", "1m", limit=8)
+    assert calls[-1]["startTime"] == history[-1][0]
+    assert calls[-1]["limit"] <= 3
+    assert list(df2.columns) == list(df.columns)
+    assert isinstance(df2["time"].dtype, pd.DatetimeTZDtype)
+    pd.testing.assert_frame_equal(df, df2)
+
+
+def test_short_store_refills_and_unchanged_bars_are_not_rewritten(tmp_path, monkeypatch):
+    now_ms = int(time.time() * 1000)
+    now_ms -= now_ms % _STEP
+    history = _rows(now_ms - 19 * _STEP, 20)  # останній бар ще не закритий
+    calls, writes = [], []
+
+    def fake_get_json(url, params, **_kw):
+        calls.append(dict(params))
+        start = params.get("startTime")
+        rows = [r for r in history if start is None or r[0] >= start]
+        return rows[-params["limit"]:] if start is None else rows[:params["limit"]], {}
+
+    monkeypatch.setattr(md, "_http_get_json", fake_get_json)
+    store = KlineStore(tmp_path)
+    real_write_day = store._write_day
+    monkeypatch.setattr(store, "_write_day", lambda *a: (writes.append(a[2]), real_write_day(*a)))
+    h = md.HttpMarketData(store=store)
+
+    assert len(h.get_klines("BTCUSDT", "1m", limit=8)) == 8
+    # у store 8 барів, а просять 15: повна сторінка, як при холодному старті
+    assert len(h.get_klines("BTCUSDT", "1m", limit=15)) == 15
+    assert calls[-1]["limit"] == 15 and calls[-1].get("startTime") is None
+    # незакритий бар на диск не йде
+    assert KlineStore(tmp_path).last_open_time("BTCUSDT", "1m") == history[-2][0]
+    assert store.last_open_time("BTCUSDT", "1m") == history[-1][0]
+
+    n = len(writes)
+    h.get_klines("BTCUSDT", "1m", limit=15)  # той самий хвіст — партиції не переписуються
+    assert len(writes) == n
+    history[-1][4] = "999"  # незакритий бар змінився — все одно лише в пам'яті
+    assert h.get_klines("BTCUSDT", "1m", limit=15)["close"].iloc[-1] == 999.0 and len(writes) == n
+
+    # біржа має менше, ніж просимо: повна сторінка один раз, далі знову лише хвіст
+    assert len(h.get_klines("BTCUSDT", "1m", limit=50)) == 20
+    assert calls[-1]["limit"] == 50
+    h.get_klines("BTCUSDT", "1m", limit=50)
+    assert calls[-1].get("startTime") == history[-1][0]
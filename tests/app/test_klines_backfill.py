@@ -0,0 +1,55 @@
+import threading
+import time
+
+from app.services import market_data as md
+
+_STEP = 60_000
+_T0 = 1_727_740_800_000
+
+
+def _rows(lo: int, hi: int):
+    first = lo + (-lo) % _STEP
+    return [[t, "1", "2", "0.5", str(t), "1", t + _STEP - 1, "0", 1, "0", "0", "0"]
+            for t in range(first, hi + 1, _STEP)]
+
+
+def test_backfill_windows_are_fetched_concurrently(monkeypatch):
+    calls = []
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_get_json(url, params, **_kw):
+        with lock:
+            calls.append((params["startTime"], params["endTime"]))
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        rows = _rows(params["startTime"], params["endTime"])[: params["limit"]]
+        return rows, {"x-mbx-used-weight-1m": "10"}
+
+    monkeypatch.setattr(md, "_http_get_json", fake_get_json)
+    h = md.HttpMarketData(backfill_workers=4)
+    df = h.get_klines_raw("BTCUSDT", "1m", limit=100, start_time=_T0, max_bars=950)
+
+    assert len(calls) == 10
+    assert active["peak"] > 1
+    assert len(df) == 950
+    assert df["open_time"].iloc[0] == _T0
+    assert df["open_time"].is_unique and df["open_time"].is_monotonic_increasing
+
+    tail = h.get_klines("BTCUSDT", "1m", limit=100, end_time=_T0 + 999 * _STEP, max_bars=250)
+    assert len(tail) == 250
+    assert tail["close"].iloc[-1] == float(_T0 + 999 * _STEP)
+
+
+
+def test_backfill_windows_stop_at_max_bars():
+    step = 60_000
+    # довгий діапазон, мало барів: лише вікна перших max_bars барів
+    w = md._backfill_windows("1m", 500, 1200, 0, 100_000 * step)
+    assert w == [(0, 500 * step - 1), (500 * step, 1000 * step - 1), (1000 * step, 1200 * step - 1)]
+    assert md._backfill_windows("1m", 500, 1200, 0, 700 * step - 1)[-1] == (500 * step, 700 * step - 1)
+    w = md._backfill_windows("1m", 500, 1200, None, 100_000 * step)
+    assert len(w) == 3 and w[0][0] == (100_000 - 1200) * step + 1
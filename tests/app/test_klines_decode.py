@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from app.services import market_data as md
+from app.services.kline_store import STORE_COLUMNS, STORE_DTYPES
+
+
+def _raw(n: int):
+    t0 = 1_727_740_800_000
+    return [[t0 + i * 60_000, "100.5", "101", "99.25", str(100 + i), "1.5", t0 + (i + 1) * 60_000 - 1,
+             "150.75", 7 + i, "0.5", "50.25", "0"] for i in range(n)]
+
+
+def test_fast_decoder_matches_slow_path():
+    raw = _raw(50)
+    fast = md._raw_frame(raw)
+    assert list(fast.columns) == STORE_COLUMNS
+    assert {c: fast[c].dtype for c in STORE_COLUMNS} == {c: np.dtype(t) for c, t in STORE_DTYPES.items()}
+    pd.testing.assert_frame_equal(fast, md._raw_frame_slow(raw))
+    assert fast["open"].to_numpy().flags["C_CONTIGUOUS"]
+
+    df = md._as_dataframe_klines(raw)
+    assert list(df.columns) == md._OUT_COLUMNS
+    assert (df["time"] == df["open_time"]).all() and str(df["time"].dt.tz) == "UTC"
+    assert df["close"].iloc[-1] == 149.0
+
+
+def test_decoder_coerces_bad_values():
+    raw = _raw(2)
+    raw[1][4] = "oops"
+    df = md._raw_frame(raw)
+    assert np.isnan(df["close"].iloc[1]) and df["close"].iloc[0] == 100.0
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import market_cache as mc
+from app.services.market_cache import CachedMarketData
+
+
+class _SlowMD:
+    symbol = "BTCUSDT"
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_klines(self, symbol, interval="1m", limit=500, **kw):
+        self.calls += 1
+        time.sleep(0.05)
+        return pd.DataFrame({"close": [1.0, 2.0, float(self.calls)]})
+
+    def get_latest_price(self, symbol, **kw):
+        self.calls += 1
+        return 100.0 + self.calls
+
+
+def test_single_flight_and_bar_close_expiry(monkeypatch):
+    inner = _SlowMD()
+    md = CachedMarketData(inner, close_grace=0.0)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(md.get_klines("BTCUSDT", "1m", limit=3))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert inner.calls == 1 and len(out) == 6
+    st = md.stats()
+    assert st["misses"] == 1 and st["coalesced"] == 5
+
+    df = md.get_klines("BTCUSDT", "1m", limit=3)
+    df.loc[0, "close"] = -1.0  # зміна копії викликача не псує кеш
+    again = md.get_klines("BTCUSDT", "1m", limit=3)
+    assert again["close"].iloc[0] == 1.0
+    # без copy-on-write (pandas 2.x) пласка копія ділила б буфер з кешем
+    assert not np.shares_memory(df["close"].to_numpy(), again["close"].to_numpy())
+    assert inner.calls == 1 and md.stats()["hits"] == 2
+
+    # наступний бар → запис протух
+    now = time.time()
+    monkeypatch.setattr(mc.time, "time", lambda: now + 61.0)
+    assert md.get_klines("BTCUSDT", "1m", limit=3)["close"].iloc[-1] == 2.0
+    assert inner.calls == 2
+
+
+def test_next_bar_close_and_price_ttl():
+    assert mc.next_bar_close("1m", now=120.5) == 180.0
+    assert mc.next_bar_close("1h", now=3600.0) == 7200.0
+    md = CachedMarketData(_SlowMD(), price_ttl=60)
+    assert md.get_latest_price("BTCUSDT") == md.get_latest_price("btcusdt") == 101.0
+    md.invalidate("BTCUSDT")
+    assert md.get_latest_price("BTCUSDT") == 102.0
+    assert md.symbol == "BTCUSDT"  # проксі атрибутів до клієнта
+
+
+def test_ranged_queries_bypass_cache():
+    inner = _SlowMD()
+    md = CachedMarketData(inner)
+    for i in range(3):
+        md.get_klines("BTCUSDT", "1m", limit=3, start_time=1_000 * i)
+    md.get_klines("BTCUSDT", "1m", limit=3, max_bars=10)
+    md.get_klines("BTCUSDT", "1m", limit=3, start_time=0)
+    assert inner.calls == 5 and md.stats()["entries"] == 0
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from app.services.market_data_async import AsyncHttpMarketData
+
+_STEP = 60_000
+_T0 = 1_727_740_800_000
+
+
+async def _serve(delay: float):
+    seen = []
+
+    async def klines(request):
+        seen.append(request.query["symbol"])
+        await asyncio.sleep(delay)
+        n = int(request.query["limit"])
+        rows = [[_T0 + i * _STEP, "1", "2", "0.5", str(1.5 + i), "3", _T0 + (i + 1) * _STEP - 1, "4", 1, "1", "1", "0"]
+                for i in range(n)]
+        return web.json_response(rows, headers={"X-MBX-USED-WEIGHT-1M": "10"})
+
+    async def price(request):
+        return web.json_response({"symbol": request.query["symbol"], "price": "123.5"})
+
+    app = web.Application()
+    app.router.add_get("/api/v3/klines", klines)
+    app.router.add_get("/api/v3/ticker/price", price)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", seen
+
+
+def test_get_klines_many_runs_concurrently():
+    async def main():
+        runner, base, seen = await _serve(delay=0.2)
+        try:
+            async with AsyncHttpMarketData(base, concurrency=50) as md:
+                syms = [f"SYM{i}USDT" for i in range(30)]
+                t0 = time.perf_counter()
+                out = await md.get_klines_many(syms, "1m", limit=5)
+                elapsed = time.perf_counter() - t0
+                price = await md.get_latest_price("btcusdt")
+        finally:
+            await runner.cleanup()
+        return out, elapsed, price, seen
+
+    out, elapsed, price, seen = asyncio.run(main())
+    assert sorted(seen) == sorted(out) and len(out) == 30
+    assert elapsed < 0.2 * 5  # ~один round-trip, а не 30 послідовних (6s)
+    df = out["SYM0USDT"]
+    assert len(df) == 5 and "time" in df.columns and df["close"].iloc[-1] == 5.5
+    assert price == 123.5
+
+
+def test_get_latest_price_accepts_list_payload(monkeypatch):
+    md = AsyncHttpMarketData("http://127.0.0.1:1")
+
+    async def get_json(path, params):
+        return [{"symbol": "ETHUSDT", "price": "1"}, {"symbol": "BTCUSDT", "price": "99.5"}]
+
+    monkeypatch.setattr(md, "_get_json", get_json)
+    assert asyncio.run(md.get_latest_price("btcusdt")) == 99.5
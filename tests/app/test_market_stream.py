@@ -0,0 +1,108 @@
+import json
+
+import pandas as pd
+
+from app.services.kline_store import STORE_COLUMNS
+from app.services.market_stream import StreamMarketDataProvider
+
+_STEP = 60_000
+_T0 = 1_727_740_800_000
+
+
+def _event(i: int, close: float, closed: bool, symbol: str = "BTCUSDT") -> str:
+    ot = _T0 + i * _STEP
+    k = {"t": ot, "T": ot + _STEP - 1, "s": symbol, "i": "1m", "o": "100", "h": "110", "l": "90",
+         "c": str(close), "v": "5", "n": 7, "x": closed, "q": "500", "V": "2", "Q": "200"}
+    return json.dumps({"stream": f"{symbol.lower()}@kline_1m", "data": {"e": "kline", "s": symbol, "k": k}})
+
+
+class _FakeRest:
+    def __init__(self, n: int):
+        self.calls = 0
+        self.rows = [[_T0 + i * _STEP, 1.0, 2.0, 0.5, 1.5, 3.0, _T0 + (i + 1) * _STEP - 1, 4.0, 1, 1.0, 1.0]
+                     for i in range(n)]
+
+    def get_klines_raw(self, symbol, interval, limit=1000, **_):
+        self.calls += 1
+        return pd.DataFrame(self.rows[-limit:], columns=STORE_COLUMNS)
+
+
+def test_stream_ring_and_backfill():
+    rest = _FakeRest(3)
+    p = StreamMarketDataProvider(["BTCUSDT"], ["1m"], capacity=5, rest=rest, autostart=False)
+    closed = []
+    p.add_listener(lambda s, i, row: closed.append((s, i, row[0])))
+
+    p.handle_message(_event(2, 101.0, closed=False))
+    p.handle_message(_event(2, 102.0, closed=True))
+    p.handle_message(_event(3, 103.0, closed=False))
+    assert closed == [("BTCUSDT", "1m", _T0 + 2 * _STEP)]
+
+    df = p.get_klines("BTCUSDT", "1m", limit=10)
+    assert rest.calls == 1
+    assert list(df["close"]) == [1.5, 1.5, 102.0, 103.0]
+    assert "time" in df.columns and len(df) == 4
+
+    # наступний виклик — без REST
+    p.handle_message(_event(4, 104.0, closed=False))
+    p.handle_message(_event(5, 105.0, closed=False))
+    df = p.get_klines("BTCUSDT", "1m", limit=10)
+    assert rest.calls == 1
+    assert len(df) == 5 and df["close"].iloc[-1] == 105.0
+
+    # розрив у послідовності → наступний get_klines добирає з REST
+    p.handle_message(_event(8, 108.0, closed=False))
+    p.get_klines("BTCUSDT", "1m", limit=2)
+    assert rest.calls == 2
+
+
+def test_stream_url_and_unknown_events():
+    p = StreamMarketDataProvider(["btcusdt", "ETHUSDT"], ["1m", "15m"], rest=_FakeRest(1), autostart=False)
+    assert "btcusdt@kline_1m" in p.stream_url and "ethusdt@kline_15m" in p.stream_url
+    p.handle_message({"data": {"e": "aggTrade"}})
+    p.handle_message(_event(0, 1.0, closed=True, symbol="XRPUSDT"))
+
+
+def test_backfill_fetches_outside_lock_and_reset_keeps_ring_unsynced():
+    import threading
+
+    p = None
+
+    class _ProbeRest(_FakeRest):
+        def get_klines_raw(self, symbol, interval, limit=1000, **_):
+            # інший потік (стрім) має брати лок, поки йде REST-запит
+            free = []
+
+            def probe():
+                free.append(p._lock.acquire(blocking=False))
+                if free[-1]:
+                    p._lock.release()
+
+            t = threading.Thread(target=probe)
+            t.start()
+            t.join()
+            self.free = free == [True]
+            if self.calls == 0:
+                with p._lock:  # розрив стріму посеред запиту
+                    p._resets += 1
+            return super().get_klines_raw(symbol, interval, limit)
+
+    rest = _ProbeRest(3)
+    p = StreamMarketDataProvider(["BTCUSDT"], ["1m"], capacity=5, rest=rest, autostart=False)
+    assert len(p.get_klines("BTCUSDT", "1m")) == 3 and rest.free
+    p.get_klines("BTCUSDT", "1m")  # бекфіл зловив розрив → ще один запит
+    p.get_klines("BTCUSDT", "1m")
+    assert rest.calls == 2
+
+
+def test_latest_price_freshness_is_per_symbol():
+    rest = _FakeRest(3)
+    rest.get_latest_price = lambda symbol: -1.0
+    p = StreamMarketDataProvider(["BTCUSDT", "ETHUSDT"], ["1m"], capacity=5, rest=rest, autostart=False)
+    p.get_klines("ETHUSDT", "1m")  # ETH — лише бекфіл з REST, стрім по ньому мовчить
+    p.handle_message(_event(3, 103.0, closed=False))
+    assert p.get_latest_price("BTCUSDT") == 103.0
+    assert p.get_latest_price("ETHUSDT") == -1.0
+    p._rings[("BTCUSDT", "1m")].updated -= 10  # BTC теж замовк, хоча сокет живий
+    p.handle_message(_event(3, 3.0, closed=False, symbol="ETHUSDT"))
+    assert p.get_latest_price("BTCUSDT") == -1.0 and p.get_latest_price("ETHUSDT") == 3.0
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from app.services.kline_store import KlineStore
+from app.services.trade_bars import TradeBarBuilder, TradeBarStream, parse_bar_spec
+
+_T0 = 1_727_740_800_000
+
+
+def test_parse_bar_spec():
+    assert parse_bar_spec("5s") == ("time", 5_000.0)
+    assert parse_bar_spec("v100") == ("volume", 100.0)
+    assert parse_bar_spec("d1e6") == ("dollar", 1e6)
+    with pytest.raises(ValueError):
+        parse_bar_spec("0s")
+    with pytest.raises(ValueError):
+        parse_bar_spec("x5")
+
+
+def test_time_bars_subsecond_and_close_due():
+    b = TradeBarBuilder("5s", capacity=10)
+    assert b.add(_T0 + 100, 10.0, 1.0) is None
+    assert b.add(_T0 + 4_900, 12.0, 2.0, buyer_maker=True) is None
+    assert b.add(_T0 + 2_000, 9.0, 1.0) is None
+    closed = b.add(_T0 + 5_000, 11.0, 1.0)
+    assert closed == [_T0, 10.0, 12.0, 9.0, 9.0, 4.0, _T0 + 4_999, 43.0, 3, 2.0, 19.0]
+    assert len(b.bars) == 2 and list(b.bars.close) == [9.0, 11.0]
+    assert b.add(_T0 + 1_000, 8.0, 1.0) is None and b.bars.low[-1] == 11.0  # запізніла угода
+    assert b.close_due(_T0 + 9_999) is None
+    assert b.close_due(_T0 + 10_000)[0] == _T0 + 5_000
+    # угода з бару, який уже закрив close_due(): відкидається, а не відкриває бар на _T0+5001
+    assert b.add(_T0 + 9_000, 7.0, 1.0) is None and b.current is None
+    assert b.add(_T0 + 10_500, 13.0, 1.0) is None
+    assert list(b.bars.open_time) == [_T0, _T0 + 5_000, _T0 + 10_000]
+
+
+def test_volume_and_dollar_bars():
+    v = TradeBarBuilder("v3")
+    d = TradeBarBuilder("d100")
+    out_v, out_d = [], []
+    for i, (px, q) in enumerate([(10, 1), (10, 1), (20, 2), (10, 1), (10, 5)]):
+        out_v.append(v.add(_T0 + i, px, q))
+        out_d.append(d.add(_T0, px, q))  # усе в одну мс
+    assert [r[5] if r else None for r in out_v] == [None, None, 4.0, None, 6.0]
+    assert [r[7] if r else None for r in out_d] == [None, None, None, None, 120.0]
+    assert list(v.bars.open_time) == [_T0, _T0 + 3]
+    # той самий ms → open_time зсувається, BarSeries лишається строго зростаючою
+    v2 = TradeBarBuilder("v1")
+    v2.add(_T0, 1.0, 1.0)
+    v2.add(_T0, 1.0, 1.0)
+    assert list(v2.bars.open_time) == [_T0, _T0 + 1]
+
+
+def test_stream_messages_replay_and_store(tmp_path):
+    store = KlineStore(tmp_path / "store")
+    s = TradeBarStream(["BTCUSDT"], ["1s", "v2"], store=store, flush_bars=1)
+    seen = []
+    s.add_listener(lambda sym, spec, row: seen.append((spec, row[0])))
+    msg = lambda t, p, q: json.dumps({"stream": "btcusdt@aggTrade", "data": {"e": "aggTrade", "s": "BTCUSDT", "p": str(p), "q": str(q), "T": t, "m": False}})
+    for t in (0, 500, 1_200):
+        s.handle_message(msg(_T0 + t, 100.0, 1.0))
+    s.handle_message(json.dumps({"data": {"e": "kline"}}))
+    assert seen == [("v2", _T0), ("1s", _T0)]
+    assert list(store.read("BTCUSDT", "1s")["volume"]) == [2.0]
+    assert "btcusdt@aggTrade" in s.stream_url
+
+    csv = tmp_path / "BTCUSDT-aggTrades-2024-10-01.csv"
+    csv.write_text("agg_trade_id,price,quantity,first_trade_id,last_trade_id,transact_time,is_buyer_maker\n"
+                   + "".join(f"{i},{100 + i},1,{i},{i},{(_T0 + 10_000 + i * 400) * 1000},{'true' if i % 2 else 'false'}\n" for i in range(10)))
+    r = TradeBarStream(["BTCUSDT"], ["1s"], store=store)
+    assert r.replay(csv, "BTCUSDT") == 10
+    bars = r.bars("BTCUSDT", "1s")
+    assert len(bars) == 4 and bars.open_time[0] == _T0 + 10_000 and bars.close[-1] == 109.0
+    assert len(store.read("BTCUSDT", "1s")) == 4  # 1 бар зі стріму + 3 закритих з replay
+
+
+def test_quiet_symbol_bar_closes_on_stream_clock():
+    s = TradeBarStream(["BTCUSDT", "ETHUSDT"], ["1s", "v100"])
+    seen = []
+    s.add_listener(lambda sym, spec, row: seen.append((sym, spec, row[0])))
+    msg = lambda sym, t: {"data": {"e": "aggTrade", "s": sym, "p": "100", "q": "1", "T": _T0 + t, "m": False}}
+    s.handle_message(msg("ETHUSDT", 200))  # ETH далі мовчить
+    for t in range(0, 2_500, 100):  # BTC торгує безперервно — recv() ніколи не чекає 1 с
+        s.handle_message(msg("BTCUSDT", t))
+    eth = [x for x in seen if x[0] == "ETHUSDT"]
+    assert eth == [("ETHUSDT", "1s", _T0)]  # volume-бари годинник не закриває
+    assert seen.index(eth[0]) == seen.index(("BTCUSDT", "1s", _T0)) + 1  # на тій самій угоді, що й BTC
+    assert s._builders[("ETHUSDT", "1s")].current is None
+    s.handle_message(msg("ETHUSDT", 900))  # запізніла угода закритого бару відкидається
+    assert s._builders[("ETHUSDT", "1s")].current is None
@@ -6,6 +6,8 @@
 - Завжди тримає CWD у корені репозиторію (щоб бачити .env / .env.example).
 - Додає корінь у sys.path (стабільні імпорти app/, core/, tools/).
 - Надає фікстуру df_klines з детермінованими цінами для юніт/інтеграційних тестів.
+- Для тестів індикаторів: фабрика random_ohlc, порівняння assert_same і еталонні (старі)
+  реалізації legacy_wma / legacy_supertrend — еталон живе в тестах, а не в бенчмарку tools/bench.
 """
 
 from __future__ import annotations
@@ -98,3 +100,95 @@ def df_klines() -> pd.DataFrame:
     Базова серія достатньо “жива” для індикаторів (EMA/RSI/ATR тощо).
     """
     return _gen_klines(n=200, start_price=100.0, step=0.2)
+
+
+# ---- Індикатори: випадкове блукання та еталонні реалізації ----
+def _random_ohlc(n: int, seed: int = 7, *, columns: int | None = None, gaps: bool = False):
+    """
+    (high, low, close): випадкове блукання close, high/low — close ± випадковий спред.
+    columns=m — DataFrame (n, m) з m незалежних серій (панель символів).
+    gaps=True — поодинокі NaN і плаский відрізок у close (гілки пропусків і v == x в ewm/rolling).
+    """
+    rng = np.random.default_rng(seed)
+    shape = n if columns is None else (n, int(columns))
+    walk = 100.0 + rng.standard_normal(shape).cumsum(axis=0)
+    c = pd.Series(walk) if columns is None else pd.DataFrame(walk)
+    if gaps:
+        c.iloc[[i for i in (5, 6, 50, 300) if i < n]] = np.nan
+        if n > 100:
+            c.iloc[100:110] = c.iloc[100]
+    spread = rng.random(shape) * 2.0
+    return c + spread, c - spread, c
+
+
+def _assert_same(got, ref, rtol: float = 1e-9, atol: float = 1e-9) -> None:
+    np.testing.assert_allclose(np.asarray(got, dtype=float), np.asarray(ref, dtype=float),
+                               rtol=rtol, atol=atol, equal_nan=True)
+
+
+def _legacy_wma(s: pd.Series, period: int) -> pd.Series:
+    """wma до ядра-згортки: rolling().apply з Python-колбеком."""
+    from core.indicators import ta
+
+    s = ta.normalize_numeric(s)
+    p = max(1, int(period))
+    weights = np.arange(1, p + 1, dtype=np.float64)
+
+    def _calc(x: np.ndarray) -> float:
+        w = weights[-len(x):]
+        return (x * w).sum() / w.sum()
+
+    return s.rolling(window=p, min_periods=1).apply(_calc, raw=True)
+
+
+def _legacy_supertrend(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 10, multiplier: float = 3.0):
+    """supertrend до prefix-scan ядра: цикл по барах через .iat."""
+    from core.indicators import ta
+
+    h, l, c = ta.normalize_numeric(high), ta.normalize_numeric(low), ta.normalize_numeric(close)
+    atr_val = ta.atr(h, l, c, period)
+    hl2 = (h + l) / 2.0
+    upperband = hl2 + multiplier * atr_val
+    lowerband = hl2 - multiplier * atr_val
+    st = pd.Series(index=c.index, dtype=np.float64)
+    dirn = pd.Series(index=c.index, dtype=np.float64)
+    prev_st, prev_dir = np.nan, 1.0
+    for i in range(len(c)):
+        ub, lb, price = upperband.iat[i], lowerband.iat[i], c.iat[i]
+        if i > 0:
+            ub = min(ub, upperband.iat[i - 1]) if prev_dir > 0 else ub
+            lb = max(lb, lowerband.iat[i - 1]) if prev_dir < 0 else lb
+        curr_dir = prev_dir
+        if np.isnan(prev_st):
+            curr_dir = 1.0
+        elif price > prev_st:
+            curr_dir = 1.0
+        elif price < prev_st:
+            curr_dir = -1.0
+        curr_st = lb if curr_dir > 0 else ub
+        st.iat[i] = curr_st
+        dirn.iat[i] = curr_dir
+        prev_st, prev_dir = curr_st, curr_dir
+    return ta.SupertrendResult(supertrend=st, direction=dirn.ffill().fillna(1.0))
+
+
+@pytest.fixture
+def random_ohlc():
+    """Фабрика random_ohlc(n, seed=7, *, columns=None, gaps=False) -> (high, low, close)."""
+    return _random_ohlc
+
+
+@pytest.fixture
+def assert_same():
+    """assert_same(got, ref, rtol=1e-9, atol=1e-9): поелементна рівність масивів, NaN == NaN."""
+    return _assert_same
+
+
+@pytest.fixture
+def legacy_wma():
+    return _legacy_wma
+
+
+@pytest.fixture
+def legacy_supertrend():
+    return _legacy_supertrend
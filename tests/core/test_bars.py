@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from app.services.signal import SignalService
+from core.bars import BarSeries
+from core.filters.gates import GateConfig, atr_percentile_gate, htf_trend_gate
+
+_T0 = 1_727_740_800_000
+
+
+def _frame(n=120):
+    rng = np.random.default_rng(7)
+    idx = pd.date_range("2024-10-01", periods=n, freq="1min", tz="UTC")
+    close = 100 + np.cumsum(rng.normal(0, 0.3, n))
+    return pd.DataFrame({"time": idx, "open": close, "high": close + 0.2, "low": close - 0.2,
+                         "close": close, "volume": 1.0, "open_time": idx})
+
+
+def test_append_roll_and_views():
+    bars = BarSeries(capacity=4)
+    for i in range(30):
+        bars.upsert(_T0 + i * 60_000, i, i + 1, i - 1, i + 0.5, 1.0)
+    bars.upsert(_T0 + 29 * 60_000, 29, 40, 20, 35.0, 2.0)  # in-progress update
+    assert len(bars) == 4
+    assert list(bars.close) == [26.5, 27.5, 28.5, 35.0]
+    assert list(bars.open_time) == [_T0 + i * 60_000 for i in range(26, 30)]
+    assert bars.close.flags["C_CONTIGUOUS"] and np.shares_memory(bars.close, bars["close"].to_numpy())
+
+    frame = bars.to_frame()
+    assert np.shares_memory(frame["close"].to_numpy(), bars.close)
+    assert str(frame["time"].dt.tz) == "UTC" and frame["close"].iloc[-1] == 35.0
+    assert bars.last()["high"] == 40.0 and bars.last()["open_time"] == frame["time"].iloc[-1]
+
+
+def test_from_frame_extend_overlap():
+    df = _frame(10)
+    bars = BarSeries.from_frame(df.iloc[:8], capacity=20)
+    upd = df.iloc[6:].copy()
+    upd.loc[upd.index[1], "close"] = 999.0  # re-sent last stored bar with a new close
+    bars.extend(upd)
+    assert len(bars) == 10 and bars.close[7] == 999.0
+    np.testing.assert_array_equal(bars.open[:7], df["open"].to_numpy()[:7])
+
+
+def test_strategy_and_gates_accept_bar_series():
+    df = _frame()
+    bars = BarSeries.from_frame(df)
+    params = {"ema_fast": 5, "ema_slow": 20, "rsi_buy": 55, "rsi_sell": 45}
+    sig = SignalService()
+    assert sig.decide(bars, params) == sig.decide(df, params)
+
+    cfg = GateConfig(htf_ema_window=20)
+    assert htf_trend_gate(bars, "LONG", cfg) == htf_trend_gate(df, "LONG", cfg)
+    assert atr_percentile_gate(bars, cfg) == (True, "atr:skip")
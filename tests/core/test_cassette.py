@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.exchange.cassette import Cassette, CassetteMiss, record_ws, replay_into, use_cassette
+from core.exchange.rate_limit import WeightGovernor
+from core.exchange.transport import HttpError, HttpTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        status = 400 if "bad" in self.path else 200
+        body = json.dumps({"path": self.path.split("?")[0], "n": type(self).hits}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_record_then_replay_offline(tmp_path):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    t = HttpTransport(backoff=0.01, max_retries=0, governor=WeightGovernor(2400))
+    path = tmp_path / "session.jsonl.gz"
+    with use_cassette(path, "record"):
+        first = t.get_json(f"{base}/fapi/v1/klines", {"symbol": "BTCUSDT", "limit": 5})[0]
+        second = t.get_json(f"{base}/fapi/v1/klines", {"limit": 5, "symbol": "BTCUSDT"})[0]
+        t.get_json(f"{base}/fapi/v2/balance?timestamp=123&signature=abc")
+        with pytest.raises(HttpError):
+            t.get_json(f"{base}/bad")
+    srv.shutdown()
+    srv.server_close()
+    t.close()
+    assert (first["n"], second["n"]) == (1, 2)
+
+    with use_cassette(path, "replay") as cas:
+        assert t.get_json(f"{base}/fapi/v1/klines", {"symbol": "BTCUSDT", "limit": 5})[0] == first
+        assert t.get_json(f"{base}/fapi/v1/klines", {"symbol": "BTCUSDT", "limit": 5})[0] == second
+        assert t.get_json(f"{base}/fapi/v1/klines", {"symbol": "BTCUSDT", "limit": 5})[0] == second  # вичерпано → останній
+        # підписані параметри змінюються між запусками і не потрапляють у файл
+        assert t.get_json(f"{base}/fapi/v2/balance?timestamp=999&signature=zzz")[0]["n"] == 3
+        with pytest.raises(HttpError) as e:
+            t.get_json(f"{base}/bad")
+        assert e.value.status == 400
+        with pytest.raises(CassetteMiss):
+            t.get_json(f"{base}/fapi/v1/depth")
+        assert cas.replaying
+    assert b"signature" not in __import__("gzip").open(path).read()
+
+    strict = Cassette(path, "replay", strict=True)
+    strict.http_response("GET", f"{base}/bad")
+    with pytest.raises(CassetteMiss):
+        strict.http_response("GET", f"{base}/bad")
+
+
+def test_ws_replay_feeds_stream_client(tmp_path):
+    from app.services.market_stream import StreamMarketDataProvider
+
+    path = tmp_path / "ws.jsonl"
+    p = StreamMarketDataProvider(["BTCUSDT"], ["1m"], rest=object(), autostart=False)
+    cas = Cassette(path, "record")
+    for i in range(3):
+        k = {"t": i * 60_000, "T": i * 60_000 + 59_999, "s": "BTCUSDT", "i": "1m", "o": "1", "h": "2", "l": "0.5",
+             "c": str(10 + i), "v": "1", "n": 1, "x": True}
+        cas.record_ws(p.stream_url, json.dumps({"data": {"e": "kline", "s": "BTCUSDT", "k": k}}))
+        time.sleep(0.01)
+    cas.record_ws("wss://other/stream", "{}")
+    cas.close()
+
+    with use_cassette(path, "replay", pace="real") as rep:
+        assert len(list(rep.ws_messages())) == 4
+        t0 = time.monotonic()
+        closed = []
+        p.add_listener(lambda s, i, row: i == "1m" and closed.append(row[4]))
+        p.start()
+        deadline = time.time() + 5
+        while len(closed) < 3 and time.time() < deadline:
+            time.sleep(0.005)
+        p.stop()
+    assert closed == [10.0, 11.0, 12.0]
+    assert time.monotonic() - t0 >= 0.015  # паузи між повідомленнями збережено
+
+
+def test_record_ws_and_replay_into_helpers(tmp_path):
+    path = tmp_path / "ws.jsonl"
+    got, stop = [], threading.Event()
+    assert replay_into("wss://a/stream", got.append, stop) is False  # касети немає → мережа
+
+    with use_cassette(path, "record"):
+        handle = record_ws("wss://a/stream", got.append)
+        handle('{"n":1}')
+        handle(b'{"n":2}')
+    assert got == ['{"n":1}', b'{"n":2}']
+
+    got.clear()
+
+    def handler(raw):
+        got.append(raw)
+        if len(got) == 2:
+            stop.set()  # інакше replay_into чекав би stop() після вичерпання запису
+
+    with use_cassette(path, "replay"):
+        assert replay_into("wss://a/stream", handler, stop) is True
+    assert got == ['{"n":1}', '{"n":2}']
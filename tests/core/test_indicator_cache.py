@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicators import ta
+from core.indicators.cache import IndicatorCache
+from core.logic import ema_rsi_atr as strat
+
+
+def test_hit_on_identical_values_and_last_label(random_ohlc, assert_same):
+    _, _, c = random_ohlc(500, seed=3)
+    cache = IndicatorCache()
+    first = cache.call(ta.ema, c, 20)
+    second = cache.call(ta.ema, c.copy(), period=20)  # kwargs і позиційні дають той самий ключ
+    assert second.index.equals(c.index)
+    assert_same(second, first)
+    cache.call(ta.ema, c, 21)  # інший параметр → окремий запис
+    cache.call(ta.ema, pd.Series(c.to_numpy(), index=c.index + 1000), 20)  # інша остання мітка
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["entries"]) == (1, 3, 3)
+    assert s["hit_rate"] == pytest.approx(1 / 4)
+
+
+@pytest.mark.parametrize("fn,cols,args,extends", [
+    (ta.ema, "c", (20,), 3),
+    (ta.sma, "c", (10,), 3),
+    (ta.rsi, "c", (14,), 3),
+    (ta.atr, "hlc", (14,), 3),
+    (ta.macd, "c", (), 3),
+    (ta.supertrend, "hlc", (10, 3.0), 0),  # без lookback (залежить від усього шляху) → повний перерахунок
+    (strat._rsi, "c", (14,), 3),
+    (strat._atr_hlc, "hlc", (14,), 3),
+])
+def test_tail_growth_extends_and_matches_full_recompute(fn, cols, args, extends, random_ohlc, assert_same):
+    h, l, c = random_ohlc(3000, seed=3)
+    series = {"h": h, "l": l, "c": c}
+    cache = IndicatorCache()
+    for end in (2000, 2001, 2050, 3000):
+        inputs = [series[k].iloc[:end] for k in cols]
+        got, ref = cache.call(fn, *inputs, *args), fn(*inputs, *args)
+        if isinstance(ref, ta.SupertrendResult):
+            np.testing.assert_array_equal(got.direction.to_numpy(), ref.direction.to_numpy())
+            got, ref = got.supertrend, ref.supertrend
+        assert_same(got, ref)
+    s = cache.stats()
+    assert (s["misses"], s["extends"], s["entries"]) == (4 - extends, extends, 1 if extends else 4)
+
+
+def test_changed_history_is_recomputed_not_extended(random_ohlc, assert_same):
+    _, _, c = random_ohlc(1000, seed=3)
+    cache = IndicatorCache()
+    cache.call(ta.ema, c.iloc[:900], 20)
+    c2 = c.copy()
+    c2.iloc[500] += 1.0
+    assert_same(cache.call(ta.ema, c2, 20), ta.ema(c2, 20))
+    assert cache.stats()["extends"] == 0 and cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_by_entries_and_bytes(random_ohlc):
+    _, _, c = random_ohlc(1000, seed=3)
+    cache = IndicatorCache(max_entries=2)
+    for p in (5, 6, 7):
+        cache.call(ta.sma, c, p)
+    cache.call(ta.sma, c, 5)  # витіснений найстаріший → промах
+    s = cache.stats()
+    assert s["entries"] == 2 and s["evictions"] == 2 and s["hits"] == 0
+
+    small = IndicatorCache(max_bytes=c.nbytes * 2)  # вміщує два float64-результати
+    for p in (5, 6):
+        small.call(ta.sma, c, p)
+    small.call(ta.sma, c, 6)  # торкнулися 6 → першим піде 5
+    small.call(ta.sma, c, 7)
+    small.call(ta.sma, c, 6)
+    assert small.stats()["hits"] == 2 and small.stats()["bytes"] <= c.nbytes * 2
+
+
+def test_cached_arrays_are_read_only_and_disabled_passes_through(random_ohlc, assert_same):
+    _, _, c = random_ohlc(300, seed=3)
+    cache = IndicatorCache()
+    out = cache.call(ta.ema, c, 20)
+    with pytest.raises(ValueError):
+        out.to_numpy()[0] = 1.0
+    off = IndicatorCache(enabled=False)
+    assert_same(off.call(ta.ema, c, 20), ta.ema(c, 20))
+    assert off.stats()["entries"] == 0 and off.stats()["misses"] == 1
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicators import ta
+
+
+@pytest.mark.parametrize("period", [1, 2, 5, 20])
+def test_wma_matches_rolling_apply(period, random_ohlc, legacy_wma, assert_same):
+    _, _, c = random_ohlc(500)
+    c.iloc[[3, 40, 41, 300]] = np.nan  # NaN у вікні → NaN, як у rolling().apply
+    assert_same(ta.wma(c, period), legacy_wma(c, period), rtol=1e-12)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_supertrend_matches_loop(seed, random_ohlc, legacy_supertrend, assert_same):
+    h, l, c = random_ohlc(3000, seed=seed)
+    c.iloc[[10, 500, 501]] = np.nan
+    c.iloc[800:820] = c.iloc[800]  # ціна на лінії: напрямок тримається
+    new, old = ta.supertrend(h, l, c, 10, 3.0), legacy_supertrend(h, l, c, 10, 3.0)
+    np.testing.assert_array_equal(new.direction.to_numpy(), old.direction.to_numpy())
+    assert_same(new.supertrend, old.supertrend, rtol=0, atol=0)
+
+
+def test_supertrend_flips_on_trend_change(legacy_supertrend):
+    c = pd.Series(np.r_[np.full(50, 100.0), np.linspace(100, 50, 50), np.linspace(50, 80, 50)])
+    new, old = ta.supertrend(c + 0.5, c - 0.5, c, 5, 1.0), legacy_supertrend(c + 0.5, c - 0.5, c, 5, 1.0)
+    np.testing.assert_array_equal(new.direction.to_numpy(), old.direction.to_numpy())
+    np.testing.assert_array_equal(new.supertrend.to_numpy(), old.supertrend.to_numpy())
+    assert new.direction.iloc[49] == 1 and new.direction.iloc[99] == -1
+
+
+def test_supertrend_short_and_empty(random_ohlc, legacy_supertrend):
+    h, l, c = random_ohlc(3)
+    r = ta.supertrend(h, l, c, 2)
+    assert r.direction.tolist() == legacy_supertrend(h, l, c, 2).direction.tolist()
+    e = ta.supertrend(h.iloc[:0], l.iloc[:0], c.iloc[:0])
+    assert len(e.supertrend) == 0 and len(e.direction) == 0
+
+
+# ---------- реєстр ядер ----------
+
+from core.indicators import kernels  # noqa: E402
+from core.indicators.stream import fold  # noqa: E402
+
+_PARAMS = {"tr": (), "rolling_quantile": (14, 0.9)}
+
+
+def _cols(random_ohlc, name, n=1500):
+    h, l, c = random_ohlc(n, seed=11)
+    c.iloc[[20, 400, 401]] = np.nan
+    return [{"high": h, "low": l, "close": c}[f] for f in kernels.get(name).inputs]
+
+
+@pytest.mark.parametrize("name", sorted(kernels.KERNELS))
+def test_kernel_warmup_stream_and_sweep_agree(name, random_ohlc, assert_same):
+    k = kernels.get(name)
+    cols, params = _cols(random_ohlc, name), _PARAMS.get(name, (14,))
+    full = kernels.run(name, *cols, *params)
+    # значення залежить лише від останніх warmup барів (вікна точно, ewm до 1e-17)
+    w = k.warmup(*params)
+    tail = kernels.run(name, *(c.iloc[-(w + 1):] for c in cols), *params)
+    assert tail[-1] == pytest.approx(full[-1], rel=1e-9, abs=1e-9)
+    if k.stream is not None:
+        assert_same(fold(name, cols, *params), full)
+    if k.many is not None:
+        many = k.many(*cols, [params[0], params[0] + 3])
+        assert_same(np.asarray(many)[:, 0], full)
+    f32 = kernels.run(name, *cols, *params, dtype=np.float32)
+    assert f32.dtype == np.float32
+    assert_same(f32, full, rtol=1e-4, atol=1e-3)
+
+
+def test_as_array_converts_once():
+    a = np.arange(5, dtype=np.float64)
+    assert kernels.as_array(a) is a  # чистий float64 — без копії
+    s = pd.Series(["1", "x", "3"], dtype=object)
+    np.testing.assert_array_equal(kernels.as_array(s), [1.0, np.nan, 3.0])
+    np.testing.assert_array_equal(kernels.as_array(np.array([1.0, np.inf, -np.inf])), [1.0, np.nan, np.nan])
+    with pytest.raises(KeyError):
+        kernels.get("nope")
+
+
+def test_wrappers_share_kernels(random_ohlc):
+    import core.indicators as pkg
+    from core.logic import ema_rsi_atr as strat
+
+    _, _, c = random_ohlc(300)
+    assert (ta.rsi.kernel, pkg.rsi.kernel, strat._rsi.kernel) == ("rsi", "rsi_sma", "rsi_sma")
+    pd.testing.assert_series_equal(pkg.rsi(c, 14), strat._rsi(c, 14))
+    pd.testing.assert_series_equal(pkg.ema(c, 20), ta.ema(c, 20))
+
+
+def test_wrapper_outputs_are_writable(random_ohlc):
+    h, l, c = random_ohlc(50)
+    for s in (ta.sma(c, 5), ta.ema(c, 5), ta.rma(c, 5), ta.atr(h, l, c, 5), ta.rsi(c, 5)):
+        s.iloc[0] = 1.0  # pandas CoW віддає read-only view — обгортки мусять повертати власні масиви
+        assert s.iloc[0] == 1.0
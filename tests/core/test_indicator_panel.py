@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.indicators import panel, ta
+from core.logic import ema_rsi_atr as strat
+
+
+@pytest.fixture
+def universe(random_ohlc):
+    """Фабрика панелі (n, m) з дірками, характерними для всесвіту символів."""
+    def make(n=600, m=12, seed=5):
+        h, l, c = random_ohlc(n, seed, columns=m)
+        rng = np.random.default_rng(seed + 1)
+        for j in range(0, m, 3):  # коротша історія: символ з'явився пізніше
+            start = int(rng.integers(1, n // 2))
+            for f in (h, l, c):
+                f.iloc[:start, j] = np.nan
+        c.iloc[rng.integers(0, n, 15), 1] = np.nan  # поодинокі пропуски
+        c.iloc[200:230, 2] = np.nan  # довгий пропуск: вага ewm загасає за кожен бар
+        c.iloc[300:330, 4] = c.iloc[300, 4]  # пласке вікно
+        return h, l, c
+    return make
+
+
+def _columns(fn, *frames):
+    return pd.concat([fn(*(f[j] for f in frames)) for j in frames[0].columns], axis=1)
+
+
+@pytest.mark.parametrize("name,args", [("ema", (20,)), ("rma", (14,)), ("sma", (10,)), ("rsi", (14,))])
+def test_single_line_matches_per_column(name, args, universe, assert_same):
+    _, _, c = universe()
+    got = getattr(panel, name)(c, *args)
+    assert isinstance(got, pd.DataFrame) and got.index.equals(c.index)
+    assert_same(got, _columns(lambda s: getattr(ta, name)(s, *args), c))
+
+
+def test_tr_atr_match_per_column(universe, assert_same):
+    h, l, c = universe()
+    assert_same(panel.tr(h, l, c), _columns(ta.tr, h, l, c))
+    assert_same(panel.atr(h, l, c, 14), _columns(lambda a, b, x: ta.atr(a, b, x, 14), h, l, c))
+
+
+@pytest.mark.parametrize("name,inputs", [("macd", "c"), ("stoch_kd", "hlc"), ("bbands", "c")])
+def test_multi_line_matches_per_column(name, inputs, universe, assert_same):
+    h, l, c = universe()
+    frames = [{"h": h, "l": l, "c": c}[k] for k in inputs]
+    got = getattr(panel, name)(*frames)
+    per = [getattr(ta, name)(*(f[j] for f in frames)) for j in c.columns]
+    assert list(got) == list(per[0].columns)
+    for key, mat in got.items():
+        ref = pd.concat([p[key] for p in per], axis=1)
+        # онлайн rolling std у pandas лишає шум ~1e-7 у вікнах з одним значенням; двопрохідний дає 0
+        assert_same(mat, ref, **({"rtol": 1e-6, "atol": 1e-6} if name == "bbands" else {}))
+
+
+def test_ndarray_in_ndarray_out_and_empty(universe, assert_same):
+    _, _, c = universe(m=6)
+    x = c.to_numpy()
+    out = panel.ema(x, 10)
+    assert isinstance(out, np.ndarray) and out.shape == x.shape
+    assert_same(out, panel.ema(c, 10))
+    assert panel.rsi(np.empty((0, 4)), 14).shape == (0, 4)
+    assert np.isnan(panel.ema(np.full((5, 2), np.nan), 3)).all()
+
+
+def test_to_panel_aligns_symbols_on_open_time(assert_same):
+    t = pd.date_range("2024-01-01", periods=5, freq="1min", tz="UTC")
+    frames = {
+        "BTCUSDT": pd.DataFrame({"open_time": t, "close": [1.0, 2, 3, 4, 5]}),
+        "NEWUSDT": pd.DataFrame({"open_time": t[3:], "close": ["7", "8"]}),
+        "EMPTY": pd.DataFrame({"open_time": [], "close": []}),
+    }
+    p = panel.to_panel(frames)
+    assert list(p.columns) == ["BTCUSDT", "NEWUSDT"] and p.index.equals(pd.Index(t))
+    assert p["NEWUSDT"].isna().sum() == 3 and p["NEWUSDT"].iloc[-1] == 8.0
+    assert_same(panel.ema(p, 3)["NEWUSDT"], ta.ema(p["NEWUSDT"], 3))
+
+
+_PERIODS = [5, 14, 14, 30, 3, 2, 1]  # 3 і 2 → alpha 0.5 (com == 1) для ema/rma; дублікати ділять стовпець
+
+
+@pytest.fixture
+def series(universe):
+    h, l, c = universe(m=6)
+    return h[1], l[1], c[1]  # колонка з поодинокими пропусками
+
+
+@pytest.mark.parametrize("name,ref", [
+    ("ema_many", lambda c, p: ta.ema(c, p)),
+    ("rma_many", lambda c, p: ta.rma(c, p)),
+    ("sma_many", lambda c, p: ta.sma(c, p)),
+    ("rsi_many", lambda c, p: ta.rsi(c, p)),
+    ("rsi_sma_many", lambda c, p: strat._rsi(c, p)),
+])
+def test_close_sweeps_match_single_calls(name, ref, series, assert_same):
+    _, _, c = series
+    got = getattr(panel, name)(c, _PERIODS)
+    assert got.shape == (len(c), len(_PERIODS)) and list(got.columns) == _PERIODS
+    for j, p in enumerate(_PERIODS):
+        assert_same(got.iloc[:, j], ref(c, p))
+
+
+@pytest.mark.parametrize("name,ref", [("atr_many", ta.atr), ("atr_sma_many", strat._atr_hlc)])
+def test_atr_sweeps_match_single_calls(name, ref, series, assert_same):
+    h, l, c = series
+    got = getattr(panel, name)(h.to_numpy(), l.to_numpy(), c.to_numpy(), _PERIODS)
+    assert isinstance(got, np.ndarray) and got.shape == (len(c), len(_PERIODS))
+    for j, p in enumerate(_PERIODS):
+        assert_same(got[:, j], ref(h, l, c, p))
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.indicators.ta as ta
+from core.bars import BarSeries
+from core.indicators.stream import IndicatorEngine, fold
+from core.logic import ema_rsi_atr as strat
+
+_T0 = 1_700_000_000_000
+_STEP = 60_000
+
+
+def test_states_match_batch_indicators(random_ohlc, assert_same):
+    h, l, c = random_ohlc(600, seed=1, gaps=True)
+    assert_same(fold("ema", [c], 20), ta.ema(c, 20))
+    assert_same(fold("rma", [c], 14), ta.rma(c, 14))
+    assert_same(fold("ema", [c], 3), ta.ema(c, 3))  # alpha 0.5 (com == 1): інша вага після пропусків
+    assert_same(fold("rma", [c], 2), ta.rma(c, 2))
+    assert_same(fold("sma", [c], 10), ta.sma(c, 10))
+    assert_same(fold("tr", [h, l, c]), ta.tr(h, l, c))
+    assert_same(fold("atr", [h, l, c], 14), ta.atr(h, l, c, 14))
+    assert_same(fold("rsi", [c], 14), ta.rsi(c, 14))
+    df = pd.DataFrame({"high": h, "low": l, "close": c})
+    assert_same(fold("rsi_sma", [c], 14), strat._rsi(c, 14))
+    assert_same(fold("atr_sma", [h, l, c], 14), strat._atr(df, 14))
+
+
+def _frame(h, l, c, start=0):
+    t = pd.to_datetime(_T0 + (np.arange(len(c)) + start) * _STEP, unit="ms", utc=True)
+    return pd.DataFrame({"time": t, "open_time": t, "open": c.to_numpy(), "high": h.to_numpy(),
+                         "low": l.to_numpy(), "close": c.to_numpy(), "volume": 1.0})
+
+
+def test_engine_sliding_window_folds_only_new_bars(random_ohlc):
+    h, l, c = random_ohlc(1400, seed=1)
+    eng = IndicatorEngine()
+    for end in range(1000, 1400, 7):  # вікно 1000 барів, що їде вперед; останній бар «у процесі»
+        df = _frame(h.iloc[end - 1000:end], l.iloc[end - 1000:end], c.iloc[end - 1000:end], start=end - 1000)
+        win_c = df["close"]
+        assert eng.value("BTCUSDT:1m", "ema", df, 50) == pytest.approx(ta.ema(win_c, 50).iloc[-1], rel=1e-9)
+        assert eng.value("BTCUSDT:1m", "rsi", df, 14) == pytest.approx(ta.rsi(win_c, 14).iloc[-1], rel=1e-9)
+        assert eng.value("BTCUSDT:1m", "atr", df, 14) == pytest.approx(
+            ta.atr(df["high"], df["low"], win_c, 14).iloc[-1], rel=1e-9)
+    assert eng.warmups == 3  # один прогрів на індикатор, далі лише догін
+
+
+def test_engine_in_progress_bar_and_rewritten_history(random_ohlc, assert_same):
+    h, l, c = random_ohlc(300, seed=1)
+    eng = IndicatorEngine()
+    bars = BarSeries.from_frame(_frame(h, l, c))
+    v1 = eng.value("s", "ema", bars, 20)
+    # той самий незакритий бар оновився — значення перераховується, прогріву немає
+    last = bars.last()
+    bars.upsert(int(bars.open_time[-1]), last["open"], last["high"], last["low"], last["close"] + 5.0, last["volume"])
+    v2 = eng.value("s", "ema", bars, 20)
+    assert v2 != v1 and eng.warmups == 1
+    assert_same([v2], [ta.ema(pd.Series(bars.close), 20).iloc[-1]])
+
+    # останній закритий бар переписано (REST-ремонт) — стан прогрівається заново
+    c2 = c.copy()
+    c2.iloc[-2] += 1.0
+    v3 = eng.value("s", "ema", _frame(h, l, c2), 20)
+    assert eng.warmups == 2
+    assert_same([v3], [ta.ema(c2, 20).iloc[-1]])
+
+
+def test_generate_signal_same_with_and_without_stream(random_ohlc):
+    h, l, c = random_ohlc(1100, seed=1)
+    params = {"symbol": "ETHUSDT", "interval": "1m", "rsi_buy": 45, "rsi_sell": 55}
+    for end in (1000, 1001, 1050, 1100):
+        df = _frame(h.iloc[end - 1000:end], l.iloc[end - 1000:end], c.iloc[end - 1000:end], start=end - 1000)
+        streamed = strat.generate_signal(df, params)
+        batch = strat.generate_signal(df, {**params, "indicator_stream": "0"})
+        assert streamed["action"] == batch["action"]
+        for k in ("ema_fast", "ema_slow", "rsi", "atr"):
+            assert streamed[k] == pytest.approx(batch[k], rel=1e-9, abs=1e-9)
+
+
+# ---------- ковзні вікна ----------
+
+def test_rolling_window_states_match_pandas(random_ohlc, assert_same):
+    h, l, c = random_ohlc(600, seed=1, gaps=True)
+    c.iloc[200:240] = np.nan  # вікно цілком з NaN → NaN
+    for p in (1, 5, 30):
+        assert_same(fold("rolling_max", [c], p), c.rolling(p, min_periods=1).max())
+        assert_same(fold("rolling_min", [c], p), c.rolling(p, min_periods=1).min())
+        for q in (0.0, 0.1, 0.5, 0.9, 1.0):
+            assert_same(fold("rolling_quantile", [c], p, q), c.rolling(p, min_periods=1).quantile(q))
+    stoch = ta.stoch_kd(h, l, c, 14, 3)
+    assert_same(fold("stoch_k", [h, l, c], 14), stoch["%K"])
+    assert_same(fold("stoch_d", [h, l, c], 14, 3), stoch["%D"])
+
+
+def test_rolling_peek_does_not_commit_and_rank():
+    from core.indicators.stream import RollingMaxState, RollingMinState, RollingQuantileState
+
+    xs = [3.0, 1.0, 4.0, 1.0, 5.0, np.nan, 2.0, 6.0]
+    mx, mn, qs = RollingMaxState(3), RollingMinState(3), RollingQuantileState(3, 0.5)
+    s = pd.Series(xs)
+    for i, x in enumerate(xs):
+        ref = s.iloc[max(0, i - 2):i + 1]
+        assert (mx.peek(x), mn.peek(x), qs.peek(x)) == pytest.approx(
+            (ref.max(), ref.min(), ref.median()), nan_ok=True)
+        assert (mx.update(x), mn.update(x), qs.update(x)) == pytest.approx(
+            (ref.max(), ref.min(), ref.median()), nan_ok=True)
+    assert qs.percentile_rank(2.0) == pytest.approx(50.0)  # вікно [nan, 2, 6]
+    assert np.isnan(RollingQuantileState(3).percentile_rank(1.0))
+
+
+def test_engine_rolling_quantile_over_other_column_and_gate(random_ohlc):
+    from core.filters import gates as G
+
+    h, l, c = random_ohlc(900, seed=1)
+    df = _frame(h, l, c)
+    df["atr"] = ta.atr(df["high"], df["low"], df["close"], 14)
+    df.loc[400:420, "atr"] = np.nan
+    cfg = G.GateConfig(atr_window=200, atr_pctl_min=10, atr_pctl_max=90)
+    eng = IndicatorEngine()
+    for end in range(100, 900, 13):
+        win = df.iloc[:end]
+        assert eng.value("s", "rolling_quantile", win, 200, 0.9, fields=("atr",)) == pytest.approx(
+            win["atr"].tail(200).quantile(0.9), rel=1e-9, nan_ok=True)
+        assert G.atr_percentile_gate(win, cfg, stream="s") == G.atr_percentile_gate(win, cfg)
+    assert eng.warmups == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from core.exchange.orderbook import OrderBook, OrderBookSyncError
+from core.positions.position_sizer import SizerConfig, compute_qty_leverage
+
+
+def _book():
+    b = OrderBook("BTCUSDT")
+    b.apply_snapshot(100, bids=[["99.0", "1"], ["98.0", "2"], ["100.0", "0.5"]],
+                     asks=[["101.0", "1"], ["102.0", "2"], ["105.0", "10"]])
+    return b
+
+
+def test_snapshot_queries():
+    b = _book()
+    assert b.best_bid() == 100.0 and b.best_ask() == 101.0 and b.mid() == 100.5
+    assert b.spread_bps() == pytest.approx(1 / 100.5 * 1e4)
+    assert b.levels("SELL", 2) == [(100.0, 0.5), (99.0, 1.0)]
+    px, filled = b.vwap("BUY", 2.0)
+    assert filled == 2.0 and px == pytest.approx((101 + 102) / 2)
+    assert b.vwap("LONG", 100.0)[1] == 13.0  # книга тонша за ордер
+    assert b.depth_within("BUY", 100) == (3.0, 101.0 + 204.0)   # 101 * 1.01 = 102.01
+    assert b.depth_within("SELL", 100) == (1.5, 50.0 + 99.0)    # 100 * 0.99 = 99.0
+    with pytest.raises(ValueError):
+        b.vwap("FLAT", 1)
+
+
+def test_diff_sequence_rules():
+    b = _book()
+    assert b.apply_event({"U": 90, "u": 99, "pu": 89, "b": [["100", "9"]], "a": []}) is False  # старіша за знімок
+    with pytest.raises(OrderBookSyncError):
+        OrderBook().apply_event({"U": 1, "u": 2})
+    b2 = _book()
+    with pytest.raises(OrderBookSyncError):
+        b2.apply_event({"U": 101, "u": 105, "pu": 100, "b": [], "a": []})   # U > lastUpdateId
+    assert not b2.synced
+
+    assert b.apply_event({"U": 95, "u": 110, "pu": 94, "b": [["100", "0"], ["99.5", "3"]], "a": [["101", "0"]]})
+    assert b.best_bid() == 99.5 and b.best_ask() == 102.0 and b.last_update_id == 110
+    assert b.apply_event({"U": 111, "u": 120, "pu": 110, "b": [], "a": [["101.5", "1"]]})
+    assert b.best_ask() == 101.5
+    with pytest.raises(OrderBookSyncError):
+        b.apply_event({"U": 125, "u": 130, "pu": 121, "b": [], "a": []})
+    assert not b.synced
+
+
+def test_max_levels_trim():
+    b = OrderBook(max_levels=2)
+    b.apply_snapshot(1, bids=[], asks=[])
+    b.apply_event({"U": 1, "u": 2, "pu": 0, "b": [[str(p), "1"] for p in (97, 98, 99)], "a": []})
+    assert b.levels("SELL", 5) == [(99.0, 1.0), (98.0, 1.0)]
+
+
+def test_sizer_caps_qty_to_book_depth():
+    filters = {"LOT_SIZE": {"stepSize": "0.1", "minQty": "0.1"}, "MIN_NOTIONAL": {"notional": "5"}}
+    cfg = SizerConfig(desired_pos_usdt=1000.0, max_impact_bps=100)
+    r = compute_qty_leverage("BTCUSDT", 10_000.0, get_price=lambda s: 100.0, get_filters=lambda s: filters, cfg=cfg, book=_book())
+    assert r.qty == pytest.approx(1.5) and r.meta["liquidity_qty"] == 1.5
+    r = compute_qty_leverage("BTCUSDT", 10_000.0, get_price=lambda s: 100.0, get_filters=lambda s: filters,
+                             cfg=SizerConfig(desired_pos_usdt=1000.0), book=_book())
+    assert r.qty == pytest.approx(10.0) and r.meta["liquidity_qty"] is None
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from core.exchange.prices import PriceSnapshot
+
+
+class _FakeFetch:
+    def __init__(self):
+        self.calls = []
+        self.px = 100.0
+
+    def __call__(self, url, params):
+        self.calls.append(dict(params))
+        time.sleep(0.02)
+        if params.get("symbol"):
+            return {"symbol": params["symbol"], "price": "7.5"}, {}
+        return [{"symbol": "BTCUSDT", "price": str(self.px)}, {"symbol": "ETHUSDT", "price": "2500.5"}], {}
+
+
+def test_one_request_prices_many_symbols():
+    fetch = _FakeFetch()
+    snap = PriceSnapshot("https://fapi.binance.com", max_age=60, fetch=fetch)
+    assert snap.url.endswith("/fapi/v1/ticker/price")
+
+    threads = [threading.Thread(target=snap.get, args=("BTCUSDT",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert snap.get("ethusdt") == 2500.5 and snap.get("BTCUSDT") == 100.0
+    assert fetch.calls == [{}]  # вісім конкурентних викликів — один запит
+
+    assert snap.get("NEWUSDT") == 7.5  # немає у знімку → точковий запит
+    assert fetch.calls[-1] == {"symbol": "NEWUSDT"} and snap.single_fetches == 1
+
+
+def test_staleness_bound_forces_refresh():
+    fetch = _FakeFetch()
+    snap = PriceSnapshot("https://fapi.binance.com", max_age=60, fetch=fetch)
+    snap.get("BTCUSDT")
+    fetch.px = 101.0
+    assert snap.get("BTCUSDT") == 100.0
+    assert snap.get("BTCUSDT", max_age=0) == 101.0
+    assert snap.refreshes == 2 and snap.age() < 1.0
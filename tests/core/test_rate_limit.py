@@ -0,0 +1,45 @@
+import pytest
+
+from core.exchange import rate_limit as rl
+
+
+def test_endpoint_weights():
+    assert rl.endpoint_weight("/fapi/v1/klines", {"limit": 50}) == 1
+    assert rl.endpoint_weight("/fapi/v1/klines", {"limit": 1000}) == 5
+    assert rl.endpoint_weight("/fapi/v1/klines", {"limit": 1500}) == 10
+    assert rl.endpoint_weight("/fapi/v1/ticker/price", {}) == 2
+    assert rl.endpoint_weight("/fapi/v1/openOrders", {"symbol": "BTCUSDT"}) == 1
+    assert rl.endpoint_weight("/api/v3/exchangeInfo") == 20
+    assert rl.endpoint_weight("/fapi/v1/unknown") == 1
+    assert rl.is_order_request("/fapi/v1/order", "POST")
+    assert not rl.is_order_request("/fapi/v1/order", "DELETE")
+
+
+def test_governor_waits_instead_of_overspending(monkeypatch):
+    gov = rl.WeightGovernor(100, safety=1.0)
+    assert gov.reserve(60) == 0.0
+    wait = gov.reserve(60)
+    assert 0.0 < wait <= 60.0 * 20 / 100 + 0.01
+
+    # сервер бачить більше використаної ваги (інші клієнти на IP) — бюджет підлаштовується
+    gov2 = rl.WeightGovernor(100, safety=1.0)
+    gov2.update({"X-MBX-USED-WEIGHT-1M": "95"})
+    assert gov2.reserve(10) > 0.0
+    assert gov2.reserve(5) == 0.0
+
+
+def test_governor_penalize_blocks_everyone(monkeypatch):
+    gov = rl.WeightGovernor(2400)
+    gov.penalize(418, retry_after=30)
+    assert gov.reserve(1) >= 29.0
+    gov.max_wait = 1.0
+    with pytest.raises(RuntimeError):
+        gov.acquire(1)
+
+
+def test_order_buckets():
+    gov = rl.WeightGovernor(2400, order_limit_10s=2, safety=1.0)
+    assert gov.reserve(1, orders=1) == 0.0
+    assert gov.reserve(1, orders=1) == 0.0
+    assert gov.reserve(1, orders=1) > 0.0
+    assert gov.reserve(1) == 0.0
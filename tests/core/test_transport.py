@@ -0,0 +1,132 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.exchange.rate_limit import WeightGovernor
+from core.exchange.transport import HttpError, HttpTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers: list = []
+    fail_next: list = []
+
+    def _reply(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-MBX-USED-WEIGHT-1M", "7")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        type(self).peers.append(self.client_address[1])
+        if type(self).fail_next:
+            self._reply(type(self).fail_next.pop(0), {"code": -1})
+            return
+        self._reply(200, {"path": self.path})
+
+    def do_POST(self):
+        type(self).peers.append(self.client_address[1])
+        n = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(n).decode()
+        if type(self).fail_next:
+            self._reply(type(self).fail_next.pop(0), {"code": -1})
+            return
+        self._reply(200, {"body": body})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    _Handler.peers = []
+    _Handler.fail_next = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_connections_are_reused_and_timed(server):
+    t = HttpTransport(backoff=0.01, governor=WeightGovernor(2400))
+    for i in range(5):
+        data, hdrs = t.get_json(f"{server}/fapi/v1/ticker/price", {"symbol": "BTCUSDT", "skip": None})
+        assert data == {"path": "/fapi/v1/ticker/price?symbol=BTCUSDT"}
+    assert hdrs["x-mbx-used-weight-1m"] == "7"
+    assert len(set(_Handler.peers)) == 1  # один TCP-конект на всі запити
+
+    st = t.stats()["GET /fapi/v1/ticker/price"]
+    assert st["count"] == 5 and st["errors"] == 0 and st["max_ms"] >= st["avg_ms"] > 0
+    t.close()
+
+
+def test_retries_get_but_not_post(server):
+    t = HttpTransport(backoff=0.01, max_retries=2, governor=None)
+    _Handler.fail_next = [503]
+    data, _ = t.get_json(f"{server}/x")
+    assert data == {"path": "/x"}
+    assert t.stats()["GET /x"]["errors"] == 1
+
+    _Handler.fail_next = [503]
+    with pytest.raises(HttpError) as ei:
+        t.request("POST", f"{server}/fapi/v1/order", data={"a": 1})
+    assert ei.value.code == 503 and b"-1" in ei.value.read()
+
+    resp = t.request("POST", f"{server}/fapi/v1/order", data={"a": 1, "b": "x"})
+    assert resp.json() == {"body": "a=1&b=x"}
+
+
+class _StaleConn:
+    """Keep-alive конект, який сервер уже закрив: падає на запису або на читанні відповіді."""
+
+    def __init__(self, on_send=False):
+        self.sock, self.timeout, self.on_send, self.sent = None, None, on_send, 0
+
+    def request(self, *a, **kw):
+        if self.on_send:
+            raise BrokenPipeError
+        self.sent += 1
+
+    def getresponse(self):
+        import http.client
+        raise http.client.RemoteDisconnected("closed")
+
+    def close(self):
+        pass
+
+
+def _stale(t, server, **kw):
+    from urllib.parse import urlsplit
+    u = urlsplit(server)
+    conn = _StaleConn(**kw)
+    t._pool(u.scheme, u.hostname, u.port).idle.put(conn)
+    return conn
+
+
+def test_stale_connection_resends_only_when_safe(server):
+    import http.client
+
+    t = HttpTransport(backoff=0.01, max_retries=0, governor=None)
+    # запит вже пішов, відповідь обірвалась: POST міг виконатися — не перепосилаємо
+    _stale(t, server)
+    with pytest.raises(http.client.RemoteDisconnected):
+        t.request("POST", f"{server}/fapi/v1/order", data={"a": 1}, retries=1)
+    assert _Handler.peers == []
+    # запис у мертвий конект: запит не пішов — POST перепосилається на новому
+    _stale(t, server, on_send=True)
+    assert t.request("POST", f"{server}/fapi/v1/order", data={"a": 1}, retries=1).json() == {"body": "a=1"}
+    # GET перепосилається, але не з retries=0
+    _stale(t, server)
+    with pytest.raises(http.client.RemoteDisconnected):
+        t.get_json(f"{server}/x")
+    _stale(t, server)
+    assert t.get_json(f"{server}/x", retries=1)[0] == {"path": "/x"}
+    assert len(_Handler.peers) == 2
+    t.close()
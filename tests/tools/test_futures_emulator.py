@@ -0,0 +1,158 @@
+import json
+
+import pytest
+
+from app.services import notifications as net
+from app.services.exit_manager import ExitManager
+from core.execution import binance_futures as fut
+from tools.emulator.engine import EmulatorError, MatchingEngine
+from tools.emulator.server import FuturesEmulator
+
+
+@pytest.fixture
+def emu(monkeypatch):
+    e = FuturesEmulator(MatchingEngine(prices={"BTCUSDT": 60_000.0}, fee_bps=0.0), api_key="k", api_secret="s")
+    base = e.start_in_thread()
+    monkeypatch.setenv("DRY_RUN_ONLY", "0")
+    monkeypatch.setattr(net, "BINANCE_FAPI_BASE", base)
+    monkeypatch.setattr(net, "_API_KEY", "k")
+    monkeypatch.setattr(net, "_API_SECRET", "s")
+    e.base = base
+    yield e
+    e.close()
+
+
+def test_engine_limit_stop_and_pnl():
+    eng = MatchingEngine(prices={"BTCUSDT": 100.0}, balance=1000.0, fee_bps=0.0)
+    eng.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "2", "price": "90"})
+    eng.new_order({"symbol": "BTCUSDT", "side": "SELL", "type": "STOP_MARKET", "stopPrice": "85", "closePosition": "true"})
+    with pytest.raises(EmulatorError) as ei:
+        eng.new_order({"symbol": "BTCUSDT", "side": "SELL", "type": "STOP_MARKET", "stopPrice": "120", "closePosition": "true"})
+    assert ei.value.code == -2021
+
+    assert eng.set_price("BTCUSDT", 89.0) == 1  # лімітка по своїй ціні 90
+    assert eng.positions["BTCUSDT"].amt == 2.0 and eng.positions["BTCUSDT"].entry == 90.0
+    assert eng.set_price("BTCUSDT", 84.0) == 1  # стоп закриває всю позицію за марк-ціною
+    assert eng.positions["BTCUSDT"].amt == 0.0
+    assert eng.wallet == pytest.approx(1000.0 - 12.0)
+    assert eng.open_orders() == []
+
+
+def test_cancelled_orders_do_not_pile_up_in_heaps():
+    eng = MatchingEngine(prices={"BTCUSDT": 100.0}, fee_bps=0.0)
+    keep = [eng.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "1", "price": str(50 + i)})
+            for i in range(10)]
+    for i in range(5_000):  # place/cancel, ціна лімітки ніколи не перетинається
+        for side, otype, px in (("BUY", "LIMIT", "80"), ("SELL", "LIMIT", "120"),
+                                ("SELL", "STOP_MARKET", "90"), ("BUY", "STOP_MARKET", "110")):
+            key = "stopPrice" if otype == "STOP_MARKET" else "price"
+            o = eng.new_order({"symbol": "BTCUSDT", "side": side, "type": otype, "quantity": "1", key: px})
+            eng.cancel("BTCUSDT", o.orderId)
+    book = eng.books["BTCUSDT"]
+    assert len(book.buy_limits) <= 2 * len(keep) + 1
+    assert len(book.sell_limits) + len(book.up) + len(book.down) <= 3
+    assert eng.set_price("BTCUSDT", 55.0) == 5 and eng.set_price("BTCUSDT", 49.0) == 5  # живі ордери на місці
+    assert eng.open_orders() == []
+
+
+def test_notifications_order_roundtrip(emu):
+    assert net.set_leverage_via_rest("BTCUSDT", 10)["leverage"] == 10
+    o = net.place_order_via_rest(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity="0.01", price="50000",
+                                 timeInForce="GTC", newClientOrderId="t1")
+    assert o["status"] == "NEW" and o["clientOrderId"] == "t1"
+    oo = net.get_open_orders("BTCUSDT")
+    assert [x["orderId"] for x in oo] == [o["orderId"]]
+    c = net.cancel_order_via_rest(symbol="BTCUSDT", origClientOrderId="t1")
+    assert c["status"] == "CANCELED"
+    assert net.get_open_orders("BTCUSDT") == []
+
+
+def test_bad_signature_and_key_rejected(emu, monkeypatch):
+    monkeypatch.setattr(net, "_API_SECRET", "wrong")
+    r = net.get_open_orders("BTCUSDT")
+    assert "error" in r and json.loads(r["body"])["code"] == -1022
+    monkeypatch.setattr(net, "_API_KEY", "other")
+    r = net.get_open_orders("BTCUSDT")
+    assert json.loads(r["body"])["code"] == -2015
+
+
+def test_exit_manager_reconcile_against_emulator(emu):
+    net.place_order_via_rest(symbol="BTCUSDT", side="BUY", type="MARKET", quantity="0.1")
+    em = ExitManager(cooldown_sec=0.0, delta_pct=0.0)
+    out = em.reconcile(symbol="BTCUSDT", side_entry="BUY", sl_target=57_000.0, tp_target=66_000.0)
+    assert [r["action"] for r in out["results"]] == ["create", "create"]
+    assert all(r["response"]["status"] == "NEW" for r in out["results"])
+
+    out = em.reconcile(symbol="BTCUSDT", side_entry="BUY", sl_target=58_000.0, tp_target=66_000.0)
+    assert [r["action"] for r in out["results"]] == ["cancel", "create"]
+    stops = sorted(float(o["stopPrice"]) for o in net.get_open_orders("BTCUSDT"))
+    assert stops == [58_000.0, 66_000.0]
+
+    assert emu.set_price("BTCUSDT", 57_900.0) == 1
+    pos = [p for p in net._do("GET", "/fapi/v2/positionRisk", {"symbol": "BTCUSDT"}) if p["symbol"] == "BTCUSDT"][0]
+    assert float(pos["positionAmt"]) == 0.0
+
+
+def test_binance_futures_client_signs_in_send_order(emu, monkeypatch):
+    monkeypatch.setattr(fut, "BINANCE_FAPI_BASE", emu.base)
+    monkeypatch.setattr(fut, "API_KEY", "k")
+    monkeypatch.setattr(fut, "API_SECRET", "s")
+    res = fut.place_order("BTCUSDT", "SELL", 0.05)
+    assert res["status"] == "FILLED"
+    assert float(fut.get_position("BTCUSDT")["positionAmt"]) == pytest.approx(-0.05)
+    assert fut.get_balance("USDT") == pytest.approx(10_000.0)
+
+
+def test_binance_futures_signed_get_is_not_resent(emu, monkeypatch):
+    from core.exchange.transport import HttpError
+
+    monkeypatch.setattr(fut, "BINANCE_FAPI_BASE", emu.base)
+    monkeypatch.setattr(fut, "API_KEY", "k")
+    monkeypatch.setattr(fut, "API_SECRET", "s")
+    emu.error_rate = 1.0
+    with pytest.raises(HttpError):
+        fut.get_balance("USDT")  # той самий timestamp/signature після бекоффу біржа відкинула б (-1021)
+    with pytest.raises(HttpError):
+        fut.exchange_info("BTCUSDT")
+    emu.error_rate = 0.0
+    routes = emu.stats()["routes"]
+    assert routes["GET /fapi/v2/balance"]["injected"] == 1
+    assert routes["GET /fapi/v1/exchangeInfo"]["injected"] > 1  # публічні GET і далі повторюються
+
+
+def test_error_injection(emu):
+    emu.error_rate = 1.0
+    r = net.get_open_orders("BTCUSDT")
+    assert "error" in r and "503" in r["error"]
+    emu.error_rate = 0.0
+    assert emu.stats()["routes"]["GET /fapi/v1/openOrders"]["injected"] >= 1
+
+
+def test_user_data_stream_pushes_order_updates(emu):
+    from websockets.sync.client import connect
+
+    key = net._do("POST", "/fapi/v1/listenKey", {}, signed=False)["listenKey"]
+    with connect(emu.base.replace("http", "ws") + f"/ws/{key}") as ws:
+        net.place_order_via_rest(symbol="BTCUSDT", side="BUY", type="MARKET", quantity="0.01")
+        events = [json.loads(ws.recv(timeout=5)) for _ in range(3)]
+    assert [e["e"] for e in events] == ["ORDER_TRADE_UPDATE", "ORDER_TRADE_UPDATE", "ACCOUNT_UPDATE"]
+    assert events[1]["o"]["X"] == "FILLED" and events[2]["a"]["P"][0]["pa"] == "0.01"
+
+
+def test_binance_exec_client_uses_emulator_base(emu, monkeypatch):
+    pytest.importorskip("binance")
+    from core.execution import binance_exec as bex
+
+    monkeypatch.setenv("BINANCE_API_KEY", "k")
+    monkeypatch.setenv("BINANCE_API_SECRET", "s")
+    monkeypatch.setenv("BINANCE_FAPI_BASE", emu.base)
+    monkeypatch.setattr(bex, "_CLIENTS", {})
+    monkeypatch.setattr(bex, "log_order", lambda order, tag="orders": None)
+    cli = bex.ensure_client()
+    assert bex.ensure_client() is cli
+    assert bex.fetch_exchange_info_cached(cli, "BTCUSDT")["qty_step"] > 0
+    res = bex.place_entry(cli, "BTCUSDT", "BUY", 0.01, None, client_order_id="bx1")
+    assert res["status"] == "FILLED" and res["clientOrderId"] == "bx1"
+    prot = bex.place_protective(cli, "BTCUSDT", "BUY", 57_000.0, 66_000.0, 0.01, base_client_id="bx1")
+    assert prot["sl"]["status"] == "NEW" and prot["tp"]["status"] == "NEW"
+    assert sorted(float(o["stopPrice"]) for o in net.get_open_orders("BTCUSDT")) == [57_000.0, 66_000.0]
@@ -0,0 +1,50 @@
+import zipfile
+from pathlib import Path
+
+from app.services.kline_store import KlineStore
+from tools.klines.import_archive import import_archives, parse_archive_name
+
+_STEP = 60_000
+_T0 = 1_704_067_200_000  # 2024-01-01
+
+
+def _csv(start: int, n: int, *, header: bool, skip=(), micro=False) -> str:
+    lines = ["open_time,open,high,low,close,volume,close_time,quote_volume,count,"
+             "taker_buy_volume,taker_buy_quote_volume,ignore"] if header else []
+    k = 1000 if micro else 1
+    for i in range(n):
+        if i in skip:
+            continue
+        ot = start + i * _STEP
+        lines.append(f"{ot * k},1,2,0.5,{1 + i},3,{(ot + _STEP - 1) * k},4,5,1,1,0")
+    return "\n".join(lines) + "\n"
+
+
+def test_import_zip_and_csv_idempotent(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    with zipfile.ZipFile(src / "BTCUSDT-1m-2024-01-01.zip", "w") as zf:
+        zf.writestr("BTCUSDT-1m-2024-01-01.csv", _csv(_T0, 1440, header=True, skip={100, 101}))
+    day2 = _T0 + 1440 * _STEP
+    (src / "BTCUSDT-1m-2024-01-02.csv").write_text(_csv(day2, 10, header=False, micro=True) + "bad,row\n")
+    (src / "README.txt").write_text("ignored")
+
+    store = KlineStore(tmp_path / "store")
+    rep = import_archives(src, store, chunk_rows=500)["BTCUSDT 1m"]
+    assert rep.files == 2 and rep.rows == 1438 + 10
+    assert rep.gaps == 1 and rep.missing_bars == 2
+    assert rep.gap_ranges == [(_T0 + 100 * _STEP, _T0 + 101 * _STEP)]
+    assert rep.invalid_rows == 1 and rep.duplicates == 0 and rep.bad_close_time == 0
+    assert store.days("BTCUSDT", "1m") == ["2024-01-01", "2024-01-02"]
+    assert KlineStore(tmp_path / "store").last_open_time("BTCUSDT", "1m") == day2 + 9 * _STEP
+
+    again = import_archives(src, KlineStore(tmp_path / "store"))["BTCUSDT 1m"]
+    assert again.skipped_files == 2 and again.rows == 0
+    forced = import_archives(src, KlineStore(tmp_path / "store"), force=True)["BTCUSDT 1m"]
+    assert forced.rows == rep.rows
+    assert len(KlineStore(tmp_path / "store").read("BTCUSDT", "1m")) == 1448
+
+
+def test_parse_archive_name():
+    assert parse_archive_name(Path("ETHUSDT-15m-2023-07.zip")) == ("ETHUSDT", "15m", "2023-07")
+    assert parse_archive_name(Path("notes.csv")) is None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: path-dependent indicator kernels.
+
+Compares the previous implementations (wma via rolling().apply with a Python callback,
+supertrend as a per-bar .iat loop) with the current array kernels in
+core.indicators.ta (np.convolve WMA, prefix-scan supertrend) on random-walk series.
+
+Usage:
+  python -m tools.bench.indicator_kernels [--bars 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import ta
+
+
+def legacy_wma(s: pd.Series, period: int) -> pd.Series:
+    """wma as it was before the convolution kernel."""
+    s = ta.normalize_numeric(s)
+    p = max(1, int(period))
+    weights = np.arange(1, p + 1, dtype=np.float64)
+
+    def _calc(x: np.ndarray) -> float:
+        w = weights[-len(x):]
+        return (x * w).sum() / w.sum()
+
+    return s.rolling(window=p, min_periods=1).apply(_calc, raw=True)
+
+
+def legacy_supertrend(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 10,
+                      multiplier: float = 3.0) -> ta.SupertrendResult:
+    """supertrend as it was before the prefix-scan kernel (bar-by-bar .iat loop)."""
+    h, l, c = ta.normalize_numeric(high), ta.normalize_numeric(low), ta.normalize_numeric(close)
+    atr_val = ta.atr(h, l, c, period)
+    hl2 = (h + l) / 2.0
+    upperband = hl2 + multiplier * atr_val
+    lowerband = hl2 - multiplier * atr_val
+    st = pd.Series(index=c.index, dtype=np.float64)
+    dirn = pd.Series(index=c.index, dtype=np.float64)
+    prev_st, prev_dir = np.nan, 1.0
+    for i in range(len(c)):
+        ub, lb, price = upperband.iat[i], lowerband.iat[i], c.iat[i]
+        if i > 0:
+            ub = min(ub, upperband.iat[i - 1]) if prev_dir > 0 else ub
+            lb = max(lb, lowerband.iat[i - 1]) if prev_dir < 0 else lb
+        curr_dir = prev_dir
+        if np.isnan(prev_st):
+            curr_dir = 1.0
+        elif price > prev_st:
+            curr_dir = 1.0
+        elif price < prev_st:
+            curr_dir = -1.0
+        curr_st = lb if curr_dir > 0 else ub
+        st.iat[i] = curr_st
+        dirn.iat[i] = curr_dir
+        prev_st, prev_dir = curr_st, curr_dir
+    return ta.SupertrendResult(supertrend=st, direction=dirn.ffill().fillna(1.0))
+
+
+def random_ohlc(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    c = pd.Series(100.0 + rng.standard_normal(n).cumsum())
+    spread = rng.random(n) * 2.0
+    return c + spread, c - spread, c
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'kernel':<11} {'bars':>7} {'legacy ms':>11} {'array ms':>9} {'speedup':>8}")
+    for n in args.bars:
+        h, l, c = random_ohlc(n)
+        cases = [
+            ("wma(20)", lambda: legacy_wma(c, 20), lambda: ta.wma(c, 20)),
+            ("supertrend", lambda: legacy_supertrend(h, l, c), lambda: ta.supertrend(h, l, c)),
+        ]
+        for name, old, new in cases:
+            t_old = min(timeit.repeat(old, number=1, repeat=args.repeat)) * 1000
+            t_new = min(timeit.repeat(new, number=1, repeat=max(args.repeat, 5))) * 1000
+            print(f"{name:<11} {n:>7} {t_old:>11.2f} {t_new:>9.3f} {t_old / t_new:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
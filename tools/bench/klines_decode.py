@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: kline payload decoding.
+
+Compares the previous decoder (DataFrame of strings + per-column pd.to_numeric,
+datetime conversion, df.insert) with the current NumPy single-pass decoder
+(app.services.market_data._as_dataframe_klines) on synthetic Binance payloads.
+
+Usage:
+  python -m tools.bench.klines_decode [--bars 1000 1500 5000] [--repeat 200]
+"""
+import argparse
+import random
+import timeit
+from typing import Any, List
+
+import pandas as pd
+
+from app.services import market_data as md
+
+
+def _payload(n: int) -> List[List[Any]]:
+    t0 = 1_727_740_800_000
+    rows, p = [], 60_000.0
+    for i in range(n):
+        o = p
+        p = max(1.0, p + random.uniform(-50, 50))
+        ot = t0 + i * 60_000
+        rows.append([ot, f"{o:.2f}", f"{max(o, p) + 5:.2f}", f"{min(o, p) - 5:.2f}", f"{p:.2f}",
+                     f"{random.uniform(1, 100):.3f}", ot + 59_999, f"{random.uniform(1e4, 1e6):.5f}",
+                     random.randint(1, 5000), f"{random.uniform(0, 50):.3f}", f"{random.uniform(0, 5e5):.5f}", "0"])
+    return rows
+
+
+def legacy_decode(raw: List[List[Any]]) -> pd.DataFrame:
+    """The decoder as it was before the NumPy fast path."""
+    df = pd.DataFrame(raw, columns=md._RAW_COLUMNS)
+    for c in md.STORE_COLUMNS:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = df[md.STORE_COLUMNS].copy()
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms", utc=True)
+    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms", utc=True)
+    df.insert(0, "time", df["open_time"])
+    return df[md._OUT_COLUMNS].reset_index(drop=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bars", type=int, nargs="+", default=[100, 1000, 1500, 5000])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"{'bars':>6} {'legacy ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in args.bars:
+        raw = _payload(n)
+        pd.testing.assert_frame_equal(md._as_dataframe_klines(raw), legacy_decode(raw), check_dtype=False)
+        t_old = min(timeit.repeat(lambda: legacy_decode(raw), number=1, repeat=args.repeat)) * 1000
+        t_new = min(timeit.repeat(lambda: md._as_dataframe_klines(raw), number=1, repeat=args.repeat)) * 1000
+        print(f"{n:>6} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
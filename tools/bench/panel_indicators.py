@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: per-symbol indicator calls vs one panel pass.
+
+Evaluates ema/rsi/atr/macd/stoch_kd/bbands for a universe of random-walk symbols either
+symbol by symbol with core.indicators.ta or once on the (bars × symbols) matrix with
+core.indicators.panel, and reports how many per-symbol evaluations the panel costs.
+
+Usage:
+  python -m tools.bench.panel_indicators [--symbols 5 50 200] [--bars 1000] [--repeat 3]
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from core.indicators import panel, ta
+
+
+def random_panel(bars: int, symbols: int, seed: int = 7):
+    """(high, low, close) DataFrames; every 7th symbol starts later (shorter history)."""
+    rng = np.random.default_rng(seed)
+    c = pd.DataFrame(100.0 + rng.standard_normal((bars, symbols)).cumsum(axis=0),
+                     columns=[f"S{j:03d}" for j in range(symbols)])
+    spread = rng.random((bars, symbols))
+    h, l = c + spread, c - spread
+    for j in range(0, symbols, 7):
+        start = int(rng.integers(0, bars // 2))
+        for f in (h, l, c):
+            f.iloc[:start, j] = np.nan
+    return h, l, c
+
+
+def per_symbol(h: pd.DataFrame, l: pd.DataFrame, c: pd.DataFrame) -> None:
+    for s in c.columns:
+        hs, ls, cs = h[s], l[s], c[s]
+        ta.ema(cs, 20), ta.rsi(cs, 14), ta.atr(hs, ls, cs, 14)
+        ta.macd(cs), ta.stoch_kd(hs, ls, cs), ta.bbands(cs)
+
+
+def one_panel(h: pd.DataFrame, l: pd.DataFrame, c: pd.DataFrame) -> None:
+    x_h, x_l, x_c = h.to_numpy(), l.to_numpy(), c.to_numpy()
+    panel.ema(x_c, 20), panel.rsi(x_c, 14), panel.atr(x_h, x_l, x_c, 14)
+    panel.macd(x_c), panel.stoch_kd(x_h, x_l, x_c), panel.bbands(x_c)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--symbols", type=int, nargs="+", default=[5, 50, 200])
+    ap.add_argument("--bars", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'symbols':>7} {'bars':>6} {'per-symbol ms':>14} {'panel ms':>9} {'speedup':>8} {'≈ symbols':>10}")
+    for m in args.symbols:
+        h, l, c = random_panel(args.bars, m)
+        t_old = min(timeit.repeat(lambda: per_symbol(h, l, c), number=1, repeat=args.repeat)) * 1000
+        t_new = min(timeit.repeat(lambda: one_panel(h, l, c), number=1, repeat=args.repeat)) * 1000
+        print(f"{m:>7} {args.bars:>6} {t_old:>14.1f} {t_new:>9.1f} {t_old / t_new:>7.1f}x {t_new / (t_old / m):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: indicator cost of an ema_rsi_atr parameter sweep.
+
+A grid over ema_fast × ema_slow × rsi_period × atr_period is evaluated two ways:
+per combination (ema, ema, rsi, atr recomputed for every combination, as a naive
+sweep does) and with the batch APIs of core.indicators.panel (one ema_many over all
+distinct spans, one rsi_sma_many, one atr_sma_many). Both produce the last-bar values
+the strategy decides on; the script checks they agree.
+
+Usage:
+  python -m tools.bench.param_sweep [--bars 1000] [--fast 5 30 10] [--slow 40 100 10] ...
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from core.indicators import panel, ta
+from core.logic import ema_rsi_atr as strat
+from tools.bench.indicator_kernels import random_ohlc
+
+
+def _grid(spec):
+    lo, hi, num = spec
+    return sorted({int(round(x)) for x in np.linspace(lo, hi, int(num))})
+
+
+def per_combo(h, l, c, combos):
+    out = []
+    for f, s, r, a in combos:
+        out.append((ta.ema(c, f).iloc[-1], ta.ema(c, s).iloc[-1],
+                    strat._rsi(c, r).iloc[-1], strat._atr_hlc(h, l, c, a).iloc[-1]))
+    return np.array(out)
+
+
+def batched(h, l, c, combos):
+    spans = sorted({x for f, s, _, _ in combos for x in (f, s)})
+    rsi_ps = sorted({r for _, _, r, _ in combos})
+    atr_ps = sorted({a for _, _, _, a in combos})
+    ema = dict(zip(spans, panel.ema_many(c, spans).to_numpy()[-1]))
+    rsi = dict(zip(rsi_ps, panel.rsi_sma_many(c, rsi_ps).to_numpy()[-1]))
+    atr = dict(zip(atr_ps, panel.atr_sma_many(h, l, c, atr_ps).to_numpy()[-1]))
+    return np.array([(ema[f], ema[s], rsi[r], atr[a]) for f, s, r, a in combos])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bars", type=int, default=1000)
+    ap.add_argument("--fast", type=float, nargs=3, default=[5, 30, 10], metavar=("LO", "HI", "N"))
+    ap.add_argument("--slow", type=float, nargs=3, default=[40, 120, 10], metavar=("LO", "HI", "N"))
+    ap.add_argument("--rsi", type=float, nargs=3, default=[7, 25, 10], metavar=("LO", "HI", "N"))
+    ap.add_argument("--atr", type=float, nargs=3, default=[14, 14, 1], metavar=("LO", "HI", "N"))
+    args = ap.parse_args()
+
+    h, l, c = random_ohlc(args.bars)
+    combos = list(itertools.product(_grid(args.fast), _grid(args.slow), _grid(args.rsi), _grid(args.atr)))
+
+    t0 = time.perf_counter()
+    old = per_combo(h, l, c, combos)
+    t1 = time.perf_counter()
+    new = batched(h, l, c, combos)
+    t2 = time.perf_counter()
+    np.testing.assert_allclose(new, old, rtol=1e-9, atol=1e-9)
+
+    columns = len({x for f, s, _, _ in combos for x in (f, s)}) + len({r for *_, r, _ in combos}) \
+        + len({a for *_, a in combos})
+    print(f"combinations: {len(combos)}  bars: {args.bars}")
+    print(f"per combination: {4 * len(combos):>5} indicator passes  {(t1 - t0) * 1000:>9.1f} ms")
+    print(f"batched:         {columns:>5} param columns     {(t2 - t1) * 1000:>9.1f} ms  ({(t1 - t0) / (t2 - t1):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
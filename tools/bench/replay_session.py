@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Record a live TraderApp session to a cassette, or replay one offline and time run_once().
+
+Record (network; uses the current .env/ENV wiring):
+  python -m tools.bench.replay_session --cassette logs/cassettes/session.jsonl.gz --record --ticks 20 --sleep 5
+
+Replay (no network; every HTTP call is answered from the cassette):
+  python -m tools.bench.replay_session --cassette logs/cassettes/session.jsonl.gz --ticks 200 [--pace fast|real|2] [--profile]
+
+Replay prints per-tick latency (min/median/p95/max) and per-endpoint transport stats.
+MD_CACHE is disabled during replay so every tick runs the full fetch+decode path.
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import statistics
+import time
+from typing import List
+
+from core.exchange.cassette import use_cassette
+from core.exchange.transport import TRANSPORT
+
+
+def _ticks(app, n: int, sleep: float) -> List[float]:
+    out: List[float] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        app.run_once()
+        out.append((time.perf_counter() - t0) * 1000.0)
+        if sleep and i < n - 1:
+            time.sleep(sleep)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cassette", required=True)
+    ap.add_argument("--record", action="store_true", help="record a live session instead of replaying")
+    ap.add_argument("--ticks", type=int, default=50)
+    ap.add_argument("--sleep", type=float, default=0.0, help="seconds between ticks (record mode)")
+    ap.add_argument("--pace", default="fast", help="replay pace: fast | real | speed multiplier")
+    ap.add_argument("--profile", action="store_true", help="cProfile the replayed ticks (top 25 by cumulative time)")
+    args = ap.parse_args(argv)
+
+    if not args.record:
+        os.environ["MD_CACHE"] = "0"
+    from app.bootstrap import compose_trader_app
+
+    mode = "record" if args.record else "replay"
+    with use_cassette(args.cassette, mode, pace=args.pace):
+        app = compose_trader_app()
+        prof = cProfile.Profile() if args.profile and not args.record else None
+        if prof is not None:
+            prof.enable()
+        lat = _ticks(app, max(1, args.ticks), args.sleep if args.record else 0.0)
+        if prof is not None:
+            prof.disable()
+
+    lat_sorted = sorted(lat)
+    p95 = lat_sorted[min(len(lat_sorted) - 1, int(0.95 * len(lat_sorted)))]
+    print(f"{mode}: {len(lat)} ticks  min={lat_sorted[0]:.2f}ms  median={statistics.median(lat):.2f}ms  "
+          f"p95={p95:.2f}ms  max={lat_sorted[-1]:.2f}ms")
+    for key, st in sorted(TRANSPORT.stats().items()):
+        print(f"  {key:<40} count={st['count']:<5} errors={st['errors']:<3} avg={st['avg_ms']:.2f}ms")
+    if prof is not None:
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(25)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
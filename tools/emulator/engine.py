@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory USDT-M futures matching engine for the local exchange emulator.
+
+One account, one-way position mode. Fills are against a mark price that the test driver
+moves (set_price); there is no counterparty book:
+
+- MARKET fills at the mark price.
+- LIMIT fills at the mark price when marketable, otherwise rests and fills at its limit
+  price once the mark crosses it.
+- STOP_MARKET / TAKE_PROFIT_MARKET rest until the mark reaches stopPrice, then fill at the
+  mark. An order that would trigger immediately is rejected (-2021), as on Binance.
+- reduceOnly / closePosition orders only reduce the position; with nothing to reduce they expire.
+
+Resting orders live in four heaps per symbol (buy limits, sell limits, triggers above and
+below the mark), so placing, cancelling and a price move are O(log n) per order touched;
+cancelled orders are dropped lazily when they reach the top of a heap, and a heap is
+compacted once its dead entries outnumber the live ones (place/cancel churn that never
+crosses the mark keeps memory bounded).
+
+Every state change is reported as user-data events (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE)
+to the registered listeners.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+DEFAULT_FILTERS = {"tickSize": "0.10", "stepSize": "0.001", "minQty": "0.001", "notional": "5"}
+
+
+class EmulatorError(Exception):
+    """Binance-style API error: HTTP status + {"code", "msg"}."""
+
+    def __init__(self, code: int, msg: str, status: int = 400) -> None:
+        super().__init__(msg)
+        self.code = int(code)
+        self.msg = msg
+        self.status = int(status)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"code": self.code, "msg": self.msg}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _num(v: float) -> str:
+    return f"{v:.8f}".rstrip("0").rstrip(".") if v else "0"
+
+
+@dataclass
+class Order:
+    orderId: int
+    clientOrderId: str
+    symbol: str
+    side: str
+    type: str
+    origQty: float
+    price: float = 0.0
+    stopPrice: float = 0.0
+    reduceOnly: bool = False
+    closePosition: bool = False
+    timeInForce: str = "GTC"
+    status: str = "NEW"
+    executedQty: float = 0.0
+    avgPrice: float = 0.0
+    time: int = field(default_factory=_now_ms)
+    updateTime: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "orderId": self.orderId, "clientOrderId": self.clientOrderId, "symbol": self.symbol,
+            "side": self.side, "positionSide": "BOTH", "type": self.type, "origType": self.type,
+            "status": self.status, "timeInForce": self.timeInForce,
+            "origQty": _num(self.origQty), "executedQty": _num(self.executedQty),
+            "cumQuote": _num(self.executedQty * self.avgPrice), "avgPrice": _num(self.avgPrice),
+            "price": _num(self.price), "stopPrice": _num(self.stopPrice),
+            "reduceOnly": self.reduceOnly, "closePosition": self.closePosition,
+            "workingType": "CONTRACT_PRICE", "priceProtect": False,
+            "time": self.time, "updateTime": self.updateTime or self.time,
+        }
+
+
+@dataclass
+class Position:
+    amt: float = 0.0          # signed: > 0 long, < 0 short
+    entry: float = 0.0
+    leverage: int = 20
+
+
+class _Book:
+    """Resting orders of one symbol."""
+
+    __slots__ = ("buy_limits", "sell_limits", "up", "down", "open", "heap_of", "dead")
+
+    def __init__(self) -> None:
+        self.buy_limits: List[Tuple[float, int, int]] = []   # (-price, seq, id): fill when mark <= price
+        self.sell_limits: List[Tuple[float, int, int]] = []  # (price, seq, id):  fill when mark >= price
+        self.up: List[Tuple[float, int, int]] = []           # (stop, seq, id):   trigger when mark >= stop
+        self.down: List[Tuple[float, int, int]] = []         # (-stop, seq, id):  trigger when mark <= stop
+        self.open: Dict[int, Order] = {}
+        self.heap_of: Dict[int, str] = {}   # id of a resting order -> name of its heap
+        self.dead: Dict[str, int] = {"buy_limits": 0, "sell_limits": 0, "up": 0, "down": 0}
+
+    def rest(self, name: str, key: float, seq: int, oid: int) -> None:
+        heapq.heappush(getattr(self, name), (key, seq, oid))
+        self.heap_of[oid] = name
+
+    def retire(self, oid: int) -> None:
+        """Order left the book: its heap entry is dead; rebuild the heap when dead entries dominate."""
+        name = self.heap_of.pop(oid, None)
+        if name is None:
+            return
+        heap: List[Tuple[float, int, int]] = getattr(self, name)
+        self.dead[name] += 1
+        if 2 * self.dead[name] > len(heap):
+            heap[:] = [e for e in heap if e[2] in self.heap_of]
+            heapq.heapify(heap)
+            self.dead[name] = 0
+
+
+class MatchingEngine:
+    """
+    Parameters:
+      balance: starting USDT wallet balance.
+      prices: initial mark prices {symbol: price}; unknown symbols are rejected (-1121).
+      fee_bps: taker fee charged on every fill.
+      max_history: closed orders kept for GET /order lookups.
+    """
+
+    def __init__(self, *, balance: float = 10_000.0, prices: Optional[Mapping[str, float]] = None,
+                 fee_bps: float = 4.0, max_history: int = 100_000) -> None:
+        self.wallet = float(balance)
+        self.prices: Dict[str, float] = {s.upper(): float(p) for s, p in (prices or {"BTCUSDT": 60_000.0}).items()}
+        self.fee_bps = float(fee_bps)
+        self.max_history = max(1, int(max_history))
+        self.orders: Dict[int, Order] = {}
+        self.by_client: Dict[Tuple[str, str], int] = {}
+        self.positions: Dict[str, Position] = {s: Position() for s in self.prices}
+        self.books: Dict[str, _Book] = {s: _Book() for s in self.prices}
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.counters = {"orders": 0, "fills": 0, "cancels": 0, "rejects": 0}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._closed: Deque[int] = deque()
+
+    # ---- helpers ----
+
+    def _symbol(self, symbol: Any) -> str:
+        sym = str(symbol or "").upper()
+        if sym not in self.prices:
+            raise EmulatorError(-1121, "Invalid symbol.")
+        return sym
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        for fn in list(self.listeners):
+            fn(event)
+
+    def _order_event(self, o: Order, exec_type: str, last_qty: float = 0.0, last_px: float = 0.0, fee: float = 0.0) -> None:
+        now = _now_ms()
+        self._emit({"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+            "s": o.symbol, "c": o.clientOrderId, "S": o.side, "o": o.type, "f": o.timeInForce,
+            "q": _num(o.origQty), "p": _num(o.price), "ap": _num(o.avgPrice), "sp": _num(o.stopPrice),
+            "x": exec_type, "X": o.status, "i": o.orderId, "l": _num(last_qty), "z": _num(o.executedQty),
+            "L": _num(last_px), "n": _num(fee), "N": "USDT", "T": now, "R": o.reduceOnly,
+            "cp": o.closePosition, "ps": "BOTH", "ot": o.type,
+        }})
+
+    def _account_event(self, sym: str) -> None:
+        p = self.positions[sym]
+        now = _now_ms()
+        self._emit({"e": "ACCOUNT_UPDATE", "E": now, "T": now, "a": {
+            "m": "ORDER",
+            "B": [{"a": "USDT", "wb": _num(self.wallet), "cw": _num(self.wallet)}],
+            "P": [{"s": sym, "pa": _num(p.amt), "ep": _num(p.entry), "up": _num(self._upnl(sym)), "mt": "cross", "ps": "BOTH"}],
+        }})
+
+    def _upnl(self, sym: str) -> float:
+        p = self.positions[sym]
+        return (self.prices[sym] - p.entry) * p.amt if p.amt else 0.0
+
+    def _close_order(self, o: Order) -> None:
+        book = self.books[o.symbol]
+        book.open.pop(o.orderId, None)
+        book.retire(o.orderId)
+        self._closed.append(o.orderId)
+        while len(self._closed) > self.max_history:
+            old = self.orders.pop(self._closed.popleft(), None)
+            if old is not None:
+                self.by_client.pop((old.symbol, old.clientOrderId), None)
+
+    # ---- fills ----
+
+    def _fill(self, o: Order, px: float) -> None:
+        pos = self.positions[o.symbol]
+        sign = 1.0 if o.side == "BUY" else -1.0
+        qty = o.origQty
+        if o.reduceOnly or o.closePosition:
+            if pos.amt * sign >= 0:  # nothing to reduce in this direction
+                o.status = "EXPIRED"
+                o.updateTime = _now_ms()
+                self._close_order(o)
+                self._order_event(o, "EXPIRED")
+                return
+            qty = abs(pos.amt) if o.closePosition else min(qty, abs(pos.amt))
+        delta = sign * qty
+        realized = 0.0
+        if pos.amt == 0 or pos.amt * delta > 0:
+            new_amt = pos.amt + delta
+            pos.entry = (pos.entry * abs(pos.amt) + px * qty) / abs(new_amt)
+            pos.amt = new_amt
+        else:
+            closing = min(abs(delta), abs(pos.amt))
+            realized = (px - pos.entry) * closing * (1.0 if pos.amt > 0 else -1.0)
+            pos.amt += delta
+            if abs(pos.amt) < 1e-12:
+                pos.amt, pos.entry = 0.0, 0.0
+            elif pos.amt * delta > 0:  # flipped through zero
+                pos.entry = px
+        fee = px * qty * self.fee_bps / 10_000.0
+        self.wallet += realized - fee
+        o.executedQty, o.avgPrice, o.status = qty, px, "FILLED"
+        o.updateTime = _now_ms()
+        self.counters["fills"] += 1
+        self._close_order(o)
+        self._order_event(o, "TRADE", qty, px, fee)
+        self._account_event(o.symbol)
+
+    # ---- orders ----
+
+    def new_order(self, params: Mapping[str, Any]) -> Order:
+        sym = self._symbol(params.get("symbol"))
+        side = str(params.get("side", "")).upper()
+        otype = str(params.get("type", "")).upper()
+        if side not in ("BUY", "SELL"):
+            raise EmulatorError(-1117, "Invalid side.")
+        if otype not in ("MARKET", "LIMIT", "STOP_MARKET", "TAKE_PROFIT_MARKET"):
+            raise EmulatorError(-1116, "Invalid orderType.")
+        close_pos = str(params.get("closePosition", "false")).lower() == "true"
+        reduce = str(params.get("reduceOnly", "false")).lower() == "true"
+        try:
+            qty = float(params.get("quantity") or 0.0)
+            price = float(params.get("price") or 0.0)
+            stop = float(params.get("stopPrice") or 0.0)
+        except (TypeError, ValueError):
+            raise EmulatorError(-1102, "A mandatory parameter was not sent, was empty/null, or malformed.")
+        if qty <= 0 and not close_pos:
+            raise EmulatorError(-1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+        if otype == "LIMIT" and price <= 0:
+            raise EmulatorError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        if otype in ("STOP_MARKET", "TAKE_PROFIT_MARKET") and stop <= 0:
+            raise EmulatorError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+        cid = str(params.get("newClientOrderId") or f"emu_{next(self._seq)}")
+        if (sym, cid) in self.by_client and self.orders[self.by_client[(sym, cid)]].status == "NEW":
+            raise EmulatorError(-4015, "Client order id is not valid.")
+
+        mark = self.prices[sym]
+        up = (otype == "STOP_MARKET") == (side == "BUY")   # trigger when mark rises to stop
+        if otype in ("STOP_MARKET", "TAKE_PROFIT_MARKET") and ((up and mark >= stop) or (not up and mark <= stop)):
+            raise EmulatorError(-2021, "Order would immediately trigger.")
+
+        o = Order(next(self._ids), cid, sym, side, otype, qty, price, stop, reduce, close_pos,
+                  str(params.get("timeInForce") or "GTC"))
+        self.orders[o.orderId] = o
+        self.by_client[(sym, cid)] = o.orderId
+        self.counters["orders"] += 1
+        book = self.books[sym]
+        book.open[o.orderId] = o
+        self._order_event(o, "NEW")
+
+        if otype == "MARKET" or (otype == "LIMIT" and ((side == "BUY" and price >= mark) or (side == "SELL" and price <= mark))):
+            self._fill(o, mark)
+        elif otype == "LIMIT":
+            if side == "BUY":
+                book.rest("buy_limits", -price, next(self._seq), o.orderId)
+            else:
+                book.rest("sell_limits", price, next(self._seq), o.orderId)
+        elif up:
+            book.rest("up", stop, next(self._seq), o.orderId)
+        else:
+            book.rest("down", -stop, next(self._seq), o.orderId)
+        return o
+
+    def _find(self, sym: str, order_id: Any = None, client_id: Any = None) -> Order:
+        oid = int(order_id) if order_id not in (None, "") else self.by_client.get((sym, str(client_id or "")))
+        o = self.orders.get(oid) if oid is not None else None
+        if o is None or o.symbol != sym:
+            raise EmulatorError(-2013, "Order does not exist.")
+        return o
+
+    def get_order(self, symbol: Any, order_id: Any = None, client_id: Any = None) -> Order:
+        return self._find(self._symbol(symbol), order_id, client_id)
+
+    def cancel(self, symbol: Any, order_id: Any = None, client_id: Any = None) -> Order:
+        sym = self._symbol(symbol)
+        o = self._find(sym, order_id, client_id)
+        if o.status != "NEW":
+            raise EmulatorError(-2011, "Unknown order sent.")
+        o.status = "CANCELED"
+        o.updateTime = _now_ms()
+        self.counters["cancels"] += 1
+        self._close_order(o)
+        self._order_event(o, "CANCELED")
+        return o
+
+    def cancel_all(self, symbol: Any) -> int:
+        sym = self._symbol(symbol)
+        ids = list(self.books[sym].open)
+        for oid in ids:
+            self.cancel(sym, oid)
+        return len(ids)
+
+    def open_orders(self, symbol: Any = None) -> List[Order]:
+        if symbol:
+            return list(self.books[self._symbol(symbol)].open.values())
+        return [o for b in self.books.values() for o in b.open.values()]
+
+    # ---- market ----
+
+    def set_price(self, symbol: Any, price: float) -> int:
+        """Moves the mark price and fills every resting order it crosses. Returns the number of fills."""
+        sym = self._symbol(symbol)
+        px = float(price)
+        self.prices[sym] = px
+        book = self.books[sym]
+        before = self.counters["fills"]
+
+        def drain(name: str, crossed: Callable[[float], bool], fill_px: Callable[[float], float]) -> None:
+            heap: List[Tuple[float, int, int]] = getattr(book, name)
+            while heap and crossed(heap[0][0]):
+                key, _, oid = heapq.heappop(heap)
+                if book.heap_of.pop(oid, None) is None:
+                    book.dead[name] -= 1  # entry of an already closed order
+                    continue
+                o = book.open.get(oid)
+                if o is not None and o.status == "NEW":
+                    self._fill(o, fill_px(key))
+
+        drain("buy_limits", lambda k: px <= -k, lambda k: -k)
+        drain("sell_limits", lambda k: px >= k, lambda k: k)
+        drain("up", lambda k: px >= k, lambda k: px)
+        drain("down", lambda k: px <= -k, lambda k: px)
+        return self.counters["fills"] - before
+
+    # ---- account ----
+
+    def set_leverage(self, symbol: Any, leverage: Any) -> Dict[str, Any]:
+        sym = self._symbol(symbol)
+        lev = int(leverage)
+        if not 1 <= lev <= 125:
+            raise EmulatorError(-4028, "Leverage is not valid.")
+        self.positions[sym].leverage = lev
+        return {"symbol": sym, "leverage": lev, "maxNotionalValue": "1000000"}
+
+    def position_risk(self, symbol: Any = None) -> List[Dict[str, Any]]:
+        syms = [self._symbol(symbol)] if symbol else list(self.positions)
+        out = []
+        for s in syms:
+            p = self.positions[s]
+            out.append({
+                "symbol": s, "positionAmt": _num(p.amt), "entryPrice": _num(p.entry), "markPrice": _num(self.prices[s]),
+                "unRealizedProfit": _num(self._upnl(s)), "leverage": str(p.leverage), "marginType": "cross",
+                "positionSide": "BOTH", "notional": _num(p.amt * self.prices[s]), "updateTime": _now_ms(),
+            })
+        return out
+
+    def balance(self) -> List[Dict[str, Any]]:
+        upnl = sum(self._upnl(s) for s in self.positions)
+        return [{"accountAlias": "emu", "asset": "USDT", "balance": _num(self.wallet),
+                 "crossWalletBalance": _num(self.wallet), "crossUnPnl": _num(upnl),
+                 "availableBalance": _num(self.wallet + min(0.0, upnl)), "maxWithdrawAmount": _num(self.wallet),
+                 "marginAvailable": True, "updateTime": _now_ms()}]
+
+    def account(self) -> Dict[str, Any]:
+        upnl = sum(self._upnl(s) for s in self.positions)
+        return {"totalWalletBalance": _num(self.wallet), "totalUnrealizedProfit": _num(upnl),
+                "totalMarginBalance": _num(self.wallet + upnl), "availableBalance": _num(self.wallet + min(0.0, upnl)),
+                "assets": self.balance(), "positions": self.position_risk()}
+
+    def exchange_info(self) -> Dict[str, Any]:
+        f = DEFAULT_FILTERS
+        return {"timezone": "UTC", "serverTime": _now_ms(), "rateLimits": [], "symbols": [{
+            "symbol": s, "status": "TRADING", "contractType": "PERPETUAL", "baseAsset": s[:-4], "quoteAsset": "USDT",
+            "pricePrecision": 2, "quantityPrecision": 3,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "tickSize": f["tickSize"], "minPrice": "0.10", "maxPrice": "10000000"},
+                {"filterType": "LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["minQty"], "maxQty": "1000"},
+                {"filterType": "MARKET_LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["minQty"], "maxQty": "1000"},
+                {"filterType": "MIN_NOTIONAL", "notional": f["notional"]},
+            ]} for s in self.prices]}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Load test of the live order path (app.services.notifications over the shared transport)
+and ExitManager.reconcile against the local futures emulator.
+
+  python -m tools.emulator.loadtest --orders 5000 --workers 16 --reconcile 500 [--latency-ms 1 3] [--error-rate 0.01]
+  python -m tools.emulator.loadtest --base http://127.0.0.1:8765 --key emu --secret emu ...   # external emulator
+
+Phase 1: every worker places a resting LIMIT order and cancels it (place+cancel = 2 signed calls).
+Phase 2: opens a long and reconciles SL/TP `--reconcile` times with a tightening stop
+(each round = openOrders + cancel + create through ExitManager).
+Prints calls/s and client-side latency percentiles per phase plus the emulator's own stats.
+The transport's request governor is disabled (--keep-governor keeps it) so the client's
+Binance budget does not cap the measured rate.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _summary(name: str, lat_ms: List[float], errors: int, wall: float, calls_per_op: int) -> str:
+    if not lat_ms:
+        return f"{name}: no samples"
+    s = sorted(lat_ms)
+    pct = lambda q: s[min(len(s) - 1, int(q * len(s)))]  # noqa: E731
+    return (f"{name}: {len(s)} ops in {wall:.2f}s  {len(s) * calls_per_op / wall:,.0f} calls/s  errors={errors}  "
+            f"p50={statistics.median(s):.2f}ms  p95={pct(0.95):.2f}ms  p99={pct(0.99):.2f}ms  max={s[-1]:.2f}ms")
+
+
+def _failed(resp: Any) -> bool:
+    return not isinstance(resp, (dict, list)) or (isinstance(resp, dict) and ("error" in resp or "code" in resp))
+
+
+def run_order_path(net: Any, symbol: str, orders: int, workers: int, price: float) -> str:
+    lat: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        t0 = time.perf_counter()
+        placed = net.place_order_via_rest(symbol=symbol, side="BUY", type="LIMIT", timeInForce="GTC",
+                                          quantity="0.001", price=f"{price * 0.5:.1f}", newClientOrderId=f"lt_{i}")
+        bad = _failed(placed)
+        if not bad:
+            bad = _failed(net.cancel_order_via_rest(symbol=symbol, orderId=placed["orderId"]))
+        ms = (time.perf_counter() - t0) * 1000.0
+        with lock:
+            lat.append(ms)
+            errors += int(bad)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        list(ex.map(one, range(orders)))
+    return _summary("place+cancel", lat, errors, time.perf_counter() - t0, 2)
+
+
+def run_reconcile(net: Any, symbol: str, rounds: int, price: float) -> str:
+    from app.services.exit_manager import ExitManager
+
+    net.place_order_via_rest(symbol=symbol, side="BUY", type="MARKET", quantity="0.010")
+    em = ExitManager(cooldown_sec=0.0, delta_pct=0.0)
+    lat: List[float] = []
+    errors = 0
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        sl = price * 0.90 + i * 0.5  # стоп підтягується щокроку → cancel + create
+        t1 = time.perf_counter()
+        out = em.reconcile(symbol=symbol, side_entry="BUY", sl_target=sl, tp_target=price * 1.10)
+        lat.append((time.perf_counter() - t1) * 1000.0)
+        errors += sum(1 for r in out["results"] if "error" in r or _failed(r.get("response")))
+    return _summary("reconcile", lat, errors, time.perf_counter() - t0, 3)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default=None, help="external emulator URL; default: start one in-process")
+    ap.add_argument("--key", default="emu")
+    ap.add_argument("--secret", default="emu")
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--price", type=float, default=60_000.0)
+    ap.add_argument("--orders", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--reconcile", type=int, default=200)
+    ap.add_argument("--latency-ms", type=float, nargs="+", default=[0.0], metavar="MS")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--keep-governor", action="store_true")
+    args = ap.parse_args(argv)
+
+    emu = None
+    base = args.base
+    if base is None:
+        from tools.emulator.engine import MatchingEngine
+        from tools.emulator.server import FuturesEmulator
+        emu = FuturesEmulator(MatchingEngine(prices={args.symbol: args.price}), api_key=args.key, api_secret=args.secret,
+                              latency_ms=args.latency_ms, error_rate=args.error_rate)
+        base = emu.start_in_thread()
+
+    # notifications читає базу/ключі з ENV при імпорті
+    os.environ.update({"BINANCE_FAPI_BASE": base, "API_KEY": args.key, "API_SECRET": args.secret, "DRY_RUN_ONLY": "0"})
+    from app.services import notifications as net
+    from core.exchange.transport import TRANSPORT
+
+    if not args.keep_governor:
+        TRANSPORT.governor = None
+    try:
+        print(f"emulator: {base}")
+        print(run_order_path(net, args.symbol, max(1, args.orders), args.workers, args.price))
+        print(run_reconcile(net, args.symbol, max(1, args.reconcile), args.price))
+        if emu is not None:
+            stats: Dict[str, Any] = emu.stats()
+            for route, st in sorted(stats["routes"].items()):
+                print(f"  {route:<32} count={st['count']:<7} errors={st['errors']:<5} injected={st['injected']:<5} "
+                      f"handler={st['avg_handler_us']:.0f}us")
+            print(f"  engine: {stats['engine']}  open_orders={stats['open_orders']}")
+    finally:
+        if emu is not None:
+            emu.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Local Binance USDT-M futures emulator: REST order/account endpoints + user-data WebSocket
+on top of MatchingEngine, for load and latency tests of the order path without testnet.
+
+Run:
+  python -m tools.emulator.server --port 8765 --key emu --secret emu \
+      [--latency-ms 1 5] [--error-rate 0.01 --error-status 503] [--price BTCUSDT=60000 ...]
+then point the clients at it:
+  BINANCE_FAPI_BASE=http://127.0.0.1:8765 API_KEY=emu API_SECRET=emu DRY_RUN_ONLY=0      (notifications)
+  BINANCE_FAPI_BASE=http://127.0.0.1:8765 BINANCE_FAPI_KEY=emu BINANCE_FAPI_SECRET=emu  (binance_futures)
+
+Endpoints (signed ones check X-MBX-APIKEY, HMAC-SHA256 over query+body and timestamp/recvWindow
+exactly like Binance: -2014/-2015 bad key, -1022 bad signature, -1021 stale timestamp):
+  GET    /fapi/v1/ping, /fapi/v1/time, /fapi/v1/exchangeInfo, /fapi/v1/ticker/price, /fapi/v1/premiumIndex
+  POST   /fapi/v1/order          GET /fapi/v1/order        DELETE /fapi/v1/order
+  GET    /fapi/v1/openOrders     DELETE /fapi/v1/allOpenOrders
+  POST   /fapi/v1/leverage       GET /fapi/v2/positionRisk, /fapi/v2/balance, /fapi/v2/account
+  POST/PUT/DELETE /fapi/v1/listenKey;  WS /ws/<listenKey> (ORDER_TRADE_UPDATE, ACCOUNT_UPDATE)
+Test driver (unsigned):
+  POST /emulator/price {symbol, price}    moves the mark price, fills crossed orders
+  POST /emulator/config {latency_ms, error_rate, error_status}
+  GET  /emulator/stats                    per-route count/errors/injected/avg handler µs, engine counters
+
+Fault injection: every /fapi request waits uniform(latency_ms) first; with probability
+error_rate it is answered with error_status instead (503 → -1001, 429/418 → -1003 + Retry-After).
+
+Public API:
+  class FuturesEmulator:
+      def __init__(self, engine=None, *, api_key="emu", api_secret="emu", latency_ms=(0, 0),
+                   error_rate=0.0, error_status=503, seed=None)
+      app -> aiohttp.web.Application
+      def start_in_thread(self, host="127.0.0.1", port=0) -> str   # base URL
+      def close(self) -> None
+      def call(self, fn, *args)        # runs fn(*args) on the emulator loop (thread-safe)
+      def set_price(self, symbol, price) -> int
+      def stats(self) -> dict
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl
+
+from aiohttp import WSMsgType, web
+
+from tools.emulator.engine import EmulatorError, MatchingEngine
+
+_SIG_RE = re.compile(r"&?signature=[0-9a-fA-F]*")
+
+
+class FuturesEmulator:
+    """
+    Parameters:
+      engine: MatchingEngine to serve; None → fresh engine with BTCUSDT at 60000.
+      api_key / api_secret: the only accepted credentials.
+      latency_ms: (lo, hi) injected delay per /fapi request.
+      error_rate: probability of an injected error response.
+      error_status: HTTP status of injected errors (503, 429, 418, 500...).
+      seed: RNG seed for reproducible injection.
+    """
+
+    def __init__(self, engine: Optional[MatchingEngine] = None, *, api_key: str = "emu", api_secret: str = "emu",
+                 latency_ms: Sequence[float] = (0.0, 0.0), error_rate: float = 0.0, error_status: int = 503,
+                 seed: Optional[int] = None) -> None:
+        self.engine = engine or MatchingEngine()
+        self.api_key = api_key
+        self.api_secret = api_secret.encode("utf-8")
+        self.latency_ms: Tuple[float, float] = (float(latency_ms[0]), float(latency_ms[-1]))
+        self.error_rate = float(error_rate)
+        self.error_status = int(error_status)
+        self._rng = random.Random(seed)
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._listen_keys: Set[str] = set()
+        self._queues: Dict[str, List[asyncio.Queue]] = {}
+        self.engine.listeners.append(self._broadcast)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    # ---- app ----
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        r = app.router
+        r.add_get("/fapi/v1/ping", self._ping)
+        r.add_get("/fapi/v1/time", self._time)
+        r.add_get("/fapi/v1/exchangeInfo", self._exchange_info)
+        r.add_get("/fapi/v1/ticker/price", self._ticker)
+        r.add_get("/fapi/v1/premiumIndex", self._premium)
+        r.add_post("/fapi/v1/order", self._new_order)
+        r.add_get("/fapi/v1/order", self._get_order)
+        r.add_delete("/fapi/v1/order", self._cancel_order)
+        r.add_get("/fapi/v1/openOrders", self._open_orders)
+        r.add_delete("/fapi/v1/allOpenOrders", self._cancel_all)
+        r.add_post("/fapi/v1/leverage", self._leverage)
+        r.add_get("/fapi/v2/positionRisk", self._position_risk)
+        r.add_get("/fapi/v2/balance", self._balance)
+        r.add_get("/fapi/v2/account", self._account)
+        r.add_post("/fapi/v1/listenKey", self._listen_key)
+        r.add_put("/fapi/v1/listenKey", self._listen_key)
+        r.add_delete("/fapi/v1/listenKey", self._listen_key)
+        r.add_get("/ws/{listen_key}", self._user_stream)
+        r.add_post("/emulator/price", self._admin_price)
+        r.add_post("/emulator/config", self._admin_config)
+        r.add_get("/emulator/stats", self._admin_stats)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Callable) -> web.StreamResponse:
+        path = request.path
+        key = f"{request.method} {path}"
+        st = self._routes.setdefault(key, {"count": 0, "errors": 0, "injected": 0, "handler_us": 0.0})
+        st["count"] += 1
+        if path.startswith("/fapi/"):
+            lo, hi = self.latency_ms
+            if hi > 0:
+                await asyncio.sleep(self._rng.uniform(lo, hi) / 1000.0)
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                st["injected"] += 1
+                return self._injected_error()
+        t0 = time.perf_counter()
+        try:
+            resp = await handler(request)
+        except EmulatorError as e:
+            self.engine.counters["rejects"] += 1
+            st["errors"] += 1
+            resp = web.json_response(e.as_dict(), status=e.status)
+        st["handler_us"] += (time.perf_counter() - t0) * 1e6
+        return resp
+
+    def _injected_error(self) -> web.Response:
+        if self.error_status in (429, 418):
+            body = {"code": -1003, "msg": "Too many requests; current limit is exceeded."}
+            return web.json_response(body, status=self.error_status, headers={"Retry-After": "1"})
+        return web.json_response({"code": -1001, "msg": "Internal error; unable to process your request. Please try again."},
+                                 status=self.error_status)
+
+    # ---- auth ----
+
+    async def _params(self, request: web.Request, *, signed: bool) -> Dict[str, str]:
+        query = request.query_string
+        body = await request.text() if request.can_read_body else ""
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        params.update(parse_qsl(body, keep_blank_values=True))
+        if signed:
+            self._check_key(request)
+            sig = params.pop("signature", "")
+            payload = _SIG_RE.sub("", query).lstrip("&") + _SIG_RE.sub("", body).lstrip("&")
+            want = hmac.new(self.api_secret, payload.encode("utf-8"), hashlib.sha256).hexdigest()
+            if not sig or not hmac.compare_digest(sig, want):
+                raise EmulatorError(-1022, "Signature for this request is not valid.")
+            try:
+                ts = int(params["timestamp"])
+                window = min(int(params.get("recvWindow", 5000)), 60_000)
+            except (KeyError, ValueError):
+                raise EmulatorError(-1102, "Mandatory parameter 'timestamp' was not sent, was empty/null, or malformed.")
+            now = int(time.time() * 1000)
+            if ts > now + 1000 or now - ts > window:
+                raise EmulatorError(-1021, "Timestamp for this request is outside of the recvWindow.")
+        return params
+
+    def _check_key(self, request: web.Request) -> None:
+        key = request.headers.get("X-MBX-APIKEY", "")
+        if not key:
+            raise EmulatorError(-2014, "API-key format invalid.")
+        if not hmac.compare_digest(key, self.api_key):
+            raise EmulatorError(-2015, "Invalid API-key, IP, or permissions for action.", status=401)
+
+    # ---- market ----
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    async def _time(self, request: web.Request) -> web.Response:
+        return web.json_response({"serverTime": int(time.time() * 1000)})
+
+    async def _exchange_info(self, request: web.Request) -> web.Response:
+        return web.json_response(self.engine.exchange_info())
+
+    async def _ticker(self, request: web.Request) -> web.Response:
+        now = int(time.time() * 1000)
+        sym = request.query.get("symbol")
+        if sym:
+            s = self.engine._symbol(sym)
+            return web.json_response({"symbol": s, "price": str(self.engine.prices[s]), "time": now})
+        return web.json_response([{"symbol": s, "price": str(p), "time": now} for s, p in self.engine.prices.items()])
+
+    async def _premium(self, request: web.Request) -> web.Response:
+        s = self.engine._symbol(request.query.get("symbol"))
+        px = str(self.engine.prices[s])
+        return web.json_response({"symbol": s, "markPrice": px, "indexPrice": px, "lastFundingRate": "0.0001",
+                                  "nextFundingTime": 0, "time": int(time.time() * 1000)})
+
+    # ---- orders ----
+
+    async def _new_order(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response(self.engine.new_order(p).as_dict())
+
+    async def _get_order(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response(self.engine.get_order(p.get("symbol"), p.get("orderId"), p.get("origClientOrderId")).as_dict())
+
+    async def _cancel_order(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response(self.engine.cancel(p.get("symbol"), p.get("orderId"), p.get("origClientOrderId")).as_dict())
+
+    async def _open_orders(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response([o.as_dict() for o in self.engine.open_orders(p.get("symbol"))])
+
+    async def _cancel_all(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        self.engine.cancel_all(p.get("symbol"))
+        return web.json_response({"code": 200, "msg": "The operation of cancel all open order is done."})
+
+    # ---- account ----
+
+    async def _leverage(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response(self.engine.set_leverage(p.get("symbol"), p.get("leverage", 0)))
+
+    async def _position_risk(self, request: web.Request) -> web.Response:
+        p = await self._params(request, signed=True)
+        return web.json_response(self.engine.position_risk(p.get("symbol")))
+
+    async def _balance(self, request: web.Request) -> web.Response:
+        await self._params(request, signed=True)
+        return web.json_response(self.engine.balance())
+
+    async def _account(self, request: web.Request) -> web.Response:
+        await self._params(request, signed=True)
+        return web.json_response(self.engine.account())
+
+    # ---- user-data stream ----
+
+    async def _listen_key(self, request: web.Request) -> web.Response:
+        self._check_key(request)
+        if request.method == "POST":
+            key = secrets.token_hex(32)
+            self._listen_keys.add(key)
+            return web.json_response({"listenKey": key})
+        if request.method == "DELETE":
+            p = await self._params(request, signed=False)
+            self._listen_keys.discard(p.get("listenKey", ""))
+        return web.json_response({})
+
+    def _broadcast(self, event: Dict[str, Any]) -> None:
+        if not self._queues:
+            return
+        raw = json.dumps(event, separators=(",", ":"))
+        for queues in self._queues.values():
+            for q in queues:
+                q.put_nowait(raw)
+
+    async def _user_stream(self, request: web.Request) -> web.StreamResponse:
+        key = request.match_info["listen_key"]
+        if key not in self._listen_keys:
+            raise web.HTTPNotFound(text="unknown listenKey")
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        q: asyncio.Queue = asyncio.Queue()
+        self._queues.setdefault(key, []).append(q)
+        reader = asyncio.ensure_future(self._drain_client(ws))
+        try:
+            while not ws.closed and key in self._listen_keys:
+                getter = asyncio.ensure_future(q.get())
+                done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                await ws.send_str(getter.result())
+        finally:
+            reader.cancel()
+            self._queues[key].remove(q)
+            if not self._queues[key]:
+                del self._queues[key]
+            await ws.close()
+        return ws
+
+    @staticmethod
+    async def _drain_client(ws: web.WebSocketResponse) -> None:
+        async for msg in ws:
+            if msg.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                break
+
+    # ---- test driver ----
+
+    async def _admin_price(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.content_type == "application/json" else await self._params(request, signed=False)
+        fills = self.engine.set_price(body.get("symbol"), float(body.get("price")))
+        return web.json_response({"fills": fills})
+
+    async def _admin_config(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if "latency_ms" in body:
+            lat = body["latency_ms"]
+            self.latency_ms = (float(lat[0]), float(lat[-1])) if isinstance(lat, (list, tuple)) else (float(lat), float(lat))
+        if "error_rate" in body:
+            self.error_rate = float(body["error_rate"])
+        if "error_status" in body:
+            self.error_status = int(body["error_status"])
+        return web.json_response({"latency_ms": list(self.latency_ms), "error_rate": self.error_rate,
+                                  "error_status": self.error_status})
+
+    async def _admin_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        routes = {k: {"count": int(v["count"]), "errors": int(v["errors"]), "injected": int(v["injected"]),
+                      "avg_handler_us": round(v["handler_us"] / max(1, v["count"] - v["injected"]), 1)}
+                  for k, v in self._routes.items()}
+        return {"routes": routes, "engine": dict(self.engine.counters),
+                "open_orders": len(self.engine.open_orders()), "ws_clients": sum(len(q) for q in self._queues.values())}
+
+    # ---- lifecycle ----
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._loop = asyncio.get_running_loop()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return f"http://{host}:{bound}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serves from a daemon thread with its own event loop; returns the base URL."""
+        ready = threading.Event()
+        out: Dict[str, Any] = {}
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                out["url"] = loop.run_until_complete(self.start(host, port))
+            except Exception as e:  # pragma: no cover - bind errors
+                out["error"] = e
+                ready.set()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="FuturesEmulator", daemon=True)
+        self._thread.start()
+        ready.wait(10.0)
+        if "error" in out:
+            raise out["error"]
+        return out["url"]
+
+    def close(self) -> None:
+        if self._thread is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(10.0)
+            self._thread = None
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs fn(*args) on the emulator loop (engine state is owned by that thread) and returns its result."""
+        if self._loop is None or not self._loop.is_running() or self._thread is threading.current_thread():
+            return fn(*args)
+
+        async def run() -> Any:
+            return fn(*args)
+
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result(10.0)
+
+    def set_price(self, symbol: str, price: float) -> int:
+        return self.call(self.engine.set_price, symbol, price)
+
+
+def _price_arg(s: str) -> Tuple[str, float]:
+    sym, _, px = s.partition("=")
+    return sym.upper(), float(px)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--key", default="emu")
+    ap.add_argument("--secret", default="emu")
+    ap.add_argument("--balance", type=float, default=10_000.0)
+    ap.add_argument("--fee-bps", type=float, default=4.0)
+    ap.add_argument("--price", action="append", type=_price_arg, default=[], metavar="SYMBOL=PRICE")
+    ap.add_argument("--latency-ms", type=float, nargs="+", default=[0.0], metavar="MS", help="fixed or lo hi")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    engine = MatchingEngine(balance=args.balance, prices=dict(args.price) or None, fee_bps=args.fee_bps)
+    emu = FuturesEmulator(engine, api_key=args.key, api_secret=args.secret, latency_ms=args.latency_ms,
+                          error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    print(f"futures emulator on http://{args.host}:{args.port}  symbols={','.join(engine.prices)}")
+    web.run_app(emu.app, host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Import Binance public-data kline archives (data.binance.vision) into the local KlineStore.
+
+Streams already-downloaded monthly/daily dumps from a directory, chunk by chunk, so memory
+stays bounded regardless of history length:
+
+  <src>/**/BTCUSDT-1m-2024-01.zip        (monthly)
+  <src>/**/BTCUSDT-1m-2024-02-03.zip     (daily)
+  <src>/**/BTCUSDT-1m-2024-02-03.csv     (already unzipped)
+
+- Schema: >= 11 numeric columns per row (header row optional, as in newer futures dumps);
+  microsecond timestamps (spot dumps since 2025) are converted to ms.
+- Continuity: per symbol/interval the open_time sequence is checked across chunks and files
+  (gaps, duplicates, close_time != open_time + interval - 1) and reported.
+- Idempotent: rows are upserted by open_time, and files already imported with the same
+  size/mtime are skipped (manifest <store>/_imports.json; --force re-imports).
+
+The result is the same Parquet layout HttpMarketData(store=KlineStore(...)) reads, so
+backtests and tuning over full history need no network.
+
+Usage:
+  python -m tools.klines.import_archive --src data/binance [--root logs/cache/klines]
+                                        [--symbol BTCUSDT] [--interval 1m] [--chunk-rows 100000] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import zipfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.kline_store import KlineStore, STORE_COLUMNS, STORE_DTYPES
+from app.services.market_data import interval_to_ms
+
+_NAME_RE = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[smhdwM])-(?P<date>\d{4}-\d{2}(?:-\d{2})?)\.(?:zip|csv)$")
+MANIFEST = "_imports.json"
+
+
+@dataclass
+class SeriesReport:
+    files: int = 0
+    skipped_files: int = 0
+    rows: int = 0
+    invalid_rows: int = 0
+    gaps: int = 0
+    missing_bars: int = 0
+    duplicates: int = 0
+    bad_close_time: int = 0
+    first_open_time: Optional[int] = None
+    last_open_time: Optional[int] = None
+    gap_ranges: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def parse_archive_name(path: Path) -> Optional[Tuple[str, str, str]]:
+    """'BTCUSDT-1m-2024-01.zip' -> ('BTCUSDT', '1m', '2024-01'); None for other files."""
+    m = _NAME_RE.match(path.name)
+    if not m:
+        return None
+    return m.group("symbol"), m.group("interval"), m.group("date")
+
+
+@contextmanager
+def _open_csv(path: Path) -> Iterator[IO[bytes]]:
+    if path.suffix != ".zip":
+        with open(path, "rb") as fh:
+            yield fh
+        return
+    with zipfile.ZipFile(path) as zf:
+        members = [n for n in zf.namelist() if n.endswith(".csv")]
+        if len(members) != 1:
+            raise ValueError(f"{path.name}: expected exactly one CSV inside, got {members}")
+        with zf.open(members[0]) as fh:
+            yield fh
+
+
+def _has_header(path: Path) -> bool:
+    with _open_csv(path) as fh:
+        first = fh.readline().decode("utf-8", errors="replace").strip()
+    return bool(first) and not first.split(",", 1)[0].strip().lstrip("-").isdigit()
+
+
+def iter_archive_chunks(path: Path, chunk_rows: int = 100_000) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """
+    Yields (frame in STORE_COLUMNS/STORE_DTYPES, invalid_row_count) per chunk.
+    Rows with non-numeric or missing fields are dropped and counted.
+    """
+    header = 0 if _has_header(path) else None
+    with _open_csv(path) as fh:
+        reader = pd.read_csv(fh, header=header, usecols=range(len(STORE_COLUMNS)), names=STORE_COLUMNS,
+                             dtype=str, chunksize=max(1, int(chunk_rows)))
+        for raw in reader:
+            num = raw.apply(pd.to_numeric, errors="coerce")
+            bad = num.isna().any(axis=1)
+            num = num[~bad]
+            out = pd.DataFrame({c: num[c].to_numpy(dtype=STORE_DTYPES[c]) for c in STORE_COLUMNS})
+            # microsecond timestamps (spot dumps since 2025) -> ms
+            for c in ("open_time", "close_time"):
+                us = out[c].to_numpy() > 10 ** 14
+                if us.any():
+                    out.loc[us, c] = out.loc[us, c] // 1000
+            yield out, int(bad.sum())
+
+
+def _check_continuity(rep: SeriesReport, open_time: np.ndarray, close_time: np.ndarray, step: int) -> None:
+    if open_time.size == 0:
+        return
+    seq = open_time if rep.last_open_time is None else np.concatenate(([rep.last_open_time], open_time))
+    d = np.diff(seq)
+    rep.duplicates += int((d <= 0).sum())
+    gap_idx = np.flatnonzero(d > step)
+    rep.gaps += int(gap_idx.size)
+    rep.missing_bars += int(((d[gap_idx] // step) - 1).sum()) if gap_idx.size else 0
+    for i in gap_idx[:max(0, 50 - len(rep.gap_ranges))]:  # keep the report short
+        rep.gap_ranges.append((int(seq[i] + step), int(seq[i + 1] - step)))
+    rep.bad_close_time += int((close_time != open_time + step - 1).sum())
+    if rep.first_open_time is None:
+        rep.first_open_time = int(open_time[0])
+    last = int(open_time.max())
+    rep.last_open_time = last if rep.last_open_time is None else max(rep.last_open_time, last)
+
+
+def _load_manifest(root: Path) -> Dict[str, Dict[str, int]]:
+    p = root / MANIFEST
+    if not p.exists():
+        return {}
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _save_manifest(root: Path, manifest: Dict[str, Dict[str, int]]) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST)
+
+
+def import_archives(src: Path, store: KlineStore, *, symbol: Optional[str] = None, interval: Optional[str] = None,
+                    chunk_rows: int = 100_000, force: bool = False) -> Dict[str, SeriesReport]:
+    """Imports every matching archive under `src`; returns {'SYMBOL interval': SeriesReport}."""
+    files = []
+    for p in sorted(Path(src).rglob("*")):
+        meta = parse_archive_name(p)
+        if meta is None or not p.is_file():
+            continue
+        if symbol and meta[0] != symbol.upper():
+            continue
+        if interval and meta[1] != interval:
+            continue
+        files.append((meta, p))
+    # chronological per series, so continuity is checked in order
+    files.sort(key=lambda x: (x[0][0], x[0][1], x[0][2]))
+
+    manifest = _load_manifest(store.root)
+    reports: Dict[str, SeriesReport] = {}
+    for (sym, itv, _date), path in files:
+        rep = reports.setdefault(f"{sym} {itv}", SeriesReport())
+        stat = path.stat()
+        sig = {"size": int(stat.st_size), "mtime": int(stat.st_mtime)}
+        key = str(path.resolve())
+        if not force and manifest.get(key, {}).get("size") == sig["size"] and manifest.get(key, {}).get("mtime") == sig["mtime"]:
+            rep.skipped_files += 1
+            continue
+        step = interval_to_ms(itv)
+        rows = 0
+        for chunk, invalid in iter_archive_chunks(path, chunk_rows):
+            rep.invalid_rows += invalid
+            chunk = chunk.sort_values("open_time", kind="stable")
+            _check_continuity(rep, chunk["open_time"].to_numpy(), chunk["close_time"].to_numpy(), step)
+            rows += store.write(sym, itv, chunk)
+        rep.files += 1
+        rep.rows += rows
+        manifest[key] = {**sig, "rows": rows}
+        _save_manifest(store.root, manifest)
+    return reports
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Import Binance kline archives into the local KlineStore")
+    ap.add_argument("--src", required=True, help="directory with downloaded *.zip / *.csv dumps")
+    ap.add_argument("--root", default=None, help="store root (default: KLINE_STORE_DIR or logs/cache/klines)")
+    ap.add_argument("--symbol", default=None)
+    ap.add_argument("--interval", default=None)
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    ap.add_argument("--force", action="store_true", help="re-import files already in the manifest")
+    args = ap.parse_args(argv)
+
+    store = KlineStore(args.root, memory_bars=1)
+    reports = import_archives(Path(args.src), store, symbol=args.symbol, interval=args.interval,
+                              chunk_rows=args.chunk_rows, force=args.force)
+    if not reports:
+        print(f"No archives matching SYMBOL-interval-date.(zip|csv) under {args.src}", file=sys.stderr)
+        return 1
+    print(json.dumps({k: asdict(v) for k, v in reports.items()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())